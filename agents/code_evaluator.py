@@ -1,7 +1,8 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterator, Mapping, Tuple
 import sys
 import os
 import json
+import time
 
 # Add project root to sys.path to allow absolute import of 'utils'
 current_file_path = os.path.abspath(__file__)
@@ -12,13 +13,66 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 import utils
+from llm_resilience import Deadline
+from llm_json import PartialJSONParser
+from agents.code_sandbox import summarize_execution
+from agents.static_analysis import analyze_code, summarize_analysis
+from agents.code_fingerprint import CodeSubmission, fingerprint_submission, get_evaluation_cache
+from agents.interview_store import get_interview_store
+from agents.results import SCORE_KEYS, CodeEvaluation
+from agents.submission_history import (INCREMENTAL_MAX_CHANGE_RATIO, CodeDiff, PreviousSubmission,
+                                       diff_submissions, get_submission_history)
+from metrics import increment, log_event, record_cache_lookup, span
+
+# Called with each structured evaluation and its source ("llm", "incremental", "cached" or "static").
+RecordFn = Callable[[CodeEvaluation, str], None]
+CATEGORY_LABELS = {
+    "problem_understanding": "Problem Understanding",
+    "problem_solving_approach": "Problem Solving Approach",
+    "code_structure_readability": "Code Structure & Readability",
+    "syntax_language_usage": "Syntax & Language Usage",
+    "test_coverage_edge_cases": "Test Coverage & Edge Cases",
+}
+
+class _PreparedEvaluation:
+    """A submission after the local checks: either its feedback, or the prompt and context for the LLM call."""
+
+    __slots__ = ("execution", "record", "feedback", "submission", "similar", "previous", "diff", "prompt", "schema")
+
+    def __init__(self, execution: Optional[Dict[str, Any]], record: Optional[RecordFn]):
+        self.execution = execution
+        self.record = record
+        self.feedback: Optional[str] = None
+        self.submission: Optional[CodeSubmission] = None
+        self.similar: Optional[Dict[str, Any]] = None
+        self.previous: Optional[PreviousSubmission] = None
+        self.diff: Optional[CodeDiff] = None
+        self.prompt = ""
+        self.schema: Dict[str, Any] = {}
+
 
 class CodeEvaluator:
-    def __init__(self):
-        """Initializes the CodeEvaluator agent."""
+    def __init__(self, model_name: Optional[str] = None, use_cache: bool = True):
+        """
+        Initializes the CodeEvaluator agent.
+
+        Args:
+            model_name: LLM model used for evaluation. Defaults to the backend's default model.
+            use_cache: Whether LLM responses may be served from the response cache, and structured
+                evaluations reused for submissions with the same normalized fingerprint.
+        """
+        self.model_name = model_name
+        self.use_cache = use_cache
+        self.evaluation_cache = get_evaluation_cache() if use_cache else None
+        # Every evaluation shown to a candidate is also kept in the interview store.
+        self.interview_store = get_interview_store()
+        # Resubmissions are re-evaluated from their diff against the candidate's previous submission.
+        self.submission_history = get_submission_history()
         print("CodeEvaluator initialized.")
 
-    def evaluate(self, question: str, code_submission: str, language: str) -> Optional[str]:
+    def evaluate(self, question: str, code_submission: str, language: str, deadline: Optional[Deadline] = None,
+                 execution: Optional[Dict[str, Any]] = None, analysis: Optional[Dict[str, Any]] = None,
+                 candidate_id: Optional[str] = None) -> Optional[str]:
         """
         Evaluates the submitted code against the given question using Gemini API,
         expecting a JSON response for structured feedback.
@@ -27,16 +81,162 @@ class CodeEvaluator:
             question: The coding question that was asked.
             code_submission: The candidate's code solution.
             language: The detected programming language of the submission.
+            deadline: Optional llm_resilience.Deadline propagated to the LLM call.
+            execution: Optional CodeSandbox.run_tests result. When present the model is given
+                the measured results (and a shorter prompt), and they are shown in the feedback.
+            analysis: Optional static_analysis.analyze_code result (computed here when omitted).
+                Unparsable, empty or template submissions are answered locally without an LLM call;
+                otherwise the metrics summary is included in the prompt.
+            candidate_id: Resume fingerprint of the candidate, recorded with the evaluation in
+                the interview store. When the candidate already submitted a similar version for
+                the question, only the diff and the previous evaluation are sent to the model,
+                and categories the change does not affect keep their previous feedback.
 
         Returns:
             A Markdown string containing structured feedback (table and text),
             or None if evaluation fails or response is not as expected.
         """
-        print(f"CodeEvaluator: Evaluating {language} code for question: '{question[:70]}...'" )
+        log_event("CodeEvaluator", "Evaluating code.", language=language, code_chars=len(code_submission))
+        prepared = self._prepare(question, code_submission, language, execution, analysis, candidate_id)
+        if prepared.feedback is not None:
+            return prepared.feedback
+        try:
+            eval_data, gemini_response_str = utils.generate_json_from_gemini(prepared.prompt, prepared.schema, model_name=self.model_name, use_cache=self.use_cache, deadline=deadline)
+            return self._finish(prepared, eval_data, gemini_response_str)
+        except ImportError as e:
+            log_event("CodeEvaluator", f"Error importing utils: {e}.", level="error")
+            return "Error: System configuration issue (utils import)."
+        except Exception as e:
+            log_event("CodeEvaluator", f"General error during code evaluation: {e}", level="error")
+            return f"Error: An unexpected error occurred during code evaluation: {str(e)}"
+
+    async def evaluate_async(self, question: str, code_submission: str, language: str, deadline: Optional[Deadline] = None,
+                             execution: Optional[Dict[str, Any]] = None, analysis: Optional[Dict[str, Any]] = None,
+                             candidate_id: Optional[str] = None) -> Optional[str]:
+        """
+        Async variant of evaluate using the backend's async generation call.
+
+        Args:
+            question: The coding question that was asked.
+            code_submission: The candidate's code solution.
+            language: The detected programming language of the submission.
+            deadline: Optional llm_resilience.Deadline propagated to the LLM call.
+            execution: Optional CodeSandbox.run_tests result (see evaluate).
+            analysis: Optional static_analysis.analyze_code result (see evaluate).
+            candidate_id: Resume fingerprint of the candidate (see evaluate).
+
+        Returns:
+            Same as evaluate.
+        """
+        log_event("CodeEvaluator", "Evaluating code.", language=language, code_chars=len(code_submission))
+        prepared = self._prepare(question, code_submission, language, execution, analysis, candidate_id)
+        if prepared.feedback is not None:
+            return prepared.feedback
+        try:
+            eval_data, gemini_response_str = await utils.generate_json_from_gemini_async(prepared.prompt, prepared.schema, model_name=self.model_name, use_cache=self.use_cache, deadline=deadline)
+            return self._finish(prepared, eval_data, gemini_response_str)
+        except Exception as e:
+            log_event("CodeEvaluator", f"General error during code evaluation: {e}", level="error")
+            return f"Error: An unexpected error occurred during code evaluation: {str(e)}"
+
+    def evaluate_stream(self, question: str, code_submission: str, language: str, deadline: Optional[Deadline] = None,
+                        execution: Optional[Dict[str, Any]] = None, analysis: Optional[Dict[str, Any]] = None,
+                        candidate_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Streaming variant of evaluate.
+
+        Consumes the model's streamed chunks, incrementally parses the partial JSON and
+        yields progressively more complete Markdown: the summary first, then the score
+        table, then per-category feedback. Each yielded value replaces the previous one.
+
+        Args:
+            question: The coding question that was asked.
+            code_submission: The candidate's code solution.
+            language: The detected programming language of the submission.
+            deadline: Optional llm_resilience.Deadline propagated to the LLM call.
+            execution: Optional CodeSandbox.run_tests result; its section is yielded before the model answers.
+            analysis: Optional static_analysis.analyze_code result (see evaluate).
+            candidate_id: Resume fingerprint of the candidate (see evaluate).
+
+        Yields:
+            Cumulative Markdown. The last value is the same as evaluate's return value.
+        """
+        log_event("CodeEvaluator", "Streaming evaluation.", language=language, code_chars=len(code_submission))
+        prepared = self._prepare(question, code_submission, language, execution, analysis, candidate_id)
+        if prepared.feedback is not None:
+            yield prepared.feedback
+            return
+
+        previous = prepared.previous
+        execution_md = self._render_execution(execution) + self._render_similarity(prepared.similar)
+        if previous is not None:
+            execution_md += self._render_resubmission(prepared.diff)
+        received = ""
+        parser = PartialJSONParser()
+        last_rendered = None
+        if execution_md:
+            yield execution_md
+        try:
+            for chunk in utils.stream_text_from_gemini(prepared.prompt, model_name=self.model_name, generation_config=utils.json_generation_config(prepared.schema), use_cache=self.use_cache, deadline=deadline):
+                received += chunk
+                if received.startswith("Error:"):
+                    continue
+                # Parse and re-render only once a value has been completed, not on every chunk.
+                if not parser.feed(chunk):
+                    continue
+                partial_data = parser.value()
+                if not partial_data:
+                    continue
+                if previous is not None:
+                    # Categories the model has not (yet) updated show the previous assessment.
+                    partial_data = previous.evaluation.updated_with(partial_data)
+                rendered = execution_md + self._render_markdown(partial_data, partial=True)
+                if rendered != last_rendered:
+                    last_rendered = rendered
+                    yield rendered
+            eval_data = utils.complete_json_response(prepared.prompt, received, prepared.schema, model_name=self.model_name, use_cache=self.use_cache, deadline=deadline)
+            feedback = self._finish(prepared, eval_data, received)
+        except Exception as e:
+            log_event("CodeEvaluator", f"General error during streaming evaluation: {e}", level="error")
+            yield f"Error: An unexpected error occurred during code evaluation: {str(e)}"
+            return
+        yield feedback
+
+    @staticmethod
+    def _build_prompt(question: str, code_submission: str, language: str, execution: Optional[Dict[str, Any]] = None,
+                      analysis: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Builds the structured-evaluation prompt; shorter when measured execution results are available.
+        Static analysis metrics, when given, are stated so the model does not have to derive them.
+        """
+        static_summary = summarize_analysis(analysis)
+        static_section = f"\n{static_summary} Use these measured metrics for structure and complexity instead of recounting them.\n" if static_summary else ""
+        if execution and execution.get("status") != "unsupported":
+            return f"""
+Analyze the following code submission based on the provided coding question. It was already run against {execution['total']} generated test cases; base correctness on these measured results rather than tracing the code by hand.
+
+Execution results:
+{summarize_execution(execution)}
+{static_section}
+
+Respond with a single JSON object with keys "evaluation_summary" (string), "scores" (object with "X / 10" string values for problem_understanding, problem_solving_approach, code_structure_readability, syntax_language_usage, test_coverage_edge_cases) and "category_feedback" (object with the same keys suffixed by "_feedback", string values).
 
-        prompt = f"""
+Coding Question:
+```
+{question}
+```
+
+Candidate's Code Submission:
+```{language}
+{code_submission}
+```
+
+JSON Output:
+"""
+        return f"""
 Analyze the following code submission based on the provided coding question.
 Provide a detailed evaluation as a JSON object.
+{static_section}
 
 The JSON object must have the following top-level keys:
 - "evaluation_summary": A brief overall summary of the code submission (string).
@@ -70,58 +270,315 @@ Candidate's Code Submission:
 Ensure the output is a single, valid JSON object only, enclosed in triple backticks if necessary for clarity in your response, but the core content must be parseable JSON.
 JSON Output:
 """
+
+    def _prepare(self, question: str, code_submission: str, language: str, execution: Optional[Dict[str, Any]],
+                 analysis: Optional[Dict[str, Any]], candidate_id: Optional[str]) -> "_PreparedEvaluation":
+        """
+        The steps shared by evaluate and its variants before the LLM call: static analysis, the
+        evaluation cache, the candidate's previous submission and the prompt.
+
+        Returns:
+            A _PreparedEvaluation whose feedback is set when the submission was answered without
+            the model (static rejection, cached evaluation or unchanged resubmission).
+        """
+        prepared = _PreparedEvaluation(execution, self._recorder(question, code_submission, language, execution, candidate_id))
+        analysis = analysis if analysis is not None else analyze_code(code_submission, language)
+        if analysis["fail_fast"]:
+            prepared.feedback = self._static_feedback(analysis, prepared.record)
+            return prepared
+        prepared.submission, cached, prepared.similar = self._cached_evaluation(question, code_submission, language)
+        if cached is not None:
+            prepared.feedback = self._cached_feedback(cached, execution, prepared.similar, prepared.record)
+            return prepared
+        previous, prepared.diff = self._previous_submission(question, code_submission, language, candidate_id)
+        if previous is not None and prepared.diff.unchanged:
+            prepared.feedback = self._cached_feedback(previous.evaluation.to_dict(), execution, prepared.similar, prepared.record)
+            return prepared
+        with span("CodeEvaluator", "prompt_build"):
+            prepared.prompt, prepared.schema, prepared.previous = self._prompt_and_schema(
+                question, code_submission, language, execution, analysis, previous, prepared.diff)
+        return prepared
+
+    def _finish(self, prepared: "_PreparedEvaluation", eval_data: Optional[Dict[str, Any]], response_text: str) -> str:
+        """Formats the model's answer to a prepared evaluation (see _format_feedback)."""
+        with span("CodeEvaluator", "post_process"):
+            return self._format_feedback(eval_data, response_text, prepared.execution, prepared.submission,
+                                         prepared.similar, prepared.record, prepared.previous, prepared.diff)
+
+    def _prompt_and_schema(self, question: str, code_submission: str, language: str, execution: Optional[Dict[str, Any]],
+                           analysis: Optional[Dict[str, Any]], previous: Optional[PreviousSubmission],
+                           diff: Optional[CodeDiff]) -> Tuple[str, Dict[str, Any], Optional[PreviousSubmission]]:
+        """
+        The full evaluation prompt, or the incremental one when there is a previous submission to build
+        on and the diff plus its evaluation are shorter than the full prompt.
+
+        Returns:
+            (prompt, response schema, previous submission or None when evaluating from scratch).
+        """
+        prompt = self._build_prompt(question, code_submission, language, execution, analysis)
+        if previous is None:
+            return prompt, CodeEvaluation.SCHEMA, None
+        incremental_prompt = self._build_incremental_prompt(question, language, diff, previous, execution, analysis)
+        if len(incremental_prompt) >= len(prompt):
+            increment("code_resubmissions", mode="full")
+            return prompt, CodeEvaluation.SCHEMA, None
+        increment("code_resubmissions", mode="incremental")
+        log_event("CodeEvaluator", "Re-evaluating from the diff against the previous submission.",
+                  prompt_chars=len(incremental_prompt), full_prompt_chars=len(prompt), added=diff.added, removed=diff.removed)
+        return incremental_prompt, CodeEvaluation.INCREMENTAL_SCHEMA, previous
+
+    @staticmethod
+    def _build_incremental_prompt(question: str, language: str, diff: CodeDiff, previous: PreviousSubmission,
+                                  execution: Optional[Dict[str, Any]] = None,
+                                  analysis: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Builds the re-evaluation prompt for a revised submission: the question, the diff against the
+        previous submission and that submission's evaluation, instead of the full code.
+        """
+        static_summary = summarize_analysis(analysis)
+        static_section = f"\n{static_summary} These metrics describe the revised code as a whole.\n" if static_summary else ""
+        execution_section = ""
+        if execution and execution.get("status") != "unsupported":
+            execution_section = f"\nThe revised code was run against {execution['total']} generated test cases"
+            if previous.tests_total:
+                execution_section += f" (the previous version passed {previous.tests_passed} / {previous.tests_total})"
+            execution_section += f"; base correctness on these measured results:\n{summarize_execution(execution)}\n"
+        return f"""
+Re-evaluate the revised code submission below. The candidate changed their previous submission to this coding question; you are given the changes as a unified diff and the evaluation of the previous version.
+{execution_section}{static_section}
+Respond with a single JSON object with key "evaluation_summary" (string, summarizing the revised submission as a whole) and, only for the categories the changes affect, "scores" (object with "X / 10" string values, keys among problem_understanding, problem_solving_approach, code_structure_readability, syntax_language_usage, test_coverage_edge_cases) and "category_feedback" (object with the same keys suffixed by "_feedback", string values). Omit categories the changes do not affect; they keep their previous score and feedback.
+
+Coding Question:
+```
+{question}
+```
+
+Changes to the previous {language} submission (lines starting with "-" were removed, "+" were added):
+```diff
+{diff.text}
+```
+
+Evaluation of the previous submission:
+{json.dumps(previous.evaluation.to_dict())}
+
+JSON Output:
+"""
+
+    def _previous_submission(self, question: str, code_submission: str, language: str, candidate_id: Optional[str]
+                             ) -> Tuple[Optional[PreviousSubmission], Optional[CodeDiff]]:
+        """
+        Looks up the candidate's previous submission to the question and diffs it against this one.
+
+        Returns:
+            (previous submission, diff), or (None, None) when there is none or more than
+            INCREMENTAL_MAX_CHANGE_RATIO of the lines changed.
+        """
+        if self.submission_history is None or not candidate_id:
+            return None, None
+        previous = self.submission_history.previous(candidate_id, question, language, self.model_name)
+        if previous is None:
+            return None, None
+        diff = diff_submissions(previous.code, code_submission)
+        if diff.unchanged:
+            increment("code_resubmissions", mode="unchanged")
+        elif diff.change_ratio > INCREMENTAL_MAX_CHANGE_RATIO:
+            increment("code_resubmissions", mode="full")
+            return None, None
+        return previous, diff
+
+    def _cached_evaluation(self, question: str, code_submission: str, language: str
+                           ) -> Tuple[Optional[CodeSubmission], Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Fingerprints the submission and looks it up in the evaluation cache.
+
+        Returns:
+            (submission, cached evaluation data or None, closest earlier submission or None);
+            all None when the cache is disabled or unavailable.
+        """
+        if self.evaluation_cache is None:
+            return None, None, None
         try:
-            gemini_response_str = utils.generate_text_from_gemini(prompt)
-
-            if not gemini_response_str or gemini_response_str.startswith("Error:"):
-                print(f"CodeEvaluator: Gemini API error or empty response: {gemini_response_str}")
-                return "Error: Could not get evaluation from AI. Please try again."
-
-            # Attempt to parse the JSON response from Gemini
-            # Gemini might return the JSON within backticks or other markdown
-            cleaned_response_str = gemini_response_str.strip()
-            if cleaned_response_str.startswith("```json"):
-                cleaned_response_str = cleaned_response_str[7:] # Remove ```json
-            if cleaned_response_str.endswith("```"):
-                cleaned_response_str = cleaned_response_str[:-3] # Remove ```
-            cleaned_response_str = cleaned_response_str.strip()
-
-            try:
-                eval_data: Dict[str, Any] = json.loads(cleaned_response_str)
-            except json.JSONDecodeError as e:
-                print(f"CodeEvaluator: Failed to parse JSON response from Gemini: {e}")
-                print(f"CodeEvaluator: Raw Gemini response was: {gemini_response_str}")
-                return "Error: AI response was not in the expected format. Could not parse evaluation."
-
-            # Extract data, with defaults for safety
-            summary = eval_data.get("evaluation_summary", "Summary not provided.")
-            scores = eval_data.get("scores", {})
-            cat_feedback = eval_data.get("category_feedback", {})
-
-            # Build Markdown output
-            md_output = f"### Overall Summary:\n{summary}\n\n"
-            md_output += "### Detailed Evaluation Scores:\n"
-            md_output += "| Category                     | Score    |\n"
-            md_output += "| ---------------------------- | -------- |\n"
-            md_output += f"| Problem Understanding        | {scores.get('problem_understanding', 'N/A')}   |\n"
-            md_output += f"| Problem Solving Approach     | {scores.get('problem_solving_approach', 'N/A')} |\n"
-            md_output += f"| Code Structure & Readability | {scores.get('code_structure_readability', 'N/A')} |\n"
-            md_output += f"| Syntax & Language Usage    | {scores.get('syntax_language_usage', 'N/A')}  |\n"
-            md_output += f"| Test Coverage & Edge Cases   | {scores.get('test_coverage_edge_cases', 'N/A')} |\n\n"
-
-            md_output += "### Category Specific Feedback:\n"
-            md_output += f"- **Problem Understanding:** {cat_feedback.get('problem_understanding_feedback', 'N/A')}\n"
-            md_output += f"- **Problem Solving Approach:** {cat_feedback.get('problem_solving_approach_feedback', 'N/A')}\n"
-            md_output += f"- **Code Structure & Readability:** {cat_feedback.get('code_structure_readability_feedback', 'N/A')}\n"
-            md_output += f"- **Syntax & Language Usage:** {cat_feedback.get('syntax_language_usage_feedback', 'N/A')}\n"
-            md_output += f"- **Test Coverage & Edge Cases:** {cat_feedback.get('test_coverage_edge_cases_feedback', 'N/A')}\n"
-            
-            print(f"CodeEvaluator: Successfully processed Gemini evaluation.")
+            with span("CodeEvaluator", "fingerprint_lookup"):
+                submission = fingerprint_submission(question, code_submission, language)
+                cached, similar = self.evaluation_cache.lookup(submission, self.model_name)
+        except Exception as e:
+            log_event("CodeEvaluator", f"Evaluation cache lookup failed: {e}", level="error")
+            return None, None, None
+        record_cache_lookup("code_evaluation", cached is not None)
+        if cached is not None:
+            log_event("CodeEvaluator", "Reusing cached evaluation.", fingerprint=submission.fingerprint[:12])
+        return submission, cached, similar
+
+    def _format_feedback(self, eval_data: Optional[Dict[str, Any]], gemini_response_str: str,
+                         execution: Optional[Dict[str, Any]] = None, submission: Optional[CodeSubmission] = None,
+                         similar: Optional[Dict[str, Any]] = None, record: Optional[RecordFn] = None,
+                         previous: Optional[PreviousSubmission] = None, diff: Optional[CodeDiff] = None) -> str:
+        """
+        Renders the model's evaluation (already extracted by utils.generate_json_from_gemini) as
+        Markdown, preceded by the test execution and similar-submission sections when there is
+        anything to show. A successfully parsed evaluation is stored under the submission's fingerprint
+        and passed to record. For an incremental re-evaluation, the categories the model returned
+        replace those of the previous submission's evaluation.
+
+        Returns:
+            The Markdown feedback, or an "Error: ..." message.
+        """
+        if not gemini_response_str or gemini_response_str.startswith("Error:"):
+            log_event("CodeEvaluator", "Gemini API error or empty response.", level="error", response=gemini_response_str)
+            return "Error: Could not get evaluation from AI. Please try again."
+        if not eval_data:
+            log_event("CodeEvaluator", "No JSON object found in Gemini response.", level="error",
+                      response_chars=len(gemini_response_str), response_head=gemini_response_str[:200])
+            return "Error: AI response was not in the expected format. Could not parse evaluation."
+
+        if previous is None:
+            evaluation, source, resubmission_md = CodeEvaluation.from_dict(eval_data), "llm", ""
+        else:
+            evaluation, source = previous.evaluation.updated_with(eval_data), "incremental"
+            resubmission_md = self._render_resubmission(diff, CodeEvaluation.from_dict(eval_data))
+        if submission is not None and self.evaluation_cache is not None:
+            self.evaluation_cache.store(submission, self.model_name, evaluation.to_dict())
+        if record is not None:
+            record(evaluation, source)
+        md_output = (self._render_execution(execution) + self._render_similarity(similar) + resubmission_md
+                     + self._render_markdown(evaluation))
+        log_event("CodeEvaluator", "Successfully processed Gemini evaluation.", scores=evaluation.scores)
+        return md_output
+
+    def _recorder(self, question: str, code_submission: str, language: str, execution: Optional[Dict[str, Any]],
+                  candidate_id: Optional[str]) -> Optional[RecordFn]:
+        """
+        Returns the callback that saves this submission's evaluation to the interview store and, for a
+        known candidate, as their latest submission to the question (None when neither applies).
+        """
+        history = self.submission_history if candidate_id else None
+        if self.interview_store is None and history is None:
+            return None
+
+        def record(evaluation: CodeEvaluation, source: str) -> None:
+            if self.interview_store is not None:
+                self.interview_store.record_evaluation(question, code_submission, language, evaluation, source,
+                                                       candidate_id=candidate_id, execution=execution)
+            # Static rejections carry no assessment worth building on.
+            if history is not None and source != "static":
+                history.remember(candidate_id, question, language, self.model_name, code_submission, evaluation, execution)
+        return record
+
+    def _cached_feedback(self, cached: Dict[str, Any], execution: Optional[Dict[str, Any]],
+                         similar: Optional[Dict[str, Any]], record: Optional[RecordFn] = None) -> str:
+        """Renders an evaluation reused from the evaluation cache."""
+        evaluation = CodeEvaluation.from_dict(cached)
+        if record is not None:
+            record(evaluation, "cached")
+        return self._render_execution(execution) + self._render_similarity(similar, reused=True) + self._render_markdown(evaluation)
+
+    def _static_feedback(self, analysis: Dict[str, Any], record: Optional[RecordFn] = None) -> str:
+        """Renders feedback for a submission the static pre-pass rejected, without calling the LLM."""
+        if analysis.get("error") and not analysis.get("parsed"):
+            reason = f"The submission does not parse ({analysis['error']}), so it cannot run or be evaluated further."
+            syntax_feedback = f"Fix the syntax error first: {analysis['error']}."
+        else:
+            reason = " ".join(analysis.get("notes") or ["The submission contains no solution logic."])
+            syntax_feedback = "No code to assess."
+        not_assessed = "Not assessed: no working solution was submitted."
+        feedback = {f"{key}_feedback": not_assessed for key in SCORE_KEYS}
+        feedback["syntax_language_usage_feedback"] = syntax_feedback
+        evaluation = CodeEvaluation(reason, {key: "0 / 10" for key in SCORE_KEYS}, feedback)
+        log_event("CodeEvaluator", f"Static pre-pass rejected the submission without an LLM call: {reason}", level="warning")
+        if record is not None:
+            record(evaluation, "static")
+        return self._render_markdown(evaluation)
+
+    @staticmethod
+    def _render_execution(execution: Optional[Dict[str, Any]]) -> str:
+        """Renders measured test results as a Markdown section (empty when there are none)."""
+        if not execution or execution.get("status") == "unsupported":
+            return ""
+        md_output = "### Test Execution:\n"
+        md_output += f"**Passed {execution['passed']} / {execution['total']} tests** ({execution['status']})"
+        if execution.get("runtime_ms") is not None:
+            md_output += f" · {execution['runtime_ms']:.0f} ms"
+        if execution.get("peak_memory_kb"):
+            md_output += f" · peak memory {execution['peak_memory_kb'] / 1024:.1f} MB"
+        md_output += "\n\n"
+        if execution.get("error"):
+            md_output += f"- {execution['error']}\n"
+        for test in execution.get("tests", []):
+            if test.get("passed"):
+                continue
+            if test.get("error"):
+                md_output += f"- Test {test['index'] + 1}: {test['error']}\n"
+            else:
+                md_output += f"- Test {test['index'] + 1}: expected `{test.get('expected')}`, got {test.get('actual')}\n"
+        return md_output + "\n"
+
+    @staticmethod
+    def _render_similarity(similar: Optional[Dict[str, Any]], reused: bool = False) -> str:
+        """Renders the near-duplicate report for the reviewer (empty when no earlier submission is similar)."""
+        if not similar:
+            return ""
+        first_seen = time.strftime("%Y-%m-%d %H:%M", time.localtime(similar["created_at"]))
+        md_output = "### Similar Submissions:\n"
+        if similar["identical"]:
+            md_output += (f"Identical to an earlier submission for this question (first seen {first_seen}) "
+                          "after normalizing formatting, comments and variable names.")
+            if reused:
+                md_output += " Its evaluation was reused."
+        else:
+            md_output += f"About {similar['similarity']:.0%} similar to an earlier submission for this question (first seen {first_seen})."
+        return md_output + "\n\n"
+
+    @staticmethod
+    def _render_resubmission(diff: Optional[CodeDiff], update: Optional[CodeEvaluation] = None) -> str:
+        """
+        Renders the note on an incremental re-evaluation (empty for a full one); with the model's
+        update, also which categories were re-assessed and which kept their previous evaluation.
+        """
+        if diff is None:
+            return ""
+        md_output = (f"### Resubmission:\nRe-evaluated from the changes to the previous submission "
+                     f"(+{diff.added} / -{diff.removed} lines).")
+        if update is not None:
+            updated = [key for key in SCORE_KEYS if key in update.scores or f"{key}_feedback" in update.category_feedback]
+            kept = [CATEGORY_LABELS[key] for key in SCORE_KEYS if key not in updated]
+            md_output += f" Updated: {', '.join(CATEGORY_LABELS[key] for key in updated) or 'none'}."
+            if kept:
+                md_output += f" Unchanged from the previous evaluation: {', '.join(kept)}."
+        return md_output + "\n\n"
+
+    @staticmethod
+    def _render_markdown(eval_data: Mapping[str, Any], partial: bool = False) -> str:
+        """
+        Builds the Markdown summary, score table and per-category feedback from parsed evaluation data.
+
+        With partial=True (streaming), only sections the model has started are rendered
+        and values that have not arrived yet are shown as an ellipsis instead of "N/A".
+        """
+        missing = "…" if partial else "N/A"
+        # Extract data, with defaults for safety
+        summary = eval_data.get("evaluation_summary", missing if partial else "Summary not provided.")
+        scores = eval_data.get("scores", {})
+        cat_feedback = eval_data.get("category_feedback", {})
+
+        # Build Markdown output
+        md_output = f"### Overall Summary:\n{summary}\n\n"
+        if partial and "scores" not in eval_data:
             return md_output.strip()
+        md_output += "### Detailed Evaluation Scores:\n"
+        md_output += "| Category                     | Score    |\n"
+        md_output += "| ---------------------------- | -------- |\n"
+        md_output += f"| Problem Understanding        | {scores.get('problem_understanding', missing)}   |\n"
+        md_output += f"| Problem Solving Approach     | {scores.get('problem_solving_approach', missing)} |\n"
+        md_output += f"| Code Structure & Readability | {scores.get('code_structure_readability', missing)} |\n"
+        md_output += f"| Syntax & Language Usage    | {scores.get('syntax_language_usage', missing)}  |\n"
+        md_output += f"| Test Coverage & Edge Cases   | {scores.get('test_coverage_edge_cases', missing)} |\n\n"
 
-        except ImportError as e:
-            print(f"CodeEvaluator: Error importing utils: {e}.")
-            return "Error: System configuration issue (utils import)."
-        except Exception as e:
-            print(f"CodeEvaluator: General error during code evaluation: {e}")
-            return f"Error: An unexpected error occurred during code evaluation: {str(e)}"
+        if partial and "category_feedback" not in eval_data:
+            return md_output.strip()
+        md_output += "### Category Specific Feedback:\n"
+        md_output += f"- **Problem Understanding:** {cat_feedback.get('problem_understanding_feedback', missing)}\n"
+        md_output += f"- **Problem Solving Approach:** {cat_feedback.get('problem_solving_approach_feedback', missing)}\n"
+        md_output += f"- **Code Structure & Readability:** {cat_feedback.get('code_structure_readability_feedback', missing)}\n"
+        md_output += f"- **Syntax & Language Usage:** {cat_feedback.get('syntax_language_usage_feedback', missing)}\n"
+        md_output += f"- **Test Coverage & Edge Cases:** {cat_feedback.get('test_coverage_edge_cases_feedback', missing)}\n"
+        return md_output.strip()
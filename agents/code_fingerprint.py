@@ -0,0 +1,427 @@
+"""
+Normalized fingerprints of code submissions and a cache of their evaluations.
+
+Submissions that differ only in formatting, comments or identifier names get the same
+fingerprint: Python is parsed and the names it binds itself (variables, parameters,
+functions, classes) renamed to v0, v1, ... in order of first use before being unparsed,
+with docstrings dropped; other languages are tokenized with comments removed and
+declared names canonicalized the same way. Builtins, imported names, names the code
+never assigns and the solve entry point are kept, so submissions that call different
+library functions never share a fingerprint.
+
+The structured evaluation of each (question, fingerprint, model) is stored in SQLite
+and reused for later identical submissions. Every submission also gets a MinHash
+signature over 5-token shingles, so near-duplicates of earlier submissions to the
+same question can be reported to the reviewer even when the evaluation is not reused.
+"""
+import ast
+import builtins
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from llm_cache import CACHE_DIR
+from metrics import log_event
+from agents.static_analysis import HASH_COMMENT_LANGUAGES
+
+CODE_EVAL_CACHE_ENABLED = os.environ.get("CODE_EVAL_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+CODE_EVAL_CACHE_PATH = os.environ.get("CODE_EVAL_CACHE_PATH", os.path.join(CACHE_DIR, "code_evaluations.sqlite3"))
+# Estimated Jaccard similarity at which an earlier submission is reported as a near-duplicate.
+CODE_SIMILARITY_THRESHOLD = float(os.environ.get("CODE_SIMILARITY_THRESHOLD", 0.8))
+MINHASH_PERMUTATIONS = 64
+SHINGLE_SIZE = 5
+# Questions whose signature matrices are kept in memory.
+SIGNATURE_CACHE_QUESTIONS = 256
+
+ENTRY_POINT = "solve"
+_MERSENNE_PRIME = 4294967291  # largest prime below 2**32; keeps a * h + b inside uint64
+_rng = np.random.RandomState(20240611)  # fixed seed: signatures are persisted
+_HASH_A = _rng.randint(1, _MERSENNE_PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_HASH_B = _rng.randint(0, _MERSENNE_PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+_PRESERVED_PYTHON_NAMES = set(dir(builtins)) | {ENTRY_POINT, "self", "cls"}
+_TOKEN = re.compile(
+    r"(?P<comment>//[^\n]*|/\*.*?\*/)"
+    r"|(?P<hash_comment>#[^\n]*)"
+    r"|(?P<string>\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|`(?:\\.|[^`\\])*`)"
+    r"|(?P<name>[A-Za-z_$][\w$]*)"
+    r"|(?P<number>\d[\w.]*)"
+    r"|(?P<op>\S)",
+    re.DOTALL,
+)
+# Keywords and common type names across the editor's languages are never renamed.
+_KEYWORDS = set("""
+abstract and as async await bool boolean break byte case catch char class const continue def default defer
+del delete do double elif else end enum except extends false final finally float fn for foreach from func
+function go goto if impl implements import in instanceof int interface is let long loop map match mod module
+mut namespace new nil not null object of or package pass private protected pub public raise range return
+self short static str string struct super switch template then this throw throws trait true try type typeof
+uint unless until use using val var void when where while with yield i32 i64 u32 u64 usize f32 f64 vec
+list dict set tuple None True False
+""".split())
+# A name right after one of these is being declared (let x, int x, for x in ...).
+_DECLARATION_WORDS = set("""
+let const var val mut auto def fn func function class struct enum interface type for
+int long short byte char bool boolean double float string void unsigned signed
+i8 i16 i32 i64 u8 u16 u32 u64 usize isize f32 f64
+""".split())
+_FUNCTION_WORDS = {"function", "fn", "func", "def"}
+_CONTROL_WORDS = {"if", "while", "for", "switch", "return", "elif", "when", "match", "until", "unless"}
+_IMPORT_WORDS = {"import", "from", "use", "require", "include"}
+
+
+class CodeSubmission:
+    """Fingerprint and MinHash signature of one submission to one question."""
+
+    __slots__ = ("question_hash", "fingerprint", "signature", "language")
+
+    def __init__(self, question_hash: str, fingerprint: str, signature: np.ndarray, language: str):
+        self.question_hash = question_hash
+        self.fingerprint = fingerprint
+        self.signature = signature
+        self.language = language
+
+
+def question_hash(question: str) -> str:
+    """SHA-256 of the question text with surrounding whitespace removed."""
+    return hashlib.sha256(question.strip().encode("utf-8")).hexdigest()
+
+
+def normalized_tokens(code_submission: str, language: str) -> List[str]:
+    """Returns the submission's token stream with comments, formatting and variable names normalized."""
+    language = (language or "text").strip().lower()
+    if language in ("python", "python3", "py"):
+        try:
+            tree = ast.parse(code_submission)
+            tree = _PythonCanonicalizer(_python_bound_names(tree)).visit(tree)
+            return _tokenize(ast.unparse(tree), hash_comments=True, rename=False)
+        except (SyntaxError, ValueError, RecursionError):
+            return _tokenize(code_submission, hash_comments=True, rename=True)
+    return _tokenize(code_submission, hash_comments=language in HASH_COMMENT_LANGUAGES, rename=True)
+
+
+def fingerprint_submission(question: str, code_submission: str, language: str) -> CodeSubmission:
+    """Computes the normalized fingerprint and MinHash signature of a submission."""
+    language = (language or "text").strip().lower()
+    tokens = normalized_tokens(code_submission, language)
+    digest = hashlib.sha256(("\x1f".join([language] + tokens)).encode("utf-8")).hexdigest()
+    return CodeSubmission(question_hash(question), digest, minhash(tokens), language)
+
+
+def minhash(tokens: List[str]) -> np.ndarray:
+    """MINHASH_PERMUTATIONS-long MinHash signature over SHINGLE_SIZE-token shingles."""
+    count = max(1, len(tokens) - SHINGLE_SIZE + 1)
+    shingles = {"\x1f".join(tokens[i:i + SHINGLE_SIZE]) for i in range(count)}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    permuted = (_HASH_A[:, None] * hashes[None, :] + _HASH_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def _tokenize(code: str, hash_comments: bool, rename: bool) -> List[str]:
+    significant: List[Tuple[str, str]] = []
+    for match in _TOKEN.finditer(code):
+        kind, text = match.lastgroup, match.group()
+        if kind == "comment" or (kind == "hash_comment" and hash_comments):
+            continue
+        if text == ";":
+            continue  # optional in JavaScript/Go/Kotlin; elsewhere it never distinguishes valid programs
+        if kind == "hash_comment":
+            text = text.strip()  # preprocessor line (#include ...) in languages without # comments
+        significant.append((kind, text))
+
+    bound = _bound_names(significant) if rename else set()
+    tokens: List[str] = []
+    names: Dict[str, str] = {}
+    for index, (kind, text) in enumerate(significant):
+        # Only names the submission itself binds are renamed: library functions and constants
+        # it merely uses (floor vs ceil, Math.max) are what distinguishes otherwise equal programs.
+        if kind == "name" and text in bound:
+            previous = tokens[-1] if tokens else ""
+            following = significant[index + 1][1] if index + 1 < len(significant) else ""
+            # Attribute and call names carry meaning (xs.push(...), len(...)); plain variables do not.
+            if previous not in (".", "->", "::") and following != "(":
+                text = names.setdefault(text, f"v{len(names)}")
+        tokens.append(text)
+    return tokens
+
+
+def _bound_names(tokens: List[Tuple[str, str]]) -> set:
+    """
+    Names the submission declares or assigns, found from their position in the token stream:
+    after a declaration keyword or type (let x, int x, for x), before a plain assignment (x = ...,
+    x := ..., x => ...), or in a function header's parameter list. Imported names are excluded.
+    """
+    texts = [text for _, text in tokens]
+    bound = set()
+    imported = set()
+    header_depth: List[bool] = []  # one entry per open "(": whether it starts a parameter list
+    for index, (kind, text) in enumerate(tokens):
+        previous = texts[index - 1] if index else ""
+        following = texts[index + 1] if index + 1 < len(texts) else ""
+        if text == "(":
+            header_depth.append(_opens_parameters(texts, index))
+            continue
+        if text == ")":
+            if header_depth:
+                header_depth.pop()
+            continue
+        if kind != "name" or text in _KEYWORDS or text == ENTRY_POINT or previous in (".", "->", "::"):
+            continue
+        if previous in _IMPORT_WORDS or (previous == "," and _in_import(texts, index)):
+            imported.add(text)
+        elif previous in _DECLARATION_WORDS:
+            bound.add(text)
+        elif following == "=" and texts[index + 2:index + 3] != ["="]:
+            bound.add(text)
+        elif following == ":" and texts[index + 2:index + 3] == ["="]:
+            bound.add(text)
+        elif header_depth and header_depth[-1] and following in (",", ")", ":", "="):
+            bound.add(text)
+    return bound - imported
+
+
+def _opens_parameters(texts: List[str], index: int) -> bool:
+    """Whether the "(" at index starts a function's parameter list."""
+    previous = texts[index - 1] if index else ""
+    before_name = texts[index - 2] if index > 1 else ""
+    if previous in _FUNCTION_WORDS or before_name in _FUNCTION_WORDS or previous == "catch":
+        return True
+    if previous in _CONTROL_WORDS:
+        return False
+    depth = 0
+    for position in range(index, len(texts)):
+        if texts[position] == "(":
+            depth += 1
+        elif texts[position] == ")":
+            depth -= 1
+            if depth == 0:
+                after = texts[position + 1:position + 3]
+                # (a, b) => ..., or a typed header such as "int solve(int a) {" / "fn f(x: T) -> U".
+                return after in (["=", ">"], ["-", ">"]) or after[:1] == ["{"]
+    return False
+
+
+def _in_import(texts: List[str], index: int) -> bool:
+    """Whether the name at index is part of an import/use list on the same statement."""
+    for position in range(index - 1, max(-1, index - 64), -1):
+        if texts[position] in _IMPORT_WORDS:
+            return True
+        if texts[position] in ("{", "}", "=", "(", ")"):
+            return texts[position] == "{" and position > 0 and texts[position - 1] in _IMPORT_WORDS
+    return False
+
+
+def _python_bound_names(tree: ast.AST) -> set:
+    """Names the submission assigns, defines or takes as parameters, minus anything it imports."""
+    bound, imported = set(), set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            bound.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            imported.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+    return bound - imported - _PRESERVED_PYTHON_NAMES
+
+
+class _PythonCanonicalizer(ast.NodeTransformer):
+    """
+    Renames the submission's own identifiers in order of first appearance and drops docstrings.
+
+    Imported names and names the submission never binds (math.floor imported as floor, module
+    constants) are kept, since swapping one for another changes what the program does.
+    """
+
+    def __init__(self, bound: set):
+        self.bound = bound
+        self.names: Dict[str, str] = {}
+
+    def _canonical(self, name: str) -> str:
+        if name not in self.bound:
+            return name
+        return self.names.setdefault(name, f"v{len(self.names)}")
+
+    def _strip_docstring(self, node: ast.AST) -> None:
+        body = node.body
+        if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+                and isinstance(body[0].value.value, str):
+            node.body = body[1:] or [ast.Pass()]
+
+    def visit_Module(self, node: ast.Module) -> ast.AST:
+        self._strip_docstring(node)
+        return self.generic_visit(node)
+
+    def visit_FunctionDef(self, node: ast.AST) -> ast.AST:
+        node.name = self._canonical(node.name)
+        self._strip_docstring(node)
+        return self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_ClassDef = visit_FunctionDef
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        node.id = self._canonical(node.id)
+        return node
+
+    def visit_arg(self, node: ast.arg) -> ast.AST:
+        node.arg = self._canonical(node.arg)
+        node.annotation = None
+        return node
+
+    def visit_Global(self, node: ast.AST) -> ast.AST:
+        node.names = [self._canonical(name) for name in node.names]
+        return node
+
+    visit_Nonlocal = visit_Global
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> ast.AST:
+        if node.name:
+            node.name = self._canonical(node.name)
+        return self.generic_visit(node)
+
+
+class EvaluationCache:
+    """SQLite store of structured evaluations plus per-question MinHash signatures for near-duplicate lookup."""
+
+    def __init__(self, path: str = CODE_EVAL_CACHE_PATH, similarity_threshold: float = CODE_SIMILARITY_THRESHOLD):
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.RLock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS code_evaluations ("
+            "question_hash TEXT NOT NULL, fingerprint TEXT NOT NULL, model TEXT NOT NULL, language TEXT NOT NULL, "
+            "signature BLOB NOT NULL, evaluation TEXT NOT NULL, hits INTEGER NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL, PRIMARY KEY (question_hash, fingerprint, model))"
+        )
+        # question_hash -> (fingerprints, created_at, signature matrix)
+        self._signatures: "OrderedDict[str, Tuple[List[str], List[float], np.ndarray]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "near_duplicates": 0}
+
+    def lookup(self, submission: CodeSubmission, model_name: Optional[str]
+               ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Returns (evaluation, similar).
+
+        evaluation is the cached structured evaluation for an identical normalized submission
+        (None on a miss). similar describes the closest earlier submission to the same question,
+        {"similarity", "fingerprint", "created_at", "identical"}, or None when nothing reaches
+        the similarity threshold.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT evaluation FROM code_evaluations WHERE question_hash = ? AND fingerprint = ? AND model = ?",
+                (submission.question_hash, submission.fingerprint, model_name or "default"),
+            ).fetchone()
+            if row is not None:
+                self._stats["hits"] += 1
+                self._conn.execute(
+                    "UPDATE code_evaluations SET hits = hits + 1 WHERE question_hash = ? AND fingerprint = ? AND model = ?",
+                    (submission.question_hash, submission.fingerprint, model_name or "default"),
+                )
+            else:
+                self._stats["misses"] += 1
+            similar = self._most_similar(submission)
+            if similar is not None:
+                self._stats["near_duplicates"] += 1
+        return (json.loads(row[0]) if row is not None else None), similar
+
+    def store(self, submission: CodeSubmission, model_name: Optional[str], evaluation: Dict[str, Any]) -> None:
+        """Saves the structured evaluation of a submission."""
+        now = time.time()
+        with self._lock:
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO code_evaluations "
+                "(question_hash, fingerprint, model, language, signature, evaluation, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (submission.question_hash, submission.fingerprint, model_name or "default", submission.language,
+                 submission.signature.tobytes(), json.dumps(evaluation), now),
+            ).rowcount
+            cached = self._signatures.get(submission.question_hash)
+            if inserted and cached is not None and submission.fingerprint not in cached[0]:
+                fingerprints, created, matrix = cached
+                self._signatures[submission.question_hash] = (
+                    fingerprints + [submission.fingerprint], created + [now],
+                    np.vstack([matrix, submission.signature[None, :]]),
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = self._conn.execute("SELECT COUNT(*) FROM code_evaluations").fetchone()[0]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _most_similar(self, submission: CodeSubmission) -> Optional[Dict[str, Any]]:
+        """Compares the signature against every earlier submission to the question at once. Caller holds the lock."""
+        fingerprints, created, matrix = self._question_signatures(submission.question_hash)
+        if not fingerprints:
+            return None
+        similarities = (matrix == submission.signature[None, :]).mean(axis=1)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+        return {
+            "similarity": float(similarities[best]),
+            "fingerprint": fingerprints[best],
+            "created_at": created[best],
+            "identical": fingerprints[best] == submission.fingerprint,
+        }
+
+    def _question_signatures(self, question_hash_value: str) -> Tuple[List[str], List[float], np.ndarray]:
+        cached = self._signatures.get(question_hash_value)
+        if cached is None:
+            rows = self._conn.execute(
+                "SELECT fingerprint, MIN(created_at), signature FROM code_evaluations "
+                "WHERE question_hash = ? GROUP BY fingerprint",
+                (question_hash_value,),
+            ).fetchall()
+            matrix = np.array([np.frombuffer(row[2], dtype=np.uint32) for row in rows], dtype=np.uint32)
+            cached = ([row[0] for row in rows], [row[1] for row in rows],
+                      matrix.reshape(len(rows), MINHASH_PERMUTATIONS))
+            self._signatures[question_hash_value] = cached
+            while len(self._signatures) > SIGNATURE_CACHE_QUESTIONS:
+                self._signatures.popitem(last=False)
+        self._signatures.move_to_end(question_hash_value)
+        return cached
+
+
+_evaluation_cache: Optional[EvaluationCache] = None
+_evaluation_cache_lock = threading.Lock()
+
+
+def get_evaluation_cache() -> Optional[EvaluationCache]:
+    """Returns the process-wide evaluation cache, or None if disabled or the cache file cannot be opened."""
+    global _evaluation_cache
+    if not CODE_EVAL_CACHE_ENABLED:
+        return None
+    if _evaluation_cache is None:
+        with _evaluation_cache_lock:
+            if _evaluation_cache is None:
+                try:
+                    _evaluation_cache = EvaluationCache()
+                except (sqlite3.Error, OSError) as e:
+                    log_event("EvaluationCache", "evaluation cache unavailable", level="error", error=str(e))
+                    return None
+    return _evaluation_cache
@@ -0,0 +1,581 @@
+"""
+Sandboxed local execution of candidate submissions against generated test cases.
+
+Each submission runs in a fresh subprocess inside a throwaway working directory,
+with an isolated interpreter, a scrubbed environment and resource limits:
+CPU seconds, address space and process count (RLIMIT_CPU / RLIMIT_AS / RLIMIT_NPROC,
+applied by the harness before any candidate code runs; for Node via prlimit, the V8
+heap cap and Node's permission model), a per-test timeout, and a wall-clock timeout
+for the whole process group. At most SANDBOX_WORKERS sandboxes run at once.
+
+The subprocess is only told the test inputs. It loads the submission as its own
+module, calls the entry point and reports each JSON-encoded return value over a
+dedicated pipe (stdout is discarded); the expected outputs stay in this process, which
+does the comparison. Code that tampers with the harness or writes to the pipe itself
+can therefore only report return values it could have returned directly. Whatever the
+submission returns, raises or prints is never echoed back: failing tests report the
+type and size of the return value and the exception class, so data the code reads on
+the host cannot reach the candidate or the evaluation prompt.
+
+Resource limits do not stop code from reading files or the network, so execution is
+off by default (SANDBOX_ENABLED) and requires an OS-level sandbox (SANDBOX_ISOLATION):
+"bwrap" runs each submission under bubblewrap in fresh user, PID, network, IPC and
+mount namespaces that only see the runtime and the working directory; "prefix" runs it
+under an operator-supplied wrapper (SANDBOX_COMMAND_PREFIX, e.g. nsjail or a container
+runner that keeps inherited file descriptors and holds no secrets in its environment or
+filesystem). "none" skips isolation and is only for trusted submitters, e.g. local
+development.
+
+Test cases are JSON objects {"input": [positional args], "expected": value}; the
+submission must define the entry point function (default "solve").
+"""
+import builtins
+import json
+import math
+import os
+import re
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from llm_resilience import Deadline
+from metrics import log_event
+
+# Off by default: candidate code runs on this host (see the module docstring).
+SANDBOX_ENABLED = os.environ.get("SANDBOX_ENABLED", "0").lower() in ("1", "true", "yes")
+# "bwrap", "prefix" (SANDBOX_COMMAND_PREFIX) or "none" (trusted submitters only).
+SANDBOX_ISOLATION = os.environ.get("SANDBOX_ISOLATION", "bwrap").strip().lower()
+SANDBOX_COMMAND_PREFIX = os.environ.get("SANDBOX_COMMAND_PREFIX", "")
+SANDBOX_WORKERS = int(os.environ.get("SANDBOX_WORKERS", min(4, os.cpu_count() or 1)))
+SANDBOX_CPU_SECONDS = int(os.environ.get("SANDBOX_CPU_SECONDS", 5))
+SANDBOX_MEMORY_MB = int(os.environ.get("SANDBOX_MEMORY_MB", 256))
+SANDBOX_WALL_SECONDS = float(os.environ.get("SANDBOX_WALL_SECONDS", 10))
+SANDBOX_TEST_TIMEOUT_SECONDS = float(os.environ.get("SANDBOX_TEST_TIMEOUT_SECONDS", 2))
+_MAX_VALUE_CHARS = 1 << 20
+_MAX_CHANNEL_BYTES = 16 << 20
+
+_LANGUAGE_ALIASES = {
+    "python": "python", "python3": "python", "py": "python",
+    "javascript": "javascript", "js": "javascript", "node": "javascript", "nodejs": "javascript",
+}
+_ISOLATION_MODES = ("bwrap", "prefix", "none")
+_IDENTIFIER = re.compile(r"[A-Za-z_$][A-Za-z0-9_$]*")
+# Exception class names the harness may report; anything else (e.g. a class the submission
+# defined, or a forged message) is reported as "Error".
+_ERROR_NAMES = frozenset(
+    [name for name, value in vars(builtins).items() if isinstance(value, type) and issubclass(value, BaseException)]
+    + ["Error", "TypeError", "RangeError", "ReferenceError", "SyntaxError", "EvalError", "URIError", "AggregateError"]
+)
+_TEST_ERRORS = {"timeout": "Timed out", "too_large": "Return value too large"}
+
+_PYTHON_HARNESS = r'''
+import json, os, resource, signal, sys, time, types
+
+
+def main():
+    config = json.loads(sys.stdin.read())
+    # Results go to a private pipe; the submission's stdout is /dev/null.
+    channel = os.fdopen(config["channel_fd"], "w")
+
+    def emit(payload):
+        channel.write(json.dumps(payload) + "\n")
+        channel.flush()
+
+    memory = config["memory_mb"] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_CPU, (config["cpu_seconds"], config["cpu_seconds"] + 1))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (1 << 20, 1 << 20))
+    # No child processes: no fork bombs, and no setsid() escape from the process group.
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+    class TestTimeout(BaseException):
+        pass
+
+    def on_alarm(signum, frame):
+        raise TestTimeout()
+
+    signal.signal(signal.SIGALRM, on_alarm)
+
+    def peak_memory_kb():
+        # VmHWM starts fresh at exec; ru_maxrss would include the forked parent's footprint.
+        try:
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    submission = types.ModuleType("submission")
+    submission.__file__ = os.path.abspath("submission.py")
+    sys.modules["submission"] = submission
+    try:
+        with open("submission.py", "r", encoding="utf-8") as f:
+            exec(compile(f.read(), "submission.py", "exec"), submission.__dict__)
+    except BaseException as e:
+        emit({"load_error": type(e).__name__})
+        return
+
+    entry = getattr(submission, config["entry_point"], None)
+    if not callable(entry):
+        emit({"missing_entry": True})
+        return
+
+    for index, args in enumerate(config["inputs"]):
+        result = {"index": index}
+        started = time.perf_counter()
+        try:
+            signal.setitimer(signal.ITIMER_REAL, config["test_timeout"])
+            actual = json.dumps(entry(*args), default=str)
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            if len(actual) > config["max_value_chars"]:
+                result["error"] = "too_large"
+            else:
+                result["actual"] = actual
+        except TestTimeout:
+            result["error"] = "timeout"
+        except BaseException as e:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            result["error"] = type(e).__name__
+        result["runtime_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        # One line per test, so results survive if a later test hits the CPU limit.
+        emit({"test": result})
+
+    emit({"done": True, "peak_memory_kb": peak_memory_kb()})
+
+
+main()
+'''
+
+_NODE_HARNESS = r'''
+const fs = require("fs");
+const vm = require("vm");
+const config = JSON.parse(fs.readFileSync(0, "utf8"));
+const channelFd = config.channel_fd;
+const emit = (payload) => fs.writeSync(channelFd, JSON.stringify(payload) + "\n");
+const context = vm.createContext({ console: { log() {}, error() {}, warn() {} }, module: { exports: {} }, exports: {} });
+try {
+  vm.runInContext(fs.readFileSync("submission.js", "utf8"), context, { timeout: config.test_timeout * 1000, filename: "submission.js" });
+  // entry_point is validated as an identifier by the parent before it is interpolated.
+  vm.runInContext(`globalThis.__entry = typeof ${config.entry_point} === "function" ? ${config.entry_point} : module.exports.${config.entry_point} || module.exports;`, context);
+} catch (e) {
+  emit({ load_error: String(e && e.name) });
+  process.exit(0);
+}
+if (typeof context.__entry !== "function") {
+  emit({ missing_entry: true });
+  process.exit(0);
+}
+config.inputs.forEach((args, index) => {
+  const result = { index };
+  const started = process.hrtime.bigint();
+  try {
+    context.__args = JSON.parse(JSON.stringify(args));
+    const actual = JSON.stringify(vm.runInContext("__entry(...__args)", context, { timeout: config.test_timeout * 1000 }) ?? null) ?? "null";
+    if (actual.length > config.max_value_chars) result.error = "too_large";
+    else result.actual = actual;
+  } catch (e) {
+    result.error = (e && e.code === "ERR_SCRIPT_EXECUTION_TIMEOUT") ? "timeout" : String(e && e.name);
+  }
+  result.runtime_ms = Number(process.hrtime.bigint() - started) / 1e6;
+  emit({ test: result });
+});
+const peakMemoryKb = () => {
+  try {
+    const match = /VmHWM:\s+(\d+)/.exec(fs.readFileSync("/proc/self/status", "utf8"));
+    if (match) return Number(match[1]);
+  } catch (e) {}
+  return process.resourceUsage().maxRSS;
+};
+emit({ done: true, peak_memory_kb: peakMemoryKb() });
+'''
+
+
+def normalize_language(language: Optional[str]) -> Optional[str]:
+    """Maps editor/detected language names to a sandbox runtime ("python", "javascript") or None."""
+    return _LANGUAGE_ALIASES.get((language or "").strip().lower())
+
+
+class SandboxUnavailable(RuntimeError):
+    """The configured isolation mode cannot be used on this host."""
+
+
+class CodeSandbox:
+    """Runs submissions against test cases in resource-limited subprocesses, at most `workers` at a time."""
+
+    def __init__(self, workers: int = SANDBOX_WORKERS, cpu_seconds: int = SANDBOX_CPU_SECONDS,
+                 memory_mb: int = SANDBOX_MEMORY_MB, wall_seconds: float = SANDBOX_WALL_SECONDS,
+                 test_timeout: float = SANDBOX_TEST_TIMEOUT_SECONDS, isolation: str = SANDBOX_ISOLATION,
+                 command_prefix: str = SANDBOX_COMMAND_PREFIX):
+        """
+        Raises:
+            SandboxUnavailable: If the isolation mode is unknown or its tooling is missing.
+        """
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.wall_seconds = wall_seconds
+        self.test_timeout = test_timeout
+        self._slots = threading.BoundedSemaphore(max(1, workers))
+        self._node = shutil.which("node")
+        self._prlimit = shutil.which("prlimit")
+
+        if isolation not in _ISOLATION_MODES:
+            raise SandboxUnavailable(f"Unknown SANDBOX_ISOLATION '{isolation}' (expected one of {', '.join(_ISOLATION_MODES)}).")
+        self.isolation = isolation
+        self._bwrap = shutil.which("bwrap")
+        self._prefix = shlex.split(command_prefix)
+        if isolation == "bwrap" and self._bwrap is None:
+            raise SandboxUnavailable("SANDBOX_ISOLATION=bwrap but bubblewrap (bwrap) is not installed.")
+        if isolation == "prefix" and not self._prefix:
+            raise SandboxUnavailable("SANDBOX_ISOLATION=prefix but SANDBOX_COMMAND_PREFIX is empty.")
+        if isolation == "none":
+            log_event("CodeSandbox", "running submissions without OS isolation; only use this for trusted code",
+                      level="warning")
+
+    def supports(self, language: Optional[str]) -> bool:
+        runtime = normalize_language(language)
+        return runtime == "python" or (runtime == "javascript" and self._node is not None)
+
+    def run_tests(self, code_submission: str, language: str, test_cases: List[Dict[str, Any]],
+                  entry_point: str = "solve", deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        Executes the submission against every test case.
+
+        Args:
+            code_submission: Candidate source code.
+            language: Submission language (see normalize_language).
+            test_cases: [{"input": [...], "expected": ...}, ...].
+            entry_point: Name of the function under test.
+            deadline: Optional llm_resilience.Deadline; the wall-clock limit never runs past it.
+
+        Returns:
+            {"status": "passed" | "failed" | "error" | "timeout" | "unsupported",
+             "passed", "total", "tests": [{"index", "passed", "runtime_ms", ...}],
+             "runtime_ms", "peak_memory_kb", "error"}.
+        """
+        runtime = normalize_language(language)
+        total = len(test_cases)
+        if not self.supports(language):
+            return self._result("unsupported", total, error=f"No local runtime for '{language}'.")
+        if not test_cases:
+            return self._result("unsupported", 0, error="No test cases available.")
+        if not _IDENTIFIER.fullmatch(entry_point or ""):
+            return self._result("error", total, error="The entry point must be a plain function name.")
+        if runtime == "python":
+            # Compile errors come from the parent, so their message is about the candidate's own code.
+            try:
+                compile(code_submission, "submission.py", "exec")
+            except SyntaxError as e:
+                return self._result("error", total, error=f"SyntaxError: {e.msg} (line {e.lineno}).")
+            except ValueError as e:
+                return self._result("error", total, error=f"Submission could not be compiled: {e}.")
+
+        config = {
+            "entry_point": entry_point,
+            # Expected values never enter the sandbox: the child only reports what the entry
+            # point returned, and grading happens here.
+            "inputs": [case.get("input", []) for case in test_cases],
+            "memory_mb": self.memory_mb,
+            "cpu_seconds": self.cpu_seconds,
+            "test_timeout": self.test_timeout,
+            "max_value_chars": _MAX_VALUE_CHARS,
+        }
+        wall_seconds = self.wall_seconds if deadline is None else min(self.wall_seconds, deadline.remaining())
+        with self._slots, tempfile.TemporaryDirectory(prefix="sandbox-") as workdir:
+            command = self._command(runtime, workdir, code_submission)
+            started = time.perf_counter()
+            try:
+                output, stderr, returncode = self._execute(command, workdir, config, wall_seconds)
+            except OSError as e:
+                return self._result("error", total, error=f"Could not start sandbox: {e}")
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+
+        messages = self._parse_messages(output)
+        tests = self._grade(messages, test_cases)
+        passed = sum(1 for test in tests if test["passed"])
+        done = next((message for message in messages if message.get("done")), None)
+
+        for message in messages:
+            if "load_error" in message:
+                return self._result("error", total, runtime_ms=elapsed_ms,
+                                    error=f"Submission raised {_error_name(message['load_error'])} while loading.")
+            if message.get("missing_entry"):
+                return self._result("error", total, runtime_ms=elapsed_ms,
+                                    error=f"No function named '{entry_point}' was defined.")
+        if returncode is None:
+            return self._result("timeout", total, passed=passed, tests=tests, runtime_ms=elapsed_ms,
+                                error=f"Exceeded the {wall_seconds:.1f}s wall-clock limit after {len(tests)} tests.")
+        if done is None or len(tests) < total:
+            if returncode < 0:
+                reason = f"killed by {signal.Signals(-returncode).name}, likely the CPU or memory limit"
+            else:
+                reason = f"exited with code {returncode}"
+            # stderr may hold whatever the submission printed, so it stays in the local log.
+            log_event("CodeSandbox", "sandbox process stopped early", level="warning", runtime=runtime,
+                      returncode=returncode, stderr_tail=stderr.strip()[-500:])
+            return self._result("error", total, passed=passed, tests=tests, runtime_ms=elapsed_ms,
+                                error=f"Sandbox process stopped after {len(tests)} of {total} tests ({reason}).")
+        peak_memory_kb = done.get("peak_memory_kb")
+        return self._result("passed" if passed == total else "failed", total, passed=passed, tests=tests,
+                            runtime_ms=elapsed_ms, peak_memory_kb=peak_memory_kb if isinstance(peak_memory_kb, int) else None)
+
+    def _command(self, runtime: str, workdir: str, code_submission: str) -> List[str]:
+        # Under bwrap the working directory is mounted at /sandbox.
+        visible_workdir = "/sandbox" if self.isolation == "bwrap" else workdir
+        if runtime == "python":
+            with open(os.path.join(workdir, "submission.py"), "w", encoding="utf-8") as f:
+                f.write(code_submission)
+            with open(os.path.join(workdir, "harness.py"), "w", encoding="utf-8") as f:
+                f.write(_PYTHON_HARNESS)
+            command = [sys.executable, "-I", "harness.py"]
+        else:
+            with open(os.path.join(workdir, "submission.js"), "w", encoding="utf-8") as f:
+                f.write(code_submission)
+            with open(os.path.join(workdir, "harness.js"), "w", encoding="utf-8") as f:
+                f.write(_NODE_HARNESS)
+            # RLIMIT_AS breaks V8's address-space reservation, so Node gets a heap cap instead; Node
+            # starts its own threads, so child processes and workers are denied by the permission
+            # model rather than RLIMIT_NPROC.
+            command = [self._node, "--experimental-permission", f"--allow-fs-read={visible_workdir}/*",
+                       f"--max-old-space-size={self.memory_mb}", "harness.js"]
+            if self._prlimit:
+                command = [self._prlimit, f"--cpu={self.cpu_seconds}"] + command
+        return self._isolate(command, workdir)
+
+    def _isolate(self, command: List[str], workdir: str) -> List[str]:
+        """Wraps the runtime command in the configured OS sandbox."""
+        if self.isolation == "prefix":
+            return self._prefix + command
+        if self.isolation != "bwrap":
+            return command
+        wrapped = [self._bwrap, "--unshare-all", "--die-with-parent", "--new-session", "--cap-drop", "ALL",
+                   "--proc", "/proc", "--dev", "/dev", "--tmpfs", "/tmp"]
+        # Only the system and runtime installation trees are visible, read-only: no /etc, /home,
+        # /root or application directory.
+        mounted: List[str] = []
+        for path in ("/usr", "/bin", "/lib", "/lib32", "/lib64", "/sbin"):
+            if os.path.islink(path):
+                wrapped += ["--symlink", os.readlink(path), path]
+            elif os.path.isdir(path):
+                wrapped += ["--ro-bind", path, path]
+                mounted.append(path)
+        runtimes = [sys.base_prefix, sys.prefix]
+        if self._node:
+            runtimes.append(os.path.dirname(os.path.dirname(os.path.realpath(self._node))))
+        for path in map(os.path.realpath, runtimes):
+            if os.path.isdir(path) and path != "/" and not any(path == m or path.startswith(m + "/") for m in mounted):
+                wrapped += ["--ro-bind", path, path]
+                mounted.append(path)
+        wrapped += ["--bind", workdir, "/sandbox", "--chdir", "/sandbox", "--"]
+        return wrapped + command
+
+    @staticmethod
+    def _execute(command: List[str], workdir: str, config: Dict[str, Any], wall_seconds: float):
+        """
+        Runs the command in its own process group with the config on stdin.
+
+        Returns (result channel output, stderr, returncode or None on timeout). The harness
+        reports over a dedicated pipe whose write end is passed as config["channel_fd"];
+        stdout goes to /dev/null, so printing from the submission cannot reach the parser.
+        """
+        read_fd, write_fd = os.pipe()
+        try:
+            process = subprocess.Popen(
+                command, cwd=workdir, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                env={"PATH": os.defpath, "LANG": "C.UTF-8"}, start_new_session=True, text=True,
+                pass_fds=(write_fd,),
+            )
+        except OSError:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+
+        chunks: List[bytes] = []
+
+        def drain():
+            size = 0
+            with os.fdopen(read_fd, "rb") as channel:
+                while True:
+                    chunk = channel.read1(65536)
+                    if not chunk:
+                        break
+                    # Keep reading past the cap so the child never blocks on a full pipe.
+                    if size < _MAX_CHANNEL_BYTES:
+                        chunks.append(chunk)
+                        size += len(chunk)
+
+        reader = threading.Thread(target=drain, name="sandbox-channel", daemon=True)
+        reader.start()
+        stdin_text = json.dumps({**config, "channel_fd": write_fd})
+        try:
+            _, stderr = process.communicate(stdin_text, timeout=max(0.1, wall_seconds))
+            returncode = process.returncode
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            _, stderr = process.communicate()
+            returncode = None
+        reader.join(timeout=1.0)
+        if reader.is_alive():
+            # A forked descendant still holds the pipe open.
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            reader.join(timeout=1.0)
+        return b"".join(chunks).decode("utf-8", "replace"), stderr, returncode
+
+    @staticmethod
+    def _parse_messages(output: str) -> List[Dict[str, Any]]:
+        """Returns the JSON object messages on the result channel, skipping anything malformed."""
+        messages = []
+        for line in output.splitlines():
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(message, dict):
+                messages.append(message)
+        return messages
+
+    @staticmethod
+    def _grade(messages: List[Dict[str, Any]], test_cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Compares reported return values with the expected outputs.
+
+        Only the first report per test index counts and results are kept in index order,
+        stopping at the first missing test, so a submission that writes to the channel
+        itself can at most claim return values it could have returned anyway.
+        """
+        reports: Dict[int, Dict[str, Any]] = {}
+        for message in messages:
+            report = message.get("test")
+            if isinstance(report, dict) and isinstance(report.get("index"), int):
+                reports.setdefault(report["index"], report)
+
+        tests = []
+        for index, case in enumerate(test_cases):
+            report = reports.get(index)
+            if report is None:
+                break
+            runtime_ms = report.get("runtime_ms")
+            result: Dict[str, Any] = {"index": index, "passed": False,
+                                      "runtime_ms": runtime_ms if isinstance(runtime_ms, (int, float)) else None}
+            if "error" in report:
+                error = report["error"]
+                result["error"] = _TEST_ERRORS.get(error) or f"Raised {_error_name(error)}"
+            elif not isinstance(report.get("actual"), str):
+                result["error"] = "No return value reported"
+            else:
+                try:
+                    actual = json.loads(report["actual"])
+                except json.JSONDecodeError:
+                    result["error"] = "Unreadable return value"
+                else:
+                    expected = case.get("expected")
+                    result["passed"] = values_equal(actual, expected)
+                    if not result["passed"]:
+                        # The return value itself is never reported: it may carry data the code read on the host.
+                        result["expected"] = _short(expected)
+                        result["actual"] = describe_value(actual)
+            tests.append(result)
+        return tests
+
+    @staticmethod
+    def _result(status: str, total: int, passed: int = 0, tests: Optional[List[Dict[str, Any]]] = None,
+                runtime_ms: Optional[float] = None, peak_memory_kb: Optional[int] = None,
+                error: Optional[str] = None) -> Dict[str, Any]:
+        return {"status": status, "passed": passed, "total": total, "tests": tests or [],
+                "runtime_ms": runtime_ms, "peak_memory_kb": peak_memory_kb, "error": error}
+
+
+def values_equal(actual: Any, expected: Any) -> bool:
+    """JSON-level equality with a relative tolerance for floats."""
+    if isinstance(actual, float) or isinstance(expected, float):
+        if not (isinstance(actual, (int, float)) and isinstance(expected, (int, float))):
+            return False
+        return math.isclose(actual, expected, rel_tol=1e-6, abs_tol=1e-9)
+    if isinstance(actual, list) and isinstance(expected, list):
+        return len(actual) == len(expected) and all(values_equal(a, e) for a, e in zip(actual, expected))
+    if isinstance(actual, dict) and isinstance(expected, dict):
+        return actual.keys() == expected.keys() and all(values_equal(actual[k], expected[k]) for k in actual)
+    return actual == expected
+
+
+def describe_value(value: Any) -> str:
+    """Describes a returned value by type and size only, e.g. "list of 3 items"."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "a boolean"
+    if isinstance(value, (int, float)):
+        return "a number"
+    if isinstance(value, str):
+        return f"a string of {len(value)} characters"
+    if isinstance(value, list):
+        return f"a list of {len(value)} items"
+    if isinstance(value, dict):
+        return f"an object with {len(value)} keys"
+    return type(value).__name__
+
+
+def _error_name(name: Any) -> str:
+    """Maps a reported exception class name to a known one, so the child cannot smuggle text out."""
+    return name if isinstance(name, str) and name in _ERROR_NAMES else "Error"
+
+
+def _short(value: Any) -> str:
+    text = json.dumps(value, default=str)
+    return text if len(text) <= 120 else text[:117] + "..."
+
+
+def summarize_execution(execution: Dict[str, Any], max_failures: int = 3) -> str:
+    """Compact plain-text summary of a run_tests result, used in the evaluation prompt."""
+    lines = [f"Status: {execution['status']}; passed {execution['passed']} / {execution['total']} tests."]
+    if execution.get("runtime_ms") is not None:
+        lines.append(f"Total runtime: {execution['runtime_ms']:.0f} ms; peak memory: "
+                     f"{(execution.get('peak_memory_kb') or 0) / 1024:.1f} MB.")
+    if execution.get("error"):
+        lines.append(f"Error: {execution['error']}")
+    failures = [test for test in execution.get("tests", []) if not test.get("passed")]
+    for test in failures[:max_failures]:
+        if test.get("error"):
+            lines.append(f"Test {test['index']}: {test['error']}")
+        else:
+            lines.append(f"Test {test['index']}: expected {test.get('expected')}, got {test.get('actual')}")
+    if len(failures) > max_failures:
+        lines.append(f"... and {len(failures) - max_failures} more failing tests.")
+    return "\n".join(lines)
+
+
+_code_sandbox: Optional[CodeSandbox] = None
+_code_sandbox_failed = False
+_code_sandbox_lock = threading.Lock()
+
+
+def get_code_sandbox() -> Optional[CodeSandbox]:
+    """Returns the process-wide sandbox, or None when SANDBOX_ENABLED is off or isolation is unavailable."""
+    global _code_sandbox, _code_sandbox_failed
+    if not SANDBOX_ENABLED or _code_sandbox_failed:
+        return None
+    if _code_sandbox is None:
+        with _code_sandbox_lock:
+            if _code_sandbox is None and not _code_sandbox_failed:
+                try:
+                    _code_sandbox = CodeSandbox()
+                except SandboxUnavailable as e:
+                    _code_sandbox_failed = True
+                    log_event("CodeSandbox", "disabled", level="error", error=str(e))
+    return _code_sandbox
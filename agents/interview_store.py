@@ -0,0 +1,457 @@
+"""
+Persistent record of candidates, the questions they were asked and their evaluations.
+
+Everything the pipeline produces is written to SQLite (WAL mode, so dashboards can read
+while the pipeline writes): candidates keyed by resume fingerprint with their extracted
+skills, generated questions, and every code submission with its structured scores.
+
+Writes never block a request: record_* calls only enqueue, and a background thread
+commits queued rows in batches of up to INTERVIEW_STORE_BATCH_SIZE, at least every
+INTERVIEW_STORE_FLUSH_SECONDS. When the queue is full new rows are dropped and counted.
+
+Reads go through their own connection and are served from indexes on candidate,
+question and creation time, with keyset pagination (before_id) for long listings and
+SQL-side aggregation for score summaries. Every evaluation also updates a per-day
+rollup (day, question, language, source -> counts and score sums) in the same
+transaction, so dashboard summaries read a few rows per day instead of scanning every
+evaluation. Submitted code and the full evaluation text live in content-addressed side
+tables, so identical code or reused evaluations are stored once.
+"""
+import atexit
+import hashlib
+import itertools
+import json
+import math
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from llm_cache import CACHE_DIR
+from agents.code_fingerprint import question_hash
+from agents.results import SCORE_KEYS, CodeEvaluation
+from metrics import log_event
+
+INTERVIEW_STORE_ENABLED = os.environ.get("INTERVIEW_STORE_ENABLED", "1").lower() not in ("0", "false", "no")
+INTERVIEW_STORE_PATH = os.environ.get("INTERVIEW_STORE_PATH", os.path.join(CACHE_DIR, "interviews.sqlite3"))
+# Rows committed per transaction, and the longest a queued row waits for its commit.
+INTERVIEW_STORE_BATCH_SIZE = int(os.environ.get("INTERVIEW_STORE_BATCH_SIZE", 500))
+INTERVIEW_STORE_FLUSH_SECONDS = float(os.environ.get("INTERVIEW_STORE_FLUSH_SECONDS", 1.0))
+INTERVIEW_STORE_QUEUE_MAX = int(os.environ.get("INTERVIEW_STORE_QUEUE_MAX", 10000))
+
+SUMMARY_GROUPS = ("day", "question", "language", "source", "candidate")
+# Rollup column for each group that can be answered from the daily rollup.
+_ROLLUP_GROUPS = {"day": "day", "question": "question_hash", "language": "language", "source": "source"}
+_RAW_GROUPS = {
+    "day": "date(e.created_at, 'unixepoch')",
+    "question": "e.question_hash",
+    "language": "e.language",
+    "source": "e.source",
+    "candidate": "e.candidate_id",
+}
+_AVERAGED = SCORE_KEYS + ("overall",)
+DAY_SECONDS = 86400
+_EVALUATION_COLUMNS = ", ".join(f"e.{column}" for column in (
+    "id", "candidate_id", "question_hash", "language", "code_hash", "evaluation_hash", "source", *SCORE_KEYS,
+    "overall", "tests_passed", "tests_total", "created_at"))
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS candidates ("
+    "candidate_id TEXT PRIMARY KEY, file_name TEXT, skills TEXT NOT NULL, experience_years INTEGER, "
+    "first_seen REAL NOT NULL, last_seen REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS candidates_last_seen ON candidates(last_seen)",
+    "CREATE TABLE IF NOT EXISTS questions ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, candidate_id TEXT, question_hash TEXT NOT NULL, difficulty TEXT, "
+    "question TEXT NOT NULL, created_at REAL NOT NULL, UNIQUE (candidate_id, question_hash, difficulty))",
+    "CREATE INDEX IF NOT EXISTS questions_hash ON questions(question_hash, created_at)",
+    "CREATE INDEX IF NOT EXISTS questions_created ON questions(created_at)",
+    "CREATE TABLE IF NOT EXISTS evaluations ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, candidate_id TEXT, question_hash TEXT NOT NULL, language TEXT NOT NULL, "
+    "code_hash TEXT NOT NULL, evaluation_hash TEXT NOT NULL, source TEXT NOT NULL, "
+    + ", ".join(f"{key} REAL" for key in SCORE_KEYS) + ", overall REAL, tests_passed INTEGER, tests_total INTEGER, "
+    "created_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS evaluations_candidate ON evaluations(candidate_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS evaluations_question ON evaluations(question_hash, created_at)",
+    "CREATE INDEX IF NOT EXISTS evaluations_created ON evaluations(created_at)",
+    "CREATE TABLE IF NOT EXISTS submitted_code (code_hash TEXT PRIMARY KEY, code TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS evaluation_texts (evaluation_hash TEXT PRIMARY KEY, evaluation TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS evaluation_rollup ("
+    "day TEXT NOT NULL, question_hash TEXT NOT NULL, language TEXT NOT NULL, source TEXT NOT NULL, "
+    "evaluations INTEGER NOT NULL, "
+    + "".join(f"{key}_sum REAL NOT NULL, {key}_count INTEGER NOT NULL, " for key in _AVERAGED)
+    + "tests_passed INTEGER NOT NULL, tests_total INTEGER NOT NULL, "
+    "PRIMARY KEY (day, question_hash, language, source))",
+)
+_UPSERT_CANDIDATE = (
+    "INSERT INTO candidates (candidate_id, file_name, skills, experience_years, first_seen, last_seen) "
+    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(candidate_id) DO UPDATE SET file_name = excluded.file_name, "
+    "skills = excluded.skills, experience_years = excluded.experience_years, last_seen = excluded.last_seen"
+)
+_INSERT_QUESTION = (
+    "INSERT OR IGNORE INTO questions (candidate_id, question_hash, difficulty, question, created_at) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+_INSERT_EVALUATION = (
+    "INSERT INTO evaluations (candidate_id, question_hash, language, code_hash, evaluation_hash, source, "
+    + ", ".join(SCORE_KEYS) + ", overall, tests_passed, tests_total, created_at) "
+    "VALUES (" + ", ".join("?" * (10 + len(SCORE_KEYS))) + ")"
+)
+_INSERT_CODE = "INSERT OR IGNORE INTO submitted_code (code_hash, code) VALUES (?, ?)"
+_INSERT_EVALUATION_TEXT = "INSERT OR IGNORE INTO evaluation_texts (evaluation_hash, evaluation) VALUES (?, ?)"
+_ROLLUP_SUMS = [f"{key}_{part}" for key in _AVERAGED for part in ("sum", "count")] + ["tests_passed", "tests_total"]
+_UPSERT_ROLLUP = (
+    "INSERT INTO evaluation_rollup (day, question_hash, language, source, evaluations, " + ", ".join(_ROLLUP_SUMS)
+    + ") VALUES (" + ", ".join("?" * (5 + len(_ROLLUP_SUMS))) + ") "
+    "ON CONFLICT(day, question_hash, language, source) DO UPDATE SET evaluations = evaluations + 1, "
+    + ", ".join(f"{column} = {column} + excluded.{column}" for column in _ROLLUP_SUMS)
+)
+
+# One queued record: the (sql, params) statements that store it.
+Record = Tuple[Tuple[str, Tuple[Any, ...]], ...]
+
+
+class InterviewStore:
+    """SQLite store of interview results with a batched background writer and an indexed query API."""
+
+    def __init__(self, path: str = INTERVIEW_STORE_PATH, batch_size: int = INTERVIEW_STORE_BATCH_SIZE,
+                 flush_seconds: float = INTERVIEW_STORE_FLUSH_SECONDS, max_queued: int = INTERVIEW_STORE_QUEUE_MAX):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._write_conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._write_conn.execute("PRAGMA journal_mode=WAL")
+        # WAL stays consistent after a crash at NORMAL; only the last commits can be lost.
+        self._write_conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._write_conn.execute(statement)
+        self._read_conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._read_conn.row_factory = sqlite3.Row
+        self._read_lock = threading.Lock()
+        self._queue: "queue.Queue[Record]" = queue.Queue(maxsize=max_queued)
+        self._stats_lock = threading.Lock()
+        self._stats = {"written": 0, "dropped": 0, "batches": 0, "errors": 0, "last_batch_ms": 0.0}
+        self._writer = threading.Thread(target=self._drain, name="interview-store", daemon=True)
+        self._writer.start()
+
+    # --- writes (enqueue only) ---------------------------------------------
+
+    def record_candidate(self, candidate_id: str, file_name: Optional[str], skills: Union[List[str], str],
+                         experience_years: Optional[int]) -> None:
+        """Records (or refreshes) a candidate identified by their resume fingerprint."""
+        skills = skills if isinstance(skills, list) else [skill.strip() for skill in str(skills).split(",") if skill.strip()]
+        now = time.time()
+        self._enqueue((_UPSERT_CANDIDATE, (candidate_id, file_name, json.dumps(skills), experience_years, now, now)))
+
+    def record_question(self, candidate_id: Optional[str], question: str, difficulty: Optional[str]) -> None:
+        """Records a question generated for a candidate (once per candidate, question and difficulty)."""
+        self._enqueue((_INSERT_QUESTION, (candidate_id, question_hash(question), difficulty, question, time.time())))
+
+    def record_evaluation(self, question: str, code_submission: str, language: str, evaluation: CodeEvaluation,
+                          source: str, candidate_id: Optional[str] = None,
+                          execution: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Records one evaluated submission.
+
+        Args:
+            question: The question the code answers.
+            code_submission: The submitted code.
+            language: Submission language.
+            evaluation: The structured evaluation shown to the candidate.
+            source: "llm", "incremental" (re-evaluated from the diff against the candidate's previous
+                submission), "cached" (reused for an identical submission) or "static" (rejected by
+                the static pre-pass).
+            candidate_id: Resume fingerprint of the candidate, when known.
+            execution: Optional CodeSandbox.run_tests result; its pass counts are stored.
+        """
+        scores = evaluation.numeric_scores()
+        known = [value for value in scores.values() if value is not None]
+        overall = round(sum(known) / len(known), 2) if known else None
+        code_hash = hashlib.sha256(code_submission.encode("utf-8")).hexdigest()
+        evaluation_text = json.dumps(evaluation.to_dict(), sort_keys=True)
+        evaluation_hash = hashlib.sha256(evaluation_text.encode("utf-8")).hexdigest()
+        tests_passed = execution.get("passed") if execution else None
+        tests_total = execution.get("total") if execution else None
+        hashed_question = question_hash(question)
+        now = time.time()
+        averaged = {**scores, "overall": overall}
+        rollup_sums = [number for key in _AVERAGED
+                       for number in ((averaged[key] or 0.0), int(averaged[key] is not None))]
+        self._enqueue(
+            (_INSERT_CODE, (code_hash, code_submission)),
+            (_INSERT_EVALUATION_TEXT, (evaluation_hash, evaluation_text)),
+            (_INSERT_EVALUATION, (
+                candidate_id, hashed_question, language, code_hash, evaluation_hash, source,
+                *(scores[key] for key in SCORE_KEYS), overall, tests_passed, tests_total, now,
+            )),
+            (_UPSERT_ROLLUP, (
+                _day(now), hashed_question, language, source, 1, *rollup_sums, tests_passed or 0, tests_total or 0,
+            )),
+        )
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Waits (up to timeout) until every queued row is committed. Returns False on timeout."""
+        ends = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= ends:
+                return False
+            time.sleep(0.01)
+        return True
+
+    # --- reads --------------------------------------------------------------
+
+    def get_candidate(self, candidate_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the candidate with their questions and evaluations (newest first), or None."""
+        row = self._query("SELECT * FROM candidates WHERE candidate_id = ?", (candidate_id,))
+        if not row:
+            return None
+        candidate = self._candidate(row[0])
+        candidate["questions"] = self._query(
+            "SELECT id, question_hash, difficulty, question, created_at FROM questions "
+            "WHERE candidate_id = ? ORDER BY created_at DESC", (candidate_id,))
+        candidate["evaluations"] = self.list_evaluations(candidate_id=candidate_id, limit=1000)
+        return candidate
+
+    def list_candidates(self, since: Optional[float] = None, until: Optional[float] = None,
+                        limit: int = 50) -> List[Dict[str, Any]]:
+        """Candidates seen in [since, until), most recently seen first."""
+        where, params = self._time_range("last_seen", since, until)
+        rows = self._query(f"SELECT * FROM candidates {where} ORDER BY last_seen DESC LIMIT ?", (*params, limit))
+        return [self._candidate(row) for row in rows]
+
+    def list_questions(self, candidate_id: Optional[str] = None, since: Optional[float] = None,
+                       until: Optional[float] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Generated questions, newest first, optionally for one candidate."""
+        where, params = self._time_range("created_at", since, until)
+        if candidate_id is not None:
+            where += (" AND" if where else "WHERE") + " candidate_id = ?"
+            params.append(candidate_id)
+        return self._query(
+            "SELECT id, candidate_id, question_hash, difficulty, question, created_at FROM questions "
+            f"{where} ORDER BY created_at DESC LIMIT ?", (*params, limit))
+
+    def list_evaluations(self, candidate_id: Optional[str] = None, question: Optional[str] = None,
+                         since: Optional[float] = None, until: Optional[float] = None, limit: int = 100,
+                         before_id: Optional[int] = None, include_details: bool = False) -> List[Dict[str, Any]]:
+        """
+        Evaluations, newest first.
+
+        Args:
+            candidate_id: Only this candidate's submissions.
+            question: Only submissions to this question (its text).
+            since: Earliest creation time (epoch seconds, inclusive).
+            until: Latest creation time (epoch seconds, exclusive).
+            limit: Page size.
+            before_id: Keyset pagination: pass the smallest id of the previous page.
+            include_details: Also return the code and the full evaluation (summary, scores, feedback).
+        """
+        where, params = self._evaluation_filters(candidate_id, question, since, until)
+        if before_id is not None:
+            where += (" AND" if where else "WHERE") + " e.id < ?"
+            params.append(before_id)
+        columns, joins = _EVALUATION_COLUMNS, ""
+        if include_details:
+            columns += ", c.code, t.evaluation"
+            joins = ("JOIN submitted_code c ON c.code_hash = e.code_hash "
+                     "JOIN evaluation_texts t ON t.evaluation_hash = e.evaluation_hash")
+        rows = self._query(f"SELECT {columns} FROM evaluations e {joins} {where} ORDER BY e.id DESC LIMIT ?",
+                           (*params, limit))
+        if include_details:
+            for row in rows:
+                row["evaluation"] = json.loads(row["evaluation"])
+        return rows
+
+    def score_summary(self, group_by: str = "day", candidate_id: Optional[str] = None, question: Optional[str] = None,
+                      since: Optional[float] = None, until: Optional[float] = None,
+                      limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Aggregates evaluations per group ("day", "question", "language", "source" or "candidate"):
+        count, average of each score, average overall score and test pass rate.
+
+        Time filters select whole UTC days: since is rounded down and until up to midnight.
+        Summaries that are not for one candidate are read from the daily rollup.
+        """
+        if group_by not in SUMMARY_GROUPS:
+            raise ValueError(f"Unknown group '{group_by}'. Available: {', '.join(SUMMARY_GROUPS)}")
+        since = math.floor(since / DAY_SECONDS) * DAY_SECONDS if since is not None else None
+        until = math.ceil(until / DAY_SECONDS) * DAY_SECONDS if until is not None else None
+        pass_rate = "ROUND(CAST(SUM({0}tests_passed) AS REAL) / NULLIF(SUM({0}tests_total), 0), 3) AS test_pass_rate"
+        if candidate_id is None and group_by in _ROLLUP_GROUPS:
+            where, params = self._time_range(
+                "day", _day(since) if since is not None else None, _day(until) if until is not None else None)
+            if question is not None:
+                where += (" AND" if where else "WHERE") + " question_hash = ?"
+                params.append(question_hash(question))
+            averages = ", ".join(f"ROUND(SUM({key}_sum) / NULLIF(SUM({key}_count), 0), 2) AS {key}" for key in _AVERAGED)
+            return self._query(
+                f"SELECT {_ROLLUP_GROUPS[group_by]} AS grp, SUM(evaluations) AS evaluations, {averages}, "
+                f"{pass_rate.format('')} FROM evaluation_rollup {where} GROUP BY grp ORDER BY grp DESC LIMIT ?",
+                (*params, limit))
+        where, params = self._evaluation_filters(candidate_id, question, since, until)
+        averages = ", ".join(f"ROUND(AVG(e.{key}), 2) AS {key}" for key in _AVERAGED)
+        return self._query(
+            f"SELECT {_RAW_GROUPS[group_by]} AS grp, COUNT(*) AS evaluations, {averages}, {pass_rate.format('e.')} "
+            f"FROM evaluations e {where} GROUP BY grp ORDER BY grp DESC LIMIT ?", (*params, limit))
+
+    def score_rows(self, since: Optional[float] = None, until: Optional[float] = None, question: Optional[str] = None,
+                   limit: Optional[int] = None) -> List[Tuple[Any, ...]]:
+        """
+        Bulk export for analytics: newest-first (id, candidate_id, question_hash, *SCORE_KEYS, tests_passed,
+        tests_total, created_at) tuples, without building a dict per row.
+        """
+        where, params = self._evaluation_filters(None, question, since, until)
+        columns = ", ".join(f"e.{column}" for column in (
+            "id", "candidate_id", "question_hash", *SCORE_KEYS, "tests_passed", "tests_total", "created_at"))
+        with self._read_lock:
+            cursor = self._read_conn.cursor()
+            cursor.row_factory = None
+            return cursor.execute(f"SELECT {columns} FROM evaluations e {where} ORDER BY e.id DESC LIMIT ?",
+                                  (*params, -1 if limit is None else limit)).fetchall()
+
+    def candidate_names(self, candidate_ids: List[str]) -> Dict[str, Optional[str]]:
+        """Resume file names of the given candidates."""
+        if not candidate_ids:
+            return {}
+        rows = self._query(
+            f"SELECT candidate_id, file_name FROM candidates WHERE candidate_id IN ({', '.join('?' * len(candidate_ids))})",
+            tuple(candidate_ids))
+        return {row["candidate_id"]: row["file_name"] for row in rows}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+    # --- internals ----------------------------------------------------------
+
+    def _enqueue(self, *record: Tuple[str, Tuple[Any, ...]]) -> None:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats["dropped"] += 1
+
+    def _drain(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Collect more rows until the batch is full or the oldest row has waited flush_seconds.
+            ends = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, ends - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch: List[Record]) -> None:
+        started = time.perf_counter()
+        # Rows of the same kind go to SQLite in one executemany call (nothing depends on insert order).
+        rows_by_sql: Dict[str, List[Tuple[Any, ...]]] = {}
+        for sql, params in itertools.chain.from_iterable(batch):
+            rows_by_sql.setdefault(sql, []).append(params)
+        try:
+            self._write_conn.execute("BEGIN")
+            for sql, rows in rows_by_sql.items():
+                self._write_conn.executemany(sql, rows)
+            self._write_conn.execute("COMMIT")
+            written, dropped = len(batch), 0
+        except sqlite3.Error as e:
+            if self._write_conn.in_transaction:
+                self._write_conn.execute("ROLLBACK")
+            log_event("InterviewStore", "Batch write failed; retrying record by record.", level="warning",
+                      rows=len(batch), error=str(e))
+            # One bad record must not take the rest of the batch with it.
+            written = sum(self._write_record(record) for record in batch)
+            dropped = len(batch) - written
+        with self._stats_lock:
+            self._stats["written"] += written
+            self._stats["dropped"] += dropped
+            self._stats["errors"] += 1 if dropped else 0
+            self._stats["batches"] += 1
+            self._stats["last_batch_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    def _write_record(self, record: Record) -> bool:
+        """Writes one record in its own transaction; returns False (and logs) if it fails."""
+        try:
+            self._write_conn.execute("BEGIN")
+            for sql, params in record:
+                self._write_conn.execute(sql, params)
+            self._write_conn.execute("COMMIT")
+            return True
+        except sqlite3.Error as e:
+            if self._write_conn.in_transaction:
+                self._write_conn.execute("ROLLBACK")
+            log_event("InterviewStore", "Dropped a record.", level="error", error=str(e))
+            return False
+
+    def _query(self, sql: str, params: Tuple[Any, ...] = ()) -> List[Dict[str, Any]]:
+        with self._read_lock:
+            return [dict(row) for row in self._read_conn.execute(sql, params).fetchall()]
+
+    @staticmethod
+    def _time_range(column: str, since: Optional[float], until: Optional[float]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if since is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append(f"{column} < ?")
+            params.append(until)
+        return ("WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _evaluation_filters(self, candidate_id: Optional[str], question: Optional[str],
+                            since: Optional[float], until: Optional[float]) -> Tuple[str, List[Any]]:
+        where, params = self._time_range("e.created_at", since, until)
+        if candidate_id is not None:
+            where += (" AND" if where else "WHERE") + " e.candidate_id = ?"
+            params.append(candidate_id)
+        if question is not None:
+            where += (" AND" if where else "WHERE") + " e.question_hash = ?"
+            params.append(question_hash(question))
+        return where, params
+
+    @staticmethod
+    def _candidate(row: Dict[str, Any]) -> Dict[str, Any]:
+        row["skills"] = json.loads(row["skills"])
+        return row
+
+
+def _day(timestamp: float) -> str:
+    """UTC date of an epoch timestamp, formatted like SQLite's date(ts, 'unixepoch')."""
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+_interview_store: Optional[InterviewStore] = None
+_interview_store_failed = False
+_interview_store_lock = threading.Lock()
+
+
+def get_interview_store() -> Optional[InterviewStore]:
+    """Returns the process-wide interview store, or None if disabled or the store file cannot be opened."""
+    global _interview_store, _interview_store_failed
+    if not INTERVIEW_STORE_ENABLED or _interview_store_failed:
+        return None
+    if _interview_store is None:
+        with _interview_store_lock:
+            if _interview_store is None and not _interview_store_failed:
+                try:
+                    _interview_store = InterviewStore()
+                except (sqlite3.Error, OSError) as e:
+                    # Not retried on every request: opening the file again would fail the same way.
+                    _interview_store_failed = True
+                    log_event("InterviewStore", "Interview store unavailable.", level="error", error=str(e))
+                    return None
+                atexit.register(_interview_store.flush)
+    return _interview_store
@@ -0,0 +1,144 @@
+"""
+Background jobs for long-running ManagerAgent work.
+
+submit() returns a job id immediately and runs the work on a bounded worker pool; the
+caller polls get() for status, progress text, partial output (e.g. streamed evaluation
+Markdown) and the final result. Jobs live in a process-wide store, so a browser refresh
+that starts a new Streamlit session can pick a job back up by id. Finished jobs are
+dropped after JOB_RESULT_TTL_SECONDS.
+"""
+import concurrent.futures
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from metrics import log_event
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 8))
+# Queued plus running jobs accepted before submit() refuses new work.
+JOB_QUEUE_MAX = int(os.environ.get("JOB_QUEUE_MAX", 256))
+JOB_RESULT_TTL_SECONDS = float(os.environ.get("JOB_RESULT_TTL_SECONDS", 3600))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class JobQueueFull(RuntimeError):
+    """Raised by submit() when JOB_QUEUE_MAX jobs are already queued or running."""
+
+
+class Job:
+    """State of one job. Workers update progress/partial while it runs; readers take to_dict() snapshots."""
+
+    __slots__ = ("id", "kind", "status", "progress", "partial", "result", "error", "request",
+                 "created_at", "started_at", "finished_at")
+
+    def __init__(self, kind: str, request: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.progress = "Queued"
+        self.partial: Any = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.request = request
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        snapshot = {name: getattr(self, name) for name in self.__slots__}
+        end = self.finished_at or time.time()
+        snapshot["elapsed_seconds"] = round(end - (self.started_at or self.created_at), 3)
+        return snapshot
+
+
+JobFn = Callable[[Job], Any]
+
+
+class JobQueue:
+    """Bounded thread pool plus an in-memory job store keyed by id."""
+
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = JOB_QUEUE_MAX,
+                 result_ttl_seconds: float = JOB_RESULT_TTL_SECONDS):
+        self.max_pending = max_pending
+        self.result_ttl_seconds = result_ttl_seconds
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    def submit(self, kind: str, fn: JobFn, request: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Queues fn(job) and returns the job id.
+
+        Args:
+            kind: Job type label (e.g. "resume", "evaluation").
+            fn: Work to run on a pool thread. It may set job.progress / job.partial as it goes;
+                its return value becomes job.result and an exception marks the job failed.
+            request: JSON-serializable description of the inputs, returned with the job.
+
+        Raises:
+            JobQueueFull: If max_pending jobs are already queued or running.
+        """
+        job = Job(kind, request or {})
+        with self._lock:
+            self._evict_expired()
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise JobQueueFull(f"{self._pending} jobs are already queued or running.")
+            self._pending += 1
+            self._jobs[job.id] = job
+            self._stats["submitted"] += 1
+        self._executor.submit(self._run, job, fn)
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Returns a snapshot of the job, or None if the id is unknown or has expired."""
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = self._pending
+            stats["stored"] = len(self._jobs)
+        return stats
+
+    def _run(self, job: Job, fn: JobFn) -> None:
+        job.status, job.progress, job.started_at = RUNNING, "Running", time.time()
+        try:
+            job.result = fn(job)
+            job.status, job.progress = DONE, "Done"
+        except Exception as e:
+            log_event("JobQueue", "Job failed.", level="error", kind=job.kind, job_id=job.id, error=str(e))
+            job.error = str(e)
+            job.status, job.progress = FAILED, "Failed"
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+                self._stats["completed" if job.status == DONE else "failed"] += 1
+
+    def _evict_expired(self) -> None:
+        """Drops finished jobs older than the TTL. Caller holds the lock."""
+        cutoff = time.time() - self.result_ttl_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Returns the process-wide job queue, creating it on first use."""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue()
+    return _job_queue
@@ -1,18 +1,101 @@
-from typing import Tuple, Optional, Union, List # Added typing imports
+import asyncio
+import concurrent.futures
+import os
+import threading
+from collections import OrderedDict
+from typing import Tuple, Optional, Union, List, Dict, Any, Iterator, Set # Added typing imports
 from agents.resume_analyzer import ResumeAnalyzer
+from agents.results import ResumeAnalysis
 from agents.question_generator import QuestionGenerator
 from agents.code_evaluator import CodeEvaluator
+from agents.static_analysis import analyze_code
+from agents.resume_cache import fingerprint
+from agents.code_sandbox import get_code_sandbox
+from agents.job_queue import Job, get_job_queue
+from agents.interview_store import get_interview_store
+from llm_resilience import Deadline
+from startup_timing import times_first_call
+from metrics import log_event, register_collector, span
 # from utils import generate_text_from_gemini # If manager directly uses Gemini
 
+# Default end-to-end budget (seconds) per ManagerAgent call; unset means no deadline.
+DEFAULT_TIMEOUT_SECONDS = float(os.environ["PIPELINE_TIMEOUT_SECONDS"]) if os.environ.get("PIPELINE_TIMEOUT_SECONDS") else None
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+# Generate every difficulty as soon as skills are known, so switching difficulty is instant.
+SPECULATIVE_DIFFICULTIES = os.environ.get("SPECULATIVE_DIFFICULTIES", "1").lower() not in ("0", "false", "no")
+# Resumes whose per-difficulty questions are kept in memory.
+QUESTION_SET_CACHE_SIZE = int(os.environ.get("QUESTION_SET_CACHE_SIZE", 256))
+# Questions whose generated test cases are kept in memory.
+TEST_CASE_CACHE_SIZE = int(os.environ.get("TEST_CASE_CACHE_SIZE", 512))
+
+_question_executor = concurrent.futures.ThreadPoolExecutor(max_workers=3 * len(DIFFICULTIES), thread_name_prefix="question-gen")
+
+
+def _failed(future: concurrent.futures.Future) -> bool:
+    """True once a future was cancelled, raised or returned None; such entries are started again."""
+    return future.done() and (future.cancelled() or future.exception() is not None or future.result() is None)
+
+
+def _question_result(future: concurrent.futures.Future, deadline: Optional[Deadline]) -> Optional[str]:
+    """Waits for a question future until the deadline; None if it is not ready in time or failed."""
+    try:
+        return future.result(timeout=deadline.remaining() if deadline is not None else None)
+    except concurrent.futures.TimeoutError:
+        log_event("ManagerAgent", "Question not ready before the deadline.", level="warning")
+    except Exception as e:
+        log_event("ManagerAgent", "Question generation failed.", level="warning", error=str(e))
+    return None
+
+
 class ManagerAgent:
-    def __init__(self):
-        """Initializes the ManagerAgent and its subordinate agents."""
-        self.resume_analyzer = ResumeAnalyzer()
-        self.question_generator = QuestionGenerator()
-        self.code_evaluator = CodeEvaluator()
+    def __init__(self, resume_model: Optional[str] = None, question_model: Optional[str] = None,
+                 evaluation_model: Optional[str] = None, cache_questions: bool = True,
+                 default_timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS,
+                 speculative_difficulties: bool = SPECULATIVE_DIFFICULTIES):
+        """
+        Initializes the ManagerAgent and its subordinate agents.
+
+        Args:
+            resume_model: LLM model for the ResumeAnalyzer (backend default if None).
+            question_model: LLM model for the QuestionGenerator (backend default if None).
+            evaluation_model: LLM model for the CodeEvaluator (backend default if None).
+            cache_questions: Set to False to always ask the model for a fresh question
+                instead of reusing a cached one for the same skills and difficulty.
+            default_timeout: End-to-end deadline in seconds applied to each call when the
+                caller does not pass one (PIPELINE_TIMEOUT_SECONDS; None disables it).
+            speculative_difficulties: Once skills are extracted, generate questions for every
+                difficulty concurrently and keep them per resume (SPECULATIVE_DIFFICULTIES).
+        """
+        self.resume_analyzer = ResumeAnalyzer(model_name=resume_model)
+        self.question_generator = QuestionGenerator(model_name=question_model, use_cache=cache_questions)
+        self.code_evaluator = CodeEvaluator(model_name=evaluation_model)
+        self.default_timeout = default_timeout
+        self.speculative_difficulties = speculative_difficulties
+        # resume fingerprint -> {difficulty: Future[Optional[str]]}, least recently used first.
+        self._question_sets: "OrderedDict[str, Dict[str, concurrent.futures.Future]]" = OrderedDict()
+        self._question_sets_lock = threading.Lock()
+        # Speculative generate_async tasks, referenced until done so they are not garbage collected.
+        self._question_tasks: "Set[asyncio.Task]" = set()
+        # Local test execution; test cases are generated in the background as soon as a question exists.
+        self.code_sandbox = get_code_sandbox()
+        self._test_cases: "OrderedDict[str, concurrent.futures.Future]" = OrderedDict()
+        self._test_cases_lock = threading.Lock()
+        # Shared by every ManagerAgent in the process so jobs outlive the session that submitted them.
+        self.job_queue = get_job_queue()
+        # Candidates, questions and evaluations are recorded here (writes are batched in the background).
+        self.interview_store = get_interview_store()
+        # The shared caches and the job queue report their counters on the metrics endpoint.
+        for name, component in (("jobs", self.job_queue), ("resume_cache", self.resume_analyzer.resume_cache),
+                                ("question_bank", self.question_generator.question_bank),
+                                ("code_evaluation_cache", self.code_evaluator.evaluation_cache),
+                                ("submission_history", self.code_evaluator.submission_history),
+                                ("interview_store", self.interview_store)):
+            if component is not None:
+                register_collector(name, component.stats)
         print("ManagerAgent initialized with sub-agents.")
 
-    def process_resume_and_generate_question(self, resume_content: bytes, file_name: str, difficulty: str) -> Tuple[Optional[Union[List[str], str]], Optional[str]]:
+    @times_first_call("first resume request")
+    def process_resume_and_generate_question(self, resume_content: bytes, file_name: str, difficulty: str, timeout: Optional[float] = None) -> Tuple[Optional[Union[List[str], str]], Optional[str]]:
         """
         Coordinates the resume analysis and question generation process.
 
@@ -20,37 +103,206 @@ class ManagerAgent:
             resume_content: The content of the uploaded resume as bytes.
             file_name: The name of the uploaded file.
             difficulty: The desired difficulty level for the question (e.g., "Easy", "Medium", "Hard").
+            timeout: End-to-end deadline in seconds shared by every step (defaults to default_timeout).
 
         Returns:
             A tuple containing (extracted_skills, generated_question).
             Returns (None, None) if any step fails, or (skills, None) if only question generation fails.
         """
-        print(f"ManagerAgent: Received resume '{file_name}' for {difficulty} question, starting analysis...")
-        
-        extracted_skills_data = self.resume_analyzer.analyze(resume_content, file_name)
+        log_event("ManagerAgent", "Received resume, starting analysis.", file_name=file_name,
+                  difficulty=difficulty, resume_bytes=len(resume_content))
+
+        with span("ManagerAgent", "resume_pipeline"):
+            deadline = self._deadline(timeout)
+            extracted_skills_data = self.resume_analyzer.analyze(resume_content, file_name, deadline=deadline)
+            skills, experience = self._skills_and_experience(extracted_skills_data)
+            if skills is None:
+                return None, None
+            resume_fingerprint = fingerprint(resume_content)
+            self._record_candidate(resume_fingerprint, file_name, skills, experience)
+
+            with span("ManagerAgent", "question_wait"):
+                if self.speculative_difficulties:
+                    future = self._question_futures(resume_fingerprint, skills, experience, difficulty, deadline)[difficulty]
+                    generated_question = _question_result(future, deadline)
+                else:
+                    generated_question = self.question_generator.generate(skills, experience, difficulty, deadline=deadline)
+            return self._finish_question(skills, generated_question, resume_fingerprint, difficulty)
+
+    async def process_resume_and_generate_question_async(self, resume_content: bytes, file_name: str, difficulty: str, timeout: Optional[float] = None) -> Tuple[Optional[Union[List[str], str]], Optional[str]]:
+        """
+        Async variant of process_resume_and_generate_question.
+
+        Awaiting it never blocks the event loop, so one worker process can keep many
+        interviews in flight concurrently.
+
+        Args:
+            resume_content: The content of the uploaded resume as bytes.
+            file_name: The name of the uploaded file.
+            difficulty: The desired difficulty level for the question.
+            timeout: End-to-end deadline in seconds shared by every step (defaults to default_timeout).
+
+        Returns:
+            Same as process_resume_and_generate_question.
+        """
+        log_event("ManagerAgent", "Received resume, starting analysis.", file_name=file_name,
+                  difficulty=difficulty, resume_bytes=len(resume_content))
+
+        with span("ManagerAgent", "resume_pipeline"):
+            deadline = self._deadline(timeout)
+            extracted_skills_data = await self.resume_analyzer.analyze_async(resume_content, file_name, deadline=deadline)
+            skills, experience = self._skills_and_experience(extracted_skills_data)
+            if skills is None:
+                return None, None
+            resume_fingerprint = fingerprint(resume_content)
+            self._record_candidate(resume_fingerprint, file_name, skills, experience)
+
+            with span("ManagerAgent", "question_wait"):
+                if self.speculative_difficulties:
+                    future = self._question_futures(resume_fingerprint, skills, experience, difficulty, deadline,
+                                                    use_asyncio=True)[difficulty]
+                    # Shielded: the question set is shared, so one caller giving up must not cancel it.
+                    try:
+                        generated_question = await asyncio.wait_for(
+                            asyncio.shield(asyncio.wrap_future(future)),
+                            timeout=deadline.remaining() if deadline is not None else None)
+                    except asyncio.TimeoutError:
+                        log_event("ManagerAgent", "Question not ready before the deadline.", level="warning")
+                        generated_question = None
+                else:
+                    generated_question = await self.question_generator.generate_async(skills, experience, difficulty, deadline=deadline)
+            return self._finish_question(skills, generated_question, resume_fingerprint, difficulty)
+
+    def generate_all_questions(self, resume_content: bytes, file_name: str, timeout: Optional[float] = None) -> Tuple[Optional[Union[List[str], str]], Dict[str, Optional[str]]]:
+        """
+        Analyzes the resume once and generates a question for every difficulty concurrently.
+
+        Results are kept per resume, so later calls to process_resume_and_generate_question
+        for the same file return immediately for any difficulty.
+
+        Args:
+            resume_content: The content of the uploaded resume as bytes.
+            file_name: The name of the uploaded file.
+            timeout: End-to-end deadline in seconds (defaults to default_timeout).
+
+        Returns:
+            A tuple of (extracted_skills, {difficulty: question or None}).
+            Returns (None, {}) if resume analysis fails.
+        """
+        deadline = self._deadline(timeout)
+        extracted_skills_data = self.resume_analyzer.analyze(resume_content, file_name, deadline=deadline)
+        skills, experience = self._skills_and_experience(extracted_skills_data)
+        if skills is None:
+            return None, {}
+        resume_fingerprint = fingerprint(resume_content)
+        self._record_candidate(resume_fingerprint, file_name, skills, experience)
+        futures = self._question_futures(resume_fingerprint, skills, experience, DIFFICULTIES[0], deadline)
+        questions = {difficulty: _question_result(futures[difficulty], deadline) for difficulty in DIFFICULTIES}
+        for difficulty, question in questions.items():
+            if question:
+                self._test_case_future(question)
+                if self.interview_store is not None:
+                    self.interview_store.record_question(resume_fingerprint, question, difficulty)
+        return skills, questions
+
+    def _question_futures(self, resume_fingerprint: str, skills: Union[List[str], str], experience: int,
+                          difficulty: str, deadline: Optional[Deadline],
+                          use_asyncio: bool = False) -> Dict[str, concurrent.futures.Future]:
+        """
+        Returns this resume's per-difficulty question futures, starting any that are missing or failed.
+
+        The requested difficulty runs under the caller's deadline; speculative ones get a fresh
+        default deadline so they are not cut short when the caller returns.
+
+        With use_asyncio (callers on an event loop), missing levels run as
+        QuestionGenerator.generate_async tasks on the running loop instead of occupying
+        _question_executor threads; either way the entries are concurrent.futures.Future
+        objects, so sync and async callers share them.
+        """
+        with self._question_sets_lock:
+            futures = self._question_sets.get(resume_fingerprint)
+            if futures is None:
+                futures = self._question_sets[resume_fingerprint] = {}
+                while len(self._question_sets) > QUESTION_SET_CACHE_SIZE:
+                    self._question_sets.popitem(last=False)
+            self._question_sets.move_to_end(resume_fingerprint)
+
+            for level in dict.fromkeys((difficulty,) + DIFFICULTIES):
+                existing = futures.get(level)
+                if existing is not None and not _failed(existing):
+                    continue
+                level_deadline = deadline if level == difficulty else self._deadline(None)
+                start = self._start_question_task if use_asyncio else self._submit_question
+                futures[level] = start(skills, experience, level, level_deadline)
+            return dict(futures)
+
+    def _submit_question(self, skills: Union[List[str], str], experience: int, difficulty: str,
+                         deadline: Optional[Deadline]) -> concurrent.futures.Future:
+        return _question_executor.submit(self.question_generator.generate, skills, experience, difficulty, deadline=deadline)
+
+    def _start_question_task(self, skills: Union[List[str], str], experience: int, difficulty: str,
+                             deadline: Optional[Deadline]) -> concurrent.futures.Future:
+        """Runs generate_async as a task on the running event loop, settling a concurrent future with its outcome."""
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        task = asyncio.get_running_loop().create_task(
+            self.question_generator.generate_async(skills, experience, difficulty, deadline=deadline))
+        self._question_tasks.add(task)
+
+        def settle(finished: asyncio.Task) -> None:
+            self._question_tasks.discard(finished)
+            if finished.cancelled():
+                future.cancel()
+            elif finished.exception() is not None:
+                future.set_exception(finished.exception())
+            else:
+                future.set_result(finished.result())
+
+        task.add_done_callback(settle)
+        return future
+
+    def _deadline(self, timeout: Optional[float]) -> Optional[Deadline]:
+        """Creates the deadline propagated to every agent for one ManagerAgent call."""
+        return Deadline.from_timeout(timeout if timeout is not None else self.default_timeout)
+
+    @staticmethod
+    def _skills_and_experience(extracted_skills_data: Optional[ResumeAnalysis]) -> Tuple[Optional[Union[List[str], str]], Optional[int]]:
+        """Validates the analyzer output; returns (None, None) when skills or experience are missing."""
         if not extracted_skills_data:
-            print("ManagerAgent: Failed to extract skills from resume.")
+            log_event("ManagerAgent", "Failed to extract skills from resume.", level="error")
             return None, None
         
         skills = extracted_skills_data.get("skills")
         experience = extracted_skills_data.get("experience_years")
-        print(f"ManagerAgent: Extracted skills - {skills}, Experience - {experience} years")
-        
+        log_event("ManagerAgent", "Extracted skills.", skill_count=len(skills or []), experience_years=experience)
+
         if not skills or experience is None: # Ensure experience is not None
-            print("ManagerAgent: Missing skills or experience from analysis.")
+            log_event("ManagerAgent", "Missing skills or experience from analysis.", level="error")
             return None, None
+        return skills, experience
+
+    def _record_candidate(self, resume_fingerprint: str, file_name: str, skills: Union[List[str], str], experience: int) -> None:
+        if self.interview_store is not None:
+            self.interview_store.record_candidate(resume_fingerprint, file_name, skills, experience)
 
-        generated_question = self.question_generator.generate(skills, experience, difficulty)
+    def _finish_question(self, skills: Union[List[str], str], generated_question: Optional[str],
+                         resume_fingerprint: Optional[str] = None, difficulty: Optional[str] = None) -> Tuple[Optional[Union[List[str], str]], Optional[str]]:
+        """Builds the (skills, question) result, keeping skills when question generation failed, and records the question."""
         if not generated_question:
-            print("ManagerAgent: Failed to generate a question.")
+            log_event("ManagerAgent", "Failed to generate a question.", level="error")
             # Return skills even if question generation fails, so UI can show something
             return skills, None 
         
-        print(f"ManagerAgent: Generated question - {generated_question[:100]}...")
+        log_event("ManagerAgent", "Generated question.", question_chars=len(generated_question))
+        # Test cases are ready by the time the candidate submits.
+        self._test_case_future(generated_question)
+        if self.interview_store is not None:
+            self.interview_store.record_question(resume_fingerprint, generated_question, difficulty)
 
         return skills, generated_question
 
-    def evaluate_code_submission(self, question: str, code_submission: str, language: str) -> Optional[str]:
+    @times_first_call("first evaluation request")
+    def evaluate_code_submission(self, question: str, code_submission: str, language: str, timeout: Optional[float] = None,
+                                 candidate_id: Optional[str] = None) -> Optional[str]:
         """
         Coordinates the code evaluation process.
 
@@ -58,15 +310,197 @@ class ManagerAgent:
             question: The coding question that was asked.
             code_submission: The user's code submission.
             language: The detected programming language of the submission.
+            timeout: End-to-end deadline in seconds shared by every step (defaults to default_timeout).
+            candidate_id: Resume fingerprint of the candidate (agents.resume_cache.fingerprint of
+                the resume bytes), stored with the evaluation in the interview store.
 
         Returns:
             Feedback on the code submission, or None if evaluation fails.
         """
-        print(f"ManagerAgent: Received {language} code submission for question: {question}")
-        feedback = self.code_evaluator.evaluate(question, code_submission, language)
+        log_event("ManagerAgent", "Received code submission.", language=language, code_chars=len(code_submission))
+        with span("ManagerAgent", "evaluation_pipeline"):
+            deadline = self._deadline(timeout)
+            analysis = self._analyze(code_submission, language)
+            execution = self._execute_submission(question, code_submission, language, deadline, analysis)
+            feedback = self.code_evaluator.evaluate(question, code_submission, language, deadline=deadline, execution=execution, analysis=analysis, candidate_id=candidate_id)
         if not feedback:
-            print("ManagerAgent: Failed to evaluate code.")
+            log_event("ManagerAgent", "Failed to evaluate code.", level="error")
             return None
-        print(f"ManagerAgent: Evaluation feedback - {feedback}")
-        
+        log_event("ManagerAgent", "Evaluation complete.", feedback_chars=len(feedback))
+
+        return feedback
+
+    async def evaluate_code_submission_async(self, question: str, code_submission: str, language: str, timeout: Optional[float] = None,
+                                             candidate_id: Optional[str] = None) -> Optional[str]:
+        """
+        Async variant of evaluate_code_submission.
+
+        Args:
+            question: The coding question that was asked.
+            code_submission: The user's code submission.
+            language: The detected programming language of the submission.
+            timeout: End-to-end deadline in seconds shared by every step (defaults to default_timeout).
+            candidate_id: Resume fingerprint of the candidate (agents.resume_cache.fingerprint of
+                the resume bytes), stored with the evaluation in the interview store.
+
+        Returns:
+            Feedback on the code submission, or None if evaluation fails.
+        """
+        log_event("ManagerAgent", "Received code submission.", language=language, code_chars=len(code_submission))
+        with span("ManagerAgent", "evaluation_pipeline"):
+            deadline = self._deadline(timeout)
+            analysis = self._analyze(code_submission, language)
+            execution = await asyncio.to_thread(self._execute_submission, question, code_submission, language, deadline, analysis)
+            feedback = await self.code_evaluator.evaluate_async(question, code_submission, language, deadline=deadline, execution=execution, analysis=analysis, candidate_id=candidate_id)
+        if not feedback:
+            log_event("ManagerAgent", "Failed to evaluate code.", level="error")
+            return None
+        log_event("ManagerAgent", "Evaluation complete.", feedback_chars=len(feedback))
+
         return feedback
+
+    @times_first_call("first streamed evaluation request")
+    def evaluate_code_submission_stream(self, question: str, code_submission: str, language: str, timeout: Optional[float] = None,
+                                        candidate_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Streams the code evaluation as progressively more complete Markdown.
+
+        Args:
+            question: The coding question that was asked.
+            code_submission: The user's code submission.
+            language: The detected programming language of the submission.
+            timeout: End-to-end deadline in seconds shared by every step (defaults to default_timeout).
+            candidate_id: Resume fingerprint of the candidate, stored with the evaluation.
+
+        Yields:
+            Cumulative Markdown feedback; the last value is the final feedback.
+        """
+        log_event("ManagerAgent", "Received code submission for streaming evaluation.", language=language,
+                  code_chars=len(code_submission))
+        with span("ManagerAgent", "evaluation_pipeline"):
+            deadline = self._deadline(timeout)
+            analysis = self._analyze(code_submission, language)
+            execution = self._execute_submission(question, code_submission, language, deadline, analysis)
+            yield from self.code_evaluator.evaluate_stream(question, code_submission, language, deadline=deadline, execution=execution, analysis=analysis, candidate_id=candidate_id)
+
+    def submit_resume_job(self, resume_content: bytes, file_name: str, difficulty: str, timeout: Optional[float] = None) -> str:
+        """
+        Queues process_resume_and_generate_question on the job pool and returns the job id at once.
+
+        The finished job's result is {"skills", "question", "difficulty", "candidate_id"}.
+
+        Raises:
+            agents.job_queue.JobQueueFull: If the job pool is saturated.
+        """
+        def run(job: Job) -> Dict[str, Any]:
+            job.progress = f"Analyzing resume and generating {difficulty} question"
+            skills, question = self.process_resume_and_generate_question(resume_content, file_name, difficulty, timeout)
+            return {"skills": skills, "question": question, "difficulty": difficulty,
+                    "candidate_id": fingerprint(resume_content)}
+
+        job_id = self.job_queue.submit("resume", run, {"file_name": file_name, "difficulty": difficulty})
+        log_event("ManagerAgent", "Queued resume job.", job_id=job_id, file_name=file_name)
+        return job_id
+
+    def submit_evaluation_job(self, question: str, code_submission: str, language: str, timeout: Optional[float] = None,
+                              candidate_id: Optional[str] = None) -> str:
+        """
+        Queues a streamed code evaluation on the job pool and returns the job id at once.
+
+        While it runs, the job's "partial" holds the feedback Markdown streamed so far; the
+        finished job's result is {"feedback"}.
+
+        Raises:
+            agents.job_queue.JobQueueFull: If the job pool is saturated.
+        """
+        def run(job: Job) -> Dict[str, Any]:
+            job.progress = f"Evaluating {language} code"
+            feedback = None
+            for partial_feedback in self.evaluate_code_submission_stream(question, code_submission, language, timeout, candidate_id):
+                feedback = job.partial = partial_feedback
+            return {"feedback": feedback}
+
+        job_id = self.job_queue.submit(
+            "evaluation", run, {"question": question, "code": code_submission, "language": language,
+                                "candidate_id": candidate_id})
+        log_event("ManagerAgent", "Queued evaluation job.", job_id=job_id)
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns a snapshot of a submitted job: id, kind, status ("queued", "running", "done" or
+        "failed"), progress, partial, result, error, request and timings. None if unknown or expired.
+        """
+        return self.job_queue.get(job_id)
+
+    @staticmethod
+    def _analyze(code_submission: str, language: str) -> Dict[str, Any]:
+        """Runs the static pre-pass, timed as its own stage."""
+        with span("ManagerAgent", "static_analysis", language=language):
+            return analyze_code(code_submission, language)
+
+    def _test_case_future(self, question: str) -> Optional[concurrent.futures.Future]:
+        """Returns the future holding the question's test cases, starting generation if needed (None without a sandbox)."""
+        if self.code_sandbox is None:
+            return None
+        with self._test_cases_lock:
+            future = self._test_cases.get(question)
+            if future is None or _failed(future):
+                future = self._test_cases[question] = _question_executor.submit(
+                    self.question_generator.generate_test_cases, question, deadline=self._deadline(None))
+                while len(self._test_cases) > TEST_CASE_CACHE_SIZE:
+                    self._test_cases.popitem(last=False)
+            self._test_cases.move_to_end(question)
+            return future
+
+    def _execute_submission(self, question: str, code_submission: str, language: str,
+                            deadline: Optional[Deadline], analysis: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Runs the submission against the question's generated test cases in the sandbox.
+
+        Returns:
+            The CodeSandbox.run_tests result, or None when the language has no local runtime,
+            no test cases could be generated in time, the static pre-pass already rejected
+            the submission, or the sandbox is disabled.
+        """
+        if self.code_sandbox is None or not self.code_sandbox.supports(language):
+            return None
+        if analysis is not None and analysis["fail_fast"]:
+            return None
+        future = self._test_case_future(question)
+        try:
+            with span("ManagerAgent", "test_case_wait"):
+                test_cases = future.result(timeout=deadline.remaining() if deadline is not None else None)
+        except concurrent.futures.TimeoutError:
+            log_event("ManagerAgent", "Test cases not ready before the deadline; evaluating without execution.", level="warning")
+            return None
+        except Exception as e:
+            log_event("ManagerAgent", "Test case generation failed; evaluating without execution.", level="warning",
+                      error=str(e))
+            return None
+        if not test_cases:
+            return None
+        with span("ManagerAgent", "sandbox", language=language):
+            execution = self.code_sandbox.run_tests(code_submission, language, test_cases, deadline=deadline)
+        log_event("ManagerAgent", "Sandbox run finished.", status=execution["status"],
+                  passed=execution["passed"], total=execution["total"])
+        return execution
+
+
+_manager_agent: Optional[ManagerAgent] = None
+_manager_agent_lock = threading.Lock()
+
+
+def get_manager_agent() -> ManagerAgent:
+    """
+    Returns the process-wide ManagerAgent, creating it on first use.
+
+    The agents hold no per-session state (their caches are locked), so every Streamlit
+    session and API request can share one instance and its clients, caches and pools.
+    """
+    global _manager_agent
+    if _manager_agent is None:
+        with _manager_agent_lock:
+            if _manager_agent is None:
+                _manager_agent = ManagerAgent()
+    return _manager_agent
@@ -0,0 +1,357 @@
+"""
+Persistent bank of pre-generated coding questions with nearest-neighbour lookup.
+
+Questions are stored in SQLite keyed by difficulty and experience bucket, together
+with the skill profile they were generated for. Each entry is embedded as an
+L2-normalised TF-IDF vector over canonical skill tokens (aliases are folded through
+the skill taxonomy, and skills mentioned in the question text count at half weight).
+A candidate's skills are matched against a whole bucket with two matrix-vector
+products over the raw token weights (one for the dot product, one for the row norms
+under the current IDF), so adding a question only appends a row to its bucket and
+never rebuilds the index. The best match above QUESTION_BANK_MIN_SCORE is served
+instead of calling the LLM, preferring the least-served question for variety.
+Questions written by other processes sharing the bank file are picked up by the
+refill thread every QUESTION_BANK_SYNC_SECONDS.
+
+Misses, and hits with few close variants, queue a background refill that generates
+more questions for that profile.
+"""
+import json
+import math
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from llm_cache import CACHE_DIR
+from agents.skill_taxonomy import get_local_extractor
+from metrics import log_event
+
+QUESTION_BANK_ENABLED = os.environ.get("QUESTION_BANK_ENABLED", "1").lower() not in ("0", "false", "no")
+QUESTION_BANK_PATH = os.environ.get("QUESTION_BANK_PATH", os.path.join(CACHE_DIR, "question_bank.sqlite3"))
+# Cosine similarity needed to serve a banked question.
+QUESTION_BANK_MIN_SCORE = float(os.environ.get("QUESTION_BANK_MIN_SCORE", 0.6))
+# Close variants to keep per profile; fewer triggers a background refill.
+QUESTION_BANK_TARGET_VARIANTS = int(os.environ.get("QUESTION_BANK_TARGET_VARIANTS", 3))
+QUESTION_BANK_REFILL_QUEUE = int(os.environ.get("QUESTION_BANK_REFILL_QUEUE", 100))
+QUESTION_BANK_SYNC_SECONDS = float(os.environ.get("QUESTION_BANK_SYNC_SECONDS", 30))
+
+# Upper bounds (inclusive) of the experience buckets.
+EXPERIENCE_BUCKETS: Tuple[Tuple[int, str], ...] = ((1, "0-1"), (4, "2-4"), (9, "5-9"))
+QUESTION_TEXT_WEIGHT = 0.5
+
+GenerateFn = Callable[[List[str], int, str], Optional[str]]
+
+
+def experience_bucket(experience_years: int) -> str:
+    """Maps years of experience to its bank bucket ("0-1", "2-4", "5-9" or "10+")."""
+    for upper, label in EXPERIENCE_BUCKETS:
+        if experience_years <= upper:
+            return label
+    return "10+"
+
+
+def normalize_skills(skills: Union[List[str], str]) -> List[str]:
+    """Accepts the skills list or a comma-separated string; returns stripped, non-empty names."""
+    if isinstance(skills, str):
+        skills = skills.split(",")
+    return [str(skill).strip() for skill in skills if str(skill).strip()]
+
+
+def skill_tokens(skills: List[str], question: Optional[str] = None) -> Dict[str, float]:
+    """
+    Returns {token: weight} for a skill profile.
+
+    Each skill is folded to its canonical taxonomy name(s) when it matches one
+    ("JS" -> "JavaScript"), otherwise to its lowercased text.
+    """
+    taxonomy = get_local_extractor().taxonomy
+    tokens: Dict[str, float] = {}
+    for skill in skills:
+        canonical = list(taxonomy.find_skills(skill)) or [skill.lower()]
+        for token in canonical:
+            tokens[token] = 1.0
+    if question:
+        for token in taxonomy.find_skills(question):
+            tokens.setdefault(token, QUESTION_TEXT_WEIGHT)
+    return tokens
+
+
+class _Segment:
+    """Raw token weights for one (difficulty, experience bucket), grown in place as questions are added."""
+
+    __slots__ = ("ids", "weights", "squared")
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.weights = np.zeros((8, 16), dtype=np.float32)
+        self.squared = np.zeros((8, 16), dtype=np.float32)
+
+    def append(self, entry_id: int, columns: Dict[int, float]) -> None:
+        row = len(self.ids)
+        rows, cols = self.weights.shape
+        width = max(columns) + 1
+        if row >= rows or width > cols:
+            grown_rows = rows * 2 if row >= rows else rows
+            grown_cols = max(cols, 2 * width) if width > cols else cols
+            self.weights = _grow(self.weights, grown_rows, grown_cols)
+            self.squared = _grow(self.squared, grown_rows, grown_cols)
+        for column, weight in columns.items():
+            self.weights[row, column] = weight
+            self.squared[row, column] = weight * weight
+        self.ids.append(entry_id)
+
+
+def _grow(matrix: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    grown = np.zeros((rows, cols), dtype=matrix.dtype)
+    grown[:matrix.shape[0], :matrix.shape[1]] = matrix
+    return grown
+
+
+class QuestionBank:
+    """SQLite-backed question store with an in-memory TF-IDF index updated incrementally as questions are added."""
+
+    def __init__(self, path: str = QUESTION_BANK_PATH, min_score: float = QUESTION_BANK_MIN_SCORE,
+                 target_variants: int = QUESTION_BANK_TARGET_VARIANTS):
+        self.min_score = min_score
+        self.target_variants = target_variants
+        self._lock = threading.RLock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS question_bank ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, difficulty TEXT NOT NULL, experience_bucket TEXT NOT NULL, "
+            "tokens TEXT NOT NULL, question TEXT NOT NULL, served INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS question_bank_segment ON question_bank(difficulty, experience_bucket)"
+        )
+        # Columns are assigned in first-seen order, so existing rows never move when the vocabulary grows.
+        self._vocabulary: Dict[str, int] = {}
+        self._document_frequency: List[int] = []
+        self._idf: Optional[np.ndarray] = None
+        self._segments: Dict[Tuple[str, str], _Segment] = {}
+        self._questions: Dict[int, str] = {}
+        self._served: Dict[int, int] = {}
+        self._last_id = 0
+        self._stats = {"hits": 0, "misses": 0, "refills_queued": 0, "refills_added": 0}
+        self._refill_queue: "queue.Queue[Tuple[List[str], int, str]]" = queue.Queue(QUESTION_BANK_REFILL_QUEUE)
+        self._refill_pending: set = set()
+        self._refiller: Optional[threading.Thread] = None
+        self._generate: Optional[GenerateFn] = None
+        with self._lock:
+            self._catch_up()
+
+    # --- public API -------------------------------------------------------
+
+    def lookup(self, skills: Union[List[str], str], experience_years: int, difficulty: str) -> Optional[str]:
+        """
+        Returns a banked question for this profile, or None when nothing is similar enough.
+
+        Queues a background refill when the profile has fewer than target_variants close matches.
+        """
+        skills = normalize_skills(skills)
+        key = (difficulty.title(), experience_bucket(experience_years))
+        with self._lock:
+            matches = self._matches(key, skill_tokens(skills))
+            if not matches:
+                self._stats["misses"] += 1
+                chosen = None
+            else:
+                self._stats["hits"] += 1
+                # Least-served first so similar candidates do not all get the same question.
+                chosen = min(matches, key=lambda match: (self._served[match[0]], -match[1]))
+                self._served[chosen[0]] += 1
+                self._conn.execute("UPDATE question_bank SET served = served + 1 WHERE id = ?", (chosen[0],))
+        if len(matches) < self.target_variants:
+            self.request_refill(skills, experience_years, difficulty)
+        if chosen is None:
+            return None
+        log_event("QuestionBank", "Serving banked question.", difficulty=key[0], score=round(chosen[1], 3),
+                  close_variants=len(matches))
+        return self._questions[chosen[0]]
+
+    def add(self, skills: Union[List[str], str], experience_years: int, difficulty: str, question: str) -> None:
+        """Stores a generated question under the profile it was generated for."""
+        tokens = skill_tokens(normalize_skills(skills), question)
+        key = (difficulty.title(), experience_bucket(experience_years))
+        with self._lock:
+            duplicate = self._conn.execute(
+                "SELECT 1 FROM question_bank WHERE difficulty = ? AND experience_bucket = ? AND question = ?",
+                (key[0], key[1], question),
+            ).fetchone()
+            if duplicate:
+                return
+            self._conn.execute(
+                "INSERT INTO question_bank (difficulty, experience_bucket, tokens, question, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key[0], key[1], json.dumps(tokens), question, time.time()),
+            )
+            # Indexes the new row (and any written by other processes since the last sync).
+            self._catch_up()
+
+    def request_refill(self, skills: Union[List[str], str], experience_years: int, difficulty: str) -> None:
+        """Queues background generation for a profile (no-op if no generator is attached or it is already queued)."""
+        if self._generate is None:
+            return
+        skills = normalize_skills(skills)
+        pending_key = (difficulty.title(), experience_bucket(experience_years), tuple(sorted(skill_tokens(skills))))
+        with self._lock:
+            if pending_key in self._refill_pending:
+                return
+            try:
+                self._refill_queue.put_nowait((skills, experience_years, difficulty))
+            except queue.Full:
+                return
+            self._refill_pending.add(pending_key)
+            self._stats["refills_queued"] += 1
+
+    def start_refiller(self, generate: GenerateFn) -> None:
+        """Attaches the question generator and starts the background refill thread (once per bank)."""
+        with self._lock:
+            self._generate = generate
+            if self._refiller is None:
+                self._refiller = threading.Thread(target=self._refill_loop, name="question-bank-refill", daemon=True)
+                self._refiller.start()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self)
+            stats["refill_queue_depth"] = self._refill_queue.qsize()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM question_bank").fetchone()[0]
+
+    # --- internals --------------------------------------------------------
+
+    def _matches(self, key: Tuple[str, str], tokens: Dict[str, float]) -> List[Tuple[int, float]]:
+        """Returns [(id, score)] for entries in the segment scoring at least min_score. Caller holds the lock."""
+        segment = self._segments.get(key)
+        query = self._vectorize(tokens)
+        if segment is None or query is None:
+            return []
+        # Rows store raw weights: cosine(row * idf, query) = (row @ (idf * query)) / sqrt(row^2 @ idf^2).
+        # Columns past the segment's width are zero in every row, so they can be dropped.
+        width = min(segment.weights.shape[1], len(query))
+        idf = self._idf_vector()[:width]
+        count = len(segment.ids)
+        norms = np.sqrt(segment.squared[:count, :width] @ (idf * idf))
+        scores = (segment.weights[:count, :width] @ (idf * query[:width])) / np.where(norms == 0, 1.0, norms)
+        hits = np.flatnonzero(scores >= self.min_score)
+        return [(segment.ids[i], float(scores[i])) for i in hits]
+
+    def _vectorize(self, tokens: Dict[str, float]) -> Optional[np.ndarray]:
+        idf = self._idf_vector()
+        vector = np.zeros(len(self._vocabulary), dtype=np.float32)
+        # Skills no banked question covers still count towards the norm, lowering the score.
+        unseen_idf = math.log(1 + len(self._questions)) + 1.0
+        unseen_sq = 0.0
+        for token, weight in tokens.items():
+            index = self._vocabulary.get(token)
+            if index is not None:
+                vector[index] = weight * idf[index]
+            else:
+                unseen_sq += (weight * unseen_idf) ** 2
+        if not vector.any():
+            return None
+        return vector / math.sqrt(float(vector @ vector) + unseen_sq)
+
+    def _idf_vector(self) -> np.ndarray:
+        """Smoothed IDF per vocabulary column, recomputed after the bank changes."""
+        if self._idf is None:
+            document_frequency = np.asarray(self._document_frequency, dtype=np.float64)
+            self._idf = (np.log((1 + len(self._questions)) / (1 + document_frequency)) + 1.0).astype(np.float32)
+        return self._idf
+
+    def _catch_up(self) -> int:
+        """Indexes rows added since the last call, by this or another process; returns how many. Caller holds the lock."""
+        rows = self._conn.execute(
+            "SELECT id, difficulty, experience_bucket, tokens, question, served FROM question_bank "
+            "WHERE id > ? ORDER BY id", (self._last_id,)
+        ).fetchall()
+        for entry_id, difficulty, bucket, tokens_json, question, served in rows:
+            columns: Dict[int, float] = {}
+            for token, weight in json.loads(tokens_json).items():
+                column = self._vocabulary.get(token)
+                if column is None:
+                    column = self._vocabulary[token] = len(self._vocabulary)
+                    self._document_frequency.append(0)
+                self._document_frequency[column] += 1
+                columns[column] = weight
+            segment = self._segments.get((difficulty, bucket))
+            if segment is None:
+                segment = self._segments[(difficulty, bucket)] = _Segment()
+            if columns:
+                segment.append(entry_id, columns)
+            self._questions[entry_id] = question
+            self._served[entry_id] = served
+            self._last_id = entry_id
+        if rows:
+            self._idf = None
+        return len(rows)
+
+    def _refill_loop(self) -> None:
+        while True:
+            try:
+                skills, experience_years, difficulty = self._refill_queue.get(timeout=QUESTION_BANK_SYNC_SECONDS)
+            except queue.Empty:
+                try:
+                    with self._lock:
+                        self._catch_up()
+                except sqlite3.Error as e:
+                    log_event("QuestionBank", "Index sync failed.", level="error", error=str(e))
+                continue
+            key = (difficulty.title(), experience_bucket(experience_years))
+            tokens = skill_tokens(skills)
+            try:
+                with self._lock:
+                    enough = len(self._matches(key, tokens)) >= self.target_variants
+                if not enough:
+                    question = self._generate(skills, experience_years, difficulty)
+                    if question:
+                        self.add(skills, experience_years, difficulty, question)
+                        with self._lock:
+                            self._stats["refills_added"] += 1
+            except Exception as e:
+                log_event("QuestionBank", "Background refill failed.", level="error", difficulty=key[0], error=str(e))
+            finally:
+                with self._lock:
+                    self._refill_pending.discard((key[0], key[1], tuple(sorted(tokens))))
+
+
+_question_bank: Optional[QuestionBank] = None
+_question_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> Optional[QuestionBank]:
+    """Returns the process-wide question bank, or None if disabled or the bank file cannot be opened."""
+    global _question_bank
+    if not QUESTION_BANK_ENABLED:
+        return None
+    if _question_bank is None:
+        with _question_bank_lock:
+            if _question_bank is None:
+                try:
+                    _question_bank = QuestionBank()
+                except (sqlite3.Error, OSError) as e:
+                    log_event("QuestionBank", f"Question bank unavailable: {e}", level="error")
+                    return None
+    return _question_bank
@@ -1,6 +1,6 @@
 import sys
 import os
-from typing import Optional, List, Union # Correct type hints
+from typing import Optional, List, Union, Dict, Any # Correct type hints
 
 # Ensure the 'agents' directory is in the Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -8,13 +8,30 @@ project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from utils import generate_text_from_gemini # Gemini helper
+from utils import generate_text_from_gemini, generate_text_from_gemini_async # Gemini helpers
+from llm_resilience import Deadline
+from llm_json import extract_json
+from agents.question_bank import get_question_bank
+from metrics import log_event, record_cache_lookup, span
 
 class QuestionGenerator:
-    def __init__(self):
+    def __init__(self, model_name: Optional[str] = None, use_cache: bool = True):
+        """
+        Initializes the QuestionGenerator agent.
+
+        Args:
+            model_name: LLM model used for question generation. Defaults to the backend's default model.
+            use_cache: Whether LLM responses may be served from the response cache. Also
+                controls the pre-generated question bank.
+        """
+        self.model_name = model_name
+        self.use_cache = use_cache
+        self.question_bank = get_question_bank() if use_cache else None
+        if self.question_bank is not None:
+            self.question_bank.start_refiller(self._generate_for_bank)
         print("QuestionGenerator initialized.")
 
-    def generate(self, skills: Union[List[str], str], experience: int, difficulty: str) -> Optional[str]:
+    def generate(self, skills: Union[List[str], str], experience: int, difficulty: str, deadline: Optional[Deadline] = None) -> Optional[str]:
         """
         Generates a coding question based on the provided skills and experience.
         Uses Gemini API.
@@ -23,47 +40,185 @@ class QuestionGenerator:
             skills: A list of skills (e.g., ["Python", "Django"]) or a single skill string.
             experience: Years of experience as an integer.
             difficulty: The desired difficulty of the question (e.g., "Easy", "Medium", "Hard").
+            deadline: Optional llm_resilience.Deadline propagated to the LLM call.
 
         Returns:
             A string containing the generated coding question, or None if generation fails.
         """
+        with span("QuestionGenerator", "prompt_build"):
+            prompt = self._build_prompt(skills, experience, difficulty)
+        if prompt is None:
+            return None
+        banked_question = self._banked_question(skills, experience, difficulty)
+        if banked_question is not None:
+            return banked_question
+
+        try:
+            log_event("QuestionGenerator", "Generating question.", difficulty=difficulty,
+                      skill_count=len(skills) if isinstance(skills, list) else 1, experience_years=experience)
+            
+            question_text = generate_text_from_gemini(prompt, model_name=self.model_name, use_cache=self.use_cache, deadline=deadline)
+            with span("QuestionGenerator", "post_process"):
+                return self._bank_question(skills, experience, difficulty, self._clean_question(question_text))
+        except Exception as e:
+            log_event("QuestionGenerator", f"Error during Gemini API call or processing: {e}", level="error")
+            return None
+
+    async def generate_async(self, skills: Union[List[str], str], experience: int, difficulty: str, deadline: Optional[Deadline] = None) -> Optional[str]:
+        """
+        Async variant of generate using the backend's async generation call.
+
+        Args:
+            skills: A list of skills or a single skill string.
+            experience: Years of experience as an integer.
+            difficulty: The desired difficulty of the question.
+            deadline: Optional llm_resilience.Deadline propagated to the LLM call.
+
+        Returns:
+            The generated question text, or None if generation fails.
+        """
+        with span("QuestionGenerator", "prompt_build"):
+            prompt = self._build_prompt(skills, experience, difficulty)
+        if prompt is None:
+            return None
+        banked_question = self._banked_question(skills, experience, difficulty)
+        if banked_question is not None:
+            return banked_question
+
+        try:
+            question_text = await generate_text_from_gemini_async(prompt, model_name=self.model_name, use_cache=self.use_cache, deadline=deadline)
+            with span("QuestionGenerator", "post_process"):
+                return self._bank_question(skills, experience, difficulty, self._clean_question(question_text))
+        except Exception as e:
+            log_event("QuestionGenerator", f"Error during Gemini API call or processing: {e}", level="error")
+            return None
+
+    def generate_test_cases(self, question: str, deadline: Optional[Deadline] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Generates test cases for a question, for local execution of submissions.
+
+        Args:
+            question: The coding question text.
+            deadline: Optional llm_resilience.Deadline propagated to the LLM call.
+
+        Returns:
+            A list of {"input": [positional args to solve], "expected": value}, or None if generation fails.
+        """
+        try:
+            response = generate_text_from_gemini(self._build_test_case_prompt(question), model_name=self.model_name, use_cache=self.use_cache, deadline=deadline)
+            with span("QuestionGenerator", "post_process", kind="test_cases"):
+                return self._parse_test_cases(response)
+        except Exception as e:
+            log_event("QuestionGenerator", f"Error generating test cases: {e}", level="error")
+            return None
+
+    async def generate_test_cases_async(self, question: str, deadline: Optional[Deadline] = None) -> Optional[List[Dict[str, Any]]]:
+        """Async variant of generate_test_cases."""
+        try:
+            response = await generate_text_from_gemini_async(self._build_test_case_prompt(question), model_name=self.model_name, use_cache=self.use_cache, deadline=deadline)
+            with span("QuestionGenerator", "post_process", kind="test_cases"):
+                return self._parse_test_cases(response)
+        except Exception as e:
+            log_event("QuestionGenerator", f"Error generating test cases: {e}", level="error")
+            return None
+
+    def _banked_question(self, skills: Union[List[str], str], experience: int, difficulty: str) -> Optional[str]:
+        """Returns a close-enough pre-generated question from the bank, if any."""
+        if self.question_bank is None:
+            return None
+        try:
+            with span("QuestionGenerator", "bank_lookup"):
+                banked_question = self.question_bank.lookup(skills, experience, difficulty)
+            record_cache_lookup("question_bank", banked_question is not None)
+            return banked_question
+        except Exception as e:
+            log_event("QuestionGenerator", f"Question bank lookup failed: {e}", level="error")
+            return None
+
+    def _bank_question(self, skills: Union[List[str], str], experience: int, difficulty: str, question: Optional[str]) -> Optional[str]:
+        """Adds a freshly generated question to the bank and returns it unchanged."""
+        if question and self.question_bank is not None:
+            try:
+                self.question_bank.add(skills, experience, difficulty, question)
+            except Exception as e:
+                log_event("QuestionGenerator", f"Could not add question to the bank: {e}", level="error")
+        return question
+
+    def _generate_for_bank(self, skills: List[str], experience: int, difficulty: str) -> Optional[str]:
+        """Background refill: always asks the model for a new variant (bypassing the response cache)."""
+        prompt = self._build_prompt(skills, experience, difficulty)
+        if prompt is None:
+            return None
+        return self._clean_question(generate_text_from_gemini(prompt, model_name=self.model_name, use_cache=False))
+
+    @staticmethod
+    def _build_prompt(skills: Union[List[str], str], experience: int, difficulty: str) -> Optional[str]:
+        """Validates the inputs and builds the question prompt; returns None on invalid input."""
         if isinstance(skills, list):
             skills_str = ", ".join(skills)
         elif isinstance(skills, str):
             skills_str = skills
         else:
-            print("QuestionGenerator: Invalid type for skills argument. Must be List[str] or str.")
+            log_event("QuestionGenerator", "Invalid type for skills argument. Must be List[str] or str.", level="error")
             return None
         
         if not isinstance(experience, int):
-            print("QuestionGenerator: Invalid type for experience argument, must be int.")
+            log_event("QuestionGenerator", "Invalid type for experience argument, must be int.", level="error")
             return None
 
-        prompt = f"""Generate a {difficulty}-difficulty coding question suitable for a candidate with the following skills: {skills_str} and {experience} years of experience.
+        return f"""Generate a {difficulty}-difficulty coding question suitable for a candidate with the following skills: {skills_str} and {experience} years of experience.
 The question should be solvable in approximately 30-45 minutes for its difficulty level and focus on practical problem-solving.
+The candidate must implement the solution as a function named solve; state its parameters and return value.
 Provide only the question text itself, without any preamble, labels, explanations, or markdown formatting. Just the plain text of the question.
 """
-        try:
-            print(f"QuestionGenerator: Generating {difficulty} question for skills: '{skills_str}', experience: {experience} years...")
+
+    @staticmethod
+    def _build_test_case_prompt(question: str) -> str:
+        """Builds the prompt asking for JSON test cases for a question."""
+        return f"""Write test cases for the following coding question. The candidate implements it as a function named solve.
+Return only a JSON array of 5 to 8 objects, each of the form {{"input": [positional arguments to solve], "expected": expected return value}}.
+Include edge cases such as empty input and boundary values. Use only JSON values (numbers, strings, booleans, null, arrays, objects).
+
+Coding Question:
+```
+{question}
+```
+
+JSON Output:"""
+
+    @staticmethod
+    def _parse_test_cases(response: str) -> Optional[List[Dict[str, Any]]]:
+        """Parses and validates the model's JSON test cases; None if no usable case is found."""
+        if not response or response.startswith("Error:"):
+            log_event("QuestionGenerator", "Test case generation failed.", level="error", response=(response or "")[:200])
+            return None
+        parsed = extract_json(response, "[")
+        if parsed is None:
+            log_event("QuestionGenerator", "Could not find a JSON array of test cases in the response.", level="error")
+            return None
+        test_cases = [
+            {"input": case["input"], "expected": case["expected"]}
+            for case in parsed
+            if isinstance(case, dict) and isinstance(case.get("input"), list) and "expected" in case
+        ]
+        log_event("QuestionGenerator", f"Generated {len(test_cases)} test cases.")
+        return test_cases or None
+
+    @staticmethod
+    def _clean_question(question_text: str) -> Optional[str]:
+        """Strips common Gemini artifacts from the generated question; None if there is no usable text."""
+        if question_text and not question_text.startswith("Error:"):
+            cleaned_question = question_text.strip()
+            # Basic cleaning for common Gemini artifacts like ```
+            if cleaned_question.startswith("```") and cleaned_question.endswith("```"):
+                lines = cleaned_question.splitlines()
+                if len(lines) > 2 and lines[0].strip().lower().startswith("```") and lines[-1].strip() == "```":
+                    cleaned_question = "\n".join(lines[1:-1]).strip()
+                else: 
+                    cleaned_question = cleaned_question.strip("` \t\\n")
             
-            question_text = generate_text_from_gemini(prompt)
-
-            if question_text:
-                cleaned_question = question_text.strip()
-                # Basic cleaning for common Gemini artifacts like ```
-                if cleaned_question.startswith("```") and cleaned_question.endswith("```"):
-                    lines = cleaned_question.splitlines()
-                    if len(lines) > 2 and lines[0].strip().lower().startswith("```") and lines[-1].strip() == "```":
-                        cleaned_question = "\\n".join(lines[1:-1]).strip()
-                    else: 
-                        cleaned_question = cleaned_question.strip("` \t\\n")
-                
-                print(f"QuestionGenerator: Successfully generated question: {cleaned_question[:150]}...")
-                return cleaned_question
-            else:
-                print("QuestionGenerator: Gemini returned an empty response or failed to generate a question.")
-                return None
-        except Exception as e:
-            print(f"QuestionGenerator: Error during Gemini API call or processing: {e}")
+            log_event("QuestionGenerator", "Successfully generated question.", question_chars=len(cleaned_question))
+            return cleaned_question
+        else:
+            log_event("QuestionGenerator", "Gemini returned an empty response or failed to generate a question.", level="error")
             return None
-            
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Typed results returned by the agents, with the response schemas the LLM is asked to follow.
+
+Results are small __slots__ classes that also behave as read-only mappings, so existing
+callers that use result.get("skills") or "error" in result keep working; to_dict()
+gives a plain dict for JSON serialization.
+"""
+import re
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+
+SCORE_KEYS = (
+    "problem_understanding",
+    "problem_solving_approach",
+    "code_structure_readability",
+    "syntax_language_usage",
+    "test_coverage_edge_cases",
+)
+# Leading number of a score string such as "7 / 10" or "7.5/10".
+_SCORE_NUMBER = re.compile(r"^\s*(\d+(?:\.\d+)?)")
+
+
+class _Result(Mapping):
+    """Mapping view over the slots that are set (None values are omitted)."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in self.__slots__ if getattr(self, name) is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class ResumeAnalysis(_Result):
+    """Skills and years of experience extracted from a resume, or an error message."""
+
+    __slots__ = ("skills", "experience_years", "error")
+
+    SCHEMA: Dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "skills": {"type": "array", "items": {"type": "string"}},
+            "experience_years": {"type": "integer", "nullable": True},
+        },
+        "required": ["skills"],
+    }
+
+    def __init__(self, skills: Optional[List[str]] = None, experience_years: int = 0, error: Optional[str] = None):
+        self.skills = list(skills or [])
+        self.experience_years = experience_years
+        self.error = error
+
+    @classmethod
+    def failure(cls, error: str) -> "ResumeAnalysis":
+        return cls(error=error)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ResumeAnalysis":
+        """Coerces model output or a cached dict: skills become a list of strings, experience an int (0 if unknown)."""
+        skills = data.get("skills", [])
+        if not isinstance(skills, list):
+            # If skills is not a list (e.g., a single string), wrap it in a list
+            skills = [skills] if skills is not None else []
+        experience = data.get("experience_years")
+        if experience is None or isinstance(experience, bool) or not isinstance(experience, (int, float)):
+            experience = 0
+        return cls([str(skill) for skill in skills], int(experience), data.get("error"))
+
+
+class CodeEvaluation(_Result):
+    """Structured evaluation of a code submission: summary, "X / 10" scores and per-category feedback."""
+
+    __slots__ = ("evaluation_summary", "scores", "category_feedback")
+
+    SCHEMA: Dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "evaluation_summary": {"type": "string"},
+            "scores": {
+                "type": "object",
+                "properties": {key: {"type": "string"} for key in SCORE_KEYS},
+                "required": list(SCORE_KEYS),
+            },
+            "category_feedback": {
+                "type": "object",
+                "properties": {f"{key}_feedback": {"type": "string"} for key in SCORE_KEYS},
+                "required": [f"{key}_feedback" for key in SCORE_KEYS],
+            },
+        },
+        "required": ["evaluation_summary", "scores", "category_feedback"],
+    }
+    # Re-evaluation of a revised submission: only the categories the change affects are returned.
+    INCREMENTAL_SCHEMA: Dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "evaluation_summary": {"type": "string"},
+            "scores": {"type": "object", "properties": {key: {"type": "string"} for key in SCORE_KEYS}},
+            "category_feedback": {
+                "type": "object",
+                "properties": {f"{key}_feedback": {"type": "string"} for key in SCORE_KEYS},
+            },
+        },
+        "required": ["evaluation_summary"],
+    }
+
+    def __init__(self, evaluation_summary: Optional[str] = None, scores: Optional[Dict[str, str]] = None,
+                 category_feedback: Optional[Dict[str, str]] = None):
+        self.evaluation_summary = evaluation_summary
+        self.scores = dict(scores or {})
+        self.category_feedback = dict(category_feedback or {})
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CodeEvaluation":
+        """Keeps only the known fields; values are converted to strings."""
+        scores = data.get("scores") if isinstance(data.get("scores"), dict) else {}
+        feedback = data.get("category_feedback") if isinstance(data.get("category_feedback"), dict) else {}
+        summary = data.get("evaluation_summary")
+        return cls(
+            str(summary) if summary is not None else None,
+            {key: str(scores[key]) for key in SCORE_KEYS if scores.get(key) is not None},
+            {f"{key}_feedback": str(feedback[f"{key}_feedback"]) for key in SCORE_KEYS
+             if feedback.get(f"{key}_feedback") is not None},
+        )
+
+    def updated_with(self, data: Mapping) -> "CodeEvaluation":
+        """A copy with the summary, scores and feedback present in data (model output) replacing these."""
+        update = CodeEvaluation.from_dict(data)
+        return CodeEvaluation(
+            update.evaluation_summary if update.evaluation_summary is not None else self.evaluation_summary,
+            {**self.scores, **update.scores},
+            {**self.category_feedback, **update.category_feedback},
+        )
+
+    def numeric_scores(self) -> Dict[str, Optional[float]]:
+        """Scores as numbers out of 10 ({key: None} when missing or unparsable)."""
+        numbers: Dict[str, Optional[float]] = {}
+        for key in SCORE_KEYS:
+            match = _SCORE_NUMBER.match(self.scores.get(key, ""))
+            numbers[key] = float(match.group(1)) if match else None
+        return numbers
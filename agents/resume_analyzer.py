@@ -1,10 +1,15 @@
-from typing import Optional, Dict, Any, List
-import json
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple
+import asyncio
+import concurrent.futures
+import multiprocessing
 import sys
 import os
 import io # Added for BytesIO
-from docx import Document # Added for .docx parsing
-from PyPDF2 import PdfReader # Added for .pdf parsing
+import threading
+import time
+
+if TYPE_CHECKING:
+    from PyPDF2 import PdfReader
 
 # Add project root to sys.path to allow absolute import of 'utils'
 # current_file_path -> adk_poc/agents/resume_analyzer.py
@@ -16,12 +21,150 @@ project_root = os.path.dirname(parent_directory)      # .../adk_poc
 if project_root not in sys.path:
     sys.path.append(project_root)
 
+from llm_resilience import Deadline
+from agents.resume_cache import fingerprint, get_resume_cache
+from agents.skill_taxonomy import FAST_PATH_CONFIDENCE, get_local_extractor
+from agents.results import ResumeAnalysis
+from startup_timing import lazy_import
+from metrics import log_event, record_cache_lookup, span
+
+# PDF extraction limits. Documents with at least PDF_PARALLEL_PAGE_THRESHOLD pages are split
+# into page ranges extracted in a process pool; smaller ones stay in-process.
+PDF_PARALLEL_PAGE_THRESHOLD = int(os.environ.get("PDF_PARALLEL_PAGE_THRESHOLD", 8))
+PDF_PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", 4))
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", min(4, os.cpu_count() or 1)))
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", 60))
+PDF_TIME_BUDGET_SECONDS = float(os.environ.get("PDF_TIME_BUDGET_SECONDS", 10))
+# Enough resume text for the prompt; extraction stops early once it is collected.
+RESUME_TEXT_CHAR_BUDGET = int(os.environ.get("RESUME_TEXT_CHAR_BUDGET", 30000))
+
+_pdf_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Returns the shared PDF extraction pool, creating it on first use."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # spawn keeps workers free of the parent's threads (Streamlit, SDK clients);
+            # recycling workers bounds memory held by PyPDF2 between documents.
+            _pdf_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=100,
+            )
+        return _pdf_pool
+
+
+def _discard_pdf_pool() -> None:
+    """Drops a broken pool so the next large document starts a fresh one."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(wait=False, cancel_futures=True)
+            _pdf_pool = None
+
+
+def _extract_pdf_text_serially(reader: "PdfReader", page_count: int, budget_ends: float) -> str:
+    """In-process page loop honouring the time and character budgets."""
+    full_text: List[str] = []
+    collected = 0
+    for page_num in range(page_count):
+        if collected >= RESUME_TEXT_CHAR_BUDGET or time.monotonic() >= budget_ends:
+            break
+        page_text = reader.pages[page_num].extract_text()
+        if page_text:
+            full_text.append(page_text)
+            collected += len(page_text)
+    return '\n'.join(full_text)[:RESUME_TEXT_CHAR_BUDGET]
+
+
+def _extract_pdf_pages(resume_content: bytes, start: int, stop: int) -> List[str]:
+    """Extracts text from pages [start, stop) of a PDF. Runs in pool workers."""
+    reader = lazy_import("PyPDF2").PdfReader(io.BytesIO(resume_content))
+    if reader.is_encrypted:
+        reader.decrypt('')
+    return [reader.pages[page_num].extract_text() or "" for page_num in range(start, stop)]
+
+
+def _extract_pdf_text(reader: "PdfReader", resume_content: bytes, file_name: str) -> str:
+    """
+    Extracts PDF text within the page, time and character budgets.
+
+    Small documents are read serially with the already-open reader. Larger ones are
+    fanned out across the process pool a few page ranges at a time (at most one task per
+    worker in flight, which bounds memory), and results are stitched back in page order.
+    Extraction stops as soon as enough text for the prompt has been collected.
+    """
+    page_count = min(len(reader.pages), PDF_MAX_PAGES)
+    if len(reader.pages) > PDF_MAX_PAGES:
+        log_event("ResumeAnalyzer", f"'{file_name}' has {len(reader.pages)} pages; reading the first {PDF_MAX_PAGES}.")
+    budget_ends = time.monotonic() + PDF_TIME_BUDGET_SECONDS
+    full_text: List[str] = []
+    collected = 0
+
+    if page_count < PDF_PARALLEL_PAGE_THRESHOLD or PDF_WORKERS <= 1:
+        return _extract_pdf_text_serially(reader, page_count, budget_ends)
+
+    ranges = [(start, min(start + PDF_PAGES_PER_TASK, page_count))
+              for start in range(0, page_count, PDF_PAGES_PER_TASK)]
+    try:
+        pool = _get_pdf_pool()
+        pending: Dict[concurrent.futures.Future, int] = {}
+        finished: Dict[int, List[str]] = {}
+        next_to_submit = 0
+        next_to_flush = 0
+        while next_to_flush < len(ranges):
+            while next_to_submit < len(ranges) and len(pending) < PDF_WORKERS and collected < RESUME_TEXT_CHAR_BUDGET:
+                start, stop = ranges[next_to_submit]
+                pending[pool.submit(_extract_pdf_pages, resume_content, start, stop)] = next_to_submit
+                next_to_submit += 1
+            if not pending:
+                break
+            remaining = budget_ends - time.monotonic()
+            done, _ = concurrent.futures.wait(pending, timeout=max(0.0, remaining),
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            if not done:
+                log_event("ResumeAnalyzer", f"PDF time budget exhausted for '{file_name}'; using pages read so far.", level="warning")
+                break
+            for future in done:
+                finished[pending.pop(future)] = future.result()
+            while next_to_flush in finished:
+                for page_text in finished.pop(next_to_flush):
+                    if page_text:
+                        full_text.append(page_text)
+                        collected += len(page_text)
+                next_to_flush += 1
+        for future in pending:
+            future.cancel()
+    except concurrent.futures.process.BrokenProcessPool as e:
+        log_event("ResumeAnalyzer", f"PDF process pool unavailable ({e}); extracting '{file_name}' in-process.", level="warning")
+        _discard_pdf_pool()
+        return _extract_pdf_text_serially(reader, page_count, budget_ends)
+    return '\n'.join(full_text)[:RESUME_TEXT_CHAR_BUDGET]
+
 class ResumeAnalyzer:
-    def __init__(self):
-        """Initializes the ResumeAnalyzer agent."""
+    def __init__(self, model_name: Optional[str] = None, use_cache: bool = True,
+                 use_local_extractor: bool = True, fast_path_confidence: float = FAST_PATH_CONFIDENCE):
+        """
+        Initializes the ResumeAnalyzer agent.
+
+        Args:
+            model_name: LLM model used for skill extraction. Defaults to the backend's default model.
+            use_cache: Whether LLM responses may be served from the response cache. Also
+                controls the resume fingerprint cache (parsed text and final results).
+            use_local_extractor: Try the local taxonomy extractor before calling the LLM.
+            fast_path_confidence: Minimum local-extraction confidence for skipping the LLM.
+        """
+        self.model_name = model_name
+        self.use_cache = use_cache
+        self.resume_cache = get_resume_cache() if use_cache else None
+        self.local_extractor = get_local_extractor() if use_local_extractor else None
+        self.fast_path_confidence = fast_path_confidence
         print("ResumeAnalyzer initialized.")
 
-    def analyze(self, resume_content: bytes, file_name: str) -> Optional[Dict[str, Any]]: # Added file_name
+    def analyze(self, resume_content: bytes, file_name: str, deadline: Optional[Deadline] = None) -> ResumeAnalysis: # Added file_name
         """
         Analyzes the resume content to extract skills and experience.
         This method uses Gemini API via utils.py.
@@ -29,47 +172,199 @@ class ResumeAnalyzer:
         Args:
             resume_content: The content of the resume as bytes.
             file_name: The name of the uploaded file, used to determine type.
+            deadline: Optional llm_resilience.Deadline propagated to the LLM call.
+
+        Returns:
+            A ResumeAnalysis with 'skills' and 'experience_years', or with 'error' set if
+            analysis fails. It reads like a dict (result.get("skills"), "error" in result).
+        """
+        resume_fingerprint = fingerprint(resume_content)
+        cached_result = self._cached_result(resume_fingerprint, file_name)
+        if cached_result is not None:
+            return cached_result
+
+        resume_text, error = self._cached_text(resume_fingerprint, resume_content, file_name)
+        if error:
+            return error
+        return self._analyze_text(resume_text, file_name, resume_fingerprint, deadline)
+
+    async def analyze_async(self, resume_content: bytes, file_name: str, deadline: Optional[Deadline] = None) -> ResumeAnalysis:
+        """
+        Async variant of analyze. Text extraction runs in a worker thread and the
+        LLM call uses the backend's async API, so the event loop is never blocked.
+
+        Args:
+            resume_content: The content of the resume as bytes.
+            file_name: The name of the uploaded file, used to determine type.
+            deadline: Optional llm_resilience.Deadline propagated to the LLM call.
 
         Returns:
-            A dictionary containing extracted 'skills' and 'experience_years',
-            or an error dictionary if analysis fails.
+            Same as analyze.
+        """
+        resume_fingerprint = fingerprint(resume_content)
+        cached_result = self._cached_result(resume_fingerprint, file_name)
+        if cached_result is not None:
+            return cached_result
+
+        resume_text, error = await asyncio.to_thread(self._cached_text, resume_fingerprint, resume_content, file_name)
+        if error:
+            return error
+        return await self._analyze_text_async(resume_text, file_name, resume_fingerprint, deadline)
+
+    def analyze_text(self, resume_text: str, file_name: str = "resume", resume_fingerprint: Optional[str] = None,
+                     deadline: Optional[Deadline] = None) -> ResumeAnalysis:
+        """
+        Extracts skills and experience from already-parsed resume text (e.g. from a batch parser).
+
+        Args:
+            resume_text: Plain resume text.
+            file_name: Name used in log messages.
+            resume_fingerprint: fingerprint() of the original file. When given, results are
+                read from and stored in the fingerprint cache.
+            deadline: Optional llm_resilience.Deadline propagated to the LLM call.
+
+        Returns:
+            Same as analyze.
+        """
+        if resume_fingerprint is not None:
+            cached_result = self._cached_result(resume_fingerprint, file_name)
+            if cached_result is not None:
+                return cached_result
+        return self._analyze_text(resume_text, file_name, resume_fingerprint, deadline)
+
+    async def analyze_text_async(self, resume_text: str, file_name: str = "resume",
+                                 resume_fingerprint: Optional[str] = None,
+                                 deadline: Optional[Deadline] = None) -> ResumeAnalysis:
+        """Async variant of analyze_text."""
+        if resume_fingerprint is not None:
+            cached_result = self._cached_result(resume_fingerprint, file_name)
+            if cached_result is not None:
+                return cached_result
+        return await self._analyze_text_async(resume_text, file_name, resume_fingerprint, deadline)
+
+    def _analyze_text(self, resume_text: str, file_name: str, resume_fingerprint: Optional[str],
+                      deadline: Optional[Deadline]) -> ResumeAnalysis:
+        local_result = self._local_result(resume_text, file_name)
+        if local_result is not None:
+            return self._store_result(resume_fingerprint, local_result)
+
+        with span("ResumeAnalyzer", "prompt_build"):
+            prompt = self._build_prompt(resume_text)
+        try:
+            import utils # Absolute import, assuming adk_poc is in sys.path
+            parsed_response, gemini_response_str = utils.generate_json_from_gemini(prompt, ResumeAnalysis.SCHEMA, model_name=self.model_name, use_cache=self.use_cache, deadline=deadline)
+        except ImportError as e:
+            log_event("ResumeAnalyzer", f"Error importing utils: {e}. Ensure 'agents' is a package and utils.py is in the parent directory.", level="error")
+            return ResumeAnalysis.failure("Internal server error (module import issue).")
+        except Exception as e:
+            log_event("ResumeAnalyzer", f"General error during analysis: {e}", level="error")
+            return ResumeAnalysis.failure(f"General error during resume analysis: {str(e)}")
+        with span("ResumeAnalyzer", "post_process"):
+            result = self._parse_response(parsed_response, gemini_response_str)
+        return self._store_result(resume_fingerprint, result)
+
+    async def _analyze_text_async(self, resume_text: str, file_name: str, resume_fingerprint: Optional[str],
+                                  deadline: Optional[Deadline]) -> ResumeAnalysis:
+        local_result = self._local_result(resume_text, file_name)
+        if local_result is not None:
+            return self._store_result(resume_fingerprint, local_result)
+
+        with span("ResumeAnalyzer", "prompt_build"):
+            prompt = self._build_prompt(resume_text)
+        try:
+            import utils
+            parsed_response, gemini_response_str = await utils.generate_json_from_gemini_async(prompt, ResumeAnalysis.SCHEMA, model_name=self.model_name, use_cache=self.use_cache, deadline=deadline)
+        except Exception as e:
+            log_event("ResumeAnalyzer", f"General error during analysis: {e}", level="error")
+            return ResumeAnalysis.failure(f"General error during resume analysis: {str(e)}")
+        with span("ResumeAnalyzer", "post_process"):
+            result = self._parse_response(parsed_response, gemini_response_str)
+        return self._store_result(resume_fingerprint, result)
+
+    def _cached_result(self, resume_fingerprint: str, file_name: str) -> Optional[ResumeAnalysis]:
+        """Returns a previously computed analysis for the same file bytes, if any."""
+        if self.resume_cache is None:
+            return None
+        cached_result = self.resume_cache.get_result(resume_fingerprint, self.model_name)
+        record_cache_lookup("resume_result", cached_result is not None)
+        if cached_result is None:
+            return None
+        log_event("ResumeAnalyzer", "Fingerprint cache hit; skipping parse and LLM.", file_name=file_name,
+                  fingerprint=resume_fingerprint[:12])
+        return ResumeAnalysis.from_dict(cached_result)
+
+    def _cached_text(self, resume_fingerprint: str, resume_content: bytes, file_name: str) -> Tuple[str, Optional[ResumeAnalysis]]:
+        """Returns the extracted text for the file, parsing only on a cache miss."""
+        if self.resume_cache is not None:
+            cached_text = self.resume_cache.get_text(resume_fingerprint)
+            record_cache_lookup("resume_text", cached_text is not None)
+            if cached_text is not None:
+                return cached_text, None
+        with span("ResumeAnalyzer", "parse"):
+            resume_text, error = self._extract_text(resume_content, file_name)
+        if not error and self.resume_cache is not None:
+            self.resume_cache.set_text(resume_fingerprint, resume_text)
+        return resume_text, error
+
+    def _local_result(self, resume_text: str, file_name: str) -> Optional[ResumeAnalysis]:
+        """Returns the local extractor's analysis when it is confident enough to skip the LLM."""
+        if self.local_extractor is None:
+            return None
+        with span("ResumeAnalyzer", "local_extract"):
+            local = self.local_extractor.extract(resume_text)
+        if local["confidence"] < self.fast_path_confidence:
+            log_event("ResumeAnalyzer", f"Local extraction for '{file_name}' not confident enough ({local['confidence']:.2f}); using the LLM.", level="warning")
+            return None
+        log_event("ResumeAnalyzer", "Local extraction used.", file_name=file_name, confidence=round(local["confidence"], 2),
+                  skill_count=len(local["skills"]), experience_years=local["experience_years"])
+        return ResumeAnalysis(local["skills"], local["experience_years"])
+
+    def _store_result(self, resume_fingerprint: Optional[str], result: ResumeAnalysis) -> ResumeAnalysis:
+        """Caches successful analyses under the file fingerprint; errors are not cached."""
+        if self.resume_cache is not None and resume_fingerprint is not None and result.error is None:
+            self.resume_cache.set_result(resume_fingerprint, self.model_name, result.to_dict())
+        return result
+
+    def _extract_text(self, resume_content: bytes, file_name: str) -> Tuple[str, Optional[ResumeAnalysis]]:
+        """
+        Extracts plain text from the uploaded resume bytes.
+
+        Returns:
+            A tuple of (resume_text, error_dict). error_dict is None on success.
         """
-        print(f"ResumeAnalyzer: Received resume '{file_name}' for analysis (first 100 bytes: {resume_content[:100]}...)") # Added file_name
         resume_text = ""
         file_extension = os.path.splitext(file_name)[1].lower()
-        print(f"ResumeAnalyzer: Processing file '{file_name}' with extension '{file_extension}'")
+        log_event("ResumeAnalyzer", "Received resume for analysis.", file_name=file_name,
+                  extension=file_extension, resume_bytes=len(resume_content))
 
         try:
             if file_extension == '.docx':
                 try:
-                    document = Document(io.BytesIO(resume_content))
+                    # python-docx and PyPDF2 are imported on first use to keep them out of cold start.
+                    document = lazy_import("docx").Document(io.BytesIO(resume_content))
                     full_text = []
                     for para in document.paragraphs:
                         full_text.append(para.text)
                     resume_text = '\n'.join(full_text)
                 except Exception as e:
-                    print(f"ResumeAnalyzer: Error parsing DOCX file '{file_name}': {e}")
-                    return {"error": f"Could not parse DOCX content: {str(e)}", "skills": [], "experience_years": 0}
+                    log_event("ResumeAnalyzer", f"Error parsing DOCX file '{file_name}': {e}", level="error")
+                    return "", ResumeAnalysis.failure(f"Could not parse DOCX content: {str(e)}")
             
             elif file_extension == '.pdf':
                 try:
-                    reader = PdfReader(io.BytesIO(resume_content))
+                    reader = lazy_import("PyPDF2").PdfReader(io.BytesIO(resume_content))
                     if reader.is_encrypted:
                         # Attempt to decrypt with an empty password, common for some PDFs
                         try:
                             reader.decrypt('')
                         except Exception as decrypt_err:
-                            print(f"ResumeAnalyzer: PDF file '{file_name}' is encrypted and could not be decrypted: {decrypt_err}")
-                            return {"error": "PDF file is encrypted and decryption failed.", "skills": [], "experience_years": 0}
+                            log_event("ResumeAnalyzer", f"PDF file '{file_name}' is encrypted and could not be decrypted: {decrypt_err}", level="error")
+                            return "", ResumeAnalysis.failure("PDF file is encrypted and decryption failed.")
                     
-                    full_text = []
-                    for page_num in range(len(reader.pages)):
-                        page = reader.pages[page_num]
-                        full_text.append(page.extract_text())
-                    resume_text = '\n'.join(filter(None, full_text)) # Filter out None results from extract_text
+                    resume_text = _extract_pdf_text(reader, resume_content, file_name)
                 except Exception as e:
-                    print(f"ResumeAnalyzer: Error parsing PDF file '{file_name}': {e}")
-                    return {"error": f"Could not parse PDF content: {str(e)}", "skills": [], "experience_years": 0}
+                    log_event("ResumeAnalyzer", f"Error parsing PDF file '{file_name}': {e}", level="error")
+                    return "", ResumeAnalysis.failure(f"Could not parse PDF content: {str(e)}")
 
             elif file_extension == '.txt':
                 try:
@@ -78,28 +373,33 @@ class ResumeAnalyzer:
                     try:
                         resume_text = resume_content.decode('latin-1') # Try another common encoding
                     except UnicodeDecodeError as e:
-                        print(f"ResumeAnalyzer: Error decoding TXT file '{file_name}': {e}")
-                        return {"error": f"Could not decode TXT content: {str(e)}", "skills": [], "experience_years": 0}
+                        log_event("ResumeAnalyzer", f"Error decoding TXT file '{file_name}': {e}", level="error")
+                        return "", ResumeAnalysis.failure(f"Could not decode TXT content: {str(e)}")
             else:
-                print(f"ResumeAnalyzer: Unsupported file type '{file_extension}' for file '{file_name}'. Attempting plain text decode as fallback.")
+                log_event("ResumeAnalyzer", f"Unsupported file type '{file_extension}' for file '{file_name}'. Attempting plain text decode as fallback.", level="warning")
                 try:
                     resume_text = resume_content.decode('utf-8')
                 except UnicodeDecodeError:
                     try:
                         resume_text = resume_content.decode('latin-1')
                     except UnicodeDecodeError as e:
-                        print(f"ResumeAnalyzer: Error decoding unsupported file type '{file_name}' as text: {e}")
-                        return {"error": f"Unsupported file type, and could not decode as plain text: {str(e)}", "skills": [], "experience_years": 0}
+                        log_event("ResumeAnalyzer", f"Error decoding unsupported file type '{file_name}' as text: {e}", level="error")
+                        return "", ResumeAnalysis.failure(f"Unsupported file type, and could not decode as plain text: {str(e)}")
             
             if not resume_text.strip():
-                print(f"ResumeAnalyzer: Extracted text from '{file_name}' is empty or only whitespace.")
-                return {"error": "Extracted text from resume is empty.", "skills": [], "experience_years": 0}
+                log_event("ResumeAnalyzer", f"Extracted text from '{file_name}' is empty or only whitespace.", level="warning")
+                return "", ResumeAnalysis.failure("Extracted text from resume is empty.")
 
         except Exception as e: # Catch-all for unexpected issues during text extraction phase
-            print(f"ResumeAnalyzer: General error during text extraction for '{file_name}': {e}")
-            return {"error": f"General error extracting text from resume: {str(e)}", "skills": [], "experience_years": 0}
+            log_event("ResumeAnalyzer", f"General error during text extraction for '{file_name}': {e}", level="error")
+            return "", ResumeAnalysis.failure(f"General error extracting text from resume: {str(e)}")
+
+        return resume_text, None
 
-        prompt = f"""
+    @staticmethod
+    def _build_prompt(resume_text: str) -> str:
+        """Builds the skill/experience extraction prompt."""
+        return f"""
 Analyze the following resume text and extract the key skills and total years of professional experience. 
 Provide the output as a JSON object with two keys: 'skills' (a list of strings for technical skills) and 'experience_years' (an integer representing the total number of years of professional experience).
 If specific years of experience cannot be determined, use null for 'experience_years'.
@@ -111,54 +411,24 @@ Resume Text:
 
 JSON Output:"""
 
-        try:
-            import utils # Absolute import, assuming adk_poc is in sys.path
-            gemini_response_str = utils.generate_text_from_gemini(prompt)
-            
-            if not gemini_response_str or gemini_response_str.startswith("Error:"):
-                print(f"ResumeAnalyzer: Gemini API error or empty response: {gemini_response_str}")
-                return {"error": gemini_response_str or "Empty response from API", "skills": [], "experience_years": 0}
-
-            # Attempt to parse the JSON response from Gemini
-            try:
-                # Gemini might return the JSON within backticks or other markdown
-                cleaned_response = gemini_response_str.strip()
-                if cleaned_response.startswith("```json"):
-                    cleaned_response = cleaned_response[7:-3].strip()
-                elif cleaned_response.startswith("```"):
-                    cleaned_response = cleaned_response[3:-3].strip()
-                
-                parsed_response = json.loads(cleaned_response)
-                
-                skills = parsed_response.get("skills", [])
-                experience = parsed_response.get("experience_years")
-
-                if not isinstance(skills, list):
-                    # If skills is not a list (e.g., a single string), wrap it in a list
-                    skills = [str(skill_item) for skill_item in ([skills] if skills is not None else [])]
-                else:
-                    # Ensure all items in skills list are strings
-                    skills = [str(skill_item) for skill_item in skills]
-                
-                if experience is None or not isinstance(experience, (int, float)):
-                    experience_years = 0 # Default if not found, null, or not a number
-                else:
-                    experience_years = int(experience)
-
-                print(f"ResumeAnalyzer: Successfully parsed Gemini response. Skills: {skills}, Experience: {experience_years}")
-                return {"skills": skills, "experience_years": experience_years}
-            
-            except json.JSONDecodeError as e:
-                print(f"ResumeAnalyzer: Error parsing JSON response from Gemini: {e}")
-                print(f"Gemini Raw Response: {gemini_response_str}")
-                return {"error": "Failed to parse skills and experience from resume response.", "skills": [], "experience_years": 0}
-            except Exception as e:
-                print(f"ResumeAnalyzer: Unexpected error processing Gemini response: {e}")
-                return {"error": f"Unexpected error processing API response: {str(e)}", "skills": [], "experience_years": 0}
+    @staticmethod
+    def _parse_response(parsed_response: Optional[Dict[str, Any]], gemini_response_str: str) -> ResumeAnalysis:
+        """
+        Converts the model's JSON answer (already extracted by utils.generate_json_from_gemini)
+        into a ResumeAnalysis.
 
-        except ImportError as e:
-            print(f"ResumeAnalyzer: Error importing utils: {e}. Ensure 'agents' is a package and utils.py is in the parent directory.")
-            return {"error": "Internal server error (module import issue).", "skills": [], "experience_years": 0}
-        except Exception as e:
-            print(f"ResumeAnalyzer: General error during analysis: {e}")
-            return {"error": f"General error during resume analysis: {str(e)}", "skills": [], "experience_years": 0}
+        Returns:
+            The parsed result, or a failed ResumeAnalysis.
+        """
+        if not gemini_response_str or gemini_response_str.startswith("Error:"):
+            log_event("ResumeAnalyzer", "Gemini API error or empty response.", level="error", response=gemini_response_str)
+            return ResumeAnalysis.failure(gemini_response_str or "Empty response from API")
+        if not parsed_response or "skills" not in parsed_response:
+            log_event("ResumeAnalyzer", "No skills object found in Gemini response.", level="error",
+                      response_chars=len(gemini_response_str), response_head=gemini_response_str[:200])
+            return ResumeAnalysis.failure("Failed to parse skills and experience from resume response.")
+
+        result = ResumeAnalysis.from_dict(parsed_response)
+        log_event("ResumeAnalyzer", "Successfully parsed Gemini response.", skill_count=len(result.skills),
+                  experience_years=result.experience_years)
+        return result
@@ -0,0 +1,88 @@
+"""
+Fingerprint cache for uploaded resumes.
+
+Keyed by the SHA-256 of the uploaded bytes, it stores both the extracted text and the
+final {"skills", "experience_years"} analysis, in memory and in a SQLite file that
+survives restarts. A repeated upload of the same file skips parsing and the LLM.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from llm_cache import CACHE_DIR, LRUCache, ResponseCache, SQLiteCache
+from metrics import log_event
+
+RESUME_CACHE_ENABLED = os.environ.get("RESUME_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+RESUME_CACHE_TTL_SECONDS = float(os.environ.get("RESUME_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+RESUME_CACHE_MAX_ENTRIES = int(os.environ.get("RESUME_CACHE_MAX_ENTRIES", 20000))
+
+
+def fingerprint(resume_content: bytes) -> str:
+    """Returns the SHA-256 hex digest identifying an uploaded file."""
+    return hashlib.sha256(resume_content).hexdigest()
+
+
+class ResumeFingerprintCache:
+    """Two caches sharing one SQLite file: extracted text and final analysis results."""
+
+    def __init__(self, path: str):
+        self.texts = ResponseCache(
+            LRUCache(max_entries=64, ttl_seconds=RESUME_CACHE_TTL_SECONDS),
+            SQLiteCache(path, max_entries=RESUME_CACHE_MAX_ENTRIES, ttl_seconds=RESUME_CACHE_TTL_SECONDS,
+                        table="resume_text"),
+        )
+        self.results = ResponseCache(
+            LRUCache(max_entries=1024, ttl_seconds=RESUME_CACHE_TTL_SECONDS),
+            SQLiteCache(path, max_entries=RESUME_CACHE_MAX_ENTRIES, ttl_seconds=RESUME_CACHE_TTL_SECONDS,
+                        table="resume_results"),
+        )
+
+    def get_text(self, resume_fingerprint: str) -> Optional[str]:
+        return self.texts.get(resume_fingerprint)
+
+    def set_text(self, resume_fingerprint: str, resume_text: str) -> None:
+        self.texts.set(resume_fingerprint, resume_text)
+
+    def get_result(self, resume_fingerprint: str, model_name: Optional[str]) -> Optional[Dict[str, Any]]:
+        cached = self.results.get(self._result_key(resume_fingerprint, model_name))
+        return json.loads(cached) if cached is not None else None
+
+    def set_result(self, resume_fingerprint: str, model_name: Optional[str], result: Dict[str, Any]) -> None:
+        self.results.set(self._result_key(resume_fingerprint, model_name), json.dumps(result))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"text": self.texts.stats(), "results": self.results.stats()}
+
+    @staticmethod
+    def _result_key(resume_fingerprint: str, model_name: Optional[str]) -> str:
+        # The analysis depends on the model, the text only on the bytes.
+        return f"{resume_fingerprint}:{model_name or 'default'}"
+
+
+_resume_cache: Optional[ResumeFingerprintCache] = None
+_resume_cache_lock = threading.Lock()
+
+
+def get_resume_cache() -> Optional[ResumeFingerprintCache]:
+    """Returns the process-wide resume cache, or None if disabled or the cache file cannot be opened."""
+    global _resume_cache
+    if not RESUME_CACHE_ENABLED:
+        return None
+    if _resume_cache is None:
+        with _resume_cache_lock:
+            if _resume_cache is None:
+                try:
+                    _resume_cache = ResumeFingerprintCache(os.path.join(CACHE_DIR, "resumes.sqlite3"))
+                except (sqlite3.Error, OSError) as e:
+                    log_event("resume_cache", f"Resume cache unavailable: {e}", level="error")
+                    return None
+    return _resume_cache
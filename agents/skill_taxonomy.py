@@ -0,0 +1,336 @@
+"""
+Local skill and experience extraction used as a fast path before the LLM.
+
+Skills come from a taxonomy mapping each canonical name to its aliases
+("JS" / "JavaScript", "k8s" / "Kubernetes"). All aliases are compiled into a single
+Aho-Corasick automaton, so a resume is scanned once regardless of taxonomy size.
+Experience is estimated with regexes over explicit claims ("5+ years of experience")
+and employment date ranges. Each result carries a confidence score; ResumeAnalyzer
+only calls the LLM when that score is below its threshold.
+
+Taxonomy files are JSON objects of {"Canonical": ["alias", ...]}. Aliases match
+case-insensitively on word boundaries; prefix an alias with "=" to require an exact-case
+match (for ambiguous words such as "=Go" or "=REST"). Words that are common in prose
+("lambda", "containers", "algorithms", "Spring") are only listed with context ("aws
+lambda"): a false match raises the confidence that skips the LLM.
+"""
+import datetime
+import json
+import os
+import re
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+SKILL_TAXONOMY_PATH = os.environ.get("SKILL_TAXONOMY_PATH")
+# Minimum confidence for the local result to be used without an LLM call.
+FAST_PATH_CONFIDENCE = float(os.environ.get("SKILL_FAST_PATH_CONFIDENCE", 0.75))
+# Number of distinct skills at which skill coverage counts as fully confident.
+SKILLS_FOR_FULL_CONFIDENCE = int(os.environ.get("SKILL_FAST_PATH_MIN_SKILLS", 6))
+
+DEFAULT_TAXONOMY: Dict[str, List[str]] = {
+    # Languages
+    "Python": ["python", "python3", "py3"],
+    "Java": ["java", "java 8", "java 11", "java 17"],
+    "JavaScript": ["javascript", "js", "ecmascript", "es6"],
+    "TypeScript": ["typescript", "ts"],
+    "Go": ["golang", "=Go"],
+    "C": ["ansi c", "c programming", "=C"],
+    "C++": ["c++", "cpp", "c plus plus"],
+    "C#": ["c#", "csharp", "c sharp"],
+    "Rust": ["rust", "rustlang"],
+    "Kotlin": ["kotlin"],
+    "Swift": ["=Swift", "swiftui"],
+    "Ruby": ["ruby"],
+    "PHP": ["php"],
+    "Scala": ["scala"],
+    "R": ["r programming", "rstudio", "r language", "tidyverse"],
+    "SQL": ["sql", "t-sql", "pl/sql", "plsql"],
+    "Bash": ["bash", "shell scripting", "shell script"],
+    # Frameworks and libraries
+    "Django": ["django", "django rest framework", "drf"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi", "fast api"],
+    "Spring Boot": ["spring boot", "springboot", "spring framework", "spring mvc"],
+    "Node.js": ["node.js", "nodejs", "node js", "=Node"],
+    "Express": ["express.js", "expressjs", "=Express"],
+    "React": ["react", "react.js", "reactjs"],
+    "Angular": ["angular", "angularjs"],
+    "Vue.js": ["vue", "vue.js", "vuejs"],
+    "Next.js": ["next.js", "nextjs"],
+    ".NET": [".net", "dotnet", "asp.net", ".net core"],
+    "Ruby on Rails": ["ruby on rails", "rails framework"],
+    "gRPC": ["grpc"],
+    "GraphQL": ["graphql"],
+    "REST APIs": ["=REST", "restful", "rest api", "rest apis", "restful apis"],
+    "Microservices": ["microservices", "microservice"],
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "scikit-learn": ["scikit-learn", "sklearn", "scikit learn"],
+    "TensorFlow": ["tensorflow", "tf2"],
+    "PyTorch": ["pytorch"],
+    "Keras": ["keras"],
+    "Spark": ["spark", "apache spark", "pyspark"],
+    "Hadoop": ["hadoop", "hdfs"],
+    "Airflow": ["airflow", "apache airflow"],
+    "Celery": ["celery"],
+    # Data stores and messaging
+    "PostgreSQL": ["postgresql", "postgres", "psql"],
+    "MySQL": ["mysql", "mariadb"],
+    "SQLite": ["sqlite"],
+    "MongoDB": ["mongodb", "mongo"],
+    "Redis": ["redis"],
+    "Elasticsearch": ["elasticsearch", "elastic search", "opensearch"],
+    "Cassandra": ["cassandra"],
+    "DynamoDB": ["dynamodb"],
+    "BigQuery": ["bigquery", "big query"],
+    "Snowflake": ["snowflake"],
+    "Firestore": ["firestore"],
+    "Kafka": ["kafka", "apache kafka"],
+    "RabbitMQ": ["rabbitmq"],
+    "Pub/Sub": ["pub/sub", "pubsub"],
+    # Cloud and infrastructure
+    "AWS": ["aws", "amazon web services", "ec2", "amazon s3", "aws s3", "aws lambda"],
+    "GCP": ["gcp", "google cloud", "google cloud platform", "cloud run", "app engine"],
+    "Azure": ["azure", "microsoft azure"],
+    "Docker": ["docker", "dockerfile"],
+    "Kubernetes": ["kubernetes", "k8s", "gke", "eks", "aks", "helm"],
+    "Terraform": ["terraform"],
+    "Ansible": ["ansible"],
+    "Jenkins": ["jenkins"],
+    "GitHub Actions": ["github actions"],
+    "GitLab CI": ["gitlab ci", "gitlab-ci"],
+    "CI/CD": ["ci/cd", "cicd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "Linux": ["linux", "unix", "ubuntu"],
+    "Git": ["git", "github", "gitlab", "bitbucket"],
+    "Prometheus": ["prometheus"],
+    "Grafana": ["grafana"],
+    "Nginx": ["nginx"],
+    # Practices
+    "TDD": ["tdd", "test-driven development", "test driven development"],
+    "OAuth": ["oauth", "oauth2", "oauth 2.0"],
+    "Distributed Systems": ["distributed systems", "distributed system"],
+    "System Design": ["system design"],
+    "Machine Learning": ["machine learning", "=ML"],
+    "Deep Learning": ["deep learning"],
+    "NLP": ["nlp", "natural language processing"],
+    "Data Structures & Algorithms": ["data structures", "data structures and algorithms", "dsa"],
+    "Agile": ["agile", "scrum", "kanban"],
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3", "sass", "scss", "tailwind"],
+}
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every occurrence of every pattern in one pass over the text."""
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append(index)
+
+        queue: Deque[int] = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                candidate = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = candidate if candidate != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yields (start, pattern_index) for every match, in order of match end."""
+        state = 0
+        for position, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for index in self._out[state]:
+                yield position - len(self.patterns[index]) + 1, index
+
+
+class SkillTaxonomy:
+    """A compiled taxonomy: alias patterns mapped back to canonical skill names."""
+
+    def __init__(self, taxonomy: Dict[str, List[str]]):
+        self.canonical_names = list(taxonomy)
+        patterns: List[str] = []
+        self._pattern_skill: List[str] = []
+        self._pattern_exact: List[Optional[str]] = []
+        for canonical, aliases in taxonomy.items():
+            for alias in aliases:
+                exact = alias.startswith("=")
+                alias = alias[1:] if exact else alias
+                patterns.append(alias.lower())
+                self._pattern_skill.append(canonical)
+                self._pattern_exact.append(alias if exact else None)
+        self._matcher = AhoCorasick(patterns)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "SkillTaxonomy":
+        """Loads a taxonomy JSON file, falling back to DEFAULT_TAXONOMY when no path is given."""
+        if not path:
+            return cls(DEFAULT_TAXONOMY)
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def find_skills(self, text: str) -> Dict[str, int]:
+        """
+        Returns {canonical_skill: mention_count}, ordered by first mention.
+
+        Matches must sit on word boundaries; exact-case aliases are verified against the original text.
+        """
+        lowered = text.lower()
+        counts: Dict[str, int] = {}
+        for start, index in self._matcher.iter_matches(lowered):
+            pattern = self._matcher.patterns[index]
+            end = start + len(pattern)
+            if start > 0 and _is_word_char(lowered[start - 1]) and _is_word_char(pattern[0]):
+                continue
+            if start > 1 and lowered[start - 1] == "." and lowered[start - 2].isalnum():
+                continue  # "js" inside "node.js"
+            if end < len(lowered) and _is_word_char(lowered[end]) and _is_word_char(pattern[-1]):
+                continue
+            exact = self._pattern_exact[index]
+            if exact is not None and text[start:end] != exact:
+                continue
+            skill = self._pattern_skill[index]
+            counts[skill] = counts.get(skill, 0) + 1
+        return counts
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch in "+#"
+
+
+_MONTHS = "jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec"
+_EXPLICIT_YEARS = re.compile(
+    r"(\d{1,2}(?:\.\d)?)\s*\+?\s*(?:years?|yrs?)\.?\s+(?:of\s+)?"
+    r"(?:professional\s+|industry\s+|work\s+|hands-on\s+|relevant\s+|total\s+)*experience",
+    re.IGNORECASE,
+)
+_DATE_RANGE = re.compile(
+    rf"(?:(?P<m1>{_MONTHS})[a-z]*\.?\s+)?(?P<y1>(?:19|20)\d{{2}})\s*(?:-|–|—|to|until)\s*"
+    rf"(?:(?:(?P<m2>{_MONTHS})[a-z]*\.?\s+)?(?P<y2>(?:19|20)\d{{2}})|(?P<open>present|current|now|today|date))",
+    re.IGNORECASE,
+)
+_EDUCATION_HEADER = re.compile(r"\b(education|academic|qualifications?|degrees?)\b", re.IGNORECASE)
+_EXPERIENCE_HEADER = re.compile(
+    r"\b(experience|employment|work history|career|projects?|skills|achievements|certifications?)\b",
+    re.IGNORECASE,
+)
+_EDUCATION_LINE = re.compile(r"\b(university|college|institute|school|bachelor|master|b\.?tech|m\.?tech|ph\.?d)\b",
+                             re.IGNORECASE)
+
+
+def _month_index(month: Optional[str], default: int) -> int:
+    if not month:
+        return default
+    return _MONTHS.split("|").index(month.lower()[:3]) + 1
+
+
+def estimate_experience_years(text: str, today: Optional[datetime.date] = None) -> Tuple[Optional[int], float]:
+    """
+    Estimates total professional experience.
+
+    Explicit claims ("3+ years of experience") are preferred. Employment date ranges
+    outside the education section are merged (overlaps counted once) as a second signal.
+
+    Returns:
+        (years, confidence). years is None when nothing could be estimated.
+    """
+    today = today or datetime.date.today()
+    claims = [float(m.group(1)) for m in _EXPLICIT_YEARS.finditer(text)]
+    claimed = int(max(claims)) if claims else None
+
+    intervals: List[Tuple[float, float]] = []
+    in_education = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped and len(stripped) < 40 and _EDUCATION_HEADER.search(stripped):
+            in_education = True
+        elif stripped and len(stripped) < 40 and _EXPERIENCE_HEADER.search(stripped):
+            in_education = False
+        if in_education or _EDUCATION_LINE.search(line):
+            continue
+        for m in _DATE_RANGE.finditer(line):
+            start = int(m.group("y1")) + (_month_index(m.group("m1"), 1) - 1) / 12.0
+            if m.group("open"):
+                end = today.year + (today.month - 1) / 12.0
+            else:
+                end = int(m.group("y2")) + _month_index(m.group("m2"), 12) / 12.0
+            if start < end <= today.year + 1:
+                intervals.append((start, end))
+
+    ranged = None
+    if intervals:
+        intervals.sort()
+        total = 0.0
+        current_start, current_end = intervals[0]
+        for start, end in intervals[1:]:
+            if start <= current_end:
+                current_end = max(current_end, end)
+            else:
+                total += current_end - current_start
+                current_start, current_end = start, end
+        total += current_end - current_start
+        ranged = int(total)
+
+    if claimed is not None and ranged is not None:
+        # Both signals: agreement is strong evidence; disagreement means the claim may be stale.
+        return claimed, 1.0 if abs(claimed - ranged) <= 2 else 0.6
+    if claimed is not None:
+        return claimed, 0.9
+    if ranged is not None:
+        return ranged, 0.75
+    return None, 0.0
+
+
+class LocalSkillExtractor:
+    """Taxonomy + regex extractor producing the same shape as the LLM analysis, plus a confidence score."""
+
+    def __init__(self, taxonomy: Optional[SkillTaxonomy] = None):
+        self.taxonomy = taxonomy or SkillTaxonomy.load(SKILL_TAXONOMY_PATH)
+
+    def extract(self, resume_text: str) -> Dict[str, object]:
+        """
+        Returns {"skills", "experience_years", "confidence"}.
+
+        Confidence blends skill coverage (distinct skills found, saturating at
+        SKILLS_FOR_FULL_CONFIDENCE) with the experience estimate's confidence.
+        """
+        skills = list(self.taxonomy.find_skills(resume_text))
+        experience_years, experience_confidence = estimate_experience_years(resume_text)
+        skill_confidence = min(1.0, len(skills) / float(SKILLS_FOR_FULL_CONFIDENCE))
+        confidence = round(0.6 * skill_confidence + 0.4 * experience_confidence, 3)
+        return {
+            "skills": skills,
+            "experience_years": experience_years if experience_years is not None else 0,
+            "confidence": confidence,
+        }
+
+
+_default_extractor: Optional[LocalSkillExtractor] = None
+
+
+def get_local_extractor() -> LocalSkillExtractor:
+    """Returns the process-wide extractor (the automaton is compiled once)."""
+    global _default_extractor
+    if _default_extractor is None:
+        _default_extractor = LocalSkillExtractor()
+    return _default_extractor
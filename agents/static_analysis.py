@@ -0,0 +1,362 @@
+"""
+Cheap static pre-pass over code submissions, run before any LLM call.
+
+Python is parsed with `ast`; other languages get a lightweight token scan (comments
+and string/char literals stripped using each language's literal syntax, brackets
+matched). Bracket mismatches are only reported for languages whose literal syntax the
+scan knows, so an unfamiliar construct is never presented as a compile error. Both
+produce the same shape:
+
+    {"language", "parsed", "error", "empty", "fail_fast", "metrics": {...}, "notes": [...]}
+
+fail_fast is True when the submission cannot be evaluated meaningfully: Python that
+does not parse, or code in any language that is empty or still the starter template.
+CodeEvaluator answers those locally. Otherwise summarize_analysis() gives the LLM a
+compact description of the metrics.
+"""
+import ast
+import re
+from typing import Any, Dict, List, Optional
+
+# Decision points counted towards cyclomatic complexity (McCabe).
+_PY_BRANCH_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp, ast.ExceptHandler, ast.Assert)
+_PY_LOOP_NODES = (ast.For, ast.AsyncFor, ast.While)
+_PY_BLOCK_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith, ast.Try)
+_PY_FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+
+# Literal forms, tried in order at each position. "char" is a single-quoted character literal
+# ('a', '\n', '\u{1F600}'): in those languages a lone quote is something else, such as a Rust
+# lifetime (<'a>) or loop label, and is left alone.
+_LITERALS = {
+    "line_comment": r"//[^\n]*",
+    "block_comment": r"/\*.*?\*/",
+    "hash_comment": r"#[^\n]*",
+    "triple_string": r'"""(?:\\.|[^\\])*?"""',
+    "rust_raw_string": r'\br(?P<raw_hashes>#*)".*?"(?P=raw_hashes)',
+    "verbatim_string": r'@"(?:""|[^"])*"',
+    "string": r'"(?:\\.|[^"\\\n])*"',
+    "char": r"'(?:\\[^'\n]{1,10}|[^'\\\n])'",
+    "single_string": r"'(?:\\.|[^'\\\n])*'",
+    "backtick_string": r"`(?:\\.|[^`\\])*`",
+}
+_C_FAMILY = ["line_comment", "block_comment"]
+_LANGUAGE_LITERALS = {
+    "javascript": _C_FAMILY + ["string", "single_string", "backtick_string"],
+    "typescript": _C_FAMILY + ["string", "single_string", "backtick_string"],
+    "java": _C_FAMILY + ["triple_string", "string", "char"],
+    "c_cpp": _C_FAMILY + ["string", "char"],
+    "csharp": _C_FAMILY + ["verbatim_string", "string", "char"],
+    "golang": _C_FAMILY + ["string", "char", "backtick_string"],
+    "rust": _C_FAMILY + ["rust_raw_string", "string", "char"],
+    "kotlin": _C_FAMILY + ["triple_string", "string", "char"],
+    "swift": _C_FAMILY + ["triple_string", "string"],
+    "scala": _C_FAMILY + ["triple_string", "string", "char"],
+    "dart": _C_FAMILY + ["string", "single_string"],
+    "php": _C_FAMILY + ["hash_comment", "string", "single_string"],
+    "ruby": ["hash_comment", "string", "single_string"],
+    "perl": ["hash_comment", "string", "single_string"],
+    "sh": ["hash_comment", "string", "single_string"],
+    "r": ["hash_comment", "string", "single_string"],
+    "powershell": ["hash_comment", "string", "single_string"],
+}
+# Languages without an entry get the C-family comments and both quote styles, and no bracket verdict.
+_DEFAULT_LITERALS = _C_FAMILY + ["string", "single_string"]
+_LITERAL_PATTERNS: Dict[str, "re.Pattern[str]"] = {}
+_DECISION_TOKENS = re.compile(r"\b(?:if|for|while|case|catch|elif|elsif|except|when)\b|&&|\|\||\?(?![?.:])")
+_LOOP_HEADER = re.compile(r"\b(?:for|while|do|foreach|loop)\b")
+_CONTROL_HEADER = re.compile(r"\b(?:if|else|switch|match|try|catch|finally|when|unless|case)\b")
+_DECLARATION_LINE = re.compile(r"^(?:def|func|fn|fun|function|sub|package|import|using|#include|@\w+)\b")
+_FUNCTION_PATTERNS = {
+    "javascript": r"\bfunction\b|=>",
+    "typescript": r"\bfunction\b|=>",
+    "java": r"\b(?:public|private|protected|static)\b[^;{=]*\([^)]*\)\s*(?:throws [\w., ]+)?\{",
+    "c_cpp": r"\b\w+[\w<>\[\]*&\s]*\s+\**\w+\s*\([^;{)]*\)\s*(?:const\s*)?\{",
+    "csharp": r"\b(?:public|private|protected|static|internal)\b[^;{=]*\([^)]*\)\s*\{",
+    "golang": r"\bfunc\b",
+    "rust": r"\bfn\b",
+    "kotlin": r"\bfun\b",
+    "swift": r"\bfunc\b",
+    "ruby": r"\bdef\b",
+    "php": r"\bfunction\b",
+}
+HASH_COMMENT_LANGUAGES = {"ruby", "perl", "r", "sh", "powershell", "php"}
+_TEMPLATE_STATEMENT = re.compile(
+    r"^(?:pass|\.\.\.|end|return\s*(?:None|null|nil|0|false|\"\"|\[\]|\{\})?|todo!\(\)|unimplemented!\(\)|throw\b.*|raise\b.*)?$")
+
+
+def analyze_code(code_submission: str, language: str) -> Dict[str, Any]:
+    """
+    Statically analyzes a submission.
+
+    Args:
+        code_submission: Candidate source code.
+        language: Editor/detected language name.
+
+    Returns:
+        The analysis dictionary described in the module docstring.
+    """
+    language = (language or "text").strip().lower()
+    if language in ("python", "python3", "py"):
+        return _analyze_python(code_submission)
+    return _analyze_generic(code_submission, language)
+
+
+def summarize_analysis(analysis: Optional[Dict[str, Any]]) -> str:
+    """One-line summary of the metrics for the evaluation prompt ("" when there is nothing to say)."""
+    if not analysis or not analysis.get("metrics"):
+        return ""
+    metrics = analysis["metrics"]
+    parts = [
+        f"{metrics['functions']} function(s)",
+        f"max cyclomatic complexity {metrics['max_complexity']}",
+        f"max nesting depth {metrics['max_nesting']}",
+    ]
+    loop_depth = metrics.get("max_loop_depth", 0)
+    if loop_depth >= 2:
+        parts.append(f"loops nested {loop_depth} deep (likely O(n^{loop_depth}))")
+    else:
+        parts.append("no nested loops")
+    if metrics.get("recursive_functions"):
+        parts.append("recursion in " + ", ".join(metrics["recursive_functions"]))
+    summary = f"Static analysis ({analysis['language']}): " + "; ".join(parts) + "."
+    if analysis.get("notes"):
+        summary += " " + " ".join(analysis["notes"])
+    return summary
+
+
+def _result(language: str, parsed: bool, empty: bool = False, error: Optional[str] = None,
+            metrics: Optional[Dict[str, Any]] = None, notes: Optional[List[str]] = None,
+            fail_fast: bool = False) -> Dict[str, Any]:
+    return {"language": language, "parsed": parsed, "error": error, "empty": empty,
+            "fail_fast": fail_fast or empty, "metrics": metrics or {}, "notes": notes or []}
+
+
+# --- Python ---------------------------------------------------------------
+
+class _PythonMetrics(ast.NodeVisitor):
+    """Single walk collecting per-function complexity, nesting depth, loop depth and recursion."""
+
+    def __init__(self):
+        self.functions: List[str] = []
+        self.complexity: Dict[str, int] = {}
+        self.recursive: List[str] = []
+        self.max_nesting = 0
+        self.max_loop_depth = 0
+        self._function_stack: List[str] = []
+        self._nesting = 0
+        self._loop_depth = 0
+
+    def _current(self) -> str:
+        return self._function_stack[-1] if self._function_stack else "<module>"
+
+    def _add_complexity(self, amount: int) -> None:
+        name = self._current()
+        self.complexity[name] = self.complexity.get(name, 1) + amount
+
+    def visit_FunctionDef(self, node: ast.AST) -> None:
+        name = getattr(node, "name", "<lambda>")
+        self.functions.append(name)
+        self.complexity.setdefault(name, 1)
+        self._function_stack.append(name)
+        # Loops and blocks do not carry across function boundaries.
+        saved = (self._nesting, self._loop_depth)
+        self._nesting = self._loop_depth = 0
+        self.generic_visit(node)
+        self._nesting, self._loop_depth = saved
+        self._function_stack.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        self._add_complexity(0)
+        self.generic_visit(node)
+
+    def visit_BoolOp(self, node: ast.BoolOp) -> None:
+        self._add_complexity(len(node.values) - 1)
+        self.generic_visit(node)
+
+    def visit_comprehension(self, node: ast.comprehension) -> None:
+        self._add_complexity(1 + len(node.ifs))
+        self.generic_visit(node)
+
+    def _visit_comprehension_expr(self, node: ast.AST) -> None:
+        # Each extra generator is another nested loop: [x for a in A for b in B].
+        depth = len(node.generators)
+        self.max_loop_depth = max(self.max_loop_depth, self._loop_depth + depth)
+        self._loop_depth += depth
+        self.generic_visit(node)
+        self._loop_depth -= depth
+
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _visit_comprehension_expr
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if isinstance(node.func, ast.Name) and node.func.id in self._function_stack[-1:]:
+            if node.func.id not in self.recursive:
+                self.recursive.append(node.func.id)
+        self.generic_visit(node)
+
+    def generic_visit(self, node: ast.AST) -> None:
+        is_block = isinstance(node, _PY_BLOCK_NODES)
+        is_loop = isinstance(node, _PY_LOOP_NODES)
+        if isinstance(node, _PY_BRANCH_NODES):
+            self._add_complexity(1)
+        if is_block:
+            self._nesting += 1
+            self.max_nesting = max(self.max_nesting, self._nesting)
+        if is_loop:
+            self._loop_depth += 1
+            self.max_loop_depth = max(self.max_loop_depth, self._loop_depth)
+        super().generic_visit(node)
+        if is_loop:
+            self._loop_depth -= 1
+        if is_block:
+            self._nesting -= 1
+
+
+def _is_placeholder_body(body: List[ast.stmt]) -> bool:
+    """True for bodies made only of docstrings, pass, ..., a bare return or raise NotImplementedError."""
+    for statement in body:
+        if isinstance(statement, ast.Pass):
+            continue
+        if isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Constant):
+            continue  # docstring or ...
+        if isinstance(statement, ast.Return) and (statement.value is None or
+                                                  (isinstance(statement.value, ast.Constant) and statement.value.value is None)):
+            continue
+        if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)) and _is_placeholder_body(statement.body):
+            continue
+        if isinstance(statement, ast.Raise) and "NotImplementedError" in ast.dump(statement):
+            continue
+        return False
+    return True
+
+
+def _analyze_python(code_submission: str) -> Dict[str, Any]:
+    if not code_submission.strip():
+        return _result("python", parsed=True, empty=True, notes=["The submission is empty."])
+    try:
+        tree = ast.parse(code_submission)
+    except SyntaxError as e:
+        return _result("python", parsed=False, fail_fast=True,
+                       error=f"SyntaxError: {e.msg} (line {e.lineno})")
+    except (ValueError, RecursionError) as e:
+        return _result("python", parsed=False, fail_fast=True, error=f"{type(e).__name__}: {e}")
+
+    if _is_placeholder_body(tree.body):
+        return _result("python", parsed=True, empty=True,
+                       notes=["The submission is still the starter template; no solution logic was written."])
+
+    collector = _PythonMetrics()
+    collector.visit(tree)
+    complexities = collector.complexity or {"<module>": 1}
+    metrics = {
+        "lines": len([line for line in code_submission.splitlines() if line.strip()]),
+        "functions": len(collector.functions),
+        "max_complexity": max(complexities.values()),
+        "total_complexity": sum(complexities.values()),
+        "max_nesting": collector.max_nesting,
+        "max_loop_depth": collector.max_loop_depth,
+        "recursive_functions": collector.recursive,
+    }
+    notes = []
+    if "solve" not in collector.functions:
+        notes.append("No function named solve is defined.")
+    return _result("python", parsed=True, metrics=metrics, notes=notes)
+
+
+# --- Other languages --------------------------------------------------------
+
+def _is_template(code: str) -> bool:
+    """
+    True when the stripped code holds nothing but declarations and placeholder statements.
+
+    Code is split into statements at braces, semicolons and newlines; a statement ending in '{'
+    without a loop/control keyword is a function, class or namespace header.
+    """
+    parts = re.split(r"([{};\n])", code)
+    for statement, delimiter in zip(parts[::2], parts[1::2] + [""]):
+        statement = statement.strip()
+        if not statement or _TEMPLATE_STATEMENT.match(statement) or _DECLARATION_LINE.match(statement):
+            continue
+        if delimiter == "{" and not (_LOOP_HEADER.search(statement) or _CONTROL_HEADER.search(statement)):
+            continue
+        return False
+    return True
+
+
+def _literal_pattern(language: str) -> "re.Pattern[str]":
+    pattern = _LITERAL_PATTERNS.get(language)
+    if pattern is None:
+        kinds = _LANGUAGE_LITERALS.get(language, _DEFAULT_LITERALS)
+        pattern = re.compile("|".join(f"(?P<{kind}>{_LITERALS[kind]})" for kind in kinds), re.DOTALL)
+        _LITERAL_PATTERNS[language] = pattern
+    return pattern
+
+
+def _strip_comments_and_strings(code_submission: str, language: str) -> str:
+    """Replaces comments with a space and literals with "", in a single left-to-right pass."""
+    def replace(match: "re.Match[str]") -> str:
+        return " " if match.lastgroup.endswith("comment") else '""'
+
+    return _literal_pattern(language).sub(replace, code_submission)
+
+
+def _analyze_generic(code_submission: str, language: str) -> Dict[str, Any]:
+    code = _strip_comments_and_strings(code_submission, language)
+    if not code.strip():
+        return _result(language, parsed=True, empty=True, notes=["The submission is empty."])
+
+    if _is_template(code):
+        return _result(language, parsed=True, empty=True,
+                       notes=["The submission is still the starter template; no solution logic was written."])
+
+    # Bracket matching plus brace-depth tracking. Each '{' is classified by the header before it:
+    # loops and control blocks count towards nesting, function/class bodies do not.
+    pairs = {")": "(", "]": "[", "}": "{"}
+    stack: List[str] = []
+    block_kinds: List[str] = []
+    max_nesting = max_loop_depth = 0
+    unbalanced = None
+    last_boundary = 0
+    for index, ch in enumerate(code):
+        if ch in "([{":
+            stack.append(ch)
+            if ch == "{":
+                header = code[last_boundary:index]
+                if _LOOP_HEADER.search(header):
+                    block_kinds.append("loop")
+                elif _CONTROL_HEADER.search(header):
+                    block_kinds.append("control")
+                else:
+                    block_kinds.append("other")
+                max_nesting = max(max_nesting, len(block_kinds) - block_kinds.count("other"))
+                max_loop_depth = max(max_loop_depth, block_kinds.count("loop"))
+                last_boundary = index + 1
+        elif ch in ")]}":
+            if not stack or stack[-1] != pairs[ch]:
+                unbalanced = f"Unmatched '{ch}' at offset {index}."
+                break
+            stack.pop()
+            if ch == "}" and block_kinds:
+                block_kinds.pop()
+                last_boundary = index + 1
+        elif ch == ";" and not (stack and stack[-1] == "("):
+            # Semicolons inside parentheses belong to a for (...; ...; ...) header.
+            last_boundary = index + 1
+    if unbalanced is None and stack:
+        unbalanced = f"Unclosed '{stack[-1]}'."
+
+    function_pattern = _FUNCTION_PATTERNS.get(language)
+    metrics = {
+        "lines": len([line for line in code_submission.splitlines() if line.strip()]),
+        "functions": len(re.findall(function_pattern, code)) if function_pattern else 0,
+        "max_complexity": 1 + len(_DECISION_TOKENS.findall(code)),
+        "total_complexity": 1 + len(_DECISION_TOKENS.findall(code)),
+        "max_nesting": max_nesting,
+        "max_loop_depth": max_loop_depth,
+        "recursive_functions": [],
+    }
+    if unbalanced and language not in _LANGUAGE_LITERALS:
+        unbalanced = None  # the scan does not know this language's syntax well enough to judge
+    notes = [f"Brackets do not balance ({unbalanced}); the code likely does not compile."] if unbalanced else []
+    return _result(language, parsed=unbalanced is None, error=unbalanced, metrics=metrics, notes=notes)
@@ -0,0 +1,164 @@
+"""
+Each candidate's last evaluated submission per question, and line diffs against it.
+
+When a candidate resubmits, CodeEvaluator can send the model only the diff against the
+previous submission plus that submission's evaluation, and reuse the feedback for the
+categories the change does not affect (incremental mode). Recent submissions are kept
+in an in-memory LRU keyed by (candidate, question, language, model); on a miss, e.g.
+after a restart or in another worker, the latest evaluation in the interview store is
+used instead.
+"""
+import difflib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from agents.code_fingerprint import question_hash
+from agents.interview_store import InterviewStore, get_interview_store
+from agents.results import CodeEvaluation
+from metrics import log_event
+
+INCREMENTAL_EVALUATION_ENABLED = os.environ.get("INCREMENTAL_EVALUATION_ENABLED", "1").lower() not in ("0", "false", "no")
+# Share of changed lines (of both versions together) above which a resubmission is evaluated from scratch.
+INCREMENTAL_MAX_CHANGE_RATIO = float(os.environ.get("INCREMENTAL_MAX_CHANGE_RATIO", 0.5))
+SUBMISSION_HISTORY_MAX_ENTRIES = int(os.environ.get("SUBMISSION_HISTORY_MAX_ENTRIES", 4096))
+DIFF_CONTEXT_LINES = 3
+
+
+class PreviousSubmission:
+    """A candidate's last evaluated submission to a question."""
+
+    __slots__ = ("code", "evaluation", "tests_passed", "tests_total", "created_at")
+
+    def __init__(self, code: str, evaluation: CodeEvaluation, tests_passed: Optional[int] = None,
+                 tests_total: Optional[int] = None, created_at: Optional[float] = None):
+        self.code = code
+        self.evaluation = evaluation
+        self.tests_passed = tests_passed
+        self.tests_total = tests_total
+        self.created_at = created_at if created_at is not None else time.time()
+
+
+class CodeDiff:
+    """Unified line diff between two versions of a submission."""
+
+    __slots__ = ("text", "added", "removed", "change_ratio")
+
+    def __init__(self, text: str, added: int, removed: int, change_ratio: float):
+        self.text = text
+        self.added = added
+        self.removed = removed
+        self.change_ratio = change_ratio
+
+    @property
+    def unchanged(self) -> bool:
+        return not self.added and not self.removed
+
+
+def diff_submissions(previous: str, current: str, context: int = DIFF_CONTEXT_LINES) -> CodeDiff:
+    """
+    Diffs two submissions line by line, ignoring trailing whitespace.
+
+    change_ratio is the number of added plus removed lines over the line count of both
+    versions together: 0.0 for identical code, 1.0 for a complete rewrite.
+    """
+    old_lines = [line.rstrip() for line in previous.splitlines()]
+    new_lines = [line.rstrip() for line in current.splitlines()]
+    lines = list(difflib.unified_diff(old_lines, new_lines, "previous", "revised", n=context, lineterm=""))
+    added = sum(1 for line in lines[2:] if line.startswith("+"))
+    removed = sum(1 for line in lines[2:] if line.startswith("-"))
+    total = len(old_lines) + len(new_lines)
+    return CodeDiff("\n".join(lines), added, removed, (added + removed) / total if total else 0.0)
+
+
+class SubmissionHistory:
+    """LRU of the last evaluated submission per (candidate, question, language, model), backed by the interview store."""
+
+    def __init__(self, max_entries: int = SUBMISSION_HISTORY_MAX_ENTRIES, store: Optional[InterviewStore] = None):
+        self.max_entries = max_entries
+        self.store = store
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, str, str], PreviousSubmission]" = OrderedDict()
+        self._stats = {"hits": 0, "store_hits": 0, "misses": 0}
+
+    def remember(self, candidate_id: str, question: str, language: str, model_name: Optional[str], code: str,
+                 evaluation: CodeEvaluation, execution: Optional[Dict[str, Any]] = None) -> None:
+        """Saves a submission as the candidate's latest for the question."""
+        executed = execution and execution.get("status") != "unsupported"
+        entry = PreviousSubmission(code, evaluation, execution.get("passed") if executed else None,
+                                   execution.get("total") if executed else None)
+        key = self._key(candidate_id, question, language, model_name)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def previous(self, candidate_id: str, question: str, language: str,
+                 model_name: Optional[str]) -> Optional[PreviousSubmission]:
+        """The candidate's latest evaluated submission to the question, or None."""
+        key = self._key(candidate_id, question, language, model_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry
+        entry = self._from_store(candidate_id, question, language)
+        with self._lock:
+            self._stats["store_hits" if entry is not None else "misses"] += 1
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "size": len(self._entries)}
+
+    def _from_store(self, candidate_id: str, question: str, language: str) -> Optional[PreviousSubmission]:
+        """Latest LLM-backed evaluation of the same candidate, question and language in the interview store."""
+        if self.store is None:
+            return None
+        try:
+            rows: List[Dict[str, Any]] = self.store.list_evaluations(candidate_id=candidate_id, question=question,
+                                                                     limit=5, include_details=True)
+        except Exception as e:
+            log_event("SubmissionHistory", "Interview store lookup failed.", level="warning", error=str(e))
+            return None
+        language = _language(language)
+        for row in rows:
+            # Static rejections carry no assessment worth building on.
+            if _language(row["language"]) == language and row["source"] != "static":
+                return PreviousSubmission(row["code"], CodeEvaluation.from_dict(row["evaluation"]),
+                                          row["tests_passed"], row["tests_total"], row["created_at"])
+        return None
+
+    @staticmethod
+    def _key(candidate_id: str, question: str, language: str, model_name: Optional[str]) -> Tuple[str, str, str, str]:
+        return candidate_id, question_hash(question), _language(language), model_name or "default"
+
+
+def _language(language: Optional[str]) -> str:
+    return (language or "text").strip().lower()
+
+
+_submission_history: Optional[SubmissionHistory] = None
+_submission_history_lock = threading.Lock()
+
+
+def get_submission_history() -> Optional[SubmissionHistory]:
+    """Returns the process-wide submission history, or None if incremental evaluation is disabled."""
+    global _submission_history
+    if not INCREMENTAL_EVALUATION_ENABLED:
+        return None
+    if _submission_history is None:
+        with _submission_history_lock:
+            if _submission_history is None:
+                _submission_history = SubmissionHistory(store=get_interview_store())
+    return _submission_history
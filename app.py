@@ -1,10 +1,12 @@
 import streamlit as st
-from agents.manager_agent import ManagerAgent
+from agents.manager_agent import get_manager_agent
 from utils import GEMINI_API_KEY # For checking API key status
 import io
-from pygments import lexers
-from pygments.util import ClassNotFound
-from streamlit_ace import st_ace, LANGUAGES, THEMES, KEYBINDINGS
+from agents.job_queue import JobQueueFull
+import metrics
+import startup_timing
+
+JOB_POLL_SECONDS = 1.0  # How often a running background job is polled for progress
 
 st.set_page_config(layout="wide", page_title="AI-Powered Interview System")
 
@@ -13,8 +15,11 @@ st.caption("Upload a resume to generate a tailored coding question and get AI-po
 
 # --- Initialize ManagerAgent and other session states ---
 if 'manager' not in st.session_state:
-    st.session_state.manager = ManagerAgent()
-    print("App.py: ManagerAgent initialized and stored in session state.")
+    # One ManagerAgent per process: sessions share its clients, caches and worker pools.
+    st.session_state.manager = get_manager_agent()
+    print("App.py: Shared ManagerAgent stored in session state.")
+# Serves /metrics (Prometheus) and /metrics.json when METRICS_PORT is set; started once per process.
+metrics.start_metrics_server()
 if 'generated_question' not in st.session_state:
     st.session_state.generated_question = None
 if 'extracted_skills' not in st.session_state:
@@ -37,6 +42,35 @@ if 'selected_editor_theme' not in st.session_state:
     st.session_state.selected_editor_theme = "tomorrow_night"
 if 'selected_keybinding' not in st.session_state:
     st.session_state.selected_keybinding = "ace"
+if 'question_difficulty' not in st.session_state:
+    st.session_state.question_difficulty = None  # Difficulty the current question was generated for
+if 'resume_job_id' not in st.session_state:
+    st.session_state.resume_job_id = None  # Background resume analysis/question job being polled
+if 'evaluation_job_id' not in st.session_state:
+    st.session_state.evaluation_job_id = None  # Background code evaluation job being polled
+if 'analyzed_upload' not in st.session_state:
+    st.session_state.analyzed_upload = None  # file_id of the upload a resume job was submitted for
+if 'candidate_id' not in st.session_state:
+    st.session_state.candidate_id = None  # Resume fingerprint; links evaluations to the candidate in the interview store
+
+# --- Pick up background jobs after a browser refresh (job ids are kept in the URL) ---
+if 'jobs_restored' not in st.session_state:
+    st.session_state.jobs_restored = True
+    restored_resume_job = st.session_state.manager.get_job(st.query_params["resume_job"]) if "resume_job" in st.query_params else None
+    if restored_resume_job is not None:
+        st.session_state.resume_job_id = restored_resume_job["id"]
+    restored_evaluation_job = st.session_state.manager.get_job(st.query_params["evaluation_job"]) if "evaluation_job" in st.query_params else None
+    if restored_evaluation_job is not None:
+        st.session_state.evaluation_job_id = restored_evaluation_job["id"]
+        st.session_state.generated_question = restored_evaluation_job["request"]["question"]
+        st.session_state.submitted_code_display = restored_evaluation_job["request"]["code"]
+        st.session_state.code_input_area_content = restored_evaluation_job["request"]["code"]
+        st.session_state.selected_editor_language = restored_evaluation_job["request"]["language"]
+        st.session_state.candidate_id = restored_evaluation_job["request"].get("candidate_id")
+        st.session_state.active_tab_index = 2
+        if restored_evaluation_job["status"] == "done":
+            st.session_state.evaluation_job_id = None
+            st.session_state.evaluation_feedback = (restored_evaluation_job["result"] or {}).get("feedback")
 
 def clear_session_state_for_restart():
     """Clears session state variables to allow the user to start over."""
@@ -51,11 +85,83 @@ def clear_session_state_for_restart():
     st.session_state.selected_editor_language = "python"
     st.session_state.selected_editor_theme = "tomorrow_night"
     st.session_state.selected_keybinding = "ace"
+    st.session_state.question_difficulty = None
+    st.session_state.resume_job_id = None
+    st.session_state.evaluation_job_id = None
+    st.session_state.analyzed_upload = None
+    st.session_state.candidate_id = None
+    st.query_params.clear()
     # The file uploader will reset itself if its key changes or a new file is uploaded.
     # Forcing a full clear might involve more complex handling of the uploader widget itself.
     print("App.py: Session state cleared for restart.")
 
 
+def submit_resume_job(uploaded_file, difficulty: str) -> None:
+    """Queues resume analysis/question generation in the background and remembers the job id in the URL."""
+    try:
+        job_id = st.session_state.manager.submit_resume_job(
+            uploaded_file.getvalue(),
+            file_name=uploaded_file.name,
+            difficulty=difficulty
+        )
+    except JobQueueFull:
+        st.error("The server is busy right now. Please try again in a moment.")
+        return
+    st.session_state.resume_job_id = job_id
+    st.query_params["resume_job"] = job_id
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def poll_resume_job():
+    """Shows progress of the resume job; once it finishes, stores its result and reruns the app."""
+    job = st.session_state.manager.get_job(st.session_state.resume_job_id)
+    if job is not None and job["status"] in ("queued", "running"):
+        st.info(f"⏳ {job['progress']}... ({job['elapsed_seconds']:.0f}s)")
+        return
+
+    st.session_state.resume_job_id = None
+    if job is None:
+        st.toast("The resume analysis job has expired. Please upload the resume again.", icon="⚠️")
+    elif job["status"] == "failed":
+        st.session_state.question_difficulty = job["request"]["difficulty"]
+        st.toast(f"Failed to process resume: {job['error']}", icon="❌")
+    else:
+        skills, question = job["result"]["skills"], job["result"]["question"]
+        if skills:
+            st.session_state.extracted_skills = skills
+        st.session_state.generated_question = question
+        st.session_state.question_difficulty = job["result"]["difficulty"]
+        st.session_state.candidate_id = job["result"]["candidate_id"]
+        if skills and question:
+            st.toast("Resume processed and question generated!", icon="✅")
+        elif skills:
+            st.toast("Skills extracted, but question generation failed.", icon="⚠️")
+        else:
+            st.toast("Failed to process resume and generate question.", icon="❌")
+    st.rerun()
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def poll_evaluation_job():
+    """Renders the evaluation streamed so far; once the job finishes, stores the feedback and reruns the app."""
+    job = st.session_state.manager.get_job(st.session_state.evaluation_job_id)
+    if job is not None and job["status"] in ("queued", "running"):
+        if job["partial"]:
+            st.markdown(job["partial"])
+        else:
+            st.info(f"⏳ {job['progress']}... ({job['elapsed_seconds']:.0f}s)")
+        return
+
+    st.session_state.evaluation_job_id = None
+    feedback = (job["result"] or {}).get("feedback") if job is not None else None
+    st.session_state.evaluation_feedback = feedback
+    if feedback:
+        st.toast("Evaluation complete!", icon="✅") # Simpler toast
+    else:
+        st.toast("Failed to get evaluation feedback.", icon="❌")
+    st.rerun()
+
+
 # --- Workflow Progress Indicator ---
 st.markdown("### Workflow Progress")
 max_steps = 3  # Resume Analysis, Coding Challenge, Evaluation Feedback
@@ -104,6 +210,11 @@ if st.session_state.active_tab_index == 0:
             setattr(st.session_state, 'evaluation_feedback', None),
             setattr(st.session_state, 'submitted_code_display', None),
             setattr(st.session_state, 'code_input_area_content', "def solve():\n    # Your code here\n    pass"),
+            setattr(st.session_state, 'question_difficulty', None),
+            setattr(st.session_state, 'resume_job_id', None),
+            setattr(st.session_state, 'evaluation_job_id', None),
+            setattr(st.session_state, 'analyzed_upload', None),
+            st.query_params.clear(),
             setattr(st.session_state, 'active_tab_index', 0) # Reset to step 1
         ]
     )
@@ -116,27 +227,23 @@ if st.session_state.active_tab_index == 0:
         key="difficulty_selector"
     )
 
-    if uploaded_file is not None:
-        # Process resume only if skills/question haven't been extracted for this upload yet
-        if st.session_state.get('extracted_skills') is None and st.session_state.get('generated_question') is None:
+    if uploaded_file is not None and not st.session_state.get('resume_job_id'):
+        # Process resume only if it hasn't been submitted for this upload yet
+        if st.session_state.analyzed_upload != uploaded_file.file_id:
             st.success(f"Uploaded: {uploaded_file.name}")
             st.toast(f"Analyzing resume and generating {st.session_state.selected_difficulty} question...", icon="⏳")
-            with st.spinner(f"Analyzing resume and generating {st.session_state.selected_difficulty} question..."):
-                resume_bytes = uploaded_file.getvalue()
-                skills, question = st.session_state.manager.process_resume_and_generate_question(
-                    resume_bytes,
-                    file_name=uploaded_file.name,
-                    difficulty=st.session_state.selected_difficulty
-                )
-                st.session_state.extracted_skills = skills
-                st.session_state.generated_question = question
-
-                if skills and question:
-                    st.toast("Resume processed and question generated!", icon="✅")
-                elif skills:
-                    st.toast("Skills extracted, but question generation failed.", icon="⚠️")
-                else:
-                    st.toast("Failed to process resume and generate question.", icon="❌")
+            st.session_state.analyzed_upload = uploaded_file.file_id
+            submit_resume_job(uploaded_file, st.session_state.selected_difficulty)
+        elif st.session_state.get('extracted_skills') and st.session_state.question_difficulty != st.session_state.selected_difficulty:
+            # Difficulty changed after analysis: the other levels were generated speculatively,
+            # so this job is answered from the manager's per-resume question set.
+            submit_resume_job(uploaded_file, st.session_state.selected_difficulty)
+
+    if st.session_state.get('resume_job_id'):
+        poll_resume_job()
+
+    if st.session_state.get('generated_question') and st.session_state.get('question_difficulty'):
+        st.caption(f"Current question difficulty: {st.session_state.question_difficulty}")
     
     if st.session_state.get('extracted_skills'):
         st.subheader("🔍 Extracted Skills:")
@@ -157,7 +264,10 @@ elif st.session_state.active_tab_index == 1:
     st.header("💻 Coding Challenge")
     if st.session_state.get('generated_question'):
         st.info(f"**Question:** {st.session_state.generated_question}")
-        
+        # The editor component is only needed on this step, so it is imported on first use.
+        ace = startup_timing.lazy_import("streamlit_ace")
+        st_ace, LANGUAGES, THEMES, KEYBINDINGS = ace.st_ace, ace.LANGUAGES, ace.THEMES, ace.KEYBINDINGS
+
         st.subheader("Code Editor Settings")
         editor_cols = st.columns(3)
         with editor_cols[0]:
@@ -217,18 +327,22 @@ elif st.session_state.active_tab_index == 1:
                     evaluation_language = st.session_state.selected_editor_language
                     print(f"App.py: Evaluating code as {evaluation_language}")
 
-                    st.toast(f"Evaluating your {evaluation_language} code...", icon="⏳")
-                    with st.spinner(f"Evaluating your {evaluation_language} code..."):
-                        feedback = st.session_state.manager.evaluate_code_submission(
+                    # Evaluation runs as a background job; the feedback step shows it as it streams in
+                    try:
+                        job_id = st.session_state.manager.submit_evaluation_job(
                             st.session_state.generated_question,
                             st.session_state.code_input_area_content, # Use the content from session state
-                            language=evaluation_language
+                            language=evaluation_language,
+                            candidate_id=st.session_state.candidate_id
                         )
-                        st.session_state.evaluation_feedback = feedback
-                        if feedback:
-                            st.toast("Evaluation complete!", icon="✅") # Simpler toast
-                        else:
-                            st.toast("Failed to get evaluation feedback.", icon="❌")
+                    except JobQueueFull:
+                        st.error("The server is busy right now. Please try again in a moment.")
+                    else:
+                        st.session_state.evaluation_job_id = job_id
+                        st.query_params["evaluation_job"] = job_id
+                        st.toast(f"Evaluating your {evaluation_language} code...", icon="⏳")
+                        st.session_state.active_tab_index = 2
+                        st.rerun()
                 else:
                     st.error("Please enter your code solution before submitting.")
         
@@ -263,7 +377,10 @@ elif st.session_state.active_tab_index == 2:
 
     st.markdown("---") # Visual separator
 
-    if st.session_state.get('evaluation_feedback'):
+    if st.session_state.get('evaluation_job_id'):
+        st.subheader("Evaluation Feedback:")
+        poll_evaluation_job()
+    elif st.session_state.get('evaluation_feedback'):
         st.subheader("Evaluation Feedback:")
         st.markdown(st.session_state.evaluation_feedback)
     else:
@@ -288,6 +405,23 @@ st.sidebar.info(
     "All agent responses are currently mocked/placeholders."
 )
 st.sidebar.markdown("**Workflow:** User → Streamlit UI → Manager Agent → Resume Analyzer → Question Generator → Code Evaluator → Feedback.")
+with st.sidebar.expander("Startup timing"):
+    st.json(startup_timing.report())
+with st.sidebar.expander("Cohort ranking"):
+    cohort_days = st.number_input("Last N days (0 = all)", min_value=0, value=30, step=1)
+    if st.button("Rank candidates"):
+        import cohort_analytics  # Deferred: NumPy is only needed when a ranking is requested.
+        try:
+            report = cohort_analytics.cohort_report(days=cohort_days or None, top_k=10)
+        except RuntimeError as e:
+            st.warning(str(e))
+        else:
+            st.caption(f"{report['evaluations']} evaluations, {report['candidates']} candidates, "
+                       f"{report['questions']} questions")
+            st.dataframe([{"candidate": entry["file_name"] or entry["candidate_id"][:12], "total": entry["total"],
+                           "normalized": entry["normalized"], "percentile": entry["percentile"]}
+                          for entry in report["top"]])
+            st.json(report["percentiles"].get("total", {}))
 
 
 # To run this app:
@@ -0,0 +1,183 @@
+"""
+Headless bulk resume ingestion.
+
+Walks a directory of PDF/DOCX/TXT resumes, parses them in a process pool, extracts
+skills and experience through ResumeAnalyzer with bounded LLM concurrency, and appends
+one JSON line per resume to the output file as results complete.
+
+Re-running with the same output file resumes an interrupted run: files that already
+have a successful record are skipped, and failed ones are retried (the newest line for a
+path wins). Renamed copies of finished files are answered from ResumeAnalyzer's
+fingerprint cache without an LLM call.
+
+Usage:
+    python batch_ingest.py resumes/ --output results.jsonl --workers 4 --concurrency 8
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from agents import resume_analyzer
+from agents.resume_analyzer import ResumeAnalyzer
+from agents.resume_cache import fingerprint
+from llm_resilience import Deadline
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+_worker_analyzer: Optional[ResumeAnalyzer] = None
+
+
+def _init_worker() -> None:
+    """Process-pool initializer: parallelism is across files, so PDFs are read in-process."""
+    global _worker_analyzer
+    resume_analyzer.PDF_PARALLEL_PAGE_THRESHOLD = sys.maxsize
+    _worker_analyzer = ResumeAnalyzer(use_cache=False, use_local_extractor=False)
+
+
+def _parse_resume(path: str) -> Dict[str, Any]:
+    """Runs in a pool worker. Returns {"fingerprint", "text"} or {"fingerprint", "error"}."""
+    with open(path, "rb") as f:
+        content = f.read()
+    text, error = _worker_analyzer._extract_text(content, os.path.basename(path))
+    if error:
+        return {"fingerprint": fingerprint(content), "error": error["error"]}
+    return {"fingerprint": fingerprint(content), "text": text}
+
+
+def iter_resume_files(input_dir: str, recursive: bool = True) -> Iterator[str]:
+    """Yields supported resume files under input_dir in a stable (sorted) order."""
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                yield os.path.join(root, name)
+        if not recursive:
+            break
+
+
+def load_completed(output_path: str) -> Set[str]:
+    """
+    Reads an existing output file and returns the relative paths already processed successfully.
+
+    A truncated last line (from an interrupted run) is ignored.
+    """
+    paths: Set[str] = set()
+    if not os.path.exists(output_path):
+        return paths
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "error" in record:
+                paths.discard(record.get("path"))
+                continue
+            paths.add(record.get("path"))
+    return paths
+
+
+class BatchIngestor:
+    """Parses resumes in a process pool and analyzes them with at most `concurrency` LLM calls in flight."""
+
+    def __init__(self, input_dir: str, output_path: str, workers: int = 2, concurrency: int = 4,
+                 model_name: Optional[str] = None, timeout: Optional[float] = None, recursive: bool = True):
+        self.input_dir = input_dir
+        self.output_path = output_path
+        self.workers = max(1, workers)
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.recursive = recursive
+        self.analyzer = ResumeAnalyzer(model_name=model_name)
+        self.counts = {"processed": 0, "skipped": 0, "failed": 0}
+
+    def run(self) -> Dict[str, Any]:
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> Dict[str, Any]:
+        """Processes every pending file and returns run counters plus elapsed seconds."""
+        started = time.perf_counter()
+        done_paths = load_completed(self.output_path)
+        pending: List[str] = []
+        for path in iter_resume_files(self.input_dir, self.recursive):
+            if os.path.relpath(path, self.input_dir) in done_paths:
+                self.counts["skipped"] += 1
+            else:
+                pending.append(path)
+        print(f"batch_ingest: {len(pending)} resumes to process, {self.counts['skipped']} already done.")
+
+        llm_slots = asyncio.Semaphore(self.concurrency)
+        # Bounds parsed-but-not-yet-analyzed texts held in memory.
+        in_progress = asyncio.Semaphore(self.workers + self.concurrency)
+        pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker)
+        try:
+            with open(self.output_path, "a", encoding="utf-8") as out:
+                await asyncio.gather(*(
+                    self._process(path, pool, llm_slots, in_progress, out) for path in pending
+                ))
+        finally:
+            pool.shutdown(cancel_futures=True)
+        return dict(self.counts, elapsed_seconds=round(time.perf_counter() - started, 3))
+
+    async def _process(self, path: str, pool: concurrent.futures.ProcessPoolExecutor,
+                       llm_slots: asyncio.Semaphore, in_progress: asyncio.Semaphore, out) -> None:
+        async with in_progress:
+            started = time.perf_counter()
+            relative_path = os.path.relpath(path, self.input_dir)
+            record: Dict[str, Any] = {"path": relative_path, "file_name": os.path.basename(path)}
+            try:
+                parsed = await asyncio.get_running_loop().run_in_executor(pool, _parse_resume, path)
+            except Exception as e:
+                parsed = {"error": f"Could not read resume: {e}"}
+            record["fingerprint"] = parsed.get("fingerprint")
+
+            if "error" in parsed:
+                record["error"] = parsed["error"]
+            else:
+                if self.analyzer.resume_cache is not None:
+                    self.analyzer.resume_cache.set_text(record["fingerprint"], parsed["text"])
+                async with llm_slots:
+                    result = await self.analyzer.analyze_text_async(
+                        parsed["text"], record["file_name"], record["fingerprint"],
+                        deadline=Deadline.from_timeout(self.timeout))
+                record.update(result)
+
+            if "error" in record:
+                self.counts["failed"] += 1
+            else:
+                self.counts["processed"] += 1
+            record["seconds"] = round(time.perf_counter() - started, 3)
+            # Single event loop thread: lines are never interleaved.
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Extract skills and experience from a directory of resumes.")
+    parser.add_argument("input_dir", help="Directory containing .pdf, .docx and .txt resumes.")
+    parser.add_argument("-o", "--output", default="resumes.jsonl", help="JSONL output file (appended to; default: resumes.jsonl).")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Parser processes (default: CPU count).")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Maximum LLM calls in flight (default: 4).")
+    parser.add_argument("--model", default=None, help="LLM model for skill extraction.")
+    parser.add_argument("--timeout", type=float, default=None, help="Per-resume LLM deadline in seconds.")
+    parser.add_argument("--no-recursive", action="store_true", help="Do not descend into subdirectories.")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"'{args.input_dir}' is not a directory.")
+    ingestor = BatchIngestor(args.input_dir, args.output, workers=args.workers, concurrency=args.concurrency,
+                             model_name=args.model, timeout=args.timeout, recursive=not args.no_recursive)
+    summary = ingestor.run()
+    print(f"batch_ingest: Done. {json.dumps(summary)}")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,16 @@
+"""
+Offline benchmarks for the interview pipeline.
+
+Runs against a stub LLM with simulated latency (no API key or network needed) and
+reports p50/p95/p99 latency and throughput per concurrency level:
+
+    python -m benchmarks.run                                # all suites
+    python -m benchmarks.run --suites parse,postprocess --concurrency 1,8
+    python -m benchmarks.run --compare benchmarks/results/<earlier run>.json
+
+Results are written to benchmarks/results/ as JSON so runs can be compared.
+"""
+
+# Backend name the latency stub registers under; kept here so the runner can select it
+# before llm_backends is imported.
+BENCH_BACKEND = "bench_stub"
@@ -0,0 +1,89 @@
+"""
+Stub LLM backend with simulated network latency.
+
+LatencyStubBackend answers like llm_backends.StubBackend but sleeps for a latency drawn
+from a LatencyModel first, so pipeline benchmarks see realistic waiting, queueing and
+overlap without calling a real model.
+"""
+import asyncio
+import math
+import random
+import threading
+import time
+from typing import Iterator, Optional
+
+from benchmarks import BENCH_BACKEND
+from llm_backends import StubBackend, register_backend
+
+BACKEND_NAME = BENCH_BACKEND
+# Share of a streamed response's latency spent before the first chunk arrives.
+FIRST_CHUNK_SHARE = 0.3
+
+
+class LatencyModel:
+    """Draws per-call latencies (seconds) from a fixed, uniform or lognormal distribution."""
+
+    DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+    def __init__(self, distribution: str = "lognormal", mean_ms: float = 200.0, spread: float = 0.5, seed: int = 0):
+        """
+        Args:
+            distribution: "fixed", "uniform" or "lognormal".
+            mean_ms: Mean latency in milliseconds.
+            spread: Uniform: half-width as a fraction of the mean. Lognormal: sigma of the
+                underlying normal (0.5 gives a p99 of roughly 3x the median).
+            seed: Seed for reproducible draws.
+        """
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{distribution}'. Available: {', '.join(self.DISTRIBUTIONS)}")
+        self.distribution = distribution
+        self.mean = mean_ms / 1000.0
+        self.spread = spread
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        if self.mean <= 0:
+            return 0.0
+        with self._lock:
+            if self.distribution == "fixed":
+                return self.mean
+            if self.distribution == "uniform":
+                return max(0.0, self._random.uniform(self.mean * (1 - self.spread), self.mean * (1 + self.spread)))
+            # Lognormal with the requested mean: mu = ln(mean) - sigma^2 / 2
+            return self._random.lognormvariate(math.log(self.mean) - self.spread ** 2 / 2, self.spread)
+
+    def describe(self) -> dict:
+        return {"distribution": self.distribution, "mean_ms": self.mean * 1000.0, "spread": self.spread}
+
+
+class LatencyStubBackend(StubBackend):
+    """StubBackend that waits for a sampled latency before answering."""
+
+    name = BACKEND_NAME
+    latency_model = LatencyModel("fixed", 0.0)
+
+    def generate(self, prompt_text: str, timeout: Optional[float] = None) -> str:
+        time.sleep(self.latency_model.sample())
+        return super().generate(prompt_text)
+
+    async def generate_async(self, prompt_text: str, timeout: Optional[float] = None) -> str:
+        await asyncio.sleep(self.latency_model.sample())
+        return super().generate(prompt_text)
+
+    def generate_stream(self, prompt_text: str, timeout: Optional[float] = None) -> Iterator[str]:
+        latency = self.latency_model.sample()
+        text = super().generate(prompt_text)
+        chunks = [text[i:i + self.stream_chunk_size] for i in range(0, len(text), self.stream_chunk_size)] or [""]
+        time.sleep(latency * FIRST_CHUNK_SHARE)
+        per_chunk = latency * (1 - FIRST_CHUNK_SHARE) / len(chunks)
+        for index, chunk in enumerate(chunks):
+            if index:
+                time.sleep(per_chunk)
+            yield chunk
+
+
+def install(latency_model: LatencyModel) -> None:
+    """Registers the backend under BACKEND_NAME with the given latency model."""
+    LatencyStubBackend.latency_model = latency_model
+    register_backend(BACKEND_NAME, LatencyStubBackend)
@@ -0,0 +1,231 @@
+"""
+Benchmark runner.
+
+Suites:
+    pipeline     ManagerAgent end-to-end (resume -> question, then code evaluation) against
+                 the latency stub, one distinct synthetic resume and submission per request.
+    parse        ResumeAnalyzer text extraction on synthetic TXT/DOCX/PDF resumes of several sizes.
+    postprocess  CodeEvaluator response handling: JSON extraction and Markdown rendering of a
+                 complete response, and incremental rendering of a streamed one.
+
+Every case is run at each concurrency level. Results are printed as a table and saved as
+JSON (default benchmarks/results/<timestamp>.json); --compare prints the change against an
+earlier results file.
+
+By default the LLM is the latency stub. --record-cassette runs against the backend selected
+by LLM_BACKEND instead and records its traffic; --cassette replays such a recording (with
+its latencies, see --cassette-latency-scale), so a run against a real model can be repeated
+offline. Replay with the same --suites, --requests and --concurrency as the recording.
+
+Usage:
+    python -m benchmarks.run --suites pipeline --concurrency 1,4,16 --requests 32 \\
+        --latency-distribution lognormal --latency-ms 200 --latency-spread 0.5
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks import BENCH_BACKEND
+
+SUITES = ("pipeline", "parse", "postprocess")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _configure_environment(args: argparse.Namespace) -> None:
+    """
+    Points the app at the latency stub with fresh caches and quiet logs. Must run before
+    llm_backends and the agents are imported, because they read configuration at import time.
+    """
+    if args.cassette:
+        os.environ.update(LLM_CASSETTE_MODE="replay", LLM_CASSETTE_PATH=args.cassette,
+                          LLM_CASSETTE_LATENCY_SCALE=str(args.cassette_latency_scale))
+    elif args.record_cassette:
+        os.environ.update(LLM_CASSETTE_MODE="record", LLM_CASSETTE_PATH=args.record_cassette)
+    else:
+        os.environ["LLM_BACKEND"] = BENCH_BACKEND
+    if not args.keep_cache:
+        os.environ["LLM_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench-cache-")
+    os.environ.setdefault("PIPELINE_LOG_PATH", os.devnull)
+
+
+def _pipeline_cases(args: argparse.Namespace) -> Dict[str, Callable[[int], Dict[str, float]]]:
+    from agents.manager_agent import ManagerAgent
+    from benchmarks.synthetic import code_submission, synthetic_resume
+
+    manager = ManagerAgent()
+
+    def end_to_end(index: int) -> Dict[str, float]:
+        content, file_name = synthetic_resume("txt", index, paragraphs=4)
+        started = time.perf_counter()
+        skills, question = manager.process_resume_and_generate_question(content, file_name, args.difficulty)
+        if not question:
+            raise RuntimeError(f"No question generated for {file_name}")
+        generated = time.perf_counter()
+        feedback = manager.evaluate_code_submission(question, code_submission(index), "python")
+        if not feedback or feedback.startswith("Error:"):
+            raise RuntimeError(f"Evaluation failed for {file_name}: {feedback}")
+        return {"question": generated - started, "evaluation": time.perf_counter() - generated}
+
+    return {"end_to_end": end_to_end}
+
+
+def _parse_cases(args: argparse.Namespace) -> Dict[str, Callable[[int], None]]:
+    from agents.resume_analyzer import ResumeAnalyzer
+    from benchmarks.synthetic import FORMATS, synthetic_resume
+
+    analyzer = ResumeAnalyzer(use_cache=False, use_local_extractor=False)
+    cases = {}
+    for file_format in FORMATS:
+        for paragraphs in args.sizes:
+            content, file_name = synthetic_resume(file_format, 0, paragraphs)
+
+            def extract(index: int, content: bytes = content, file_name: str = file_name) -> None:
+                _, error = analyzer._extract_text(content, file_name)
+                if error:
+                    raise RuntimeError(error.error)
+
+            cases[f"{file_format}/{paragraphs}p/{len(content) // 1024}KiB"] = extract
+    return cases
+
+
+def _postprocess_cases(args: argparse.Namespace) -> Dict[str, Callable[[int], None]]:
+    from agents.code_evaluator import CodeEvaluator
+    from benchmarks.synthetic import evaluation_response
+    from llm_json import PartialJSONParser, extract_json_object
+
+    evaluator = CodeEvaluator(use_cache=False)
+    cases = {}
+    for sentences in (2, 20):
+        response = evaluation_response(0, sentences)
+
+        def format_feedback(index: int, response: str = response) -> None:
+            evaluator._format_feedback(extract_json_object(response), response)
+
+        def stream_render(index: int, response: str = response) -> None:
+            # Same work as evaluate_stream (24-character chunks, like the stub backend).
+            parser = PartialJSONParser()
+            for start in range(0, len(response), 24):
+                if parser.feed(response[start:start + 24]):
+                    partial = parser.value()
+                    if partial:
+                        evaluator._render_markdown(partial, partial=True)
+
+        cases[f"format_feedback/{len(response)}B"] = format_feedback
+        cases[f"stream_render/{len(response)}B"] = stream_render
+    return cases
+
+
+def _metadata(args: argparse.Namespace, latency: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(RESULTS_DIR), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "latency_model": latency,
+        "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+    }
+
+
+def _print_results(results: List[Dict[str, Any]]) -> None:
+    print(f"{'suite':<12} {'case':<34} {'conc':>4} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'req/s':>9} {'err':>4}")
+    for result in results:
+        latency = result["latency_ms"]
+        print(f"{result['suite']:<12} {result['case']:<34} {result['concurrency']:>4} "
+              f"{latency.get('p50', 0):>10.2f} {latency.get('p95', 0):>10.2f} {latency.get('p99', 0):>10.2f} "
+              f"{result['throughput_rps']:>9.2f} {result['errors']:>4}")
+
+
+def _print_comparison(rows: List[Dict[str, Any]], baseline_path: str) -> None:
+    def change(value: Optional[float]) -> str:
+        return f"{value:+.1f}%" if value is not None else "n/a"
+
+    print(f"\nChange against {baseline_path} (latency: + is slower; throughput: + is faster)")
+    print(f"{'suite':<12} {'case':<34} {'conc':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8}")
+    for row in rows:
+        print(f"{row['suite']:<12} {row['case']:<34} {row['concurrency']:>4} {change(row['p50']):>8} "
+              f"{change(row['p95']):>8} {change(row['p99']):>8} {change(row['throughput_rps']):>8}")
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the interview pipeline.")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma-separated suites ({', '.join(SUITES)}).")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels.")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per case and concurrency level.")
+    parser.add_argument("--sizes", default="1,10,50", help="Resume sizes for the parse suite, in project paragraphs.")
+    parser.add_argument("--latency-distribution", default="lognormal", choices=["fixed", "uniform", "lognormal"])
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Mean simulated LLM latency.")
+    parser.add_argument("--latency-spread", type=float, default=0.5,
+                        help="Uniform: half-width as a fraction of the mean. Lognormal: sigma.")
+    parser.add_argument("--difficulty", default="Medium", choices=["Easy", "Medium", "Hard"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep-cache", action="store_true",
+                        help="Use the configured LLM_CACHE_DIR instead of a fresh temporary one.")
+    parser.add_argument("--record-cassette", metavar="PATH",
+                        help="Run against the LLM_BACKEND backend instead of the stub and record its calls to PATH.")
+    parser.add_argument("--cassette", metavar="PATH", help="Replay LLM calls from a recorded cassette.")
+    parser.add_argument("--cassette-latency-scale", type=float, default=1.0,
+                        help="Multiplier for recorded latencies when replaying (0 answers immediately).")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>.json).")
+    parser.add_argument("--compare", help="Earlier results file to compare against.")
+    args = parser.parse_args(argv)
+    args.concurrency = [int(level) for level in args.concurrency.split(",") if level]
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    suites = [suite for suite in args.suites.split(",") if suite]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"Unknown suites: {', '.join(sorted(unknown))}")
+    if args.cassette and args.record_cassette:
+        parser.error("--cassette and --record-cassette cannot be combined.")
+
+    _configure_environment(args)
+    from benchmarks import latency_stub
+    from benchmarks.stats import compare_results, run_concurrent
+    if args.cassette or args.record_cassette:
+        latency = {"cassette": args.cassette or args.record_cassette, "mode": "replay" if args.cassette else "record"}
+        if args.cassette:
+            latency["latency_scale"] = args.cassette_latency_scale
+    else:
+        latency_model = latency_stub.LatencyModel(args.latency_distribution, args.latency_ms, args.latency_spread, args.seed)
+        latency_stub.install(latency_model)
+        latency = latency_model.describe()
+
+    case_builders = {"pipeline": _pipeline_cases, "parse": _parse_cases, "postprocess": _postprocess_cases}
+    results = []
+    next_index = 0  # Pipeline requests never reuse a resume, so fingerprint caches stay cold.
+    for suite in suites:
+        for case, task in case_builders[suite](args).items():
+            for concurrency in args.concurrency:
+                print(f"benchmarks: {suite} {case} at concurrency {concurrency}...", file=sys.stderr)
+                result = run_concurrent(task, args.requests, concurrency, first_index=next_index)
+                next_index += args.requests
+                results.append({"suite": suite, "case": case, **result})
+
+    report = {"meta": _metadata(args, latency), "results": results}
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    _print_results(results)
+    print(f"\nResults saved to {output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        _print_comparison(compare_results(results, baseline["results"]), args.compare)
+    return report
+
+
+if __name__ == "__main__":
+    main()
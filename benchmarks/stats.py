@@ -0,0 +1,94 @@
+"""
+Concurrent load driver, latency summaries and run-to-run comparison.
+"""
+import concurrent.futures
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+# A task receives the request index and may return {stage: seconds} for per-stage timings.
+Task = Callable[[int], Optional[Dict[str, float]]]
+
+
+def summarize_latencies(seconds: List[float]) -> Dict[str, float]:
+    """p50/p95/p99, mean and max in milliseconds (empty dict for no samples)."""
+    if not seconds:
+        return {}
+    samples = np.asarray(seconds, dtype=np.float64) * 1000.0
+    summary = {f"p{p}": round(float(value), 3) for p, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES))}
+    summary["mean"] = round(float(samples.mean()), 3)
+    summary["max"] = round(float(samples.max()), 3)
+    return summary
+
+
+def run_concurrent(task: Task, requests: int, concurrency: int, first_index: int = 0) -> Dict[str, Any]:
+    """
+    Runs task(first_index + i) for i in range(requests) on `concurrency` threads.
+
+    Returns:
+        {"concurrency", "requests", "errors", "wall_seconds", "throughput_rps",
+         "latency_ms": summary, "stages": {stage: summary}}. Failed requests are
+        counted in errors and left out of the latency figures.
+    """
+    def timed(index: int) -> Tuple[float, Optional[Dict[str, float]]]:
+        started = time.perf_counter()
+        stages = task(index)
+        return time.perf_counter() - started, stages
+
+    latencies: List[float] = []
+    stage_samples: Dict[str, List[float]] = {}
+    errors = 0
+    started = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as executor:
+        futures = [executor.submit(timed, first_index + i) for i in range(requests)]
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                elapsed, stages = future.result()
+            except Exception as e:
+                errors += 1
+                print(f"benchmarks: Request failed: {e}")
+                continue
+            latencies.append(elapsed)
+            for stage, seconds in (stages or {}).items():
+                stage_samples.setdefault(stage, []).append(seconds)
+    wall_seconds = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "wall_seconds": round(wall_seconds, 4),
+        "throughput_rps": round(len(latencies) / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        "latency_ms": summarize_latencies(latencies),
+        "stages": {stage: summarize_latencies(samples) for stage, samples in sorted(stage_samples.items())},
+    }
+
+
+def compare_results(current: List[Dict[str, Any]], baseline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Pairs results by (suite, case, concurrency) and reports the relative change of each
+    latency percentile and of throughput (positive latency change = slower).
+    """
+    def key(result: Dict[str, Any]) -> Tuple[str, str, int]:
+        return result["suite"], result["case"], result["concurrency"]
+
+    baseline_by_key = {key(result): result for result in baseline}
+    rows = []
+    for result in current:
+        before = baseline_by_key.get(key(result))
+        if before is None:
+            continue
+        row: Dict[str, Any] = {"suite": result["suite"], "case": result["case"], "concurrency": result["concurrency"]}
+        for metric in [f"p{p}" for p in PERCENTILES]:
+            row[metric] = _relative_change(before["latency_ms"].get(metric), result["latency_ms"].get(metric))
+        row["throughput_rps"] = _relative_change(before["throughput_rps"], result["throughput_rps"])
+        rows.append(row)
+    return rows
+
+
+def _relative_change(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    if not before or after is None:
+        return None
+    return round((after - before) / before * 100.0, 1)
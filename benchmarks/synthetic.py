@@ -0,0 +1,124 @@
+"""
+Synthetic benchmark inputs: resumes as TXT, DOCX or PDF of a chosen size, code
+submissions and model evaluation responses.
+
+Everything is generated deterministically from an index, so runs are comparable and
+distinct indices never collide in the fingerprint caches.
+"""
+import io
+import json
+from typing import List, Tuple
+
+from agents.results import SCORE_KEYS
+
+FORMATS = ("txt", "docx", "pdf")
+
+_SKILLS = [
+    "Python", "Java", "Go", "TypeScript", "React", "Django", "Flask", "FastAPI", "PostgreSQL",
+    "Redis", "Kafka", "Docker", "Kubernetes", "AWS", "GCP", "Terraform", "Spark", "Airflow",
+    "TensorFlow", "PyTorch", "GraphQL", "gRPC", "MongoDB", "Elasticsearch", "CI/CD", "Git",
+]
+_PROJECT_SENTENCES = [
+    "Designed and operated a {skill} service handling {n} thousand requests per minute.",
+    "Led a migration of legacy batch jobs to {skill}, cutting processing time by {n} percent.",
+    "Mentored {n} engineers and introduced code review guidelines for the {skill} codebase.",
+    "Built observability dashboards and alerting for {skill} workloads across {n} regions.",
+]
+PDF_LINES_PER_PAGE = 48
+
+
+def resume_text(index: int, paragraphs: int) -> str:
+    """Plain resume text with a header, skills line and `paragraphs` project paragraphs."""
+    skills = [_SKILLS[(index + step * 7) % len(_SKILLS)] for step in range(8)]
+    lines = [
+        f"Candidate {index:05d}",
+        f"Senior Software Engineer with {3 + index % 12} years of experience",
+        "Skills: " + ", ".join(dict.fromkeys(skills)),
+        "",
+        "Experience",
+    ]
+    for paragraph in range(paragraphs):
+        skill = skills[paragraph % len(skills)]
+        lines.append(f"Project {paragraph + 1} ({2010 + paragraph % 14})")
+        for offset, sentence in enumerate(_PROJECT_SENTENCES):
+            lines.append(sentence.format(skill=skill, n=(index + paragraph + offset) % 90 + 10))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def make_docx(text: str) -> bytes:
+    from docx import Document
+    document = Document()
+    for line in text.splitlines():
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_pdf(text: str, lines_per_page: int = PDF_LINES_PER_PAGE) -> bytes:
+    """Minimal multi-page PDF with one Helvetica text line per resume line."""
+    lines = text.splitlines() or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then a (page, content) pair per page.
+    objects: List[bytes] = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_refs = []
+    for page_lines in pages:
+        escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in page_lines]
+        stream = "BT /F1 10 Tf 14 TL 50 790 Td " + " ".join(f"({line}) Tj T*" for line in escaped) + " ET"
+        stream_bytes = stream.encode("latin-1", "replace")
+        page_number = len(objects) + 1
+        page_refs.append(f"{page_number} 0 R")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Resources << /Font << /F1 3 0 R >> >> "
+                       f"/Contents {page_number + 1} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream_bytes) + stream_bytes + b"\nendstream")
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(pages)} >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref_at = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at))
+    return out.getvalue()
+
+
+def synthetic_resume(file_format: str, index: int, paragraphs: int) -> Tuple[bytes, str]:
+    """Returns (file bytes, file name) for a resume in the given format."""
+    text = resume_text(index, paragraphs)
+    if file_format == "txt":
+        return text.encode("utf-8"), f"candidate_{index}.txt"
+    if file_format == "docx":
+        return make_docx(text), f"candidate_{index}.docx"
+    if file_format == "pdf":
+        return make_pdf(text), f"candidate_{index}.pdf"
+    raise ValueError(f"Unknown resume format '{file_format}'. Available: {', '.join(FORMATS)}")
+
+
+def code_submission(index: int) -> str:
+    """A correct list-sum solution whose constants differ per index (distinct fingerprints)."""
+    return (
+        "def solve(values):\n"
+        f"    total = {index} - {index}\n"
+        "    for value in values:\n"
+        "        total += value\n"
+        "    return total\n"
+    )
+
+
+def evaluation_response(index: int, feedback_sentences: int, fenced: bool = True) -> str:
+    """Model-style evaluation JSON; feedback_sentences controls its size."""
+    sentence = "The submission handles the main case but could document its assumptions more clearly. "
+    payload = {
+        "evaluation_summary": f"Evaluation {index}: " + sentence * max(1, feedback_sentences // 2),
+        "scores": {key: f"{4 + (index + i) % 7} / 10" for i, key in enumerate(SCORE_KEYS)},
+        "category_feedback": {f"{key}_feedback": sentence * feedback_sentences for key in SCORE_KEYS},
+    }
+    body = json.dumps(payload, indent=2)
+    return f"```json\n{body}\n```" if fenced else body
@@ -0,0 +1,258 @@
+"""
+Cohort scoring and ranking over recorded evaluations.
+
+Loads evaluations from the interview store into NumPy arrays (one row per evaluation,
+one column per score category) and computes, in a single vectorized pass:
+
+* a weighted total per evaluation (missing categories are left out of the weighting),
+* cohort percentiles of the total and of each category,
+* a per-question normalized score (z-score of the total among answers to the same
+  question), so candidates who got harder questions are not penalized,
+* each candidate's best evaluation and the top-k candidates by total or normalized score.
+
+Usage:
+    python cohort_analytics.py --days 30 --top 10
+    python cohort_analytics.py --weights problem_solving_approach=2,test_coverage_edge_cases=1.5 --json
+"""
+import argparse
+import json
+import sys
+import time
+import warnings
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agents.interview_store import InterviewStore, get_interview_store
+from agents.results import SCORE_KEYS
+
+DEFAULT_WEIGHTS: Dict[str, float] = {key: 1.0 for key in SCORE_KEYS}
+PERCENTILES = (25, 50, 75, 90, 99)
+RANK_BY = ("normalized", "total")
+# Questions with fewer answers than this are not normalized (their normalized score is 0).
+MIN_QUESTION_ANSWERS = 2
+
+
+class EvaluationArrays:
+    """
+    Column arrays for a set of evaluations. scores is (n, len(SCORE_KEYS)) with NaN for missing
+    values. Candidates and questions are integer codes into the candidates / questions lists
+    (candidate_index is -1 when unknown), so grouping never compares strings.
+    """
+
+    __slots__ = ("ids", "candidate_index", "candidates", "question_index", "questions", "scores",
+                 "tests_passed", "tests_total", "created_at")
+
+    def __init__(self, rows: List[Tuple[Any, ...]]):
+        score_end = 3 + len(SCORE_KEYS)
+        columns = list(zip(*rows)) if rows else [()] * (score_end + 3)
+        self.ids = np.array(columns[0], dtype=np.int64)
+        self.candidate_index, self.candidates = _factorize(columns[1])
+        self.question_index, self.questions = _factorize(columns[2])
+        self.scores = np.array(columns[3:score_end], dtype=np.float64).T.reshape(len(rows), len(SCORE_KEYS))
+        self.tests_passed = np.array(columns[score_end], dtype=np.float64)
+        self.tests_total = np.array(columns[score_end + 1], dtype=np.float64)
+        self.created_at = np.array(columns[score_end + 2], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _factorize(values: Tuple[Optional[str], ...]) -> Tuple[np.ndarray, List[str]]:
+    """Maps each value to the index of its first occurrence in the returned list (None -> -1)."""
+    codes: Dict[str, int] = {}
+    index = np.fromiter((-1 if value is None else codes.setdefault(value, len(codes)) for value in values),
+                        dtype=np.int64, count=len(values))
+    return index, list(codes)
+
+
+def load_evaluations(store: InterviewStore, since: Optional[float] = None, until: Optional[float] = None,
+                     question: Optional[str] = None, limit: Optional[int] = None) -> EvaluationArrays:
+    """Reads evaluations (newest first, up to limit) from the store into column arrays."""
+    return EvaluationArrays(store.score_rows(since=since, until=until, question=question, limit=limit))
+
+
+def weighted_totals(scores: np.ndarray, weights: Dict[str, float]) -> np.ndarray:
+    """Weighted mean of the category scores per row (0-10); categories missing in a row are ignored."""
+    weight_vector = np.array([weights.get(key, 0.0) for key in SCORE_KEYS], dtype=np.float64)
+    present = ~np.isnan(scores)
+    weight_sums = present @ weight_vector
+    totals = np.nan_to_num(scores) @ weight_vector
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(weight_sums > 0, totals / weight_sums, np.nan)
+
+
+def normalize_per_question(totals: np.ndarray, question_index: np.ndarray, questions: int) -> np.ndarray:
+    """z-score of each total among totals for the same question (0 for questions with too few answers)."""
+    valid = ~np.isnan(totals)
+    values = np.where(valid, totals, 0.0)
+    counts = np.bincount(question_index, weights=valid, minlength=questions)
+    sums = np.bincount(question_index, weights=values, minlength=questions)
+    squares = np.bincount(question_index, weights=values * values, minlength=questions)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+        stds = np.sqrt(np.maximum(squares / counts - means * means, 0.0))
+        normalized = (totals - means[question_index]) / stds[question_index]
+    usable = (counts[question_index] >= MIN_QUESTION_ANSWERS) & (stds[question_index] > 0)
+    return np.where(valid, np.where(usable, normalized, 0.0), np.nan)
+
+
+def percentile_ranks(values: np.ndarray) -> np.ndarray:
+    """Share of the cohort (0-100) scoring at or below each value; NaN stays NaN."""
+    valid = values[~np.isnan(values)]
+    if not len(valid):
+        return np.full(len(values), np.nan)
+    ranks = np.searchsorted(np.sort(valid), values, side="right") / len(valid) * 100.0
+    return np.where(np.isnan(values), np.nan, ranks)
+
+
+def analyze_cohort(evaluations: EvaluationArrays, weights: Optional[Dict[str, float]] = None, top_k: int = 10,
+                   rank_by: str = "normalized") -> Dict[str, Any]:
+    """
+    Scores and ranks a cohort.
+
+    Args:
+        evaluations: Evaluations to analyze (see load_evaluations).
+        weights: Weight per score category (DEFAULT_WEIGHTS when None; missing keys weigh 0).
+        top_k: Number of candidates to return in "top".
+        rank_by: "normalized" (per-question z-score) or "total" (weighted total).
+
+    Returns:
+        {"evaluations", "candidates", "questions", "weights", "rank_by",
+         "percentiles": {"total": {p: value}, <category>: {p: value}},
+         "top": [{"rank", "candidate_id", "evaluation_id", "question_hash", "total", "normalized",
+                  "percentile", "tests_passed", "tests_total", "scores"}]}.
+        Candidates are ranked by their best evaluation; evaluations without a candidate only
+        count towards the percentiles.
+    """
+    if rank_by not in RANK_BY:
+        raise ValueError(f"Unknown ranking '{rank_by}'. Available: {', '.join(RANK_BY)}")
+    weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+    count = len(evaluations)
+    report: Dict[str, Any] = {"evaluations": count, "candidates": 0, "questions": 0, "weights": weights,
+                              "rank_by": rank_by, "percentiles": {}, "top": []}
+    if not count:
+        return report
+
+    totals = weighted_totals(evaluations.scores, weights)
+    normalized = normalize_per_question(totals, evaluations.question_index, len(evaluations.questions))
+    percentiles = percentile_ranks(totals)
+    report["questions"] = len(evaluations.questions)
+    report["percentiles"] = _percentiles(np.column_stack([totals, evaluations.scores]), ("total",) + SCORE_KEYS)
+
+    # Best evaluation per candidate: sort by (candidate, ranking score) and keep each group's last row.
+    ranking = normalized if rank_by == "normalized" else totals
+    ranked = np.flatnonzero((evaluations.candidate_index >= 0) & ~np.isnan(ranking))
+    if not len(ranked):
+        return report
+    candidate_index = evaluations.candidate_index[ranked]
+    order = np.lexsort((totals[ranked], ranking[ranked], candidate_index))
+    last_of_group = np.r_[candidate_index[order][1:] != candidate_index[order][:-1], True]
+    best = ranked[order[last_of_group]]
+    report["candidates"] = len(best)
+
+    k = min(top_k, len(best))
+    if k <= 0:
+        return report
+    # Partial selection first, then sort only the k winners (ties broken by the weighted total).
+    top = best[np.argpartition(-ranking[best], k - 1)[:k]] if k < len(best) else best
+    top = top[np.lexsort((-totals[top], -ranking[top]))]
+    for rank, row in enumerate(top, start=1):
+        report["top"].append({
+            "rank": rank,
+            "candidate_id": evaluations.candidates[evaluations.candidate_index[row]],
+            "evaluation_id": int(evaluations.ids[row]),
+            "question_hash": evaluations.questions[evaluations.question_index[row]],
+            "total": _number(totals[row]),
+            "normalized": _number(normalized[row]),
+            "percentile": _number(percentiles[row], 1),
+            "tests_passed": _count(evaluations.tests_passed[row]),
+            "tests_total": _count(evaluations.tests_total[row]),
+            "scores": {key: _number(evaluations.scores[row, column]) for column, key in enumerate(SCORE_KEYS)},
+        })
+    return report
+
+
+def cohort_report(store: Optional[InterviewStore] = None, days: Optional[float] = None,
+                  question: Optional[str] = None, limit: Optional[int] = None, **options: Any) -> Dict[str, Any]:
+    """
+    Loads evaluations from the last `days` days (all when None) and analyzes them; the top
+    candidates get their resume file name. options are passed to analyze_cohort.
+    """
+    store = store or get_interview_store()
+    if store is None:
+        raise RuntimeError("The interview store is disabled (INTERVIEW_STORE_ENABLED=0).")
+    since = time.time() - days * 86400 if days is not None else None
+    report = analyze_cohort(load_evaluations(store, since=since, question=question, limit=limit), **options)
+    names = store.candidate_names([entry["candidate_id"] for entry in report["top"]])
+    for entry in report["top"]:
+        entry["file_name"] = names.get(entry["candidate_id"])
+    return report
+
+
+def _percentiles(columns: np.ndarray, names: Tuple[str, ...]) -> Dict[str, Dict[str, Optional[float]]]:
+    """PERCENTILES of every column at once, ignoring NaN ({name: {"p50": value, ...}})."""
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns
+        values = np.nanpercentile(columns, PERCENTILES, axis=0)
+    return {name: {f"p{p}": _number(values[row, column]) for row, p in enumerate(PERCENTILES)}
+            for column, name in enumerate(names)}
+
+
+def _number(value: float, digits: int = 2) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def _count(value: float) -> Optional[int]:
+    return None if np.isnan(value) else int(value)
+
+
+def parse_weights(text: str) -> Dict[str, float]:
+    """Parses "key=weight,key=weight" on top of DEFAULT_WEIGHTS."""
+    weights = dict(DEFAULT_WEIGHTS)
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        key, _, value = item.partition("=")
+        if key not in DEFAULT_WEIGHTS:
+            raise ValueError(f"Unknown score category '{key}'. Available: {', '.join(SCORE_KEYS)}")
+        weights[key] = float(value)
+    return weights
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rank candidates from recorded evaluations.")
+    parser.add_argument("--days", type=float, help="Only evaluations from the last N days (default: all).")
+    parser.add_argument("--question", help="Only evaluations of this question (exact text).")
+    parser.add_argument("--limit", type=int, help="Analyze at most this many of the newest evaluations.")
+    parser.add_argument("--top", type=int, default=10, help="Number of candidates to list.")
+    parser.add_argument("--rank-by", choices=RANK_BY, default="normalized")
+    parser.add_argument("--weights", default="", help="Category weights, e.g. problem_solving_approach=2.")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON.")
+    args = parser.parse_args(argv)
+    try:
+        weights = parse_weights(args.weights)
+    except ValueError as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+    report = cohort_report(days=args.days, question=args.question, limit=args.limit, weights=weights,
+                           top_k=args.top, rank_by=args.rank_by)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(f"{report['evaluations']} evaluations, {report['candidates']} candidates, {report['questions']} questions "
+          f"({elapsed_ms:.0f} ms)")
+    print("Total score percentiles: " + ", ".join(f"{p} {v}" for p, v in report["percentiles"].get("total", {}).items()))
+    print(f"\n{'rank':>4} {'candidate':<28} {'total':>6} {'norm':>6} {'pct':>6} {'tests':>7}")
+    for entry in report["top"]:
+        label = entry["file_name"] or entry["candidate_id"][:12]
+        tests = f"{entry['tests_passed']}/{entry['tests_total']}" if entry["tests_total"] else "-"
+        print(f"{entry['rank']:>4} {label[:28]:<28} {entry['total']:>6} {entry['normalized']:>6} "
+              f"{entry['percentile']:>6} {tests:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
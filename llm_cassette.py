@@ -0,0 +1,333 @@
+"""
+Record/replay cassettes of LLM traffic.
+
+With LLM_CASSETTE_MODE=record, every backend call made through utils is passed to the
+real backend and appended to LLM_CASSETTE_PATH as one compact JSON line: the prompt,
+the response (or the error), and the observed latency. For streamed calls the line also
+holds the time to the first chunk and the chunk count. With LLM_CASSETTE_MODE=replay,
+responses are served from that file and no backend is contacted: no network, no API
+key, and the same output on every run.
+
+Calls are matched on (model, generation config, prompt), whichever backend recorded
+them. Repeated recordings of the same request, such as a failed attempt followed by its
+retry, are replayed in recorded order, and the last one repeats once they run out. A
+request with no exact recording falls back to a recording whose prompt differs only in
+numbers, such as the measured test runtimes in evaluation prompts. Anything else fails
+with CassetteMiss. Recorded latencies are slept
+out when LLM_CASSETTE_LATENCY_SCALE is above 0 (1.0 replays them as recorded). Timeouts,
+hedging and queueing then behave as they did in the recorded run: a replayed call or
+stream that would outlast its timeout raises TimeoutError at the timeout.
+
+Replay never falls back to the live backend. If the cassette cannot be opened in replay
+mode (or the mode is not recognised), get_cassette() raises CassetteUnavailable, and
+utils reports it as an error for every call.
+
+While a cassette is active the LLM response cache is bypassed, so that every call is
+recorded and every replay goes through the cassette.
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import llm_backends
+import llm_cache
+import llm_scheduler
+from metrics import log_event
+
+LLM_CASSETTE_MODE = os.environ.get("LLM_CASSETTE_MODE", "off").strip().lower()
+LLM_CASSETTE_PATH = os.environ.get("LLM_CASSETTE_PATH", os.path.join(llm_cache.CACHE_DIR, "llm_cassette.jsonl"))
+# Multiplier for recorded latencies on replay: 0 answers immediately, 1.0 waits as long as the recorded call took.
+LLM_CASSETTE_LATENCY_SCALE = float(os.environ.get("LLM_CASSETTE_LATENCY_SCALE", 0))
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+class CassetteMiss(LookupError):
+    """Raised on replay for a request the cassette has no recording of."""
+
+    retryable = False
+
+
+class CassetteUnavailable(RuntimeError):
+    """Raised by get_cassette() when replay was requested but the cassette cannot be used."""
+
+    retryable = False
+
+
+class RecordedError(RuntimeError):
+    """A backend failure replayed from the cassette, as retryable as the original was."""
+
+    def __init__(self, message: str, retryable: bool):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class Cassette:
+    """An append-only JSONL file of recorded LLM calls, either being recorded or replayed."""
+
+    def __init__(self, path: str = LLM_CASSETTE_PATH, mode: str = LLM_CASSETTE_MODE,
+                 latency_scale: float = LLM_CASSETTE_LATENCY_SCALE):
+        """
+        Args:
+            path: Cassette file.
+            mode: "record" or "replay".
+            latency_scale: Multiplier for recorded latencies on replay (0 disables waiting).
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode '{mode}'. Available: record, replay")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._stats = {"recorded": 0, "replayed": 0, "number_insensitive_matches": 0, "misses": 0}
+        # key -> recordings in order, and the same keyed by loose_key; each with its own replay position.
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._loose_entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._fd: Optional[int] = None
+        if mode == "replay":
+            self._load()
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # One os.write per line on an O_APPEND descriptor, so concurrent writers never interleave lines.
+            self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    @staticmethod
+    def request_key(model_name: str, prompt_text: str, generation_config: Optional[Dict[str, Any]],
+                    ignore_numbers: bool = False) -> str:
+        """Backend-independent address of a request; with ignore_numbers, every number in the prompt counts as equal."""
+        if ignore_numbers:
+            prompt_text = _NUMBER.sub("#", prompt_text)
+        return llm_cache.make_cache_key("", model_name, prompt_text, generation_config)
+
+    def wrap(self, backend: str, model_name: str, generation_config: Optional[Dict[str, Any]],
+             factory: Callable[[], llm_backends.LLMBackend]) -> "CassetteBackend":
+        """
+        Returns a client that records calls to factory()'s client, or replays them. The real
+        client is only built when recording, so replay works without the backend's SDK or key.
+        """
+        return CassetteBackend(self, backend, model_name, generation_config, factory)
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Appends one call to the cassette."""
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n"
+        with self._lock:
+            os.write(self._fd, line.encode("utf-8"))
+            self._stats["recorded"] += 1
+
+    def replay(self, key: str, loose_key: str) -> Dict[str, Any]:
+        """The next recording of a request (see request_key for both keys). Raises CassetteMiss if there is none."""
+        with self._lock:
+            recordings = self._entries.get(key)
+            if not recordings:
+                recordings, key = self._loose_entries.get(loose_key), "~" + loose_key
+                if not recordings:
+                    self._stats["misses"] += 1
+                    raise CassetteMiss(f"No recording of this request in cassette {self.path} (key {key[1:13]}).")
+                self._stats["number_insensitive_matches"] += 1
+            position = self._cursors.get(key, 0)
+            self._cursors[key] = position + 1
+            self._stats["replayed"] += 1
+            return recordings[min(position, len(recordings) - 1)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "mode": self.mode, "requests": len(self._entries)}
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            # Still replay (every call misses) rather than silently falling back to the live backend.
+            log_event("llm_cassette", "Cassette does not exist; every call will miss.", level="warning",
+                      path=self.path)
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    key, loose_key = entry["key"], entry["loose_key"]
+                except (json.JSONDecodeError, TypeError, KeyError):
+                    # A recording interrupted mid-write leaves a partial last line.
+                    log_event("llm_cassette", "Skipping unreadable cassette line.", level="warning",
+                              path=self.path, line=number)
+                    continue
+                self._entries.setdefault(key, []).append(entry)
+                self._loose_entries.setdefault(loose_key, []).append(entry)
+
+
+class CassetteBackend(llm_backends.LLMBackend):
+    """Client that records another backend's calls to a cassette, or replays them from it."""
+
+    name = "cassette"
+
+    def __init__(self, cassette: Cassette, backend: str, model_name: str,
+                 generation_config: Optional[Dict[str, Any]], factory: Callable[[], llm_backends.LLMBackend]):
+        super().__init__(model_name, generation_config)
+        self.cassette = cassette
+        self.backend = backend
+        self._factory = factory
+
+    def generate(self, prompt_text: str, timeout: Optional[float] = None) -> str:
+        keys = self._keys(prompt_text)
+        if self.cassette.mode == "replay":
+            entry = self.cassette.replay(*keys)
+            time.sleep(self._delay(entry["latency_ms"], timeout))
+            return self._replayed(entry, timeout)
+        started = time.perf_counter()
+        try:
+            response = self._factory().generate(prompt_text, timeout)
+        except Exception as e:
+            self._record(keys, prompt_text, started, error=e)
+            raise
+        self._record(keys, prompt_text, started, response=response)
+        return response
+
+    async def generate_async(self, prompt_text: str, timeout: Optional[float] = None) -> str:
+        keys = self._keys(prompt_text)
+        if self.cassette.mode == "replay":
+            entry = self.cassette.replay(*keys)
+            await asyncio.sleep(self._delay(entry["latency_ms"], timeout))
+            return self._replayed(entry, timeout)
+        started = time.perf_counter()
+        try:
+            response = await self._factory().generate_async(prompt_text, timeout)
+        except Exception as e:
+            self._record(keys, prompt_text, started, error=e)
+            raise
+        self._record(keys, prompt_text, started, response=response)
+        return response
+
+    def generate_stream(self, prompt_text: str, timeout: Optional[float] = None) -> Iterator[str]:
+        keys = self._keys(prompt_text)
+        if self.cassette.mode == "replay":
+            yield from self._replay_stream(self.cassette.replay(*keys), timeout)
+            return
+        started = time.perf_counter()
+        first_chunk_ms = None
+        chunks: List[str] = []
+        try:
+            for chunk in self._factory().generate_stream(prompt_text, timeout):
+                if first_chunk_ms is None:
+                    first_chunk_ms = (time.perf_counter() - started) * 1000
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            self._record(keys, prompt_text, started, response="".join(chunks) if chunks else None, error=e,
+                         first_chunk_ms=first_chunk_ms, chunks=len(chunks))
+            raise
+        self._record(keys, prompt_text, started, response="".join(chunks), first_chunk_ms=first_chunk_ms,
+                     chunks=len(chunks))
+
+    def _replay_stream(self, entry: Dict[str, Any], timeout: Optional[float]) -> Iterator[str]:
+        """
+        Yields the recorded response in as many chunks as were recorded, spread over the recorded latency.
+
+        Like _replayed, a stream whose scaled latency runs past the timeout raises TimeoutError at the
+        timeout, after the chunks that would have arrived by then.
+        """
+        response = entry.get("response") or ""
+        latency_ms = entry["latency_ms"]
+        first_chunk_ms = entry.get("first_chunk_ms")
+        if first_chunk_ms is None:
+            first_chunk_ms = latency_ms
+        count = max(1, entry.get("chunks") or 1)
+        size = -(-len(response) // count) or 1
+        chunks = [response[i:i + size] for i in range(0, len(response), size)]
+        scale = self.cassette.latency_scale
+        per_chunk = max(0.0, latency_ms - first_chunk_ms) / 1000 * scale / max(1, len(chunks))
+        # Offset of each chunk from the start of the call, then the end of the call.
+        offsets = [first_chunk_ms / 1000 * scale + index * per_chunk for index in range(len(chunks))]
+        offsets.append(latency_ms / 1000 * scale)
+        elapsed = 0.0
+        for offset, chunk in zip(offsets, chunks + [None]):
+            if timeout is not None and offset > timeout:
+                time.sleep(max(0.0, timeout - elapsed))
+                raise TimeoutError(f"Replayed stream took longer than the {timeout:.1f}s timeout.")
+            time.sleep(max(0.0, offset - elapsed))
+            elapsed = max(elapsed, offset)
+            if chunk is not None:
+                yield chunk
+        if "error" in entry:
+            raise RecordedError(entry["error"], entry.get("retryable", False))
+
+    def _delay(self, latency_ms: float, timeout: Optional[float]) -> float:
+        """Seconds to wait before answering: the scaled recorded latency, capped at the timeout."""
+        delay = latency_ms / 1000 * self.cassette.latency_scale
+        return min(delay, timeout) if timeout is not None else delay
+
+    def _replayed(self, entry: Dict[str, Any], timeout: Optional[float]) -> str:
+        if timeout is not None and entry["latency_ms"] / 1000 * self.cassette.latency_scale > timeout:
+            raise TimeoutError(f"Replayed call took longer than the {timeout:.1f}s timeout.")
+        if "error" in entry:
+            raise RecordedError(entry["error"], entry.get("retryable", False))
+        return entry["response"]
+
+    def _keys(self, prompt_text: str) -> Tuple[str, str]:
+        config = self.generation_config or None
+        return (Cassette.request_key(self.model_name, prompt_text, config),
+                Cassette.request_key(self.model_name, prompt_text, config, ignore_numbers=True))
+
+    def _record(self, keys: Tuple[str, str], prompt_text: str, started: float, response: Optional[str] = None,
+                error: Optional[Exception] = None, **stream: Any) -> None:
+        entry: Dict[str, Any] = {
+            "key": keys[0],
+            "loose_key": keys[1],
+            "backend": self.backend,
+            "model": self.model_name,
+            "prompt": prompt_text,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "recorded_at": round(time.time(), 3),
+        }
+        if response is not None:
+            entry["response"] = response
+        if error is not None:
+            entry["error"] = str(error)
+            entry["error_type"] = type(error).__name__
+            entry["retryable"] = llm_scheduler.is_retryable(error)
+        if stream:
+            entry["first_chunk_ms"] = round(stream["first_chunk_ms"], 1) if stream["first_chunk_ms"] is not None else None
+            entry["chunks"] = stream["chunks"]
+        try:
+            self.cassette.record(entry)
+        except OSError as e:
+            log_event("llm_cassette", "Could not record call.", level="error", error=str(e))
+
+
+_cassette: Optional[Cassette] = None
+_cassette_error: Optional[str] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """
+    Returns the process-wide cassette, or None when LLM_CASSETTE_MODE is off.
+
+    A recording file that cannot be opened is logged once and calls go to the backend unrecorded.
+
+    Raises:
+        CassetteUnavailable: In replay mode (or an unrecognised mode) when the cassette cannot be
+            used; raised on every call, so replay never silently goes live.
+    """
+    global _cassette, _cassette_error
+    if LLM_CASSETTE_MODE in ("", "off", "0", "false", "no"):
+        return None
+    if _cassette is None and _cassette_error is None:
+        with _cassette_lock:
+            if _cassette is None and _cassette_error is None:
+                try:
+                    _cassette = Cassette()
+                except (OSError, ValueError) as e:
+                    _cassette_error = f"Cassette {LLM_CASSETTE_PATH} unavailable: {e}"
+                    log_event("llm_cassette", "Cassette unavailable.", level="error", mode=LLM_CASSETTE_MODE,
+                              path=LLM_CASSETTE_PATH, error=str(e))
+                else:
+                    log_event("llm_cassette", f"LLM calls are {_cassette.mode}ed.", path=_cassette.path)
+    if _cassette is None and LLM_CASSETTE_MODE != "record":
+        raise CassetteUnavailable(_cassette_error)
+    return _cassette
@@ -0,0 +1,314 @@
+"""
+Helpers for reading JSON out of LLM responses, including responses that are
+still being streamed and therefore end mid-object.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+_DANGLING_KEY = re.compile(r'"\s*$')
+_DANGLING_COLON = re.compile(r':\s*$')
+
+
+def _drop_nulls(value: Any) -> Any:
+    """Removes None entries produced by closing dangling keys."""
+    if isinstance(value, dict):
+        return {k: _drop_nulls(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_drop_nulls(v) for v in value if v is not None]
+    return value
+
+
+class PartialJSONParser:
+    """
+    Incremental parser for a JSON object that arrives in chunks.
+
+    feed() scans only the new text and keeps the scanner state (position, open
+    containers, in-string and escape flags, last clean cut point) between chunks. It
+    reports whether a value boundary was crossed: a comma or closing bracket outside a
+    string. A streaming caller that only calls value() on boundaries does one parse per
+    completed value, instead of re-scanning the whole buffer on every chunk.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._length = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        # Last position (exclusive) where the text can be cut and closed cleanly, with the stack at that point.
+        self._safe_cut = 0
+        self._safe_stack: List[str] = []
+
+    @property
+    def complete(self) -> bool:
+        """True once the top-level object has been closed; later text is ignored."""
+        return self._end is not None
+
+    def feed(self, chunk: str) -> bool:
+        """Consumes the next chunk; returns True if it completed at least one value."""
+        offset = self._length
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        if self._end is not None:
+            return False
+        first = 0
+        if self._start is None:
+            first = chunk.find("{")
+            if first < 0:
+                return False
+            self._start = offset + first
+
+        boundary = False
+        stack = self._stack
+        in_string, escape = self._in_string, self._escape
+        for j in range(first, len(chunk)):
+            ch = chunk[j]
+            if in_string:
+                if escape:
+                    escape = False
+                elif ch == "\\":
+                    escape = True
+                elif ch == '"':
+                    in_string = False
+                continue
+            if ch == '"':
+                in_string = True
+            elif ch in "{[":
+                stack.append("}" if ch == "{" else "]")
+                self._safe_cut, self._safe_stack = offset + j + 1, list(stack)
+            elif ch in "}]":
+                if stack:
+                    stack.pop()
+                if not stack:
+                    self._end = offset + j + 1
+                    boundary = True
+                    break
+                self._safe_cut, self._safe_stack = offset + j + 1, list(stack)
+                boundary = True
+            elif ch == ",":
+                self._safe_cut, self._safe_stack = offset + j, list(stack)
+                boundary = True
+        self._in_string, self._escape = in_string, escape
+        return boundary
+
+    def value(self) -> Optional[Dict[str, Any]]:
+        """
+        Parses the text received so far, closing whatever is still open (see complete_partial_json).
+
+        Returns:
+            The parsed object, or None if no object has started yet or nothing parses.
+        """
+        if self._start is None:
+            return None
+        text = self._text()
+        if self._end is not None:
+            try:
+                return json.loads(text[self._start:self._end])
+            except json.JSONDecodeError:
+                return None
+
+        candidate = text[self._start:]
+        if self._in_string:
+            if self._escape:
+                candidate = candidate[:-1]
+            candidate += '"'
+        closers = "".join(reversed(self._stack))
+
+        attempts = [candidate + closers]
+        if _DANGLING_COLON.search(candidate):
+            attempts.append(candidate + "null" + closers)
+        elif _DANGLING_KEY.search(candidate):
+            attempts.append(candidate + ":null" + closers)
+        attempts.append(text[self._start:self._safe_cut] + "".join(reversed(self._safe_stack)))
+
+        for attempt in attempts:
+            try:
+                parsed = json.loads(attempt)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(parsed, dict):
+                return _drop_nulls(parsed)
+        return None
+
+    def _text(self) -> str:
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+
+def complete_partial_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parses the longest usable prefix of a (possibly truncated) JSON object.
+
+    Open strings are closed, dangling keys are dropped and open containers are
+    closed, so '{"summary": "Good appro' parses as {"summary": "Good appro"}.
+    Any leading text such as a ```json fence is skipped. For a response that is
+    still streaming, feed a PartialJSONParser instead of calling this per chunk.
+
+    Args:
+        text: Raw model output received so far.
+
+    Returns:
+        The parsed object, or None if no object has started yet.
+    """
+    parser = PartialJSONParser()
+    parser.feed(text)
+    return parser.value()
+
+
+_FENCED_BLOCK = re.compile(r"```[A-Za-z]*\s*(.*?)```", re.DOTALL)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+
+def extract_json(text: str, container: str = "{") -> Any:
+    """
+    Locates and parses the first JSON object (or array, with container="[") in arbitrary model output.
+
+    Markdown fences and surrounding prose are ignored. When the value does not parse as-is,
+    common model mistakes are repaired: trailing commas, single-quoted strings, Python
+    literals (True/False/None), // and /* */ comments, curly quotes and raw newlines inside
+    strings. A truncated object falls back to complete_partial_json.
+
+    Args:
+        text: Raw model output.
+        container: "{" for an object, "[" for an array.
+
+    Returns:
+        The parsed dict or list, or None if none could be recovered.
+    """
+    if not text:
+        return None
+    expected_type = dict if container == "{" else list
+    candidates = [match.group(1) for match in _FENCED_BLOCK.finditer(text)] + [text]
+    for candidate in candidates:
+        start = candidate.find(container)
+        while start >= 0:
+            end = _matching_end(candidate, start)
+            if end is None:
+                break
+            segment = candidate[start:end + 1]
+            for attempt in (segment, _repair(segment)):
+                try:
+                    value = json.loads(attempt, strict=False)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(value, expected_type):
+                    return value
+            start = candidate.find(container, start + 1)
+    if container == "{":
+        return complete_partial_json(_repair(text))
+    return None
+
+
+def extract_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """extract_json for the common case of a single JSON object."""
+    return extract_json(text, "{")
+
+
+def missing_fields(data: Optional[Dict[str, Any]], schema: Dict[str, Any], prefix: str = "") -> List[str]:
+    """
+    Lists required fields (dotted paths for nested objects) absent from data or of the wrong kind.
+
+    Only the schema subset used for response schemas is understood: "type", "properties"
+    and "required".
+    """
+    data = data if isinstance(data, dict) else {}
+    missing: List[str] = []
+    properties = schema.get("properties", {})
+    for name in schema.get("required", []):
+        value = data.get(name)
+        field_schema = properties.get(name, {})
+        field_type = field_schema.get("type")
+        if value is None or value == "" or (field_type == "array" and not isinstance(value, list)):
+            missing.append(prefix + name)
+        elif field_type == "object":
+            if isinstance(value, dict):
+                missing.extend(missing_fields(value, field_schema, f"{prefix}{name}."))
+            else:
+                missing.append(prefix + name)
+    return missing
+
+
+def merge_json(base: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """Deep-merges update into a copy of base (nested objects are merged, other values replaced)."""
+    merged = dict(base)
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_json(merged[key], value)
+        elif value is not None:
+            merged[key] = value
+    return merged
+
+
+def _matching_end(text: str, start: int) -> Optional[int]:
+    """Index of the bracket closing the one at start, skipping quoted strings; None if unclosed."""
+    depth = 0
+    quote = None
+    escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if quote:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == quote:
+                quote = None
+            continue
+        if ch in "\"'":
+            quote = ch
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return i
+    return None
+
+
+def _repair(segment: str) -> str:
+    """Rewrites near-JSON into JSON outside of string literals (see extract_json)."""
+    segment = segment.translate(_SMART_QUOTES)
+    out: List[str] = []
+    i = 0
+    length = len(segment)
+    while i < length:
+        ch = segment[i]
+        if ch in "\"'":
+            # Copy a string literal, re-quoting single-quoted ones.
+            j = i + 1
+            chars: List[str] = []
+            while j < length and segment[j] != ch:
+                if segment[j] == "\\" and j + 1 < length:
+                    chars.append(segment[j:j + 2])
+                    j += 2
+                    continue
+                chars.append(segment[j])
+                j += 1
+            body = "".join(chars)
+            if ch == "'":
+                body = body.replace("\\'", "'").replace('"', '\\"')
+            out.append('"' + body + '"')
+            i = j + 1
+        elif segment.startswith("//", i):
+            newline = segment.find("\n", i)
+            i = length if newline < 0 else newline
+        elif segment.startswith("/*", i):
+            close = segment.find("*/", i + 2)
+            i = length if close < 0 else close + 2
+        elif ch.isalpha():
+            j = i
+            while j < length and (segment[j].isalnum() or segment[j] == "_"):
+                j += 1
+            word = segment[i:j]
+            out.append(_PYTHON_LITERALS.get(word, word))
+            i = j
+        else:
+            out.append(ch)
+            i += 1
+    return _TRAILING_COMMA.sub(r"\1", "".join(out))
@@ -0,0 +1,406 @@
+"""
+Tail-latency and failure handling for LLM calls.
+
+- Deadline: an absolute time budget created by ManagerAgent and passed down to
+  the backend call, so every stage sees how much time is left.
+- Hedging: if the primary request has not answered after a delay (fixed, or the
+  observed p95 latency), a second identical request is fired and whichever
+  answers first wins. Only slowness triggers a hedge: a failed primary is left to
+  the scheduler's retries. Calls that are not hedged run in the caller and are
+  bounded by the backend's own request timeout.
+- CircuitBreaker: trips after a burst of failures for a model; while it is open
+  calls are routed to a cheaper fallback model (or fail fast).
+"""
+import asyncio
+import concurrent.futures
+import contextlib
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from metrics import log_event
+
+HEDGING_ENABLED = os.environ.get("LLM_HEDGING", "0").lower() in ("1", "true", "yes")
+HEDGE_DELAY_SECONDS = float(os.environ.get("LLM_HEDGE_DELAY_SECONDS", 0))  # 0 = use observed p95
+HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", 20))
+# Threads per backend for hedged calls; when they are all busy, calls run unhedged in the caller.
+HEDGE_WORKERS = int(os.environ.get("LLM_HEDGE_WORKERS", 8))
+FALLBACK_MODEL = os.environ.get("LLM_FALLBACK_MODEL", "gemini-2.0-flash-lite")
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("LLM_BREAKER_FAILURES", 5))
+BREAKER_WINDOW_SECONDS = float(os.environ.get("LLM_BREAKER_WINDOW_SECONDS", 30))
+BREAKER_RESET_SECONDS = float(os.environ.get("LLM_BREAKER_RESET_SECONDS", 30))
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request's deadline passes. Never retried."""
+
+    retryable = False
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when the breaker is open and no fallback model is available."""
+
+    retryable = False
+
+
+class Deadline:
+    """An absolute point in (monotonic) time by which a request must finish."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, timeout_seconds: float):
+        self.expires_at = time.monotonic() + timeout_seconds
+
+    @classmethod
+    def from_timeout(cls, timeout_seconds: Optional[float]) -> Optional["Deadline"]:
+        """Returns a Deadline, or None when timeout_seconds is None (no deadline)."""
+        return None if timeout_seconds is None else cls(timeout_seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, stage: str = "request") -> None:
+        """Raises DeadlineExceeded if the deadline has passed."""
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline exceeded before {stage}.")
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.2f}s)"
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies used to derive the hedge delay."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after failure_threshold failures within window_seconds.
+    Open -> half-open after reset_seconds, letting one trial call through;
+    its success closes the breaker, its failure re-opens it.
+
+    available() only tells select_model whether to route to the model; the half-open
+    trial is taken by attempt(), which wraps the actual backend call, so cache hits,
+    coalesced followers and rate-limit waits never hold it. attempt() hands the trial
+    back if the call ends without a verdict (e.g. a deadline), and a trial held for
+    longer than reset_seconds is treated as abandoned.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 window_seconds: float = BREAKER_WINDOW_SECONDS,
+                 reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.window_seconds = window_seconds
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures: Deque[float] = deque()
+        self._opened_at = 0.0
+        self._trial_id = 0
+        self._trial_started_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """Returns True if a call may be routed to this model now. Does not take the half-open trial."""
+        with self._lock:
+            return self._trial_free(time.monotonic())
+
+    def allow(self) -> bool:
+        """
+        Takes permission for one call: always while closed, the single trial while half-open.
+
+        A caller that gets True while half-open must report record_success or record_failure;
+        prefer attempt(), which also hands the trial back when neither happens.
+        """
+        return self._begin() is not None
+
+    @contextlib.contextmanager
+    def attempt(self) -> Iterator[None]:
+        """
+        Wraps one backend call; the caller reports record_success or record_failure inside.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or another call holds the half-open trial.
+        """
+        trial = self._begin()
+        if trial is None:
+            raise CircuitOpenError("Circuit breaker open; the half-open trial call is already in flight.")
+        try:
+            yield
+        finally:
+            if trial:
+                self._end_trial(trial)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures.clear()
+            self._trial_started_at = None
+
+    def record_failure(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._open(now)
+                return
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.window_seconds:
+                self._failures.popleft()
+            if len(self._failures) >= self.failure_threshold:
+                self._open(now)
+
+    def _begin(self) -> Optional[int]:
+        """Returns 0 while closed, a trial id when the half-open trial was taken, or None."""
+        now = time.monotonic()
+        with self._lock:
+            if not self._trial_free(now):
+                return None
+            if self.state == self.CLOSED:
+                return 0
+            self._trial_id += 1
+            self._trial_started_at = now
+            return self._trial_id
+
+    def _end_trial(self, trial: int) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._trial_id == trial:
+                self._trial_started_at = None
+
+    def _trial_free(self, now: float) -> bool:
+        """Whether a call could go through now; moves open -> half-open once reset_seconds have passed."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if now - self._opened_at < self.reset_seconds:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_started_at = None
+        return self._trial_started_at is None or now - self._trial_started_at >= self.reset_seconds
+
+    def _open(self, now: float) -> None:
+        if self.state != self.OPEN:
+            log_event("llm_resilience", "Circuit breaker opened.", level="warning",
+                      recent_failures=len(self._failures), reset_seconds=self.reset_seconds)
+        self.state = self.OPEN
+        self._opened_at = now
+        self._trial_started_at = None
+        self._failures.clear()
+
+
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_latencies: Dict[Tuple[str, str], LatencyTracker] = {}
+_registry_lock = threading.Lock()
+_hedge_pools: Dict[str, "_HedgePool"] = {}
+
+
+class _HedgePool:
+    """Per-backend threads for hedged calls, with a non-blocking slot check so callers never queue."""
+
+    def __init__(self, backend: str, workers: int):
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers,
+                                                               thread_name_prefix=f"llm-hedge-{backend}")
+        self._slots = threading.BoundedSemaphore(workers)
+
+    def try_submit(self, call: Callable[[], Any]) -> Optional[concurrent.futures.Future]:
+        """Starts call on a free thread, or returns None when every thread is busy."""
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            future = self._executor.submit(call)
+        except RuntimeError:
+            self._slots.release()
+            return None
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+
+def _hedge_pool(backend: str) -> _HedgePool:
+    with _registry_lock:
+        pool = _hedge_pools.get(backend)
+        if pool is None:
+            pool = _hedge_pools[backend] = _HedgePool(backend, max(1, HEDGE_WORKERS))
+        return pool
+
+
+def get_breaker(backend: str, model_name: str) -> CircuitBreaker:
+    with _registry_lock:
+        return _breakers.setdefault((backend, model_name), CircuitBreaker())
+
+
+def get_latency_tracker(backend: str, model_name: str) -> LatencyTracker:
+    with _registry_lock:
+        return _latencies.setdefault((backend, model_name), LatencyTracker())
+
+
+def select_model(backend: str, model_name: str) -> str:
+    """
+    Returns the model to call: the requested one while its breaker is closed (or
+    half-open with the trial free), otherwise the fallback model. The trial itself is
+    only taken around the backend call, by CircuitBreaker.attempt().
+
+    Raises:
+        CircuitOpenError: If both the model's and the fallback's breakers are open.
+    """
+    if get_breaker(backend, model_name).available():
+        return model_name
+    if FALLBACK_MODEL and FALLBACK_MODEL != model_name and get_breaker(backend, FALLBACK_MODEL).available():
+        log_event("llm_resilience", "Circuit open; using fallback model.", level="warning",
+                  backend=backend, model=model_name, fallback_model=FALLBACK_MODEL)
+        return FALLBACK_MODEL
+    raise CircuitOpenError(f"Circuit breaker open for model '{model_name}' and no fallback available.")
+
+
+def hedge_delay(backend: str, model_name: str) -> Optional[float]:
+    """Delay before firing a hedged request, or None when hedging is off or not yet calibrated."""
+    if not HEDGING_ENABLED:
+        return None
+    if HEDGE_DELAY_SECONDS > 0:
+        return HEDGE_DELAY_SECONDS
+    tracker = get_latency_tracker(backend, model_name)
+    if len(tracker) < HEDGE_MIN_SAMPLES:
+        return None
+    return tracker.percentile(95)
+
+
+def call_with_hedging(call: Callable[[], Any], deadline: Optional[Deadline] = None,
+                      delay: Optional[float] = None,
+                      on_hedge: Optional[Callable[[], None]] = None, backend: str = "default") -> Any:
+    """
+    Runs call, optionally hedged, within a deadline.
+
+    Without a hedge delay (or with the backend's hedge threads all busy) call runs in the
+    calling thread; it must bound itself with the backend's request timeout, and an error
+    raised after the deadline has passed becomes DeadlineExceeded. With a delay, the
+    primary runs on the backend's hedge pool and a second identical call is fired only if
+    the primary is still running after `delay` seconds.
+
+    Args:
+        call: Zero-argument blocking callable.
+        deadline: Abort with DeadlineExceeded once it passes.
+        delay: Fire a second identical call if the first has not finished after this many seconds.
+        on_hedge: Invoked when the hedged call is fired (e.g. to charge rate budgets).
+        backend: Backend name, selecting the hedge pool.
+
+    Returns:
+        The first successful result. If every attempt fails, the first error is raised.
+    """
+    if deadline is not None:
+        deadline.check("LLM call")
+    pool = _hedge_pool(backend) if delay is not None else None
+    primary = pool.try_submit(call) if pool is not None else None
+    if primary is None:
+        try:
+            return call()
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded("Deadline exceeded waiting for the LLM response.") from e
+            raise
+
+    futures = [primary]
+    timeout = delay if deadline is None else min(delay, deadline.remaining())
+    concurrent.futures.wait(futures, timeout=timeout)
+    if not primary.done() and (deadline is None or not deadline.expired()):
+        # Primary is slow: fire the hedge once, if a thread is free.
+        hedge = pool.try_submit(call)
+        if hedge is not None:
+            if on_hedge is not None:
+                on_hedge()
+            futures.append(hedge)
+
+    first_error: Optional[BaseException] = None
+    while futures:
+        done, _ = concurrent.futures.wait(futures, timeout=deadline.remaining() if deadline is not None else None,
+                                          return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            futures.remove(future)
+            if future.exception() is None:
+                return future.result()
+            first_error = first_error or future.exception()
+        if deadline is not None and deadline.expired():
+            break
+    if first_error is not None and not futures:
+        raise first_error
+    # Abandoned attempts finish on their own once the backend's request timeout (the deadline) passes.
+    raise DeadlineExceeded("Deadline exceeded waiting for the LLM response.")
+
+
+async def call_with_hedging_async(call: Callable[[], Awaitable[Any]], deadline: Optional[Deadline] = None,
+                                  delay: Optional[float] = None,
+                                  on_hedge: Optional[Callable[[], None]] = None) -> Any:
+    """Async variant of call_with_hedging; losing or timed-out attempts are cancelled."""
+    if deadline is None and delay is None:
+        return await call()
+    if deadline is not None:
+        deadline.check("LLM call")
+
+    tasks = {asyncio.ensure_future(call())}
+    hedged = delay is None
+    first_error: Optional[BaseException] = None
+    try:
+        while tasks:
+            timeout = deadline.remaining() if deadline is not None else None
+            if not hedged:
+                timeout = delay if timeout is None else min(timeout, delay)
+            done, tasks = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                first_error = first_error or task.exception()
+            if deadline is not None and deadline.expired():
+                break
+            if not hedged and not done:
+                # Only a slow primary is hedged; a failed one is left to the scheduler's retries.
+                hedged = True
+                if on_hedge is not None:
+                    on_hedge()
+                tasks.add(asyncio.ensure_future(call()))
+        if first_error is not None and not tasks:
+            raise first_error
+        raise DeadlineExceeded("Deadline exceeded waiting for the LLM response.")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def stats() -> Dict[str, Any]:
+    """Returns breaker states and p50/p95 latency per (backend, model)."""
+    with _registry_lock:
+        keys = set(_breakers) | set(_latencies)
+        breakers = dict(_breakers)
+        latencies = dict(_latencies)
+    result: Dict[str, Any] = {}
+    for backend, model_name in sorted(keys):
+        tracker = latencies.get((backend, model_name))
+        breaker = breakers.get((backend, model_name))
+        result[f"{backend}/{model_name}"] = {
+            "breaker_state": breaker.state if breaker else CircuitBreaker.CLOSED,
+            "latency_p50": tracker.percentile(50) if tracker else None,
+            "latency_p95": tracker.percentile(95) if tracker else None,
+        }
+    return result
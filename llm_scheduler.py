@@ -0,0 +1,351 @@
+"""
+Shared scheduler around LLM calls.
+
+- Single-flight: identical prompts already in flight are coalesced, so
+  concurrent callers share one backend request.
+- Token bucket: requests-per-minute and tokens-per-minute budgets; callers
+  wait for budget instead of hitting provider quota errors.
+- Retries: retryable failures (quota, overload, transient network errors)
+  are retried with jittered exponential backoff.
+
+Queue depth and wait times are exposed through LLMScheduler.stats().
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from llm_resilience import DeadlineExceeded
+from metrics import estimate_tokens, log_event
+
+REQUESTS_PER_MINUTE = float(os.environ.get("LLM_REQUESTS_PER_MINUTE", 0))  # 0 = unlimited
+TOKENS_PER_MINUTE = float(os.environ.get("LLM_TOKENS_PER_MINUTE", 0))  # 0 = unlimited
+MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 3))
+RETRY_BASE_DELAY_SECONDS = float(os.environ.get("LLM_RETRY_BASE_DELAY_SECONDS", 1.0))
+RETRY_MAX_DELAY_SECONDS = float(os.environ.get("LLM_RETRY_MAX_DELAY_SECONDS", 30.0))
+
+_RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+_RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "Aborted", "ConnectionError", "TimeoutError",
+}
+_RETRYABLE_MESSAGES = ("quota", "rate limit", "overloaded", "try again", "temporarily unavailable")
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Decides whether a failed LLM call is worth retrying.
+
+    Matches google.api_core-style exception names and status codes without importing
+    the SDK, plus quota/overload wording in the message.
+    """
+    explicit = getattr(error, "retryable", None)
+    if explicit is not None:
+        return bool(explicit)
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & _RETRYABLE_ERROR_NAMES:
+        return True
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and code in _RETRYABLE_STATUS_CODES:
+        return True
+    message = str(error).lower()
+    return any(fragment in message for fragment in _RETRYABLE_MESSAGES)
+
+
+class TokenBucket:
+    """
+    Reservation-based token bucket refilled continuously at capacity_per_minute / 60 per second.
+
+    reserve() debits immediately (the balance may go negative) and returns how long the
+    caller must wait for its reservation to be covered, which works for both threads and
+    coroutines.
+    """
+
+    def __init__(self, capacity_per_minute: float):
+        self.capacity = float(capacity_per_minute)
+        self.rate_per_second = self.capacity / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def reserve(self, amount: float) -> float:
+        if not self.enabled:
+            return 0.0
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate_per_second)
+
+    def debit(self, amount: float) -> None:
+        """Charges tokens after the fact (e.g. response tokens) without waiting."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._refill()
+            self._tokens -= min(float(amount), self.capacity)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class LLMScheduler:
+    """Coalesces, rate-limits and retries LLM calls. One instance is shared per process."""
+
+    def __init__(self, requests_per_minute: float = REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = TOKENS_PER_MINUTE,
+                 max_retries: int = MAX_RETRIES,
+                 base_delay: float = RETRY_BASE_DELAY_SECONDS,
+                 max_delay: float = RETRY_MAX_DELAY_SECONDS):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._in_flight: Dict[str, _Call] = {}
+        self._in_flight_async: Dict[str, "asyncio.Future[Any]"] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0, "coalesced": 0, "retries": 0, "failures": 0,
+            "queue_depth": 0, "max_queue_depth": 0,
+            "waits": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0,
+        }
+
+    # --- public API -------------------------------------------------------
+
+    def run(self, key: str, prompt_text: str, call: Callable[[], str], coalesce: bool = True,
+            deadline: Optional[Any] = None) -> str:
+        """
+        Runs a blocking LLM call under the scheduler.
+
+        Args:
+            key: Content key for the request; identical keys in flight are coalesced.
+            prompt_text: The prompt, used to budget tokens.
+            call: Zero-argument callable performing the backend request.
+            coalesce: Set False to always issue a separate request.
+            deadline: Optional llm_resilience.Deadline; budget waits, retries and waiting on a
+                coalesced request never run past it.
+
+        Returns:
+            The response text. Raises the last error if all retries fail.
+        """
+        if not coalesce:
+            return self._run_limited(prompt_text, call, deadline)
+
+        while True:
+            with self._lock:
+                existing = self._in_flight.get(key)
+                if existing is None:
+                    leader = _Call()
+                    self._in_flight[key] = leader
+                else:
+                    self._stats["coalesced"] += 1
+            if existing is None:
+                break
+            # A follower gives up at its own deadline; the leader keeps running for the others.
+            if not existing.done.wait(deadline.remaining() if deadline is not None else None):
+                raise DeadlineExceeded("Deadline exceeded waiting for a coalesced LLM request.")
+            if existing.error is None:
+                return existing.result
+            if isinstance(existing.error, Exception):
+                raise existing.error
+            # The leader was interrupted (KeyboardInterrupt, SystemExit, ...), not failed: take over.
+
+        try:
+            leader.result = self._run_limited(prompt_text, call, deadline)
+            return leader.result
+        except BaseException as e:
+            leader.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            leader.done.set()
+
+    async def run_async(self, key: str, prompt_text: str, call: Callable[[], Awaitable[str]],
+                        coalesce: bool = True, deadline: Optional[Any] = None) -> str:
+        """Async variant of run; call is a zero-argument coroutine function."""
+        if not coalesce:
+            return await self._run_limited_async(prompt_text, call, deadline)
+
+        while True:
+            existing = self._in_flight_async.get(key)
+            if existing is None or existing.get_loop() is not asyncio.get_running_loop():
+                break
+            self._count("coalesced")
+            waiter = asyncio.shield(existing)
+            done, _ = await asyncio.wait({waiter}, timeout=deadline.remaining() if deadline is not None else None)
+            if not done:
+                waiter.cancel()  # Only the shield; the leader keeps running.
+                raise DeadlineExceeded("Deadline exceeded waiting for a coalesced LLM request.")
+            if not existing.cancelled():
+                return waiter.result()
+            # The leader's caller was cancelled, not this one: take over (or follow a new leader).
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight_async[key] = future
+        try:
+            result = await self._run_limited_async(prompt_text, call, deadline)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an uncoalesced failure does not log "exception never retrieved".
+            future.exception()
+            raise
+        finally:
+            if self._in_flight_async.get(key) is future:
+                del self._in_flight_async[key]
+
+    def acquire(self, prompt_text: str, deadline: Optional[Any] = None) -> None:
+        """
+        Blocks until the request and token budgets allow one more call (used for streams).
+
+        Raises:
+            DeadlineExceeded: If the wait would run past the deadline (the reservation is returned).
+        """
+        delay = self._reserve(prompt_text)
+        self._check_budget_wait(prompt_text, delay, deadline)
+        if delay > 0:
+            self._wait(delay)
+        self._count("requests")
+
+    def record_response(self, response_text: str) -> None:
+        """Charges the response's tokens against the tokens-per-minute budget."""
+        self.token_bucket.debit(estimate_tokens(response_text))
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (0-based) retry attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns counters plus current/max queue depth and wait-time metrics."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["in_flight"] = len(self._in_flight) + len(self._in_flight_async)
+        stats["wait_seconds_avg"] = stats["wait_seconds_total"] / stats["waits"] if stats["waits"] else 0.0
+        return stats
+
+    # --- internals --------------------------------------------------------
+
+    def _run_limited(self, prompt_text: str, call: Callable[[], str], deadline: Optional[Any]) -> str:
+        attempt = 0
+        while True:
+            self.acquire(prompt_text, deadline)
+            try:
+                result = call()
+                self.record_response(result or "")
+                return result
+            except Exception as e:
+                delay = self.backoff_delay(attempt)
+                if attempt >= self.max_retries or not is_retryable(e) or not self._fits(delay, deadline):
+                    self._count("failures")
+                    raise
+                attempt += 1
+                self._count("retries")
+                log_event("llm_scheduler", "Retryable error; retrying.", level="warning", error=str(e),
+                          attempt=attempt, max_retries=self.max_retries, delay_seconds=round(delay, 2))
+                time.sleep(delay)
+
+    async def _run_limited_async(self, prompt_text: str, call: Callable[[], Awaitable[str]],
+                                 deadline: Optional[Any]) -> str:
+        attempt = 0
+        while True:
+            delay = self._reserve(prompt_text)
+            self._check_budget_wait(prompt_text, delay, deadline)
+            if delay > 0:
+                await self._wait_async(delay)
+            self._count("requests")
+            try:
+                result = await call()
+                self.record_response(result or "")
+                return result
+            except Exception as e:
+                delay = self.backoff_delay(attempt)
+                if attempt >= self.max_retries or not is_retryable(e) or not self._fits(delay, deadline):
+                    self._count("failures")
+                    raise
+                attempt += 1
+                self._count("retries")
+                log_event("llm_scheduler", "Retryable error; retrying.", level="warning", error=str(e),
+                          attempt=attempt, max_retries=self.max_retries, delay_seconds=round(delay, 2))
+                await asyncio.sleep(delay)
+
+    def _reserve(self, prompt_text: str) -> float:
+        return max(self.request_bucket.reserve(1), self.token_bucket.reserve(estimate_tokens(prompt_text)))
+
+    def _check_budget_wait(self, prompt_text: str, delay: float, deadline: Optional[Any]) -> None:
+        if not self._fits(delay, deadline):
+            # Give the reservation back; this caller will not use it.
+            self.request_bucket.debit(-1)
+            self.token_bucket.debit(-estimate_tokens(prompt_text))
+            self._count("failures")
+            raise DeadlineExceeded(f"Rate-limit wait of {delay:.2f}s exceeds the remaining deadline.")
+
+    @staticmethod
+    def _fits(delay: float, deadline: Optional[Any]) -> bool:
+        return deadline is None or delay < deadline.remaining()
+
+    def _wait(self, delay: float) -> None:
+        self._enter_queue()
+        try:
+            time.sleep(delay)
+        finally:
+            self._leave_queue(delay)
+
+    async def _wait_async(self, delay: float) -> None:
+        self._enter_queue()
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._leave_queue(delay)
+
+    def _enter_queue(self) -> None:
+        with self._lock:
+            self._stats["queue_depth"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._stats["queue_depth"])
+
+    def _leave_queue(self, waited: float) -> None:
+        with self._lock:
+            self._stats["queue_depth"] -= 1
+            self._stats["waits"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """Returns the process-wide scheduler, configured from the LLM_* environment variables."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler()
+    return _scheduler
@@ -0,0 +1,385 @@
+"""
+Pipeline instrumentation: counters, latency/token histograms and a structured log sink.
+
+Agents time their stages with span(component, stage) (parse, prompt_build, llm_wait,
+post_process, ...), count cache lookups with record_cache_lookup() and report LLM token
+usage with record_tokens(). Everything is kept in process memory and exported by
+start_metrics_server() as Prometheus text (/metrics) or JSON (/metrics.json).
+
+log_event() replaces print() on the request path: events are queued and written as JSON
+lines (or plain text) by a background thread, so a slow terminal or disk never stalls a
+request. When the queue is full, events are dropped and counted instead of blocking.
+"""
+import atexit
+import bisect
+import json
+import math
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Port for the /metrics and /metrics.json endpoint; unset disables it.
+METRICS_PORT = int(os.environ["METRICS_PORT"]) if os.environ.get("METRICS_PORT") else None
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PREFIX = "interview_"
+# Structured log sink: file to append to ("" = stdout), "json" or "text" lines, queue bound.
+PIPELINE_LOG_PATH = os.environ.get("PIPELINE_LOG_PATH", "")
+PIPELINE_LOG_FORMAT = os.environ.get("PIPELINE_LOG_FORMAT", "json")
+PIPELINE_LOG_QUEUE_MAX = int(os.environ.get("PIPELINE_LOG_QUEUE_MAX", 10000))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus semantics: cumulative buckets plus sum and count)."""
+
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimates a quantile by linear interpolation inside the bucket that holds it."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                if index == len(self.bounds):
+                    return lower  # Above the largest bound: report the bound
+                return lower + (self.bounds[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters and histograms keyed by (name, labels)."""
+
+    def __init__(self):
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def register_collector(self, name: str, collect: Callable[[], Dict[str, Any]]) -> None:
+        """Adds a stats() callable whose numeric values are exported as gauges (replaces one with the same name)."""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable view: counters, histograms with p50/p95/p99 estimates, cache hit rates and collector stats."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(h.counts), h.total, h.count, h.bounds, [h.quantile(q) for q in (0.5, 0.95, 0.99)])
+                          for key, h in self._histograms.items()}
+            collectors = dict(self._collectors)
+        return {
+            "counters": [{"name": name, "labels": dict(labels), "value": value}
+                         for (name, labels), value in sorted(counters.items())],
+            "histograms": [
+                {"name": name, "labels": dict(labels), "count": count, "sum": round(total, 6),
+                 "buckets": dict(zip([*map(str, bounds), "+Inf"], counts)),
+                 "p50": quantiles[0], "p95": quantiles[1], "p99": quantiles[2]}
+                for (name, labels), (counts, total, count, bounds, quantiles) in sorted(histograms.items())],
+            "cache_hit_rates": _hit_rates(counters),
+            "collectors": {name: _collect(collect) for name, collect in collectors.items()},
+        }
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(h.counts), h.total, h.count, h.bounds)) for key, h in self._histograms.items())
+            collectors = dict(self._collectors)
+        lines: List[str] = []
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f"{METRICS_PREFIX}{name}_total"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_render_labels(labels)} {_number(value)}")
+        for (name, labels), (counts, total, count, bounds) in histograms:
+            metric = f"{METRICS_PREFIX}{name}"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip([*map(_number, bounds), "+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{metric}_bucket{_render_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{metric}_sum{_render_labels(labels)} {_number(total)}")
+            lines.append(f"{metric}_count{_render_labels(labels)} {count}")
+        for collector_name, collect in sorted(collectors.items()):
+            for key, value in _flatten(_collect(collect)):
+                metric = _metric_name(f"{METRICS_PREFIX}{collector_name}_{key}")
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _render_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _collect(collect: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    try:
+        return collect()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _flatten(stats: Dict[str, Any], prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Yields (underscore_joined_key, value) for every numeric leaf of a nested stats dict."""
+    for key, value in stats.items():
+        path = f"{prefix}_{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            yield from _flatten(value, path)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, value
+
+
+def _hit_rates(counters: Dict[Tuple[str, Labels], float]) -> Dict[str, Dict[str, float]]:
+    lookups: Dict[str, Dict[str, float]] = {}
+    for (name, labels), value in counters.items():
+        if name != "cache_lookups":
+            continue
+        label_map = dict(labels)
+        per_cache = lookups.setdefault(label_map.get("cache", ""), {"hits": 0, "misses": 0})
+        per_cache["hits" if label_map.get("result") == "hit" else "misses"] += value
+    for per_cache in lookups.values():
+        total = per_cache["hits"] + per_cache["misses"]
+        per_cache["hit_rate"] = round(per_cache["hits"] / total, 4) if total else 0.0
+    return lookups
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Returns the process-wide metrics registry."""
+    return _registry
+
+
+def increment(name: str, value: float = 1, **labels: Any) -> None:
+    _registry.increment(name, value, **labels)
+
+
+def observe(name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels: Any) -> None:
+    _registry.observe(name, value, buckets, **labels)
+
+
+def register_collector(name: str, collect: Callable[[], Dict[str, Any]]) -> None:
+    _registry.register_collector(name, collect)
+
+
+def snapshot() -> Dict[str, Any]:
+    return _registry.snapshot()
+
+
+@contextmanager
+def span(component: str, stage: str, **labels: Any) -> Iterator[None]:
+    """
+    Times the enclosed block into the pipeline_stage_seconds histogram.
+
+    Args:
+        component: Emitting class or module (e.g. "ResumeAnalyzer", "llm").
+        stage: Stage within it (e.g. "parse", "prompt_build", "llm_wait", "post_process").
+        **labels: Extra labels such as backend or model.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registry.observe("pipeline_stage_seconds", time.perf_counter() - started,
+                          component=component, stage=stage, **labels)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Counts one lookup in the named cache; hit rates are derived in snapshot()."""
+    _registry.increment("cache_lookups", cache=cache, result="hit" if hit else "miss")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about four characters per token for English text and code)."""
+    return max(1, math.ceil(len(text) / 4)) if text else 0
+
+
+def record_tokens(backend: str, model: str, prompt_text: str, response_text: str) -> None:
+    """Records estimated prompt and response token counts of one LLM call."""
+    for direction, text in (("prompt", prompt_text), ("response", response_text)):
+        _registry.observe("llm_tokens", estimate_tokens(text), TOKEN_BUCKETS,
+                          backend=backend, model=model, direction=direction)
+
+
+class _LogSink:
+    """Background writer for log_event(); callers only enqueue."""
+
+    def __init__(self, path: str = PIPELINE_LOG_PATH, log_format: str = PIPELINE_LOG_FORMAT,
+                 max_queued: int = PIPELINE_LOG_QUEUE_MAX):
+        self.path = path
+        self.log_format = log_format
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queued)
+        self._thread = threading.Thread(target=self._drain, name="pipeline-log", daemon=True)
+        self._thread.start()
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            _registry.increment("log_events_dropped")
+
+    def flush(self, timeout: float = 2.0) -> None:
+        """Waits (up to timeout) until queued events have been written."""
+        ends = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < ends:
+            time.sleep(0.01)
+
+    def _format(self, event: Dict[str, Any]) -> str:
+        if self.log_format == "text":
+            fields = " ".join(f"{key}={value}" for key, value in event.items()
+                              if key not in ("ts", "component", "message", "level"))
+            return f"{event['component']}: {event['message']}" + (f" [{fields}]" if fields else "")
+        return json.dumps(event, default=str)
+
+    def _drain(self) -> None:
+        stream = open(self.path, "a", encoding="utf-8") if self.path else None
+        while True:
+            event = self._queue.get()
+            try:
+                out = stream or sys.stdout
+                out.write(self._format(event) + "\n")
+                if self._queue.empty():
+                    out.flush()
+            except Exception:
+                pass  # Logging must never take the pipeline down
+            finally:
+                self._queue.task_done()
+
+
+_log_sink: Optional[_LogSink] = None
+_log_sink_lock = threading.Lock()
+
+
+def _get_log_sink() -> _LogSink:
+    global _log_sink
+    if _log_sink is None:
+        with _log_sink_lock:
+            if _log_sink is None:
+                _log_sink = _LogSink()
+                atexit.register(_log_sink.flush)
+    return _log_sink
+
+
+def log_event(component: str, message: str, level: str = "info", **fields: Any) -> None:
+    """
+    Queues a structured log event without blocking the caller.
+
+    Args:
+        component: Emitting class or module, as used in the old "Component: message" prints.
+        message: Human-readable message.
+        level: "info", "warning" or "error".
+        **fields: Structured context (sizes, counts, ids); keep large payloads out.
+    """
+    _registry.increment("log_events", component=component, level=level)
+    _get_log_sink().emit({"ts": round(time.time(), 3), "level": level, "component": component,
+                          "message": message, **fields})
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body, content_type = _registry.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body, content_type = json.dumps(_registry.snapshot(), default=str), "application/json"
+        else:
+            self.send_error(404)
+            return
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes would otherwise flood the console
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: Optional[int] = METRICS_PORT, host: str = METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+    """
+    Serves /metrics (Prometheus text) and /metrics.json from a daemon thread.
+
+    Safe to call on every Streamlit rerun: the server is started once per process. Returns
+    None when no port is configured.
+    """
+    global _server
+    if port is None:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                print(f"metrics: Could not start metrics endpoint on {host}:{port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+            print(f"metrics: Serving /metrics and /metrics.json on http://{host}:{_server.server_address[1]}")
+        return _server
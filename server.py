@@ -0,0 +1,246 @@
+"""
+Headless HTTP API for the interview pipeline.
+
+Serves resume analysis, question generation and code evaluation over the same agents as
+app.py, without Streamlit. Every endpoint is stateless (the caches behind them are shared
+per process and keyed by content), so any number of instances can run behind a load
+balancer.
+
+Endpoints:
+    POST /resume/analyze       multipart "file"                      -> candidate_id, skills, experience_years
+    POST /questions            multipart "file", form "difficulty"   -> candidate_id, skills, question
+    POST /evaluations          JSON {question, code, language}       -> feedback
+    POST /evaluations/stream   JSON {question, code, language}       -> NDJSON of cumulative feedback
+    GET  /healthz, /metrics, /metrics.json
+
+candidate_id is the resume fingerprint; passing it back with an evaluation links the
+submission to the candidate in the interview store.
+
+At most API_MAX_CONCURRENCY pipeline requests run at once per process; a request that
+cannot start within API_QUEUE_TIMEOUT_SECONDS gets 503 with Retry-After. Resume uploads
+larger than API_MAX_UPLOAD_BYTES get 413.
+
+Usage:
+    python server.py --host 0.0.0.0 --port 8080 --workers 4
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+from typing import Any, AsyncIterator, Dict, Literal, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import iterate_in_threadpool
+
+import metrics
+from agents.manager_agent import DIFFICULTIES, get_manager_agent
+from agents.resume_cache import fingerprint
+from llm_resilience import CircuitOpenError, Deadline, DeadlineExceeded
+
+API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("API_PORT", 8080))
+# Pipeline requests running at once in one process; the rest wait for a slot.
+API_MAX_CONCURRENCY = int(os.environ.get("API_MAX_CONCURRENCY", 32))
+# How long a request waits for a slot before it is turned away with 503.
+API_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("API_QUEUE_TIMEOUT_SECONDS", 5))
+API_MAX_UPLOAD_BYTES = int(os.environ.get("API_MAX_UPLOAD_BYTES", 5 * 1024 * 1024))
+API_MAX_CODE_CHARS = int(os.environ.get("API_MAX_CODE_CHARS", 100_000))
+RESUME_EXTENSIONS = (".pdf", ".docx", ".txt")
+UPLOAD_PATHS = ("/resume/analyze", "/questions")
+
+_slots = asyncio.Semaphore(API_MAX_CONCURRENCY)
+_in_flight = 0
+
+
+def _api_stats() -> Dict[str, Any]:
+    return {"in_flight": _in_flight, "max_concurrency": API_MAX_CONCURRENCY}
+
+
+@contextlib.asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Build the agents before the first request instead of during it.
+    await asyncio.to_thread(get_manager_agent)
+    metrics.register_collector("api", _api_stats)
+    yield
+
+
+app = FastAPI(title="AI-Powered Interview System API", lifespan=_lifespan)
+
+
+class EvaluationRequest(BaseModel):
+    question: str = Field(min_length=1)
+    code: str = Field(min_length=1, max_length=API_MAX_CODE_CHARS)
+    language: str = "python"
+    candidate_id: Optional[str] = Field(default=None, description="candidate_id returned with the question.")
+    timeout: Optional[float] = Field(default=None, gt=0, description="End-to-end deadline in seconds.")
+
+
+@contextlib.asynccontextmanager
+async def _pipeline_slot(endpoint: str) -> AsyncIterator[None]:
+    """Holds one of the API_MAX_CONCURRENCY slots; raises 503 if none frees up in time."""
+    global _in_flight
+    try:
+        await asyncio.wait_for(_slots.acquire(), API_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        metrics.increment("api_rejected", endpoint=endpoint, reason="busy")
+        raise HTTPException(503, "Server busy, retry later.", headers={"Retry-After": "1"})
+    _in_flight += 1
+    try:
+        yield
+    finally:
+        _in_flight -= 1
+        _slots.release()
+
+
+async def _read_resume(file: UploadFile) -> bytes:
+    """Reads an uploaded resume, enforcing the extension and API_MAX_UPLOAD_BYTES."""
+    if not (file.filename or "").lower().endswith(RESUME_EXTENSIONS):
+        raise HTTPException(415, f"Unsupported resume type. Upload one of: {', '.join(RESUME_EXTENSIONS)}.")
+    content = await file.read(API_MAX_UPLOAD_BYTES + 1)
+    if len(content) > API_MAX_UPLOAD_BYTES:
+        raise HTTPException(413, f"Resume exceeds {API_MAX_UPLOAD_BYTES} bytes.")
+    if not content:
+        raise HTTPException(400, "Uploaded resume is empty.")
+    return content
+
+
+@app.middleware("http")
+async def _limit_upload_size(request: Request, call_next):
+    # Rejects oversized uploads from Content-Length before the multipart body is parsed;
+    # _read_resume still enforces the limit for chunked uploads without one.
+    if request.method == "POST" and request.url.path in UPLOAD_PATHS:
+        try:
+            length = int(request.headers.get("content-length", 0))
+        except ValueError:
+            length = 0
+        # Allow a little over the file limit for the multipart framing and form fields.
+        if length > API_MAX_UPLOAD_BYTES + 64 * 1024:
+            metrics.increment("api_rejected", endpoint=request.url.path, reason="too_large")
+            return JSONResponse({"detail": f"Resume exceeds {API_MAX_UPLOAD_BYTES} bytes."}, status_code=413)
+    return await call_next(request)
+
+
+@app.exception_handler(DeadlineExceeded)
+async def _deadline_exceeded(request: Request, exc: DeadlineExceeded) -> JSONResponse:
+    return JSONResponse({"detail": str(exc)}, status_code=504)
+
+
+@app.exception_handler(CircuitOpenError)
+async def _circuit_open(request: Request, exc: CircuitOpenError) -> JSONResponse:
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": "5"})
+
+
+@app.get("/healthz")
+async def healthz() -> Dict[str, Any]:
+    return {"status": "ok", **_api_stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics() -> str:
+    return metrics.get_registry().render_prometheus()
+
+
+@app.get("/metrics.json")
+async def metrics_json() -> Dict[str, Any]:
+    return json.loads(json.dumps(metrics.snapshot(), default=str))
+
+
+@app.post("/resume/analyze")
+async def analyze_resume(file: UploadFile = File(...), timeout: Optional[float] = Form(None)) -> Dict[str, Any]:
+    """Extracts skills and years of experience from a resume."""
+    content = await _read_resume(file)
+    manager = get_manager_agent()
+    deadline = Deadline.from_timeout(timeout if timeout is not None else manager.default_timeout)
+    async with _pipeline_slot("resume_analyze"):
+        with metrics.span("API", "resume_analyze"):
+            analysis = await manager.resume_analyzer.analyze_async(content, file.filename, deadline=deadline)
+    if "error" in analysis:
+        raise HTTPException(422, analysis["error"])
+    candidate_id = fingerprint(content)
+    if manager.interview_store is not None:
+        manager.interview_store.record_candidate(candidate_id, file.filename, analysis.skills, analysis.experience_years)
+    return {"candidate_id": candidate_id, **analysis.to_dict()}
+
+
+@app.post("/questions")
+async def generate_question(file: UploadFile = File(...),
+                            difficulty: Literal[DIFFICULTIES] = Form("Medium"),
+                            timeout: Optional[float] = Form(None)) -> Dict[str, Any]:
+    """Analyzes a resume and generates a coding question tailored to it."""
+    content = await _read_resume(file)
+    async with _pipeline_slot("questions"):
+        with metrics.span("API", "questions"):
+            skills, question = await get_manager_agent().process_resume_and_generate_question_async(
+                content, file.filename, difficulty, timeout)
+    if skills is None:
+        raise HTTPException(422, "Could not extract skills from the resume.")
+    if not question:
+        raise HTTPException(502, "Question generation failed.")
+    return {"candidate_id": fingerprint(content), "skills": skills, "question": question, "difficulty": difficulty}
+
+
+@app.post("/evaluations")
+async def evaluate_code(request: EvaluationRequest) -> Dict[str, Any]:
+    """Evaluates a code submission against the question it answers."""
+    async with _pipeline_slot("evaluations"):
+        with metrics.span("API", "evaluations"):
+            feedback = await get_manager_agent().evaluate_code_submission_async(
+                request.question, request.code, request.language, request.timeout, request.candidate_id)
+    if not feedback:
+        raise HTTPException(502, "Code evaluation failed.")
+    return {"feedback": feedback}
+
+
+@app.post("/evaluations/stream")
+async def evaluate_code_stream(request: EvaluationRequest) -> StreamingResponse:
+    """
+    Streams the evaluation as newline-delimited JSON: {"feedback": markdown} lines, each more
+    complete than the last, then {"feedback": markdown, "done": true}. Failures after the
+    response has started, including a busy server or a stream that produced no feedback, end
+    the stream with {"error", "done": true}.
+    """
+    async def lines() -> AsyncIterator[str]:
+        # The slot is taken inside the generator so it is always released, even when the
+        # client disconnects before the body starts.
+        feedback = None
+        try:
+            async with _pipeline_slot("evaluations_stream"):
+                partials = get_manager_agent().evaluate_code_submission_stream(
+                    request.question, request.code, request.language, request.timeout, request.candidate_id)
+                async for feedback in iterate_in_threadpool(partials):
+                    yield json.dumps({"feedback": feedback}) + "\n"
+        except HTTPException as e:
+            yield json.dumps({"error": e.detail, "done": True}) + "\n"
+            return
+        except (DeadlineExceeded, CircuitOpenError) as e:
+            yield json.dumps({"error": str(e), "done": True}) + "\n"
+            return
+        except Exception as e:
+            metrics.log_event("API", f"Streaming evaluation failed: {e}", level="error")
+            yield json.dumps({"error": "Code evaluation failed.", "done": True}) + "\n"
+            return
+        if not feedback:
+            yield json.dumps({"error": "Code evaluation failed.", "done": True}) + "\n"
+            return
+        yield json.dumps({"feedback": feedback, "done": True}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the interview pipeline over HTTP.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes; each has its own agents, caches and concurrency limit.")
+    args = parser.parse_args()
+    uvicorn.run("server:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+import llm_backends
+from agents import question_generator
+from agents.code_evaluator import CodeEvaluator
+from agents.question_generator import QuestionGenerator
+from agents.resume_analyzer import ResumeAnalyzer
+
+RESUME = b"Jane Doe\nSoftware engineer with 6 years of experience in Python, SQL and Docker.\n"
+QUESTION = "Write solve(xs) that returns the sum of the integers in xs."
+CODE = "def solve(xs):\n    total = 0\n    for x in xs:\n        total += x\n    return total\n"
+
+
+@pytest.fixture(autouse=True)
+def stub_backend(monkeypatch):
+    monkeypatch.setattr(llm_backends, "DEFAULT_BACKEND", "stub")
+
+
+def test_resume_analysis_async_matches_sync():
+    analyzer = ResumeAnalyzer(use_cache=False)
+    expected = analyzer.analyze(RESUME, "resume.txt")
+    assert expected["skills"]
+    assert dict(asyncio.run(analyzer.analyze_async(RESUME, "resume.txt"))) == dict(expected)
+
+
+def test_question_generation_async_matches_sync():
+    generator = QuestionGenerator(use_cache=False)
+    expected = generator.generate(["Python", "SQL"], 6, "Medium")
+    assert expected
+    assert asyncio.run(generator.generate_async(["Python", "SQL"], 6, "Medium")) == expected
+
+
+def test_code_evaluation_async_matches_sync():
+    evaluator = CodeEvaluator(use_cache=False)
+    evaluator.interview_store = None
+    evaluator.submission_history = None
+    expected = evaluator.evaluate(QUESTION, CODE, "python")
+    assert expected and not expected.startswith("Error")
+    assert asyncio.run(evaluator.evaluate_async(QUESTION, CODE, "python")) == expected
+
+
+def test_backend_errors_are_not_returned_as_questions(monkeypatch):
+    async def failing(*args, **kwargs):
+        return "Error: quota exceeded"
+
+    monkeypatch.setattr(question_generator, "generate_text_from_gemini_async", failing)
+    assert asyncio.run(QuestionGenerator(use_cache=False).generate_async(["Python"], 2, "Easy")) is None
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+import llm_backends
+from agents.resume_analyzer import ResumeAnalyzer
+from batch_ingest import BatchIngestor, iter_resume_files, load_completed
+
+RESUME = "Jane Doe\nBackend engineer with {years} years of experience in Python, SQL and Docker.\n"
+
+
+@pytest.fixture
+def resumes(tmp_path):
+    directory = tmp_path / "resumes"
+    (directory / "team").mkdir(parents=True)
+    (directory / "a.txt").write_text(RESUME.format(years=3))
+    (directory / "b.txt").write_text(RESUME.format(years=5))
+    (directory / "team" / "c.txt").write_text(RESUME.format(years=8))
+    (directory / "notes.md").write_text("not a resume")
+    return directory
+
+
+def ingestor(resumes, output):
+    ingestor = BatchIngestor(str(resumes), str(output), workers=1, concurrency=2)
+    ingestor.analyzer = ResumeAnalyzer(use_cache=False)
+    return ingestor
+
+
+def read_records(output):
+    return [json.loads(line) for line in output.read_text().splitlines()]
+
+
+def test_supported_files_are_listed_in_a_stable_order(resumes):
+    paths = [path[len(str(resumes)) + 1:] for path in iter_resume_files(str(resumes))]
+    assert paths == ["a.txt", "b.txt", "team/c.txt"]
+    assert len(list(iter_resume_files(str(resumes), recursive=False))) == 2
+
+
+def test_latest_record_wins_and_truncated_lines_are_ignored(tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_text("\n".join([
+        json.dumps({"path": "a.txt", "error": "timeout"}),
+        json.dumps({"path": "a.txt", "skills": ["Python"]}),
+        json.dumps({"path": "b.txt", "skills": ["SQL"]}),
+        json.dumps({"path": "b.txt", "error": "timeout"}),
+        '{"path": "c.txt", "ski',
+    ]))
+    assert load_completed(str(output)) == {"a.txt"}
+    assert load_completed(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_run_writes_one_record_per_resume_and_resumes_where_it_stopped(resumes, tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_backends, "DEFAULT_BACKEND", "stub")
+    output = tmp_path / "out.jsonl"
+
+    summary = ingestor(resumes, output).run()
+    assert (summary["processed"], summary["skipped"], summary["failed"]) == (3, 0, 0)
+    records = read_records(output)
+    assert sorted(record["path"] for record in records) == ["a.txt", "b.txt", "team/c.txt"]
+    assert all(record["skills"] and record["fingerprint"] for record in records)
+
+    summary = ingestor(resumes, output).run()
+    assert (summary["processed"], summary["skipped"]) == (0, 3)
+    assert len(read_records(output)) == 3
@@ -0,0 +1,57 @@
+import io
+
+import pytest
+from PyPDF2 import PdfReader
+
+from benchmarks.latency_stub import LatencyModel
+from benchmarks.stats import compare_results, run_concurrent, summarize_latencies
+from benchmarks.synthetic import make_pdf, resume_text
+
+
+def test_latency_summary_is_in_milliseconds():
+    summary = summarize_latencies([0.001 * n for n in range(1, 101)])
+    assert summary["p50"] == pytest.approx(50.5)
+    assert summary["p99"] == pytest.approx(99.01)
+    assert summary["max"] == pytest.approx(100.0)
+    assert summarize_latencies([]) == {}
+
+
+def test_run_concurrent_counts_errors_and_summarizes_stages():
+    def task(index):
+        if index == 3:
+            raise RuntimeError("backend down")
+        return {"llm_wait": 0.002, "post_process": 0.001}
+
+    result = run_concurrent(task, requests=5, concurrency=2)
+    assert (result["requests"], result["errors"]) == (5, 1)
+    assert set(result["stages"]) == {"llm_wait", "post_process"}
+    assert result["stages"]["llm_wait"]["p50"] == pytest.approx(2.0)
+    assert result["throughput_rps"] > 0
+
+
+def test_comparison_reports_relative_change_per_case():
+    def result(case, p50, throughput):
+        return {"suite": "pipeline", "case": case, "concurrency": 4, "throughput_rps": throughput,
+                "latency_ms": {"p50": p50, "p95": p50, "p99": p50}}
+
+    rows = compare_results([result("end_to_end", 150.0, 20.0), result("new_case", 1.0, 1.0)],
+                           [result("end_to_end", 100.0, 25.0)])
+    assert rows == [{"suite": "pipeline", "case": "end_to_end", "concurrency": 4,
+                     "p50": 50.0, "p95": 50.0, "p99": 50.0, "throughput_rps": -20.0}]
+
+
+def test_latency_models_are_reproducible():
+    assert LatencyModel("fixed", mean_ms=200).sample() == pytest.approx(0.2)
+    first = [LatencyModel("lognormal", 200, 0.5, seed=7).sample() for _ in range(3)]
+    assert first == [LatencyModel("lognormal", 200, 0.5, seed=7).sample() for _ in range(3)]
+    samples = [LatencyModel("uniform", 200, 0.5, seed=1).sample() for _ in range(50)]
+    assert all(0.1 <= sample <= 0.3 for sample in samples)
+    with pytest.raises(ValueError):
+        LatencyModel("pareto")
+
+
+def test_synthetic_pdf_resumes_are_readable():
+    text = resume_text(3, paragraphs=12)
+    reader = PdfReader(io.BytesIO(make_pdf(text, lines_per_page=20)))
+    assert len(reader.pages) == -(-len(text.splitlines()) // 20)
+    assert reader.pages[0].extract_text().startswith("Candidate 00003")
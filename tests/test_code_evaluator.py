@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+import pytest
+
+import utils
+from agents.code_evaluator import CodeEvaluator
+
+QUESTION = "Return the sum of the list."
+CODE = "def solve(xs):\n    total = 0\n    for x in xs:\n        total += x\n    return total\n"
+
+
+@pytest.fixture
+def evaluator():
+    evaluator = CodeEvaluator(use_cache=False)
+    evaluator.interview_store = None
+    evaluator.submission_history = None
+    return evaluator
+
+
+def test_stream_post_processing_failure_ends_with_an_error(evaluator, monkeypatch):
+    keys = ("problem_understanding", "problem_solving_approach", "code_structure_readability",
+            "syntax_language_usage", "test_coverage_edge_cases")
+    response = json.dumps({"evaluation_summary": "Correct loop.", "scores": {key: "8 / 10" for key in keys},
+                           "category_feedback": {f"{key}_feedback": "Fine." for key in keys}})
+
+    def stream(prompt, **kwargs):
+        yield response
+
+    def broken_formatting(*args, **kwargs):
+        raise RuntimeError("formatting failed")
+
+    monkeypatch.setattr(utils, "stream_text_from_gemini", stream)
+    monkeypatch.setattr(evaluator, "_format_feedback", broken_formatting)
+
+    partials = list(evaluator.evaluate_stream(QUESTION, CODE, "python"))
+    assert partials[-1].startswith("Error:")
+    assert "formatting failed" in partials[-1]
+
+
+def test_unparsable_submissions_are_answered_without_the_model(evaluator, monkeypatch):
+    def no_llm(*args, **kwargs):
+        raise AssertionError("the model was called")
+
+    monkeypatch.setattr(utils, "generate_json_from_gemini", no_llm)
+    monkeypatch.setattr(utils, "generate_json_from_gemini_async", no_llm)
+    monkeypatch.setattr(utils, "stream_text_from_gemini", no_llm)
+    broken = "def solve(xs)\n    return xs\n"
+
+    feedback = evaluator.evaluate(QUESTION, broken, "python")
+    assert "does not parse" in feedback
+    assert asyncio.run(evaluator.evaluate_async(QUESTION, broken, "python")) == feedback
+    assert list(evaluator.evaluate_stream(QUESTION, broken, "python")) == [feedback]
@@ -0,0 +1,101 @@
+import textwrap
+
+import pytest
+
+from agents.code_fingerprint import EvaluationCache, fingerprint_submission
+
+QUESTION = "Return the sum of the rounded values."
+
+
+def fingerprint(code, language="python"):
+    return fingerprint_submission(QUESTION, textwrap.dedent(code), language).fingerprint
+
+
+@pytest.mark.parametrize("first, second", [
+    ("""
+        from math import floor
+        def solve(x):
+            return floor(x)
+    """, """
+        from math import ceil
+        def solve(x):
+            return ceil(x)
+    """),
+    ("""
+        import math as m
+        def solve(x):
+            return m.floor(x)
+    """, """
+        import numpy as m
+        def solve(x):
+            return m.floor(x)
+    """),
+    ("""
+        def solve(xs):
+            return sorted(xs)[LIMIT]
+    """, """
+        def solve(xs):
+            return sorted(xs)[OFFSET]
+    """),
+])
+def test_different_python_programs_do_not_collide(first, second):
+    assert fingerprint(first) != fingerprint(second)
+
+
+def test_renamed_and_reformatted_python_programs_collide():
+    first = """
+        from math import floor
+
+        def solve(values):
+            \"\"\"Sums rounded values.\"\"\"
+            total = 0
+            for value in values:  # running sum
+                total += floor(value)
+            return total
+    """
+    second = """
+        from math import floor
+        def solve(xs):
+            acc = 0
+            for x in xs: acc += floor(x)
+            return acc
+    """
+    assert fingerprint(first) == fingerprint(second)
+
+
+def test_different_javascript_programs_do_not_collide():
+    assert fingerprint("function solve(xs) { return xs.map(floor); }", "javascript") != \
+        fingerprint("function solve(xs) { return xs.map(ceil); }", "javascript")
+    assert fingerprint("import { floor as f } from 'lib'\nfunction solve(x) { return f(x) }", "javascript") != \
+        fingerprint("import { ceil as f } from 'lib'\nfunction solve(x) { return f(x) }", "javascript")
+
+
+def test_renamed_and_reformatted_javascript_programs_collide():
+    first = """
+        function solve(values) {
+          // running sum
+          let total = 0;
+          for (const value of values) { total += Math.floor(value); }
+          return total;
+        }
+    """
+    second = "function solve(xs) { let acc = 0\n for (const x of xs) { acc += Math.floor(x) }\n return acc }"
+    assert fingerprint(first, "javascript") == fingerprint(second, "javascript")
+
+
+def test_java_locals_and_parameters_are_renamed():
+    first = "int solve(int[] nums) { int best = 0; for (int i = 0; i < nums.length; i++) best += nums[i]; return best; }"
+    second = "int solve(int[] a) {\n  int s = 0;\n  for (int j = 0; j < a.length; j++) s += a[j];\n  return s;\n}"
+    assert fingerprint(first, "java") == fingerprint(second, "java")
+
+
+def test_cache_does_not_serve_a_different_program(tmp_path):
+    cache = EvaluationCache(path=str(tmp_path / "evaluations.sqlite3"))
+    floor_submission = fingerprint_submission(QUESTION, "from math import floor\ndef solve(x):\n    return floor(x)\n", "python")
+    ceil_submission = fingerprint_submission(QUESTION, "from math import ceil\ndef solve(x):\n    return ceil(x)\n", "python")
+    cache.store(floor_submission, "model", {"summary": "uses floor"})
+
+    evaluation, similar = cache.lookup(ceil_submission, "model")
+    assert evaluation is None
+    assert similar is None or not similar["identical"]
+    assert cache.lookup(floor_submission, "model")[0] == {"summary": "uses floor"}
@@ -0,0 +1,363 @@
+import os
+import shutil
+import textwrap
+
+import pytest
+
+from agents import code_sandbox
+from agents.code_sandbox import (CodeSandbox, SandboxUnavailable, describe_value, normalize_language,
+                                 summarize_execution, values_equal)
+
+ADD_CASES = [
+    {"input": [1, 2], "expected": 3},
+    {"input": [-4, 4], "expected": 0},
+    {"input": [10, 5], "expected": 15},
+]
+
+requires_node = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+
+@pytest.fixture
+def sandbox():
+    # No bubblewrap in the test environment; isolation has its own tests below.
+    return CodeSandbox(workers=2, cpu_seconds=5, memory_mb=256, wall_seconds=10, test_timeout=1, isolation="none")
+
+
+def run(sandbox, code, language="python", test_cases=ADD_CASES, **kwargs):
+    return sandbox.run_tests(textwrap.dedent(code), language, test_cases, **kwargs)
+
+
+def test_correct_submission_passes(sandbox):
+    result = run(sandbox, """
+        def solve(a, b):
+            print("debug output is discarded")
+            return a + b
+    """)
+    assert result["status"] == "passed"
+    assert (result["passed"], result["total"]) == (3, 3)
+    assert result["peak_memory_kb"] > 0
+    assert all(test["runtime_ms"] is not None for test in result["tests"])
+
+
+def test_wrong_answer_reports_expected_and_a_description_of_actual(sandbox):
+    result = run(sandbox, """
+        def solve(a, b):
+            return a - b
+    """)
+    assert result["status"] == "failed"
+    assert result["passed"] == 0
+    failure = result["tests"][0]
+    assert failure == {"index": 0, "passed": False, "runtime_ms": failure["runtime_ms"],
+                       "expected": "3", "actual": "a number"}
+
+
+def test_returned_host_data_is_never_echoed(sandbox, monkeypatch):
+    monkeypatch.setenv("SANDBOX_TEST_SECRET", "hunter2-secret")
+    result = run(sandbox, """
+        import os
+
+        def solve(a, b):
+            try:
+                with open(f"/proc/{os.getppid()}/environ", "rb") as f:
+                    return f.read().decode("latin-1")
+            except OSError as e:
+                return repr(e)
+    """, test_cases=ADD_CASES[:1])
+    assert result["status"] == "failed"
+    assert "hunter2" not in repr(result)
+    assert "hunter2" not in summarize_execution(result)
+    assert result["tests"][0]["actual"].startswith("a string of")
+
+
+def test_exception_messages_and_custom_names_are_not_echoed(sandbox):
+    result = run(sandbox, """
+        class Leak(Exception):
+            pass
+        Leak.__name__ = "top-secret"
+
+        def solve(a, b):
+            if a == 1:
+                raise ValueError("top-secret")
+            raise Leak("top-secret")
+    """, test_cases=ADD_CASES[:2])
+    assert [test["error"] for test in result["tests"]] == ["Raised ValueError", "Raised Error"]
+    assert "top-secret" not in repr(result)
+
+
+@pytest.mark.skipif(os.geteuid() == 0, reason="RLIMIT_NPROC is not enforced for root")
+def test_child_processes_are_refused(sandbox):
+    result = run(sandbox, """
+        import os
+
+        def solve(a, b):
+            pid = os.fork()
+            if pid == 0:
+                os._exit(0)
+            return a + b
+    """, test_cases=ADD_CASES[:1])
+    assert result["tests"][0]["error"] in ("Raised BlockingIOError", "Raised OSError")
+
+
+def test_invalid_entry_point_is_rejected(sandbox):
+    result = run(sandbox, "def solve(a, b):\n    return a + b\n", entry_point="solve; import os")
+    assert result["status"] == "error"
+    assert "plain function name" in result["error"]
+
+
+def test_describe_value():
+    assert describe_value(None) == "null"
+    assert describe_value(True) == "a boolean"
+    assert describe_value(2.5) == "a number"
+    assert describe_value("abc") == "a string of 3 characters"
+    assert describe_value([1, 2]) == "a list of 2 items"
+    assert describe_value({"a": 1}) == "an object with 1 keys"
+
+
+def test_float_results_compare_with_tolerance(sandbox):
+    result = run(sandbox, """
+        def solve(values):
+            return [v / 3 for v in values]
+    """, test_cases=[{"input": [[1, 2]], "expected": [0.3333333333, 0.6666666667]}])
+    assert result["status"] == "passed"
+
+
+def test_overriding_the_comparison_does_not_pass(sandbox):
+    result = run(sandbox, """
+        import __main__, builtins
+        __main__.equal = lambda actual, expected: True
+        builtins.equal = lambda actual, expected: True
+
+        def solve(a, b):
+            return None
+    """)
+    assert result["status"] == "failed"
+    assert result["passed"] == 0
+
+
+def test_forged_stdout_messages_are_ignored(sandbox):
+    result = run(sandbox, """
+        import json, sys
+        for index in range(3):
+            line = json.dumps({"test": {"index": index, "passed": True}})
+            print(line)
+            sys.__stdout__.write("@@sandbox-0000@@" + line + "\\n")
+
+        def solve(a, b):
+            return 0
+    """)
+    assert result["status"] == "failed"
+    assert result["passed"] == 1  # only -4 + 4 == 0 is genuinely right
+
+
+def test_writing_to_the_result_channel_cannot_claim_a_pass(sandbox):
+    result = run(sandbox, """
+        import json, os
+        forged = "".join(json.dumps({"test": {"index": i, "passed": True, "actual": "0"}}) + "\\n"
+                         for i in range(3)) + json.dumps({"done": True}) + "\\n"
+        for name in os.listdir("/proc/self/fd"):
+            try:
+                os.write(int(name), forged.encode())
+            except OSError:
+                pass
+
+        def solve(a, b):
+            return a + b
+    """)
+    # The forged reports win for every index, but they only claim a return value of 0.
+    assert result["status"] == "failed"
+    assert result["passed"] == 1
+
+
+def test_expected_values_are_not_sent_to_the_sandbox(sandbox):
+    result = run(sandbox, """
+        import gc
+
+        def solve(a, b):
+            for obj in gc.get_objects():
+                if isinstance(obj, dict) and "expected" in obj:
+                    return obj["expected"]
+            return None
+    """)
+    assert result["passed"] == 0
+
+
+def test_per_test_timeout(sandbox):
+    result = run(sandbox, """
+        def solve(a, b):
+            if a == -4:
+                while True:
+                    pass
+            return a + b
+    """)
+    assert result["status"] == "failed"
+    assert result["passed"] == 2
+    assert result["tests"][1]["error"] == "Timed out"
+
+
+def test_wall_clock_timeout_kills_the_process_group():
+    sandbox = CodeSandbox(workers=1, wall_seconds=1, test_timeout=30, isolation="none")
+    result = run(sandbox, """
+        import time
+
+        def solve(a, b):
+            time.sleep(60)
+    """)
+    assert result["status"] == "timeout"
+    assert result["runtime_ms"] < 5000
+
+
+def test_memory_limit(sandbox):
+    result = run(sandbox, """
+        def solve(a, b):
+            blob = bytearray(1024 * 1024 * 1024)
+            return len(blob)
+    """)
+    assert result["status"] == "failed"
+    assert all(test["error"] == "Raised MemoryError" for test in result["tests"])
+
+
+def test_oversized_return_value_is_rejected(sandbox):
+    result = run(sandbox, """
+        def solve(a, b):
+            return "x" * (2 << 20)
+    """, test_cases=ADD_CASES[:1])
+    assert result["status"] == "failed"
+    assert result["tests"][0]["error"].startswith("Return value too large")
+
+
+def test_syntax_error_and_missing_entry_point(sandbox):
+    broken = run(sandbox, "def solve(a, b)\n    return a + b\n")
+    assert broken["status"] == "error"
+    assert broken["error"].startswith("SyntaxError")
+
+    load_failure = run(sandbox, "raise RuntimeError('secret')\ndef solve(a, b):\n    return a + b\n")
+    assert load_failure["error"] == "Submission raised RuntimeError while loading."
+
+    missing = run(sandbox, "def add(a, b):\n    return a + b\n")
+    assert missing["status"] == "error"
+    assert "solve" in missing["error"]
+
+
+def test_exit_before_all_tests_is_an_error(sandbox):
+    result = run(sandbox, """
+        import os
+
+        def solve(a, b):
+            if a == 10:
+                os._exit(3)
+            return a + b
+    """)
+    assert result["status"] == "error"
+    assert result["passed"] == 2
+    assert "exited with code 3" in result["error"]
+
+
+def test_unavailable_isolation_is_refused(monkeypatch):
+    monkeypatch.setattr(code_sandbox.shutil, "which", lambda name: None)
+    with pytest.raises(SandboxUnavailable):
+        CodeSandbox(isolation="bwrap")
+    with pytest.raises(SandboxUnavailable):
+        CodeSandbox(isolation="prefix", command_prefix="")
+    with pytest.raises(SandboxUnavailable):
+        CodeSandbox(isolation="chroot")
+
+
+def test_get_code_sandbox_is_off_by_default_and_caches_failures(monkeypatch):
+    monkeypatch.setattr(code_sandbox, "_code_sandbox", None)
+    monkeypatch.setattr(code_sandbox, "_code_sandbox_failed", False)
+    monkeypatch.setattr(code_sandbox, "SANDBOX_ENABLED", False)
+    assert code_sandbox.get_code_sandbox() is None
+
+    attempts = []
+
+    def unavailable():
+        attempts.append(1)
+        raise SandboxUnavailable("no bwrap")
+
+    monkeypatch.setattr(code_sandbox, "SANDBOX_ENABLED", True)
+    monkeypatch.setattr(code_sandbox, "CodeSandbox", unavailable)
+    assert code_sandbox.get_code_sandbox() is None
+    assert code_sandbox.get_code_sandbox() is None
+    assert len(attempts) == 1
+
+
+def test_bwrap_command_hides_the_host(monkeypatch, tmp_path):
+    monkeypatch.setattr(code_sandbox.shutil, "which", lambda name: f"/usr/bin/{name}")
+    sandbox = CodeSandbox(isolation="bwrap")
+    command = sandbox._command("python", str(tmp_path), "def solve():\n    pass\n")
+    assert command[0] == "/usr/bin/bwrap"
+    assert "--unshare-all" in command and "--die-with-parent" in command
+    assert command[command.index("--bind") + 1:command.index("--bind") + 3] == [str(tmp_path), "/sandbox"]
+    mounted = [command[i + 1] for i, arg in enumerate(command) if arg == "--ro-bind"]
+    assert os.getcwd() not in mounted and "/etc" not in mounted and "/" not in mounted
+    assert command[command.index("--") + 1:] == [code_sandbox.sys.executable, "-I", "harness.py"]
+
+    prefixed = CodeSandbox(isolation="prefix", command_prefix="nsjail --config sandbox.cfg --")
+    assert prefixed._command("python", str(tmp_path), "")[:4] == ["nsjail", "--config", "sandbox.cfg", "--"]
+
+
+def test_unsupported_language_and_missing_tests(sandbox):
+    assert run(sandbox, "fn main() {}", language="rust")["status"] == "unsupported"
+    assert run(sandbox, "def solve(): pass", test_cases=[])["status"] == "unsupported"
+
+
+def test_language_aliases():
+    assert normalize_language(" Python3 ") == "python"
+    assert normalize_language("JS") == "javascript"
+    assert normalize_language("go") is None
+
+
+def test_values_equal():
+    assert values_equal([1, {"a": 0.1 + 0.2}], [1, {"a": 0.3}])
+    assert not values_equal([1, 2], [1, 2, 3])
+    assert not values_equal({"a": 1}, {"b": 1})
+    assert not values_equal("1", 1.0)
+
+
+@requires_node
+def test_javascript_submission(sandbox):
+    passing = run(sandbox, "function solve(a, b) { console.log('ignored'); return a + b; }", language="javascript")
+    assert passing["status"] == "passed"
+
+    exported = run(sandbox, "module.exports = (a, b) => a * b;", language="js", test_cases=ADD_CASES[:1])
+    assert exported["status"] == "failed"
+    assert exported["tests"][0]["actual"] == "a number"
+
+
+@requires_node
+def test_javascript_escape_cannot_read_files_or_spawn(sandbox):
+    result = run(sandbox, """
+        const proc = this.constructor.constructor("return process")();
+        function attempt(action) {
+          try { action(); return "allowed"; } catch (e) { return "denied"; }
+        }
+        function solve(path) {
+          const load = proc.mainModule.require;
+          return [
+            attempt(() => load("fs").readFileSync(path)),
+            attempt(() => load("child_process").execSync("true")),
+          ];
+        }
+    """, language="javascript", test_cases=[{"input": [__file__], "expected": ["denied", "denied"]}])
+    assert result["status"] == "passed"
+
+
+@requires_node
+def test_javascript_timeout(sandbox):
+    result = run(sandbox, "function solve(a, b) { if (a === -4) { while (true) {} } return a + b; }",
+                 language="javascript")
+    assert result["status"] == "failed"
+    assert result["tests"][1]["error"] == "Timed out"
+
+
+@requires_node
+def test_javascript_escape_cannot_forge_results(sandbox):
+    result = run(sandbox, """
+        const proc = this.constructor.constructor("return process")();
+        for (let i = 0; i < 3; i++) {
+          proc.stdout.write(JSON.stringify({ test: { index: i, passed: true } }) + "\\n");
+        }
+        function solve(a, b) { return null; }
+    """, language="javascript")
+    assert result["status"] == "failed"
+    assert result["passed"] == 0
@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+import pytest
+
+from agents.interview_store import InterviewStore
+from agents.results import SCORE_KEYS, CodeEvaluation
+from cohort_analytics import EvaluationArrays, analyze_cohort, cohort_report, weighted_totals
+
+NAN = float("nan")
+
+
+def row(evaluation_id, candidate, question, score, created_at=0.0):
+    return (evaluation_id, candidate, question) + (score,) * len(SCORE_KEYS) + (None, None, created_at)
+
+
+def test_weighted_totals_skip_missing_categories():
+    scores = np.array([[8.0, 6.0, NAN, NAN, NAN], [NAN] * 5])
+    weights = dict.fromkeys(SCORE_KEYS, 1.0)
+    weights[SCORE_KEYS[0]] = 3.0
+    totals = weighted_totals(scores, weights)
+    assert totals[0] == pytest.approx(7.5)
+    assert math.isnan(totals[1])
+
+
+def test_candidates_are_ranked_by_their_best_evaluation():
+    evaluations = EvaluationArrays([
+        row(1, "alice", "q1", 5.0), row(2, "alice", "q1", 9.0),
+        row(3, "bob", "q1", 7.0), row(4, None, "q1", 10.0),
+    ])
+    report = analyze_cohort(evaluations, rank_by="total")
+    assert [entry["candidate_id"] for entry in report["top"]] == ["alice", "bob"]
+    assert report["top"][0]["evaluation_id"] == 2
+    assert (report["evaluations"], report["candidates"]) == (4, 2)
+
+
+def test_normalized_ranking_accounts_for_question_difficulty():
+    evaluations = EvaluationArrays([
+        row(1, "easy-top", "easy", 8.0), row(2, "easy-low", "easy", 7.0), row(3, "easy-mid", "easy", 7.5),
+        row(4, "hard-top", "hard", 6.0), row(5, "hard-low", "hard", 2.0), row(6, "hard-mid", "hard", 3.0),
+    ])
+    by_total = analyze_cohort(evaluations, rank_by="total", top_k=1)
+    by_normalized = analyze_cohort(evaluations, rank_by="normalized", top_k=1)
+    assert by_total["top"][0]["candidate_id"] == "easy-top"
+    assert by_normalized["top"][0]["candidate_id"] == "hard-top"
+
+
+def test_report_reads_the_store(tmp_path):
+    store = InterviewStore(path=str(tmp_path / "interviews.sqlite3"), flush_seconds=0.01)
+    store.record_candidate("cand-1", "resume.pdf", ["Python"], 3)
+    scores = {key: "8 / 10" for key in SCORE_KEYS}
+    store.record_evaluation("Write solve().", "def solve(): pass", "python",
+                            CodeEvaluation("Summary.", scores, {}), "llm", candidate_id="cand-1")
+    assert store.flush()
+
+    report = cohort_report(store, rank_by="total")
+    [entry] = report["top"]
+    assert (entry["candidate_id"], entry["file_name"], entry["total"]) == ("cand-1", "resume.pdf", 8.0)
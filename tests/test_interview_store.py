@@ -0,0 +1,53 @@
+import sqlite3
+
+from agents import interview_store
+from agents.interview_store import InterviewStore
+from agents.results import CodeEvaluation
+
+
+def evaluation(score):
+    return CodeEvaluation("Summary.", {"Correctness": f"{score} / 10", "Efficiency": f"{score} / 10"},
+                          {"Correctness": "Feedback."})
+
+
+def test_records_are_batched_and_queryable(tmp_path):
+    store = InterviewStore(path=str(tmp_path / "interviews.sqlite3"), flush_seconds=0.01)
+    store.record_candidate("cand-1", "resume.pdf", ["Python", "SQL"], 4)
+    store.record_question("cand-1", "Write solve().", "Easy")
+    store.record_evaluation("Write solve().", "def solve(): return 1", "python", evaluation(8), "llm",
+                            candidate_id="cand-1", execution={"passed": 3, "total": 4})
+    assert store.flush()
+
+    assert store.get_candidate("cand-1")["skills"] == ["Python", "SQL"]
+    assert len(store.list_questions(candidate_id="cand-1")) == 1
+    [row] = store.list_evaluations(candidate_id="cand-1")
+    assert (row["source"], row["tests_passed"], row["tests_total"]) == ("llm", 3, 4)
+
+
+def test_a_bad_record_does_not_drop_the_batch(tmp_path):
+    store = InterviewStore(path=str(tmp_path / "interviews.sqlite3"))
+    good = ((interview_store._UPSERT_CANDIDATE, ("cand-1", "a.pdf", "[]", 1, 1.0, 1.0)),)
+    bad = ((interview_store._UPSERT_CANDIDATE, ("cand-2", "b.pdf")),)  # wrong parameter count
+    also_good = ((interview_store._UPSERT_CANDIDATE, ("cand-3", "c.pdf", "[]", 2, 1.0, 1.0)),)
+    store._write([good, bad, also_good])
+
+    assert store.get_candidate("cand-1") is not None
+    assert store.get_candidate("cand-3") is not None
+    stats = store.stats()
+    assert (stats["written"], stats["dropped"]) == (2, 1)
+
+
+def test_failed_open_is_cached(monkeypatch):
+    attempts = []
+
+    def unavailable():
+        attempts.append(1)
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(interview_store, "INTERVIEW_STORE_ENABLED", True)
+    monkeypatch.setattr(interview_store, "_interview_store", None)
+    monkeypatch.setattr(interview_store, "_interview_store_failed", False)
+    monkeypatch.setattr(interview_store, "InterviewStore", unavailable)
+    assert interview_store.get_interview_store() is None
+    assert interview_store.get_interview_store() is None
+    assert len(attempts) == 1
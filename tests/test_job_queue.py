@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+from agents.job_queue import DONE, FAILED, JobQueue, JobQueueFull
+
+
+def wait_for(queue, job_id, timeout=2.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        job = queue.get(job_id)
+        if job["status"] in (DONE, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_jobs_report_progress_partial_output_and_result():
+    queue = JobQueue(workers=1)
+    release = threading.Event()
+
+    def work(job):
+        job.progress, job.partial = "Evaluating", "## Summary"
+        release.wait(2)
+        return "## Summary\n| Score |"
+
+    job_id = queue.submit("evaluation", work, {"language": "python"})
+    time.sleep(0.05)
+    running = queue.get(job_id)
+    assert (running["progress"], running["partial"]) == ("Evaluating", "## Summary")
+    release.set()
+
+    job = wait_for(queue, job_id)
+    assert job["status"] == DONE and job["result"] == "## Summary\n| Score |"
+    assert job["request"] == {"language": "python"}
+
+
+def test_failed_jobs_keep_the_error():
+    queue = JobQueue(workers=1)
+
+    def work(job):
+        raise ValueError("resume could not be parsed")
+
+    job = wait_for(queue, queue.submit("resume", work))
+    assert job["status"] == FAILED and job["error"] == "resume could not be parsed"
+    assert queue.stats()["failed"] == 1
+
+
+def test_submit_refuses_work_beyond_the_bound():
+    queue = JobQueue(workers=1, max_pending=1)
+    release = threading.Event()
+    job_id = queue.submit("resume", lambda job: release.wait(2))
+    with pytest.raises(JobQueueFull):
+        queue.submit("resume", lambda job: None)
+    release.set()
+    wait_for(queue, job_id)
+    assert queue.stats()["rejected"] == 1
+
+
+def test_finished_jobs_expire():
+    queue = JobQueue(workers=1, result_ttl_seconds=0)
+    job_id = queue.submit("resume", lambda job: "done")
+    wait_for(queue, job_id)
+    time.sleep(0.01)
+    queue.submit("resume", lambda job: None)
+    assert queue.get(job_id) is None
+    assert queue.get("unknown") is None
@@ -0,0 +1,45 @@
+import pytest
+
+import llm_backends
+from llm_backends import LLMBackend, available_backends, get_client, register_backend
+
+
+class EchoBackend(LLMBackend):
+    instances = 0
+
+    def __init__(self, model_name, generation_config=None):
+        super().__init__(model_name, generation_config)
+        EchoBackend.instances += 1
+
+    def generate(self, prompt_text, timeout=None):
+        return f"{self.model_name}: {prompt_text}"
+
+
+@pytest.fixture
+def echo(monkeypatch):
+    monkeypatch.setattr(llm_backends, "_BACKEND_FACTORIES", dict(llm_backends._BACKEND_FACTORIES))
+    monkeypatch.setattr(llm_backends, "_CLIENTS", {})
+    EchoBackend.instances = 0
+    register_backend("echo", EchoBackend)
+    return "echo"
+
+
+def test_clients_are_shared_per_model_and_config(echo):
+    client = get_client(echo, "small")
+    assert get_client(echo, "small") is client
+    assert get_client(echo, "small", {"temperature": 0}) is not client
+    assert get_client(echo, "large") is not client
+    assert EchoBackend.instances == 3
+    assert client.generate("hi") == "small: hi"
+
+
+def test_reregistering_a_backend_drops_its_clients(echo):
+    client = get_client(echo, "small")
+    register_backend(echo, EchoBackend)
+    assert get_client(echo, "small") is not client
+
+
+def test_unknown_backends_are_rejected(echo):
+    assert echo in available_backends()
+    with pytest.raises(ValueError, match="Unknown LLM backend"):
+        get_client("missing", "small")
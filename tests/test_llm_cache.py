@@ -0,0 +1,57 @@
+import time
+
+from llm_cache import LRUCache, ResponseCache, SQLiteCache, make_cache_key
+
+
+def test_keys_depend_on_every_request_field():
+    key = make_cache_key("gemini", "flash", "Say hi.", {"temperature": 0})
+    assert key == make_cache_key("gemini", "flash", "Say hi.", {"temperature": 0})
+    assert key != make_cache_key("gemini", "pro", "Say hi.", {"temperature": 0})
+    assert key != make_cache_key("gemini", "flash", "Say hi!", {"temperature": 0})
+    assert key != make_cache_key("gemini", "flash", "Say hi.", {"temperature": 1})
+
+
+def test_lru_evicts_least_recently_used_and_expired_entries():
+    cache = LRUCache(max_entries=2, max_bytes=1024, ttl_seconds=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # "b" is now the least recently used
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+
+    cache.set("short", "x", ttl_seconds=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+
+
+def test_lru_is_bounded_by_size():
+    cache = LRUCache(max_entries=10, max_bytes=8)
+    cache.set("a", "1234")
+    cache.set("b", "5678")
+    cache.set("c", "9")
+    assert cache.get("a") is None
+    cache.set("huge", "x" * 9)
+    assert cache.get("huge") is None
+
+
+def test_disk_tier_persists_and_evicts(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    disk = SQLiteCache(path, max_entries=2)
+    disk.set("a", "1")
+    disk.set("b", "2")
+    disk.set("c", "3")
+    assert len(disk) == 2
+    assert SQLiteCache(path).get("c") == "3"
+
+
+def test_disk_hits_are_promoted_to_memory(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    disk.set("key", "answer")
+    cache = ResponseCache(LRUCache(), disk)
+
+    assert cache.get("key") == "answer"
+    assert cache.get("key") == "answer"
+    assert cache.get("missing") is None
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+import llm_backends
+import llm_cassette
+import utils
+from llm_cassette import Cassette, CassetteMiss, CassetteUnavailable, RecordedError
+
+
+class FakeBackend(llm_backends.LLMBackend):
+    name = "fake"
+
+    def __init__(self, responses):
+        super().__init__("model", None)
+        self.responses = list(responses)
+
+    def generate(self, prompt_text, timeout=None):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def generate_stream(self, prompt_text, timeout=None):
+        yield from self.generate(prompt_text, timeout).split(" ")
+
+
+def client(cassette, backend=None):
+    return cassette.wrap("fake", "model", None, lambda: backend)
+
+
+def test_record_then_replay_in_order(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    live = FakeBackend([RuntimeError("quota exceeded"), "answer 1", "first second"])
+    recorder = Cassette(path=path, mode="record")
+    with pytest.raises(RuntimeError):
+        client(recorder, live).generate("prompt 1")
+    assert client(recorder, live).generate("prompt 1") == "answer 1"
+    assert list(client(recorder, live).generate_stream("stream")) == ["first", "second"]
+
+    player = Cassette(path=path, mode="replay")
+    replayed = client(player)  # no backend: replay must never build one
+    with pytest.raises(RecordedError) as error:
+        replayed.generate("prompt 1")
+    assert error.value.retryable
+    assert replayed.generate("prompt 1") == "answer 1"
+    assert replayed.generate("prompt 1") == "answer 1"  # the last recording repeats
+    # A prompt differing only in numbers replays the same recordings, from the start.
+    with pytest.raises(RecordedError):
+        replayed.generate("prompt 2")
+    assert replayed.generate("prompt 2") == "answer 1"
+    assert "".join(replayed.generate_stream("stream")) == "firstsecond"
+    with pytest.raises(CassetteMiss):
+        replayed.generate("something else")
+
+
+def test_unreadable_lines_are_skipped(tmp_path):
+    path = tmp_path / "cassette.jsonl"
+    recorder = Cassette(path=str(path), mode="record")
+    client(recorder, FakeBackend(["ok"])).generate("prompt")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"no_key": true}\n{"key": "trunc')
+    assert client(Cassette(path=str(path), mode="replay")).generate("prompt") == "ok"
+
+
+def test_replayed_stream_honours_the_timeout(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    Cassette(path=path, mode="record").record({
+        "key": Cassette.request_key("model", "slow", None),
+        "loose_key": Cassette.request_key("model", "slow", None, ignore_numbers=True),
+        "response": "a b c d", "latency_ms": 2000, "first_chunk_ms": 10, "chunks": 4,
+    })
+    replayed = client(Cassette(path=path, mode="replay", latency_scale=1.0))
+    received = []
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        for chunk in replayed.generate_stream("slow", timeout=0.2):
+            received.append(chunk)
+    assert 0.15 < time.monotonic() - started < 1.0
+    assert received and len(received) < 4
+    with pytest.raises(TimeoutError):
+        replayed.generate("slow", timeout=0.01)
+
+
+def test_unusable_replay_cassette_fails_instead_of_going_live(monkeypatch):
+    def broken(*args, **kwargs):
+        raise ValueError("Unknown cassette mode")
+
+    monkeypatch.setattr(llm_cassette, "LLM_CASSETTE_MODE", "replay")
+    monkeypatch.setattr(llm_cassette, "_cassette", None)
+    monkeypatch.setattr(llm_cassette, "_cassette_error", None)
+    monkeypatch.setattr(llm_cassette, "Cassette", broken)
+    monkeypatch.setattr(llm_backends, "get_client", lambda *args: pytest.fail("live backend was called"))
+
+    with pytest.raises(CassetteUnavailable):
+        llm_cassette.get_cassette()
+    response = utils.generate_text_from_gemini("prompt", backend="stub", use_cache=False)
+    assert response.startswith("Error:") and "unavailable" in response
+    assert list(utils.stream_text_from_gemini("prompt", backend="stub", use_cache=False))[0].startswith("Error:")
+    assert "error" in utils.cassette_stats()
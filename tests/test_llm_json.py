@@ -0,0 +1,71 @@
+import random
+
+from llm_json import (PartialJSONParser, complete_partial_json, extract_json, extract_json_object, merge_json,
+                      missing_fields)
+
+RESPONSE = ('```json\n{"evaluation_summary": "Uses a hash map, \\"O(n)\\", handles {braces}.", '
+            '"scores": {"problem_understanding": "8 / 10", "code_structure_readability": "7 / 10"}, '
+            '"category_feedback": {"problem_understanding_feedback": "Clear."}}\n```')
+
+
+def test_truncated_object_is_closed():
+    assert complete_partial_json('{"summary": "Good appro') == {"summary": "Good appro"}
+    assert complete_partial_json('{"a": 1, "b": ') == {"a": 1}
+    assert complete_partial_json('{"a": [1, 2') == {"a": [1, 2]}
+    assert complete_partial_json("no object yet") is None
+
+
+def test_chunked_feeding_matches_one_shot_parsing():
+    rng = random.Random(11)
+    for end in range(len(RESPONSE) + 1):
+        parser = PartialJSONParser()
+        position = 0
+        while position < end:
+            size = rng.randint(1, 12)
+            parser.feed(RESPONSE[position:min(end, position + size)])
+            position += size
+        assert parser.value() == complete_partial_json(RESPONSE[:end])
+
+
+def test_feed_reports_value_boundaries_only():
+    parser = PartialJSONParser()
+    assert not parser.feed('Here you go: {"evaluation_summary": "Uses a hash map, ')
+    assert not parser.feed('which is fine."')
+    assert parser.feed(', "scores": {')
+    assert parser.value() == {"evaluation_summary": "Uses a hash map, which is fine.", "scores": {}}
+    assert parser.feed('"x": "1 / 10"}}')
+    assert parser.complete
+    assert not parser.feed(' trailing text {"ignored": true}')
+    assert parser.value() == {"evaluation_summary": "Uses a hash map, which is fine.", "scores": {"x": "1 / 10"}}
+
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "scores": {"type": "object", "properties": {"clarity": {"type": "string"}}, "required": ["clarity"]},
+        "tags": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["summary", "scores", "tags"],
+}
+
+
+def test_object_is_found_in_fences_and_prose():
+    assert extract_json_object('Sure! Here it is:\n```json\n{"a": 1}\n```\nAnything else?') == {"a": 1}
+    assert extract_json_object('The answer is {"a": {"b": "}"}} as requested.') == {"a": {"b": "}"}}
+    assert extract_json('Cases: [{"input": [1], "expected": 1}]', "[") == [{"input": [1], "expected": 1}]
+    assert extract_json_object("no JSON here") is None
+
+
+def test_common_model_mistakes_are_repaired():
+    assert extract_json_object('{"a": [1, 2,], "b": 3,}') == {"a": [1, 2], "b": 3}
+    assert extract_json_object("{'a': 'it is', 'b': True, 'c': None}") == {"a": "it is", "b": True, "c": None}
+    assert extract_json_object('{\n  // note\n  "a": 1 /* inline */\n}') == {"a": 1}
+    assert extract_json_object('{"summary": "Good, but trunc') == {"summary": "Good, but trunc"}
+
+
+def test_missing_fields_lists_required_paths_and_merge_keeps_both_answers():
+    assert missing_fields({"summary": "ok", "scores": {}, "tags": "x"}, SCHEMA) == ["scores.clarity", "tags"]
+    assert missing_fields(None, SCHEMA) == ["summary", "scores", "tags"]
+    merged = merge_json({"summary": "ok", "scores": {"speed": "5"}}, {"scores": {"clarity": "7"}, "tags": None})
+    assert merged == {"summary": "ok", "scores": {"speed": "5", "clarity": "7"}}
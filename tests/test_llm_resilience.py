@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import llm_resilience
+import utils
+from llm_resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded
+
+
+def open_breaker(reset_seconds=0.05):
+    breaker = CircuitBreaker(failure_threshold=1, window_seconds=60, reset_seconds=reset_seconds)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_half_open_after_reset_and_single_trial():
+    breaker = open_breaker()
+    assert not breaker.available()
+    time.sleep(0.06)
+    assert breaker.available()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    with breaker.attempt():
+        assert not breaker.available()
+        with pytest.raises(CircuitOpenError):
+            with breaker.attempt():
+                pass
+        breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_checking_availability_does_not_take_the_trial():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    # e.g. select_model followed by a cache hit or a coalesced wait: no backend call, no trial held.
+    for _ in range(3):
+        assert breaker.available()
+
+
+def test_attempt_without_verdict_hands_the_trial_back():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    with pytest.raises(DeadlineExceeded):
+        with breaker.attempt():
+            raise DeadlineExceeded("Deadline exceeded before LLM call.")
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.available()
+
+
+def test_failed_trial_reopens():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    with breaker.attempt():
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.available()
+
+
+def test_stale_trial_expires():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    assert breaker.allow()  # taken and never reported
+    assert not breaker.available()
+    time.sleep(0.06)
+    assert breaker.available()
+
+
+def test_guarded_call_releases_trial_on_deadline(monkeypatch):
+    breaker = open_breaker()
+    monkeypatch.setitem(llm_resilience._breakers, ("test", "model"), breaker)
+    time.sleep(0.06)
+
+    def slow_call():
+        raise DeadlineExceeded("Deadline exceeded waiting for the LLM response.")
+
+    with pytest.raises(DeadlineExceeded):
+        utils._guarded_call("test", "model", slow_call, None)
+    assert llm_resilience.select_model("test", "model") == "model"
+
+    assert utils._guarded_call("test", "model", lambda: "ok", None) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_unhedged_call_runs_in_the_caller():
+    caller = threading.current_thread()
+    ran_in = []
+    assert llm_resilience.call_with_hedging(lambda: ran_in.append(threading.current_thread()) or "ok",
+                                            llm_resilience.Deadline(5)) == "ok"
+    assert ran_in == [caller]
+
+
+def test_error_after_the_deadline_is_deadline_exceeded():
+    def timed_out():
+        time.sleep(0.06)
+        raise TimeoutError("backend request timed out")
+
+    with pytest.raises(DeadlineExceeded):
+        llm_resilience.call_with_hedging(timed_out, llm_resilience.Deadline(0.05))
+
+
+def test_fast_failure_is_not_hedged():
+    calls, hedges = [], []
+
+    def failing():
+        calls.append(1)
+        raise RuntimeError("quota")
+
+    with pytest.raises(RuntimeError):
+        llm_resilience.call_with_hedging(failing, llm_resilience.Deadline(5), delay=0.2,
+                                         on_hedge=lambda: hedges.append(1), backend="test-fast-failure")
+    assert (len(calls), hedges) == (1, [])
+
+
+def test_slow_primary_is_hedged():
+    calls, hedges = [], []
+
+    def call():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return "slow"
+        return "fast"
+
+    result = llm_resilience.call_with_hedging(call, llm_resilience.Deadline(5), delay=0.05,
+                                              on_hedge=lambda: hedges.append(1), backend="test-slow")
+    assert (result, hedges) == ("fast", [1])
+
+
+def test_busy_hedge_pool_runs_inline(monkeypatch):
+    monkeypatch.setattr(llm_resilience, "HEDGE_WORKERS", 1)
+    release = threading.Event()
+    pool = llm_resilience._hedge_pool("test-busy")
+    blocker = pool.try_submit(release.wait)
+    try:
+        caller = threading.current_thread()
+        ran_in = []
+        llm_resilience.call_with_hedging(lambda: ran_in.append(threading.current_thread()), None, delay=0.01,
+                                         backend="test-busy")
+        assert ran_in == [caller]
+    finally:
+        release.set()
+        blocker.result()
+
+
+def test_async_fast_failure_is_not_hedged():
+    hedges = []
+
+    async def failing():
+        raise RuntimeError("quota")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(llm_resilience.call_with_hedging_async(failing, llm_resilience.Deadline(5), delay=0.2,
+                                                           on_hedge=lambda: hedges.append(1)))
+    assert hedges == []
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from llm_resilience import Deadline, DeadlineExceeded
+from llm_scheduler import LLMScheduler, TokenBucket, is_retryable
+
+
+class Overloaded(Exception):
+    code = 503
+
+
+def test_coalesced_follower_shares_the_leaders_result():
+    scheduler = LLMScheduler()
+    release = threading.Event()
+    calls = []
+
+    def call():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(scheduler.run("key", "prompt", call)))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["answer"] * 3
+    assert len(calls) == 1
+
+
+def test_retryable_errors_are_retried():
+    scheduler = LLMScheduler(max_retries=2, base_delay=0)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise Overloaded("model overloaded")
+        return "answer"
+
+    assert scheduler.run("key", "prompt", flaky) == "answer"
+    assert len(calls) == 3
+    assert scheduler.stats()["retries"] == 2
+
+
+def test_other_errors_fail_without_a_retry():
+    scheduler = LLMScheduler(max_retries=3, base_delay=0)
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise ValueError("invalid argument")
+
+    with pytest.raises(ValueError):
+        scheduler.run("key", "prompt", broken)
+    assert calls == [1]
+    assert scheduler.stats()["failures"] == 1
+
+
+def test_is_retryable_recognizes_quota_and_overload_errors():
+    assert is_retryable(Overloaded("unavailable"))
+    assert is_retryable(RuntimeError("429 Quota exceeded for requests per minute"))
+    assert not is_retryable(ValueError("invalid argument"))
+
+
+def test_token_bucket_reports_the_wait_for_an_exhausted_budget():
+    bucket = TokenBucket(60)  # one token per second
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+    assert TokenBucket(0).reserve(1000) == 0
+
+
+def test_coalesced_follower_honours_its_own_deadline():
+    scheduler = LLMScheduler()
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: scheduler.run("key", "prompt", lambda: release.wait(5) and "late"))
+    leader.start()
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        scheduler.run("key", "prompt", lambda: "unused", deadline=Deadline(0.1))
+    assert time.monotonic() - started < 1
+    release.set()
+    leader.join(5)
+
+
+def test_async_coalesced_follower_honours_its_own_deadline():
+    scheduler = LLMScheduler()
+
+    async def slow():
+        await asyncio.sleep(0.5)
+        return "late"
+
+    async def main():
+        leader = asyncio.create_task(scheduler.run_async("key", "prompt", slow))
+        await asyncio.sleep(0.01)
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            await scheduler.run_async("key", "prompt", slow, deadline=Deadline(0.05))
+        assert time.monotonic() - started < 0.3
+        # The leader is unaffected by the follower giving up.
+        assert await leader == "late"
+
+    asyncio.run(main())
+
+
+def test_async_followers_take_over_from_a_cancelled_leader():
+    scheduler = LLMScheduler()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "answer"
+
+    async def main():
+        leader = asyncio.create_task(scheduler.run_async("key", "prompt", call))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(scheduler.run_async("key", "prompt", call)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(main()) == ["answer", "answer"]
+    assert len(calls) == 2  # the cancelled leader's call, then one shared by both followers
+
+
+def test_budget_wait_past_the_deadline_is_not_retried():
+    scheduler = LLMScheduler(requests_per_minute=1)
+    scheduler.acquire("prompt")
+    calls = []
+    with pytest.raises(DeadlineExceeded):
+        scheduler.run("key", "prompt", lambda: calls.append(1) or "unused", coalesce=False, deadline=Deadline(0.5))
+    assert calls == []
+    assert scheduler.stats()["retries"] == 0
+    # The streaming path retries whatever is_retryable accepts.
+    with pytest.raises(DeadlineExceeded) as raised:
+        scheduler.acquire("prompt", Deadline(0.5))
+    assert not is_retryable(raised.value)
@@ -0,0 +1,23 @@
+import concurrent.futures
+import time
+
+from agents.manager_agent import _question_result
+from llm_resilience import Deadline
+
+
+def test_question_wait_stops_at_the_deadline():
+    pending = concurrent.futures.Future()
+    started = time.monotonic()
+    assert _question_result(pending, Deadline(0.05)) is None
+    assert time.monotonic() - started < 1
+    assert not pending.cancelled()  # the shared question set keeps generating
+
+
+def test_question_wait_returns_the_result_or_none_on_failure():
+    ready = concurrent.futures.Future()
+    ready.set_result("Write solve().")
+    assert _question_result(ready, Deadline(1)) == "Write solve()."
+
+    failed = concurrent.futures.Future()
+    failed.set_exception(RuntimeError("backend down"))
+    assert _question_result(failed, None) is None
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+import metrics
+from metrics import Histogram, MetricsRegistry, _LogSink
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    histogram = Histogram((1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == pytest.approx(1.5)
+    assert histogram.quantile(1.0) == pytest.approx(4.0)
+    assert Histogram((1.0,)).quantile(0.5) is None
+
+
+def test_snapshot_reports_counters_histograms_and_hit_rates():
+    registry = MetricsRegistry()
+    registry.increment("cache_lookups", cache="llm", result="hit")
+    registry.increment("cache_lookups", cache="llm", result="hit")
+    registry.increment("cache_lookups", cache="llm", result="miss")
+    registry.observe("pipeline_stage_seconds", 0.2, component="llm", stage="llm_wait")
+    registry.register_collector("queue", lambda: {"pending": 3})
+
+    snapshot = registry.snapshot()
+    assert snapshot["cache_hit_rates"]["llm"] == {"hits": 2, "misses": 1, "hit_rate": 0.6667}
+    [histogram] = snapshot["histograms"]
+    assert (histogram["count"], histogram["labels"]) == (1, {"component": "llm", "stage": "llm_wait"})
+    assert snapshot["collectors"] == {"queue": {"pending": 3}}
+    json.dumps(snapshot)
+
+
+def test_prometheus_output_declares_each_metric_once():
+    registry = MetricsRegistry()
+    registry.increment("llm_calls", backend="stub")
+    registry.increment("llm_calls", backend="gemini")
+    text = registry.render_prometheus()
+    assert text.count(f"# TYPE {metrics.METRICS_PREFIX}llm_calls_total counter") == 1
+    assert 'backend="stub"' in text and 'backend="gemini"' in text
+
+
+def test_estimate_tokens():
+    assert metrics.estimate_tokens("") == 0
+    assert metrics.estimate_tokens("abc") == 1
+    assert metrics.estimate_tokens("abcde") == 2
+
+
+def test_log_events_are_written_in_the_background(tmp_path):
+    path = tmp_path / "pipeline.log"
+    sink = _LogSink(path=str(path))
+    sink.emit({"ts": 1.0, "level": "info", "component": "ResumeAnalyzer", "message": "Parsed.", "pages": 2})
+    sink.flush()
+    assert json.loads(path.read_text())["pages"] == 2
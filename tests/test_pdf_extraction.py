@@ -0,0 +1,79 @@
+import concurrent.futures
+import io
+
+import pytest
+from PyPDF2 import PdfReader
+
+from agents import resume_analyzer
+
+
+def make_pdf(page_texts):
+    """Minimal PDF with one Helvetica text line per page."""
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then a (page, content) pair per page.
+    objects = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_refs = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 50 780 Td ({text}) Tj ET".encode("latin-1")
+        page_number = len(objects) + 1
+        page_refs.append(f"{page_number} 0 R")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Resources << /Font << /F1 3 0 R >> >> "
+                       f"/Contents {page_number + 1} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(page_texts)} >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref_at = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at))
+    return out.getvalue()
+
+
+PAGES = [f"Page {number} of the resume" for number in range(1, 13)]
+PDF = make_pdf(PAGES)
+
+
+def extract(content=PDF):
+    return resume_analyzer._extract_pdf_text(PdfReader(io.BytesIO(content)), content, "resume.pdf")
+
+
+class BrokenPool:
+    def submit(self, *args, **kwargs):
+        raise concurrent.futures.process.BrokenProcessPool("worker died")
+
+
+@pytest.fixture
+def small_pool(monkeypatch):
+    monkeypatch.setattr(resume_analyzer, "PDF_PARALLEL_PAGE_THRESHOLD", 8)
+    monkeypatch.setattr(resume_analyzer, "PDF_PAGES_PER_TASK", 3)
+    monkeypatch.setattr(resume_analyzer, "PDF_WORKERS", 2)
+    resume_analyzer._discard_pdf_pool()
+    yield
+    resume_analyzer._discard_pdf_pool()
+
+
+def test_parallel_extraction_keeps_page_order(small_pool):
+    assert extract().splitlines() == PAGES
+
+
+def test_page_cap_and_text_budget_stop_extraction_early(small_pool, monkeypatch):
+    monkeypatch.setattr(resume_analyzer, "PDF_MAX_PAGES", 5)
+    assert extract().splitlines() == PAGES[:5]
+
+    monkeypatch.setattr(resume_analyzer, "PDF_MAX_PAGES", 60)
+    monkeypatch.setattr(resume_analyzer, "RESUME_TEXT_CHAR_BUDGET", 30)
+    text = extract()
+    assert len(text) == 30
+    assert text.startswith(PAGES[0])
+
+
+def test_broken_pool_falls_back_to_in_process_extraction(small_pool, monkeypatch):
+    monkeypatch.setattr(resume_analyzer, "_get_pdf_pool", lambda: BrokenPool())
+    assert extract().splitlines() == PAGES
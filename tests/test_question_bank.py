@@ -0,0 +1,47 @@
+import random
+
+from agents.question_bank import QuestionBank, experience_bucket, skill_tokens
+
+SKILLS = ["Python", "JavaScript", "React", "SQL", "Docker", "Kubernetes", "AWS", "Java", "Go", "Rust"]
+
+
+def matches(bank, difficulty, experience_years, skills):
+    with bank._lock:
+        return sorted((entry_id, round(score, 4)) for entry_id, score in
+                      bank._matches((difficulty, experience_bucket(experience_years)), skill_tokens(skills)))
+
+
+def test_lookup_serves_close_match(tmp_path):
+    bank = QuestionBank(path=str(tmp_path / "bank.sqlite3"))
+    bank.add(["Python", "SQL"], 3, "Easy", "Write a Python function that parses SQL rows.")
+    assert bank.lookup(["python", "sql"], 2, "easy") == "Write a Python function that parses SQL rows."
+    assert bank.lookup(["Rust"], 2, "Easy") is None
+    assert bank.lookup(["Python", "SQL"], 12, "Easy") is None  # other experience bucket
+    assert bank.stats()["hits"] == 1
+
+
+def test_incremental_index_matches_a_fresh_load(tmp_path):
+    path = str(tmp_path / "bank.sqlite3")
+    bank = QuestionBank(path=path, min_score=0.2)
+    rng = random.Random(7)
+    queries = []
+    for i in range(200):
+        skills = rng.sample(SKILLS, rng.randint(1, 4))
+        difficulty, experience_years = rng.choice(["Easy", "Medium", "Hard"]), rng.randint(0, 12)
+        bank.add(skills, experience_years, difficulty, f"Question {i} on {', '.join(skills)}")
+        queries.append((difficulty, experience_years, rng.sample(SKILLS, rng.randint(1, 3))))
+
+    fresh = QuestionBank(path=path, min_score=0.2)
+    for query in queries:
+        assert matches(bank, *query) == matches(fresh, *query)
+
+
+def test_rows_from_another_process_are_picked_up(tmp_path):
+    path = str(tmp_path / "bank.sqlite3")
+    bank = QuestionBank(path=path)
+    other = QuestionBank(path=path)
+    other.add(["Docker"], 5, "Hard", "Design a Docker build cache.")
+    assert matches(bank, "Hard", 5, ["Docker"]) == []
+    with bank._lock:
+        assert bank._catch_up() == 1
+    assert bank.lookup(["Docker"], 6, "Hard") == "Design a Docker build cache."
@@ -0,0 +1,28 @@
+from agents.resume_cache import ResumeFingerprintCache, fingerprint
+
+
+def test_fingerprint_identifies_the_file_bytes():
+    assert fingerprint(b"resume") == fingerprint(b"resume")
+    assert fingerprint(b"resume") != fingerprint(b"resume ")
+
+
+def test_text_and_results_survive_a_restart(tmp_path):
+    path = str(tmp_path / "resumes.sqlite3")
+    key = fingerprint(b"%PDF resume bytes")
+    cache = ResumeFingerprintCache(path)
+    cache.set_text(key, "Python developer, 5 years")
+    cache.set_result(key, "flash", {"skills": ["Python"], "experience_years": 5})
+
+    reopened = ResumeFingerprintCache(path)
+    assert reopened.get_text(key) == "Python developer, 5 years"
+    assert reopened.get_result(key, "flash") == {"skills": ["Python"], "experience_years": 5}
+
+
+def test_results_are_kept_per_model(tmp_path):
+    cache = ResumeFingerprintCache(str(tmp_path / "resumes.sqlite3"))
+    key = fingerprint(b"resume")
+    cache.set_result(key, None, {"skills": ["Go"], "experience_years": 2})
+
+    assert cache.get_result(key, None) == {"skills": ["Go"], "experience_years": 2}
+    assert cache.get_result(key, "pro") is None
+    assert cache.get_text(key) is None
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+REQUEST = {"question": "Return the sum of the list.", "code": "def solve(xs):\n    return sum(xs)\n", "language": "python"}
+
+
+class _Manager:
+    def __init__(self, partials):
+        self.partials = partials
+
+    def evaluate_code_submission_stream(self, *args):
+        yield from self.partials()
+
+
+def stream_lines(monkeypatch, partials):
+    monkeypatch.setattr(server, "get_manager_agent", lambda: _Manager(partials))
+    response = TestClient(server.app).post("/evaluations/stream", json=REQUEST)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_stream_ends_with_the_final_feedback(monkeypatch):
+    lines = stream_lines(monkeypatch, lambda: iter(["## Summary", "## Summary\n| Score |"]))
+    assert lines[-1] == {"feedback": "## Summary\n| Score |", "done": True}
+
+
+@pytest.mark.parametrize("partials", [
+    lambda: iter([]),
+    lambda: (_ for _ in ()).throw(ValueError("unexpected")),
+])
+def test_stream_failures_end_with_an_error_line(monkeypatch, partials):
+    lines = stream_lines(monkeypatch, partials)
+    assert lines[-1] == {"error": "Code evaluation failed.", "done": True}
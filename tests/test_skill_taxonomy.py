@@ -0,0 +1,49 @@
+import datetime
+
+from agents.skill_taxonomy import FAST_PATH_CONFIDENCE, LocalSkillExtractor, SkillTaxonomy, estimate_experience_years
+
+JAVA_RESUME = """
+Jane Doe - Java Developer
+Experience
+Backend Engineer, Acme Corp (Jan 2019 - Dec 2023)
+- Built order services in Java 17, replacing anonymous classes with lambda expressions and streams.
+- Shipped releases in containers of work items each sprint; studied sorting algorithms for batch jobs.
+- Carried the torch for code quality; kept the team on the rails during a Spring 2021 migration.
+- Uploaded reports to s3-compatible storage used by the R&D group.
+Education
+B.Sc. Computer Science, State University (2014 - 2018)
+"""
+
+
+def test_prose_words_are_not_skills():
+    skills = SkillTaxonomy.load().find_skills(JAVA_RESUME)
+    assert "Java" in skills
+    for false_positive in ("AWS", "Docker", "PyTorch", "Ruby on Rails", "Data Structures & Algorithms",
+                           "Spring Boot", "R"):
+        assert false_positive not in skills
+
+
+def test_java_resume_is_not_fast_pathed():
+    result = LocalSkillExtractor().extract(JAVA_RESUME)
+    assert result["confidence"] < FAST_PATH_CONFIDENCE
+
+
+def test_contextual_aliases_still_match():
+    skills = SkillTaxonomy.load().find_skills(
+        "Deployed AWS Lambda functions writing to Amazon S3; Spring Framework and Ruby on Rails; "
+        "trained models in PyTorch; data structures and algorithms; Dockerfile authoring.")
+    for expected in ("AWS", "Spring Boot", "Ruby on Rails", "PyTorch", "Data Structures & Algorithms", "Docker"):
+        assert expected in skills
+
+
+def test_aliases_respect_word_boundaries_and_exact_case():
+    skills = SkillTaxonomy.load().find_skills("Wrote Node.js services in Go; go-to person for javascript.")
+    assert {"Node.js", "Go", "JavaScript"} <= set(skills)
+    assert "Go" not in SkillTaxonomy.load().find_skills("I like to go hiking.")
+
+
+def test_experience_from_claims_and_ranges():
+    today = datetime.date(2024, 1, 1)
+    assert estimate_experience_years("5+ years of experience in backend work", today) == (5, 0.9)
+    years, confidence = estimate_experience_years(JAVA_RESUME, today)
+    assert (years, confidence) == (5, 0.75)
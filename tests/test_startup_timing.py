@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import startup_timing
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("streamlit", "google.generativeai", "PyPDF2", "docx", "streamlit_ace")
+
+
+def test_importing_the_agents_defers_heavy_dependencies(tmp_path):
+    script = (
+        "import json, sys\n"
+        "import utils\n"
+        "from agents.manager_agent import get_manager_agent\n"
+        f"print(json.dumps([utils.GEMINI_API_KEY, [name for name in {HEAVY_MODULES!r} if name in sys.modules]]))\n"
+    )
+    env = dict(os.environ, GEMINI_API_KEY="from-env", LLM_BACKEND="stub", LLM_CACHE_DIR=str(tmp_path),
+               PIPELINE_LOG_PATH=os.devnull)
+    completed = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_ROOT, env=env,
+                               capture_output=True, text=True, timeout=60)
+    assert completed.returncode == 0, completed.stderr
+    api_key, loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert api_key == "from-env"
+    assert loaded == []
+
+
+def test_first_call_is_timed_once(monkeypatch):
+    monkeypatch.setattr(startup_timing, "_timings", {})
+    with startup_timing.first_call("first request"):
+        time.sleep(0.01)
+    with startup_timing.first_call("first request"):
+        time.sleep(0.1)
+    assert 0.01 <= startup_timing.report()["timings"]["first request"] < 0.1
+
+
+def test_lazy_import_records_only_modules_it_loads(monkeypatch):
+    monkeypatch.setattr(startup_timing, "_timings", {})
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+    assert startup_timing.lazy_import("colorsys").rgb_to_hsv(1, 0, 0) == (0, 1, 1)
+    assert startup_timing.lazy_import("json") is json
+    assert set(startup_timing.report()["timings"]) == {"import colorsys"}
@@ -0,0 +1,90 @@
+import textwrap
+
+import pytest
+
+from agents.static_analysis import analyze_code, summarize_analysis
+
+
+def analyze(code, language):
+    return analyze_code(textwrap.dedent(code), language)
+
+
+def test_python_syntax_error_fails_fast():
+    result = analyze("def solve(xs)\n    return xs\n", "python")
+    assert result["fail_fast"] and not result["parsed"]
+    assert result["error"].startswith("SyntaxError")
+
+
+def test_python_metrics():
+    result = analyze("""
+        def solve(xs):
+            total = 0
+            for x in xs:
+                for y in xs:
+                    if x < y:
+                        total += 1
+            return total
+    """, "python")
+    assert result["parsed"] and not result["fail_fast"]
+    assert result["metrics"]["max_loop_depth"] == 2
+    assert "O(n^2)" in summarize_analysis(result)
+
+
+@pytest.mark.parametrize("language, code", [
+    ("python", "def solve(xs):\n    pass\n"),
+    ("java", "class Solution {\n  public int solve(int[] xs) {\n    return 0;\n  }\n}\n"),
+    ("rust", "fn solve(xs: &[i32]) -> i32 {\n    todo!()\n}\n"),
+    ("javascript", "function solve(xs) {\n  // TODO\n}\n"),
+])
+def test_starter_templates_are_empty(language, code):
+    assert analyze(code, language)["empty"]
+
+
+def test_rust_lifetimes_labels_and_char_literals():
+    result = analyze("""
+        fn solve<'a>(xs: &'a [i32]) -> i32 {
+            let mut best = 0;
+            'outer: for i in 0..xs.len() {
+                for j in 0..xs.len() {
+                    if xs[i] + xs[j] == ')' as i32 { break 'outer; }
+                    best += 1;
+                }
+            }
+            let note = r#"unbalanced "(" inside a raw string"#;
+            best
+        }
+    """, "rust")
+    assert result["parsed"] and result["error"] is None
+    assert result["notes"] == []
+    assert result["metrics"]["max_loop_depth"] == 2
+
+
+def test_rust_unbalanced_brackets_are_reported():
+    result = analyze("fn solve(x: i32) -> i32 {\n    if x > 0 { x\n}\n", "rust")
+    assert not result["parsed"]
+    assert "does not compile" in result["notes"][0]
+
+
+@pytest.mark.parametrize("language, code", [
+    ("java", "class S { int solve(int[] a) { char open = '('; String s = \"{\"; for (int x : a) { for (int y : a) "
+             "{ if (open == '\\'') return 1; } } return 0; } }"),
+    ("c_cpp", "int solve(int n) { char c = '}'; for (int i = 0; i < n; i++) { while (n) { n--; } } return c; }"),
+    ("csharp", "class S { int Solve(int n) { var p = @\"C:\\dir\\\"\"(\"\"\"; for (int i = 0; i < n; i++) "
+               "{ foreach (var c in p) { } } return '{'; } }"),
+    ("golang", "func solve(xs []int) int { r := '('; s := `raw ) string`; for range xs { for range s "
+               "{ r++ } }; return int(r) }"),
+    ("kotlin", "fun solve(xs: List<Int>): Int { val c = '['; val s = \"\"\"multi\n ) line\"\"\"; for (x in xs) "
+               "{ for (y in xs) { } }; return 0 }"),
+    ("javascript", "function solve(xs) { const s = `${xs.length} (`; // it's fine\n for (const x of xs) "
+                   "{ while (x) { break } } return 'a)' }"),
+])
+def test_literals_do_not_unbalance_brackets(language, code):
+    result = analyze(code, language)
+    assert result["error"] is None, result["error"]
+    assert result["metrics"]["max_loop_depth"] == 2
+
+
+def test_unknown_languages_get_no_compile_verdict():
+    result = analyze("solve :: [Int] -> Int\nsolve xs = (sum xs\n", "haskell")
+    assert result["parsed"] and result["error"] is None
+    assert result["notes"] == []
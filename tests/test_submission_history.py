@@ -0,0 +1,60 @@
+import pytest
+
+import utils
+from agents.code_evaluator import CodeEvaluator
+from agents.interview_store import InterviewStore
+from agents.results import SCORE_KEYS, CodeEvaluation
+from agents.submission_history import SubmissionHistory, diff_submissions
+
+QUESTION = "Return the sum of the list."
+FIRST = "def solve(xs):\n    total = 0\n    for x in xs:\n        total += x\n    return total\n"
+REVISED = "def solve(xs):\n    total = 0\n    for x in xs:\n        total += x\n    return int(total)\n"
+
+
+def evaluation(score=7):
+    return CodeEvaluation("Summary.", {key: f"{score} / 10" for key in SCORE_KEYS},
+                          {f"{key}_feedback": "Feedback." for key in SCORE_KEYS})
+
+
+def test_diff_counts_changed_lines():
+    assert diff_submissions(FIRST, FIRST.replace("total = 0", "total = 0   ")).unchanged
+    diff = diff_submissions(FIRST, REVISED)
+    assert (diff.added, diff.removed) == (1, 1)
+    assert diff.change_ratio == pytest.approx(2 / 10)
+    assert "+    return int(total)" in diff.text
+
+
+def test_latest_submission_is_kept_per_candidate_question_and_language():
+    history = SubmissionHistory(max_entries=2)
+    history.remember("cand-1", QUESTION, "Python", None, FIRST, evaluation(), {"passed": 2, "total": 3})
+    previous = history.previous("cand-1", QUESTION, "python", None)
+    assert (previous.code, previous.tests_passed, previous.tests_total) == (FIRST, 2, 3)
+    assert history.previous("cand-2", QUESTION, "python", None) is None
+    assert history.previous("cand-1", QUESTION, "java", None) is None
+
+
+def test_falls_back_to_the_interview_store(tmp_path):
+    store = InterviewStore(path=str(tmp_path / "interviews.sqlite3"), flush_seconds=0.01)
+    store.record_evaluation(QUESTION, FIRST, "python", evaluation(6), "llm", candidate_id="cand-1")
+    assert store.flush()
+
+    previous = SubmissionHistory(store=store).previous("cand-1", QUESTION, "python", None)
+    assert previous.code == FIRST
+    assert previous.evaluation.scores == evaluation(6).scores
+
+
+def test_unchanged_resubmission_reuses_the_previous_evaluation(monkeypatch):
+    evaluator = CodeEvaluator(use_cache=False)
+    evaluator.interview_store = None
+    evaluator.submission_history = SubmissionHistory()
+    calls = []
+
+    def generate(prompt, schema, **kwargs):
+        calls.append(prompt)
+        return evaluation().to_dict(), "{}"
+
+    monkeypatch.setattr(utils, "generate_json_from_gemini", generate)
+    first = evaluator.evaluate(QUESTION, FIRST, "python", candidate_id="cand-1")
+    again = evaluator.evaluate(QUESTION, FIRST.replace("total = 0", "total = 0  "), "python", candidate_id="cand-1")
+    assert len(calls) == 1
+    assert "7 / 10" in first and "7 / 10" in again
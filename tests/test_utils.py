@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+import utils
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "scores": {"type": "object", "properties": {"clarity": {"type": "string"}}, "required": ["clarity"]},
+    },
+    "required": ["summary", "scores"],
+}
+
+
+@pytest.fixture
+def model(monkeypatch):
+    """Replaces the text generation calls with queued answers; records (prompt, generation_config)."""
+    calls = []
+    answers = []
+
+    def generate(prompt_text, model_name=None, backend=None, generation_config=None, *args, **kwargs):
+        calls.append((prompt_text, generation_config))
+        return answers.pop(0)
+
+    async def generate_async(*args, **kwargs):
+        return generate(*args, **kwargs)
+
+    monkeypatch.setattr(utils, "LLM_JSON_MODE", True)
+    monkeypatch.setattr(utils, "generate_text_from_gemini", generate)
+    monkeypatch.setattr(utils, "generate_text_from_gemini_async", generate_async)
+    return calls, answers
+
+
+def test_requests_ask_for_json_following_the_schema(model):
+    calls, answers = model
+    answers.append('{"summary": "Solid", "scores": {"clarity": "8 / 10"}}')
+    data, _ = utils.generate_json_from_gemini("Evaluate this.", SCHEMA)
+    assert data == {"summary": "Solid", "scores": {"clarity": "8 / 10"}}
+    assert calls == [("Evaluate this.", {"response_mime_type": "application/json", "response_schema": SCHEMA})]
+
+
+def test_only_missing_fields_are_asked_for_again(model):
+    calls, answers = model
+    answers.extend(['{"summary": "Solid", "scores": {}}', '{"scores": {"clarity": "8 / 10"}}'])
+    data, raw = utils.generate_json_from_gemini("Evaluate this.", SCHEMA)
+    assert data == {"summary": "Solid", "scores": {"clarity": "8 / 10"}}
+    assert raw == '{"summary": "Solid", "scores": {}}'
+    followup_prompt, followup_config = calls[1]
+    assert followup_prompt.startswith("Evaluate this.")
+    assert "only the missing fields: scores.clarity." in followup_prompt
+    assert followup_config["response_schema"]["required"] == ["scores"]
+
+
+def test_failed_calls_are_not_followed_up(model):
+    calls, answers = model
+    answers.append("Error: quota exceeded")
+    assert asyncio.run(utils.generate_json_from_gemini_async("Evaluate this.", SCHEMA)) == (None, "Error: quota exceeded")
+    assert len(calls) == 1
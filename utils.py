@@ -1,36 +1,458 @@
-import streamlit as st
-import google.generativeai as genai
+import asyncio
+import json
+import os
+import time
+from typing import Optional, Dict, Any, Awaitable, Callable, Iterator, List, Tuple
 
-GEMINI_API_KEY = st.secrets.get("GEMINI_API_KEY")
+import llm_backends
+import llm_cache
+import llm_cassette
+import llm_json
+import llm_scheduler
+import llm_resilience
+import metrics
+from llm_resilience import Deadline
+
+
+def _load_gemini_api_key() -> Optional[str]:
+    """
+    Reads GEMINI_API_KEY from the environment, falling back to Streamlit secrets. Streamlit is
+    imported only for that fallback, so processes given the key in the environment never load it.
+    """
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if api_key:
+        return api_key
+    try:
+        import streamlit as st
+        return st.secrets.get("GEMINI_API_KEY")
+    except Exception:
+        # No Streamlit or no secrets.toml (e.g. headless or offline runs)
+        return None
+
+
+GEMINI_API_KEY = _load_gemini_api_key()
+# Ask the backend for schema-constrained JSON (response_mime_type/response_schema) where agents expect JSON.
+LLM_JSON_MODE = os.environ.get("LLM_JSON_MODE", "1").lower() not in ("0", "false", "no")
 
 if not GEMINI_API_KEY:
     print("Error: GEMINI_API_KEY not found in Streamlit secrets. Please add it to .streamlit/secrets.toml.")
     # You might want to raise an exception here or handle it appropriately
 else:
+    # The SDK itself is imported (and configured with the key) when the first Gemini client is built.
+    llm_backends.set_gemini_api_key(GEMINI_API_KEY)
+
+def _cache_lookup(backend: str, model_name: Optional[str], prompt_text: str,
+                  generation_config: Optional[Dict[str, Any]], use_cache: bool
+                  ) -> Tuple[Optional[llm_cache.ResponseCache], str, Optional[str]]:
+    """
+    Returns (cache, request_key, cached_response) for a request.
+
+    cache is None when caching is disabled; request_key is always computed because the
+    scheduler also uses it to coalesce identical in-flight prompts.
+    """
+    request_key = llm_cache.make_cache_key(
+        backend, model_name or llm_backends.DEFAULT_MODEL, prompt_text, generation_config)
+    # A cassette must see every call, so the response cache is bypassed while one is active.
+    cache = llm_cache.get_response_cache() if use_cache and llm_cassette.get_cassette() is None else None
+    if cache is None:
+        return None, request_key, None
+    cached = cache.get(request_key)
+    metrics.record_cache_lookup("llm_response", cached is not None)
+    return cache, request_key, cached
+
+
+def _unavailable(backend: str) -> Optional[str]:
+    """
+    The "Error: ..." response for a call that cannot be made at all, or None.
+
+    That is a cassette that was requested for replay but cannot be used (never fall back to the
+    live backend), or a Gemini call without a key (replaying a cassette needs none).
+    """
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        print("Gemini API Key configured successfully.")
-    except Exception as e:
-        print(f"Error configuring Gemini API Key: {e}")
+        cassette = llm_cassette.get_cassette()
+    except llm_cassette.CassetteUnavailable as e:
+        return f"Error: {e}"
+    if backend != llm_backends.GeminiBackend.name or GEMINI_API_KEY:
+        return None
+    if cassette is None or cassette.mode != "replay":
+        return "Error: Gemini API key not configured."
+    return None
+
+
+def _get_client(backend: str, model_name: str, generation_config: Optional[Dict[str, Any]]) -> llm_backends.LLMBackend:
+    """The backend's client, wrapped to record to or replay from the cassette when LLM_CASSETTE_MODE is set."""
+    cassette = llm_cassette.get_cassette()
+    if cassette is None:
+        return llm_backends.get_client(backend, model_name, generation_config)
+    return cassette.wrap(backend, model_name, generation_config,
+                         lambda: llm_backends.get_client(backend, model_name, generation_config))
 
-def generate_text_from_gemini(prompt_text: str) -> str:
+
+def _timeout(deadline: Optional[Deadline]) -> Optional[float]:
+    """Per-request timeout to hand to the backend: whatever is left of the deadline."""
+    return deadline.remaining() if deadline is not None else None
+
+
+def _guarded_call(backend: str, model_name: str, call: Callable[[], str], deadline: Optional[Deadline]) -> str:
     """
-    Generates text using the Gemini API based on the provided prompt.
+    Runs one backend attempt with deadline and hedging, feeding the model's breaker and latency stats.
+
+    The breaker's half-open trial is held only for the duration of this call.
+    """
+    breaker = llm_resilience.get_breaker(backend, model_name)
+    with breaker.attempt():
+        started = time.monotonic()
+        try:
+            result = llm_resilience.call_with_hedging(
+                call, deadline, llm_resilience.hedge_delay(backend, model_name),
+                on_hedge=lambda: llm_scheduler.get_scheduler().request_bucket.debit(1),
+                backend=backend)
+        except llm_resilience.DeadlineExceeded:
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+    llm_resilience.get_latency_tracker(backend, model_name).record(time.monotonic() - started)
+    return result
+
+
+async def _guarded_call_async(backend: str, model_name: str, call: Callable[[], Awaitable[str]],
+                              deadline: Optional[Deadline]) -> str:
+    """Async variant of _guarded_call."""
+    breaker = llm_resilience.get_breaker(backend, model_name)
+    with breaker.attempt():
+        started = time.monotonic()
+        try:
+            result = await llm_resilience.call_with_hedging_async(
+                call, deadline, llm_resilience.hedge_delay(backend, model_name),
+                on_hedge=lambda: llm_scheduler.get_scheduler().request_bucket.debit(1))
+        except llm_resilience.DeadlineExceeded:
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+    llm_resilience.get_latency_tracker(backend, model_name).record(time.monotonic() - started)
+    return result
+
+
+def generate_text_from_gemini(prompt_text: str, model_name: Optional[str] = None,
+                              backend: Optional[str] = None,
+                              generation_config: Optional[Dict[str, Any]] = None,
+                              use_cache: bool = True,
+                              deadline: Optional[Deadline] = None) -> str:
+    """
+    Generates text using the configured LLM backend (Gemini by default) based on the provided prompt.
 
     Args:
-        prompt_text: The prompt to send to the Gemini API.
+        prompt_text: The prompt to send to the model.
+        model_name: Model to use. Defaults to llm_backends.DEFAULT_MODEL.
+        backend: Registered backend name ("gemini", "stub", ...). Defaults to llm_backends.DEFAULT_BACKEND.
+        generation_config: Optional generation parameters (temperature, etc.).
+        use_cache: Whether to serve from / store into the response cache. Error responses are never cached.
+        deadline: Optional llm_resilience.Deadline; the call (including rate-limit waits,
+            retries and hedged requests) is abandoned once it passes.
 
     Returns:
-        The text generated by the Gemini API, or an error message.
+        The generated text, or an error message starting with "Error:".
     """
-    if not GEMINI_API_KEY:
-        return "Error: Gemini API key not configured."
+    backend = backend or llm_backends.DEFAULT_BACKEND
+    unavailable = _unavailable(backend)
+    if unavailable:
+        return unavailable
 
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash') # Or your preferred model
-        response = model.generate_content(prompt_text)
-        return response.text
+        model_name = llm_resilience.select_model(backend, model_name or llm_backends.DEFAULT_MODEL)
+    except llm_resilience.CircuitOpenError as e:
+        return f"Error: {e}"
+
+    cache, cache_key, cached = _cache_lookup(backend, model_name, prompt_text, generation_config, use_cache)
+    if cached is not None:
+        return cached
+
+    try:
+        client = _get_client(backend, model_name, generation_config)
+        with metrics.span("llm", "llm_wait", backend=backend, model=model_name):
+            response_text = llm_scheduler.get_scheduler().run(
+                cache_key, prompt_text,
+                lambda: _guarded_call(backend, model_name, lambda: client.generate(prompt_text, _timeout(deadline)), deadline),
+                coalesce=use_cache, deadline=deadline)
+        _record_call(backend, model_name, prompt_text, response_text)
+        if cache is not None and response_text:
+            cache.set(cache_key, response_text)
+        return response_text
     except Exception as e:
-        print(f"Error interacting with Gemini API: {e}")
+        _record_failure(backend, model_name, e)
         return f"Error: Could not generate text from Gemini. {e}"
 
+
+async def generate_text_from_gemini_async(prompt_text: str, model_name: Optional[str] = None,
+                                          backend: Optional[str] = None,
+                                          generation_config: Optional[Dict[str, Any]] = None,
+                                          use_cache: bool = True,
+                                          deadline: Optional[Deadline] = None) -> str:
+    """
+    Async variant of generate_text_from_gemini built on the backend's native async call.
+
+    Takes the same arguments and shares the same response cache; never blocks the event loop
+    on network I/O.
+
+    Returns:
+        The generated text, or an error message starting with "Error:".
+    """
+    backend = backend or llm_backends.DEFAULT_BACKEND
+    unavailable = _unavailable(backend)
+    if unavailable:
+        return unavailable
+
+    try:
+        model_name = llm_resilience.select_model(backend, model_name or llm_backends.DEFAULT_MODEL)
+    except llm_resilience.CircuitOpenError as e:
+        return f"Error: {e}"
+
+    cache, cache_key, cached = _cache_lookup(backend, model_name, prompt_text, generation_config, use_cache)
+    if cached is not None:
+        return cached
+
+    try:
+        client = _get_client(backend, model_name, generation_config)
+        with metrics.span("llm", "llm_wait", backend=backend, model=model_name):
+            response_text = await llm_scheduler.get_scheduler().run_async(
+                cache_key, prompt_text,
+                lambda: _guarded_call_async(backend, model_name, lambda: client.generate_async(prompt_text, _timeout(deadline)), deadline),
+                coalesce=use_cache, deadline=deadline)
+        _record_call(backend, model_name, prompt_text, response_text)
+        if cache is not None and response_text:
+            cache.set(cache_key, response_text)
+        return response_text
+    except Exception as e:
+        _record_failure(backend, model_name, e)
+        return f"Error: Could not generate text from Gemini. {e}"
+
+
+def stream_text_from_gemini(prompt_text: str, model_name: Optional[str] = None,
+                            backend: Optional[str] = None,
+                            generation_config: Optional[Dict[str, Any]] = None,
+                            use_cache: bool = True,
+                            deadline: Optional[Deadline] = None) -> Iterator[str]:
+    """
+    Streaming variant of generate_text_from_gemini.
+
+    Takes the same arguments. Yields text chunks as the model produces them; a cache hit
+    is yielded as a single chunk, and the full response is cached once the stream completes.
+
+    Yields:
+        Response text chunks. If the call fails before any text arrives, a single
+        "Error: ..." chunk is yielded instead.
+    """
+    backend = backend or llm_backends.DEFAULT_BACKEND
+    unavailable = _unavailable(backend)
+    if unavailable:
+        yield unavailable
+        return
+
+    try:
+        model_name = llm_resilience.select_model(backend, model_name or llm_backends.DEFAULT_MODEL)
+    except llm_resilience.CircuitOpenError as e:
+        yield f"Error: {e}"
+        return
+
+    cache, cache_key, cached = _cache_lookup(backend, model_name, prompt_text, generation_config, use_cache)
+    if cached is not None:
+        yield cached
+        return
+
+    scheduler = llm_scheduler.get_scheduler()
+    breaker = llm_resilience.get_breaker(backend, model_name)
+    chunks = []
+    attempt = 0
+    started = time.perf_counter()
+    while True:
+        try:
+            client = _get_client(backend, model_name, generation_config)
+            scheduler.acquire(prompt_text, deadline)
+            with breaker.attempt():
+                try:
+                    for chunk in client.generate_stream(prompt_text, _timeout(deadline)):
+                        chunks.append(chunk)
+                        yield chunk
+                        if deadline is not None:
+                            deadline.check("stream completion")
+                except llm_resilience.DeadlineExceeded:
+                    raise
+                except Exception:
+                    breaker.record_failure()
+                    raise
+                breaker.record_success()
+            break
+        except Exception as e:
+            # A stream can only be retried transparently if nothing has been yielded yet.
+            delay = scheduler.backoff_delay(attempt)
+            if (not chunks and attempt < scheduler.max_retries and llm_scheduler.is_retryable(e)
+                    and (deadline is None or delay < deadline.remaining())):
+                attempt += 1
+                metrics.log_event("utils", f"Retryable error streaming from {backend} backend; retrying.",
+                                  level="warning", error=str(e), attempt=attempt, delay_seconds=round(delay, 2))
+                time.sleep(delay)
+                continue
+            _record_failure(backend, model_name, e)
+            if not chunks:
+                yield f"Error: Could not generate text from Gemini. {e}"
+            return
+
+    response_text = "".join(chunks)
+    # Includes the time the consumer spent between chunks, which is small next to the model's.
+    metrics.observe("pipeline_stage_seconds", time.perf_counter() - started,
+                    component="llm", stage="llm_stream", backend=backend, model=model_name)
+    _record_call(backend, model_name, prompt_text, response_text)
+    scheduler.record_response(response_text)
+    if cache is not None and response_text:
+        cache.set(cache_key, response_text)
+
+
+def _record_call(backend: str, model_name: str, prompt_text: str, response_text: str) -> None:
+    """Counts a completed backend call and its estimated prompt/response tokens."""
+    metrics.increment("llm_calls", backend=backend, model=model_name, outcome="ok")
+    metrics.record_tokens(backend, model_name, prompt_text, response_text)
+
+
+def _record_failure(backend: str, model_name: str, error: Exception) -> None:
+    metrics.increment("llm_calls", backend=backend, model=model_name, outcome="error")
+    metrics.log_event("utils", f"Error interacting with {backend} backend.", level="error",
+                      model=model_name, error=str(error))
+
+
+def json_generation_config(schema: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Generation config requesting JSON that follows schema, or None when LLM_JSON_MODE is off."""
+    if not LLM_JSON_MODE:
+        return None
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+
+def generate_json_from_gemini(prompt_text: str, schema: Dict[str, Any], model_name: Optional[str] = None,
+                              backend: Optional[str] = None, use_cache: bool = True,
+                              deadline: Optional[Deadline] = None) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Generates a JSON object following schema (an OpenAPI-style subset: type/properties/required).
+
+    The request uses JSON mode when enabled. The answer is read with llm_json.extract_json_object,
+    and if required fields are still missing the model is asked once more for those fields
+    only, and the answers are merged.
+
+    Returns:
+        (parsed object or None, raw text of the first response). The raw text starts with
+        "Error:" when the call itself failed.
+    """
+    response_text = generate_text_from_gemini(prompt_text, model_name, backend, json_generation_config(schema),
+                                              use_cache, deadline)
+    return complete_json_response(prompt_text, response_text, schema, model_name, backend, use_cache, deadline), response_text
+
+
+async def generate_json_from_gemini_async(prompt_text: str, schema: Dict[str, Any], model_name: Optional[str] = None,
+                                          backend: Optional[str] = None, use_cache: bool = True,
+                                          deadline: Optional[Deadline] = None) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Async variant of generate_json_from_gemini. The answer is parsed (and, rarely, completed by
+    a follow-up call) with complete_json_response in a worker thread.
+    """
+    response_text = await generate_text_from_gemini_async(prompt_text, model_name, backend,
+                                                          json_generation_config(schema), use_cache, deadline)
+    data = await asyncio.to_thread(complete_json_response, prompt_text, response_text, schema, model_name, backend,
+                                   use_cache, deadline)
+    return data, response_text
+
+
+def complete_json_response(prompt_text: str, response_text: str, schema: Dict[str, Any],
+                           model_name: Optional[str] = None, backend: Optional[str] = None,
+                           use_cache: bool = True, deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+    """
+    Parses an already received response (e.g. a completed stream) like generate_json_from_gemini,
+    asking only for missing required fields.
+    """
+    data, followup = _json_followup(prompt_text, response_text, schema)
+    if followup is not None:
+        followup_prompt, followup_schema = followup
+        data = _merge_followup(data, generate_text_from_gemini(
+            followup_prompt, model_name, backend, json_generation_config(followup_schema), use_cache, deadline))
+    return data
+
+
+def _json_followup(prompt_text: str, response_text: str, schema: Dict[str, Any]
+                   ) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[str, Dict[str, Any]]]]:
+    """
+    Returns (parsed data, (follow-up prompt, follow-up schema) or None).
+
+    No follow-up is made for failed calls: re-asking would only repeat the error.
+    """
+    if not response_text or response_text.startswith("Error:"):
+        return None, None
+    data = llm_json.extract_json_object(response_text)
+    missing = llm_json.missing_fields(data, schema)
+    if not missing:
+        return data, None
+    metrics.log_event("utils", "JSON response incomplete; asking for the missing fields only.",
+                      level="warning", missing=missing)
+    metrics.increment("llm_json_followups")
+    followup_schema = _schema_subset(schema, missing)
+    followup_prompt = f"""{prompt_text}
+
+Your previous answer was incomplete. It already contained:
+{json.dumps(data or {})}
+
+Respond with a JSON object containing only the missing fields: {", ".join(missing)}.
+JSON Output:"""
+    return data, (followup_prompt, followup_schema)
+
+
+def _merge_followup(data: Optional[Dict[str, Any]], followup_text: str) -> Optional[Dict[str, Any]]:
+    extra = None if not followup_text or followup_text.startswith("Error:") else llm_json.extract_json_object(followup_text)
+    if not extra:
+        return data
+    return llm_json.merge_json(data or {}, extra)
+
+
+def _schema_subset(schema: Dict[str, Any], paths: List[str]) -> Dict[str, Any]:
+    """Schema restricted to the given dotted field paths."""
+    nested: Dict[str, List[str]] = {}
+    for path in paths:
+        name, _, rest = path.partition(".")
+        nested.setdefault(name, [])
+        if rest:
+            nested[name].append(rest)
+    properties = {}
+    for name, rest in nested.items():
+        field_schema = schema.get("properties", {}).get(name, {})
+        properties[name] = _schema_subset(field_schema, rest) if rest else field_schema
+    return {"type": "object", "properties": properties, "required": list(nested)}
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Returns hit/miss counters for the LLM response cache (empty if caching is disabled)."""
+    cache = llm_cache.get_response_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def scheduler_stats() -> Dict[str, Any]:
+    """Returns LLM scheduler metrics: request/retry/coalescing counters, queue depth and wait times."""
+    return llm_scheduler.get_scheduler().stats()
+
+
+def resilience_stats() -> Dict[str, Any]:
+    """Returns circuit breaker state and p50/p95 latency per backend/model."""
+    return llm_resilience.stats()
+
+
+def cassette_stats() -> Dict[str, Any]:
+    """Returns recorded/replayed/missed call counts for the LLM cassette (empty when none is active)."""
+    try:
+        cassette = llm_cassette.get_cassette()
+    except llm_cassette.CassetteUnavailable as e:
+        return {"error": str(e)}
+    return cassette.stats() if cassette is not None else {}
+
+
+metrics.register_collector("llm_cache", cache_stats)
+metrics.register_collector("llm_scheduler", scheduler_stats)
+metrics.register_collector("llm_resilience", resilience_stats)
+metrics.register_collector("llm_cassette", cassette_stats)